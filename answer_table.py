@@ -0,0 +1,189 @@
+"""
+Answer Table - 오프라인으로 미리 계산한 자주 들어오는 주문 문장의 답 (precompute.py가 생성)
+- 정규화한 문장 → LLM 분석 결과(intent) + 추천 메뉴 ID + 세트 조합 ID
+- 시작 시 한 번 읽어 두고 recommend_menus가 규칙 기반 다음, 캐시/LLM 전에 조회 → LLM 없이 즉시 응답
+- 만들 때의 메뉴 fingerprint와 현재 메뉴가 다르면 조회하지 않음 (메뉴가 바뀌면 다시 생성)
+
+KIOSK_ANSWER_TABLE 환경변수: 표 파일 경로 (기본 results/answer_table.json, 파일이 없거나 off면 빈 표)
+"""
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from intent_cache import normalize_text
+from menu_index import MenuIndex
+
+DEFAULT_PATH = os.path.join("results", "answer_table.json")
+FORMAT_VERSION = 1
+
+
+class AnswerTable:
+    """
+    미리 계산한 답 조회 표 (읽기 전용)
+
+    Args:
+        entries: 정규화 문장 → {"intent", "menu_ids", "combo", "count"}
+        menu_version: 표를 만들 때의 메뉴 fingerprint
+        meta: 생성 정보 (생성 시각, 입력 문장 수 등)
+    """
+
+    def __init__(
+        self,
+        entries: Optional[Dict[str, Dict[str, Any]]] = None,
+        menu_version: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None
+    ):
+        self.entries = entries or {}
+        self.menu_version = menu_version
+        self.meta = meta or {}
+        self.path: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, text: str) -> bool:
+        return normalize_text(text) in self.entries
+
+    @classmethod
+    def load(cls, path: str) -> "AnswerTable":
+        """파일에서 읽기 (없거나 읽을 수 없으면 빈 표)"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            table = cls()
+        except (OSError, ValueError) as e:
+            print(f"응답 표를 읽을 수 없음 ({path}): {e}")
+            table = cls()
+        else:
+            if data.get("format") != FORMAT_VERSION:
+                print(f"응답 표 형식이 다름 ({path}): {data.get('format')}")
+                table = cls()
+            else:
+                table = cls(data.get("entries") or {}, data.get("menu_version"), data.get("meta") or {})
+        table.path = path
+        return table
+
+    def save(self, path: str):
+        """파일로 저장 (원자적 교체, 공백 없는 JSON)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        payload = {
+            "format": FORMAT_VERSION,
+            "menu_version": self.menu_version,
+            "meta": self.meta,
+            "entries": self.entries
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self.path = path
+
+    def _entry(self, user_input: str, index: MenuIndex) -> Optional[Dict[str, Any]]:
+        if not self.entries:
+            return None
+        if index.version != self.menu_version:
+            with self._lock:
+                self._stats["stale"] += 1
+            return None
+        return self.entries.get(normalize_text(user_input))
+
+    def lookup(self, user_input: str, index: MenuIndex) -> Optional[Tuple[Dict, List[Dict]]]:
+        """
+        미리 계산한 (intent, recommendations) 조회
+
+        Args:
+            user_input: 사용자 입력 (정규화해서 조회)
+            index: 현재 메뉴 인덱스 (버전 확인 + 메뉴 ID → 메뉴)
+
+        Returns:
+            (intent, recommendations) 또는 None (intent["source"]는 "precomputed")
+        """
+        entry = self._entry(user_input, index)
+        recommendations = [index.get(menu_id) for menu_id in entry["menu_ids"]] if entry else []
+        if not entry or not recommendations or None in recommendations:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            self._stats["hits"] += 1
+        intent = dict(entry["intent"], description=user_input, source="precomputed")
+        intent["allergies"] = list(intent.get("allergies") or [])
+        return intent, recommendations
+
+    def combo(self, user_input: str, index: MenuIndex) -> Optional[Dict]:
+        """미리 계산한 세트 조합 (없거나 메뉴가 바뀌었으면 None)"""
+        entry = self._entry(user_input, index)
+        combo = entry.get("combo") if entry else None
+        if not combo:
+            return None
+        parts = {part: index.get(combo[part]) for part in ("main", "side", "drink")}
+        if None in parts.values():
+            return None
+        return dict(parts, total_price=sum(menu["price"] for menu in parts.values()), score=combo.get("score"))
+
+    def coverage(self, texts: Iterable[str]) -> Dict[str, Any]:
+        """문장 목록 중 표로 바로 답할 수 있는 비율"""
+        total = covered = 0
+        for text in texts:
+            total += 1
+            covered += normalize_text(text) in self.entries
+        return {"utterances": total, "covered": covered, "rate": covered / total if total else 0.0}
+
+    def stats(self) -> Dict[str, Any]:
+        """표 크기와 조회 통계"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = len(self.entries)
+        stats["menu_version"] = self.menu_version
+        stats["path"] = self.path
+        stats["created"] = self.meta.get("created")
+        return stats
+
+
+def build_entry(intent: Dict, recommendations: List[Dict], combo: Optional[Dict], count: int) -> Dict[str, Any]:
+    """표 항목 (입력 문장/응답 경로는 조회 때 채우므로 저장하지 않음)"""
+    stored = {key: value for key, value in intent.items() if key not in ("description", "source")}
+    return {
+        "intent": stored,
+        "menu_ids": [menu["menu_id"] for menu in recommendations],
+        "combo": {
+            "main": combo["main"]["menu_id"],
+            "side": combo["side"]["menu_id"],
+            "drink": combo["drink"]["menu_id"],
+            "score": combo.get("score")
+        } if combo else None,
+        "count": count
+    }
+
+
+# 싱글톤 인스턴스 관리
+_table: Optional[AnswerTable] = None
+_table_lock = threading.Lock()
+
+def get_answer_table(path: Optional[str] = None) -> AnswerTable:
+    """
+    AnswerTable 싱글톤 인스턴스 반환 (최초 호출 때 파일에서 읽음)
+
+    Args:
+        path: 표 파일 경로 (None이면 KIOSK_ANSWER_TABLE 환경변수)
+
+    Returns:
+        AnswerTable 인스턴스 (파일이 없거나 사용 안 함이면 빈 표)
+    """
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                path = path or os.environ.get("KIOSK_ANSWER_TABLE", DEFAULT_PATH)
+                off = path.strip().lower() in ("", "off", "0", "none")
+                _table = AnswerTable() if off else AnswerTable.load(path)
+    return _table
+
@@ -8,12 +8,22 @@ AI BURGER HOUSE - Streamlit 앱 (수정판)
 - 타입 힌팅 추가
 """
 import streamlit as st
-from streamlit_mic_recorder import mic_recorder
-from voice_utils import transcribe_audio, text_to_speech, is_api_error, is_valid_transcription
+from voice_utils import transcribe_audio, text_to_speech, audio_mime_type, is_api_error, is_valid_transcription
 from menu_data import get_menu_data, get_categories
-from menu_recommender import recommend_menus, suggest_combo
 from llm_engine import get_engine
+from intent_cache import get_intent_cache
+from prompt_builder import get_prompt_builder
+from stt_backends import get_stt_service
+from tts_service import get_tts_service
+from pipeline import PipelineTrace, get_pipeline
+from startup import get_startup
+from kiosk_client import KioskAPIClient
+import metrics
 from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Future
+from contextlib import closing
+import os
+import threading
 import time
 
 # ===== Streamlit 설정 =====
@@ -24,32 +34,75 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# KIOSK_API_URL이 있으면 분석/음성 처리를 kiosk_api 서버에 맡기는 얇은 클라이언트로 동작
+API_URL = os.environ.get("KIOSK_API_URL")
+
+# KIOSK_METRICS_FILE이 있으면 단계별 지표를 주기적으로 파일에 기록 (프로세스당 한 번)
+metrics.start_file_exporter()
+
 # ===== 캐싱된 데이터 로드 함수 =====
-@st.cache_data(ttl=3600)  # 1시간 캐싱
+# 메뉴는 menu_store가 버전별 스냅샷으로 보관하고 메뉴 파일이 바뀌면 교체하므로
+# TTL 캐시 없이 rerun마다 현재 스냅샷을 조회 (가격 변경이 다음 rerun에 바로 반영)
 def load_menu_data() -> List[Dict]:
-    """메뉴 데이터를 캐싱하여 로드"""
+    """현재 메뉴 데이터 로드"""
     return get_menu_data()
 
-@st.cache_data(ttl=3600)
 def load_categories() -> Dict[str, List[Dict]]:
-    """카테고리 데이터를 캐싱하여 로드"""
+    """현재 메뉴의 카테고리 데이터 로드"""
     return get_categories()
 
 @st.cache_resource
 def load_engine():
-    """LLM 엔진을 캐싱하여 로드 (리소스 캐싱)"""
+    """LLM 엔진 풀을 캐싱하여 로드 (KIOSK_OLLAMA_URLS로 여러 서버 지정 가능)"""
     return get_engine(
         "ollama",
         model="gemma2:latest",
         base_url="http://localhost:11434"
     )
 
+@st.cache_resource
+def load_pipeline(_engine):
+    """단계 병렬 실행 파이프라인을 캐싱하여 로드"""
+    return get_pipeline(None, _engine)
+
+@st.cache_resource
+def load_api_client():
+    """kiosk_api 클라이언트를 캐싱하여 로드 (keep-alive 연결 재사용)"""
+    return KioskAPIClient(API_URL)
+
+@st.cache_resource
+def load_stt_service():
+    """STT 서비스를 캐싱하여 로드 (로컬 모델은 startup이 LLM 준비 뒤에 로드)"""
+    return get_stt_service()
+
+@st.cache_resource
+def load_tts_service():
+    """TTS 서비스를 캐싱하여 로드 (고정 안내 문구는 startup이 LLM 준비 뒤에 합성)"""
+    return get_tts_service()
+
+@st.cache_resource
+def load_startup(_engine):
+    """모델 로드/프롬프트 캐시 적재/음성 엔진 준비를 백그라운드에서 시작"""
+    return get_startup().start(_engine, get_menu_data())
+
+def render_mic_recorder():
+    """음성 입력 위젯 (마이크 컴포넌트는 처음 그릴 때 import - 첫 화면을 먼저 표시)"""
+    from streamlit_mic_recorder import mic_recorder
+    return mic_recorder(
+        start_prompt="🎤 말하기 (Click)",
+        stop_prompt="⏹️ 완료 (Click)",
+        key='recorder',
+        format="wav",  # 헤더에서 샘플레이트/채널을 읽어 전처리 (webm은 디코더 필요)
+        use_container_width=True
+    )
+
 # ===== 세션 상태 초기화 =====
 def init_session_state():
     """세션 상태 초기화 함수"""
     defaults = {
         "last_intent": None,
         "last_recommendations": [],
+        "last_combo": None,  # 추천이 바뀔 때만 계산 (계산 중이면 Future)
         "engine": None,
         "audio_processed": False,
         "ai_response_text": "",
@@ -57,7 +110,13 @@ def init_session_state():
         "last_input": "",
         "processing_lock": False,  # 동시성 제어용 잠금
         "last_input_source": None,  # 'voice' 또는 'text'
-        "input_timestamp": 0  # 입력 시간 추적
+        "input_timestamp": 0,  # 입력 시간 추적
+        "response_cancel_event": None,  # 스트리밍 응답 취소용 이벤트
+        "pitch_stream": None,  # 분석 직후 시작된 권유 문장 스트림
+        "pipeline_trace": None,  # 현재 요청의 단계별 시간 기록
+        "last_request_id": None,  # 이벤트 로그의 요청 ID (조합 수락 기록용)
+        "combo_accepted": False,
+        "tts_audio": None  # (텍스트, 문장별 오디오 목록) - 같은 답변이면 rerun 시 재합성하지 않음
     }
     for key, value in defaults.items():
         if key not in st.session_state:
@@ -78,15 +137,49 @@ st.caption("마이크 버튼을 누르고 말씀하시거나, 텍스트로 입
 with st.sidebar:
     st.markdown("### ⚙️ 시스템 설정")
 
-    # 캐싱된 엔진 로드
-    engine = load_engine()
-    st.session_state.engine = engine
-
-    if engine and engine.is_available:
-        st.success("✅ 시스템 연결됨 (Ollama)")
+    if API_URL:
+        # 원격 API 모드: 엔진/캐시/음성 처리는 서버가 담당
+        engine = None
+        pipeline = load_api_client()
+        speech_to_text = pipeline.transcribe_audio
+        synthesize_speech = pipeline.text_to_speech
+        llm_ready = pipeline.is_available
+        if llm_ready:
+            st.success(f"✅ 시스템 연결됨 (API {API_URL})")
+        else:
+            st.warning("⚠️ AI 엔진 미연결")
+            st.info("API 서버 상태를 확인해 주세요.")
     else:
-        st.warning("⚠️ AI 엔진 미연결")
-        st.info("서버 상태를 확인해 주세요.")
+        # 캐싱된 엔진 로드
+        engine = load_engine()
+        pipeline = load_pipeline(engine)
+        speech_to_text = transcribe_audio
+        synthesize_speech = text_to_speech
+        llm_ready = bool(engine and engine.is_available)
+        stt_service = load_stt_service()
+        tts_service = load_tts_service()
+        startup = load_startup(engine)
+
+        if not startup.ready.is_set():
+            # 헬스 체크/모델 로드 중에도 화면과 규칙 기반 추천은 바로 사용 가능
+            st.info("🚀 AI 엔진 준비 중... (간단한 주문은 바로 가능합니다)")
+        elif llm_ready:
+            endpoint_stats = engine.stats()
+            healthy = sum(1 for e in endpoint_stats if e["state"] != "open")
+            st.success(f"✅ 시스템 연결됨 (Ollama {healthy}/{len(endpoint_stats)}대)")
+            st.caption(f"🚀 준비 시간: {startup.time_to_ready_ms / 1000:.1f}초")
+        else:
+            st.warning("⚠️ AI 엔진 미연결")
+            st.info("서버 상태를 확인해 주세요.")
+        st.caption(f"🎤 음성 인식 엔진: {' → '.join(b.name for b in stt_service.backends)}")
+        audio_stats = stt_service.preprocess_stats()
+        if audio_stats.get("calls"):
+            st.caption(
+                f"✂️ 음성 전처리: 무음 {audio_stats['saved_seconds']:.1f}초 제거 "
+                f"({audio_stats['saved_ratio'] * 100:.0f}%)"
+            )
+        st.caption(f"🔊 음성 합성 엔진: {' → '.join(b.name for b in tts_service.backends)}")
+    st.session_state.engine = engine
 
     st.markdown("---")
     st.markdown("#### 📊 메뉴 현황")
@@ -94,6 +187,28 @@ with st.sidebar:
     for cat, menus in categories.items():
         st.write(f"• {cat}: {len(menus)}종")
 
+    if not API_URL:
+        cache_stats = get_intent_cache().stats()
+        st.markdown("#### ⚡ 분석 캐시")
+        st.write(f"적중률: **{cache_stats['hit_rate']:.0%}** · 절약: {cache_stats['saved_llm_ms'] / 1000:.1f}초")
+        prompt_stats = get_prompt_builder().stats()
+        if prompt_stats["prompts"]:
+            st.write(f"프롬프트 평균: 약 {prompt_stats['avg_token_estimate']:.0f}토큰 (메뉴 {prompt_stats['avg_menu_items']:.0f}개)")
+        tts_stats = tts_service.cache.stats()
+        st.write(f"음성 캐시 적중률: **{tts_stats['hit_rate']:.0%}**")
+        if engine:
+            queue_stats = engine.scheduler.stats()
+            st.write(
+                f"LLM 대기열: {queue_stats['queue_depth']}건 (동시 {queue_stats['active']}/{queue_stats['max_concurrency']}) · "
+                f"평균 대기 {queue_stats['avg_wait_ms'] / 1000:.1f}초 · 거절 {queue_stats['shed_deadline'] + queue_stats['rejected_full']}건"
+            )
+    pipeline_stats = pipeline.stats()
+    if pipeline_stats["requests"]:
+        st.write(
+            f"응답 완료(p50): {pipeline_stats['e2e_p50_ms'] / 1000:.1f}초 · "
+            f"병렬 처리로 단축: {pipeline_stats['overlap_saved_p50_ms'] / 1000:.1f}초"
+        )
+
     st.markdown("---")
     st.markdown("#### 💡 Usage Tip")
     st.markdown("""
@@ -127,32 +242,41 @@ def release_processing_lock():
     """처리 잠금 해제"""
     st.session_state.processing_lock = False
 
-def process_user_input(user_input: str, source: str) -> Tuple[Optional[Dict], List[Dict]]:
+def cancel_response_stream():
+    """진행 중인 스트리밍 응답 취소 (새 입력/초기화/rerun 시)"""
+    cancel_event = st.session_state.response_cancel_event
+    if cancel_event is not None:
+        cancel_event.set()
+    st.session_state.response_cancel_event = None
+    st.session_state.pitch_stream = None
+
+def process_user_input(user_input: str, source: str, trace: PipelineTrace) -> Tuple[Optional[Dict], List[Dict], Optional[Future]]:
     """
     사용자 입력 처리 (통합 함수)
+    분석이 끝나면 조합 계산은 파이프라인 워커에서 진행되고 Future로 반환된다.
 
     Args:
         user_input: 사용자 입력 텍스트
         source: 입력 소스 ('voice' 또는 'text')
+        trace: 단계별 시간 기록
 
     Returns:
-        (intent, recommendations) 튜플
+        (intent, recommendations, 조합 Future) 튜플
     """
     if not user_input or not user_input.strip():
-        return None, []
+        return None, [], None
 
     if not acquire_processing_lock(source):
         st.warning("⏳ 이전 요청을 처리 중입니다. 잠시 후 다시 시도해주세요.")
-        return None, []
+        return None, [], None
 
     try:
         with st.spinner("🤖 AI가 주문을 분석하고 있습니다..."):
-            intent, recommendations = recommend_menus(
-                menu_data, 
-                user_input, 
-                st.session_state.engine
-            )
-        return intent, recommendations
+            intent, recommendations, combo_future = pipeline.analyze(user_input, trace)
+        if intent.get("source") == "fallback" and not recommendations:
+            # API 모드에서 서버에 연결하지 못한 경우 (로컬 대체 응답은 항상 추천 메뉴가 있음)
+            st.error("⚠️ 주문 서버에 연결할 수 없습니다. 잠시 후 다시 시도해주세요.")
+        return intent, recommendations, combo_future
     finally:
         release_processing_lock()
 
@@ -165,12 +289,7 @@ with col1:
 
     # 1. 음성 입력 위젯
     st.write("음성으로 입력:")
-    audio_bytes = mic_recorder(
-        start_prompt="🎤 말하기 (Click)",
-        stop_prompt="⏹️ 완료 (Click)",
-        key='recorder',
-        use_container_width=True
-    )
+    audio_bytes = render_mic_recorder()
     # st.write("DEBUG:", audio_bytes)
     st.markdown("---")
 
@@ -198,14 +317,16 @@ with col1:
     # --- 입력 처리 로직 (동시성 제어 적용) ---
     final_user_input = None
     input_source = None
+    trace = PipelineTrace()
 
     # A) 음성 입력 감지 (우선순위 높음)
     if audio_bytes and not st.session_state.audio_processed:
-        with st.spinner("🎤 음성을 텍스트로 변환 중..."):
-            transcribed_text = transcribe_audio(audio_bytes)
+        with st.spinner("🎤 음성을 텍스트로 변환 중..."), trace.stage("stt"):
+            transcribed_text = speech_to_text(audio_bytes)
 
         if transcribed_text and transcribed_text != "API_ERROR":
             final_user_input = transcribed_text
+            input_source = "voice"
             st.session_state.audio_processed = True
             st.success(f'✅ 인식된 음성: "{final_user_input}"')
         elif transcribed_text == "API_ERROR":
@@ -213,6 +334,7 @@ with col1:
         else:
             # 🔽 여기 추가: 인식이 안 돼도 일단 더미 텍스트로 분석까지 흘려보기
             final_user_input = "매운 버거 추천해줘"
+            input_source = "voice"
             st.warning("음성이 잘 인식되지 않아 예시 문장으로 테스트합니다.")
 
     # B) 텍스트 입력 감지 (버튼 클릭 시, 음성 처리 중이 아닐 때만)
@@ -223,22 +345,40 @@ with col1:
 
     # C) 공통 분석 실행
     if final_user_input and input_source:
-        intent, recommendations = process_user_input(final_user_input, input_source)
+        intent, recommendations, combo_future = process_user_input(final_user_input, input_source, trace)
 
         if intent is not None:
             st.session_state.last_intent = intent
             st.session_state.last_recommendations = recommendations
+            st.session_state.last_combo = combo_future  # 카드 렌더링 중에 계산 완료
             st.session_state.last_input = final_user_input
             st.session_state.ai_response_text = ""  # 새로운 입력이므로 응답 초기화
+            st.session_state.pipeline_trace = trace
+            st.session_state.last_request_id = trace.request_id
+            st.session_state.combo_accepted = False
+            cancel_response_stream()
+
+            # 권유 문장 생성을 바로 시작 (카드/조합 렌더링과 겹쳐 진행)
+            if llm_ready:
+                cancel_event = threading.Event()
+                st.session_state.response_cancel_event = cancel_event
+                st.session_state.pitch_stream = pipeline.start_pitch(
+                    final_user_input, intent, recommendations, trace, cancel_event=cancel_event
+                )
 
     # 초기화 로직
     if reset_clicked:
         st.session_state.last_intent = None
         st.session_state.last_recommendations = []
+        st.session_state.last_combo = None
         st.session_state.last_input = ""
         st.session_state.audio_processed = False
         st.session_state.ai_response_text = ""
         st.session_state.processing_lock = False
+        st.session_state.pipeline_trace = None
+        st.session_state.last_request_id = None
+        st.session_state.combo_accepted = False
+        cancel_response_stream()
         st.rerun()
 
 # ===== 우측: 결과 섹션 =====
@@ -276,7 +416,10 @@ with col2:
                 col_i3.caption(f"🌶️ 맵기 {menu.get('spicy')}/3")
 
         # 3. 조합 제안 (세트 메뉴)
-        combo = suggest_combo(recs, menu_data, budget=intent.get("budget") if intent else None)
+        combo = st.session_state.last_combo
+        if isinstance(combo, Future):
+            combo = combo.result()
+            st.session_state.last_combo = combo
         if combo:
             st.markdown("---")
             st.markdown("#### 🍽️ 꿀조합 제안")
@@ -291,43 +434,77 @@ with col2:
                 st.markdown("**🥤 음료**")
                 st.write(combo['drink']['name'])
             st.success(f"💰 총 주문 금액: {combo['total_price']:,}원")
+            if st.button("🛒 이 조합으로 주문하기", use_container_width=True, disabled=st.session_state.combo_accepted):
+                pipeline.accept_combo(st.session_state.last_request_id, combo)
+                st.session_state.combo_accepted = True
+            if st.session_state.combo_accepted:
+                st.info("✅ 주문이 접수되었습니다.")
 
         st.markdown("---")
 
         # 4. LLM 응답 및 TTS (음성 안내)
-        if st.session_state.engine and st.session_state.engine.is_available:
-            # 응답 생성 (한 번만 실행)
+        if llm_ready:
+            response_placeholder = st.empty()
+
+            # 응답 생성 (한 번만 실행, 토큰 단위 스트리밍 렌더링)
             if not st.session_state.ai_response_text:
-                with st.spinner("💬 답변 생성 중..."):
-                    menu_names = ", ".join([m['name'] for m in recs])
-                    response_prompt = f"""상황: 키오스크가 손님에게 메뉴를 추천함.
-손님요청: "{user_input_display}"
-추천메뉴: {menu_names}
-
-지시: 추천 메뉴 중 하나를 골라 왜 좋은지 1문장으로 자연스럽게 권유해주세요.
-(주의: JSON 형식 사용 금지, 일반 텍스트만 응답)"""
-
-                    try:
-                        response_text = st.session_state.engine.generate_response(
-                            response_prompt, 
-                            json_mode=False
-                        )
-                        st.session_state.ai_response_text = response_text if response_text else "추천 드린 메뉴를 선택해 주세요!"
-                    except Exception as e:
-                        st.error(f"❌ 답변 생성 오류: {e}")
-                        st.session_state.ai_response_text = "죄송합니다. 오류가 발생했습니다."
+                # 분석 직후 시작된 스트림을 이어받고, 없으면(rerun으로 끊김) 새로 시작
+                stream = st.session_state.pitch_stream
+                if stream is None:
+                    cancel_response_stream()
+                    cancel_event = threading.Event()
+                    st.session_state.response_cancel_event = cancel_event
+                    trace = st.session_state.pipeline_trace or PipelineTrace()
+                    st.session_state.pipeline_trace = trace
+                    stream = pipeline.start_pitch(user_input_display, intent, recs, trace, cancel_event=cancel_event)
+                response_placeholder.caption("💬 답변 생성 중...")
+
+                streamed_text = ""
+                try:
+                    # rerun으로 스크립트가 중단되면 closing()이 생성을 중단시킴
+                    with closing(stream):
+                        for token in stream:
+                            streamed_text += token
+                            response_placeholder.info(f"💁 **AI 매니저:** {streamed_text}▌")
+
+                    if not stream.cancel_event.is_set():
+                        streamed_text = streamed_text.strip()
+                        st.session_state.ai_response_text = streamed_text if streamed_text else "추천 드린 메뉴를 선택해 주세요!"
+                        # 첫 문장부터 스트리밍 중에 합성된 음성
+                        segments = stream.audio_segments()
+                        st.session_state.tts_audio = (st.session_state.ai_response_text, segments) if segments else None
+                except Exception as e:
+                    st.error(f"❌ 답변 생성 오류: {e}")
+                    st.session_state.ai_response_text = "죄송합니다. 오류가 발생했습니다."
+                finally:
+                    st.session_state.pitch_stream = None
+                    if st.session_state.response_cancel_event is stream.cancel_event:
+                        st.session_state.response_cancel_event = None
 
             # 텍스트 출력
             final_response = st.session_state.get("ai_response_text", "")
             if final_response:
-                st.info(f"💁 **AI 매니저:** {final_response}")
+                response_placeholder.info(f"💁 **AI 매니저:** {final_response}")
 
-                # [TTS] 음성 재생
-                audio_data = text_to_speech(final_response)
-                if audio_data:
-                    st.audio(audio_data, format="audio/mp3")
+                # [TTS] 음성 재생 (답변이 바뀔 때만 합성, 이전 답변은 캐시에서 조회)
+                cached_tts = st.session_state.tts_audio
+                if cached_tts and cached_tts[0] == final_response:
+                    audio_segments = cached_tts[1]
+                else:
+                    audio_data = synthesize_speech(final_response)
+                    audio_segments = [audio_data] if audio_data else []
+                    st.session_state.tts_audio = (final_response, audio_segments) if audio_segments else None
+                if audio_segments:
+                    for audio_data in audio_segments:
+                        st.audio(audio_data, format=audio_mime_type(audio_data))
                 else:
                     st.caption("(TTS 생성 실패)")
+
+                # 요청 하나의 단계별 시간 집계 (한 번만)
+                trace = st.session_state.pipeline_trace
+                if trace is not None:
+                    pipeline.finish(trace)
+                    st.session_state.pipeline_trace = None
     else:
         st.info("👈 왼쪽에서 음성이나 텍스트로 주문을 시작해 보세요!")
 
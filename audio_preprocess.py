@@ -0,0 +1,369 @@
+"""
+Audio Preprocess - 음성 인식 전 오디오 전처리
+1) 형식 감지: WAV(RIFF) / WebM / Ogg / MP3 / FLAC / 헤더 없는 PCM
+2) 디코딩 + 모노 변환 + 엔진 샘플레이트로 리샘플링 (WAV/PCM은 바이트 버퍼를 그대로 NumPy 뷰로 읽음)
+3) VAD: 프레임 에너지로 앞뒤 무음 제거 (말소리가 전혀 없으면 인식 호출 자체를 생략)
+4) 음량 정규화: 발화 구간 RMS를 목표 dBFS로 (피크 제한, 최대 증폭 제한)
+
+float32 버퍼 하나를 만든 뒤에는 앞뒤 자르기는 슬라이스 뷰, 음량 조절은 제자리 연산으로 처리한다.
+WebM/Ogg/MP3/FLAC 디코딩은 pydub(ffmpeg)가 있을 때만 가능하다.
+"""
+import io
+import struct
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+import metrics
+
+FRAME_MS = 20
+SILENCE_DBFS = -50.0     # 이보다 작은 프레임만 있으면 말소리 없음
+MIN_SPEECH_FRAMES = 3    # 이만큼 연속으로 임계값을 넘어야 발화 시작/끝으로 봄 (잡음 튐 무시)
+PAD_MS = 250             # 발화 앞뒤로 남길 여유 (자음 앞부분/끝 잘림 방지)
+TARGET_DBFS = -20.0
+MAX_GAIN_DB = 20.0
+PEAK_LIMIT = 0.99
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_FLOAT = 3
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class AudioDecodeError(Exception):
+    """지원하지 않거나 손상된 오디오"""
+
+
+def _is_mp3_frame(head: bytes) -> bool:
+    """MP3(MPEG Layer III) 프레임 헤더 (동기 11비트 + 유효한 버전/비트레이트/샘플레이트 인덱스)"""
+    if len(head) < 4 or head[0] != 0xFF or head[1] & 0xE0 != 0xE0:
+        return False
+    version = (head[1] >> 3) & 0x03
+    layer = (head[1] >> 1) & 0x03
+    bitrate = head[2] >> 4
+    rate = (head[2] >> 2) & 0x03
+    # 작은 음수 int16 샘플은 상위 바이트가 0xFF → 레이어 비트가 Layer I(11)이라 여기서 걸러짐
+    return version != 0x01 and layer == 0x01 and bitrate not in (0x0, 0xF) and rate != 0x03
+
+
+def detect_format(data: bytes, raw_pcm: bool = False) -> str:
+    """
+    컨테이너/코덱 감지 ("wav", "webm", "ogg", "mp3", "flac", 알 수 없으면 "pcm")
+
+    raw_pcm이면(호출자가 PCM이라고 알려 줌) 매직 바이트가 4바이트 이상인 컨테이너만 확인하고 MP3 프레임 동기는 보지 않는다.
+    (int16 -1 = FF FF처럼 작은 음수 샘플로 시작하는 PCM이 MP3 동기 비트와 겹침)
+    """
+    head = bytes(data[:12])
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav"
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    if head[:4] == b"OggS":
+        return "ogg"
+    if head[:4] == b"fLaC":
+        return "flac"
+    if head[:3] == b"ID3" or (not raw_pcm and _is_mp3_frame(head)):
+        return "mp3"
+    return "pcm"
+
+
+def pcm_to_float(raw: memoryview, sample_width: int, channels: int, is_float: bool = False) -> np.ndarray:
+    """인터리브 PCM 바이트 → 모노 float32 [-1, 1] (새 버퍼는 결과 하나만 할당)"""
+    if sample_width == 3:
+        # 24bit: 3바이트 묶음을 int32 상위 바이트로 올림 (NumPy에 24bit 정수형이 없어 한 번 복사)
+        triples = np.frombuffer(raw, dtype=np.uint8)[:len(raw) // 3 * 3].reshape(-1, 3)
+        samples = (triples[:, 0].astype(np.int32) << 8) | (triples[:, 1].astype(np.int32) << 16) | (triples[:, 2].astype(np.int32) << 24)
+        scale = 1.0 / 2147483648.0
+    else:
+        if is_float:
+            dtype, scale = (np.float32 if sample_width == 4 else np.float64), 1.0
+        else:
+            dtype, scale = {1: (np.uint8, 1.0 / 128.0), 2: (np.int16, 1.0 / 32768.0), 4: (np.int32, 1.0 / 2147483648.0)}[sample_width]
+        samples = np.frombuffer(raw, dtype=dtype, count=len(raw) // sample_width)
+    if channels > 1:
+        samples = samples[:len(samples) // channels * channels].reshape(-1, channels)
+        audio = samples.mean(axis=1, dtype=np.float32)
+    else:
+        audio = samples.astype(np.float32)
+    if sample_width == 1 and not is_float:
+        audio -= 128.0  # 8bit WAV는 부호 없는 정수
+    if scale != 1.0:
+        audio *= scale
+    return audio
+
+
+def _parse_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    """RIFF/WAVE 청크를 직접 읽어 data 청크를 복사 없이 NumPy로 해석"""
+    view = memoryview(data)
+    pos, fmt = 12, None
+    while pos + 8 <= len(data):
+        chunk_id = bytes(view[pos:pos + 4])
+        size = struct.unpack_from("<I", data, pos + 4)[0]
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            fmt_tag, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            if fmt_tag == _WAVE_FORMAT_EXTENSIBLE and size >= 26:
+                fmt_tag = struct.unpack_from("<H", data, body + 24)[0]
+            fmt = (fmt_tag, channels, sample_rate, bits // 8)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise AudioDecodeError("WAV fmt 청크 없음")
+            fmt_tag, channels, sample_rate, sample_width = fmt
+            supported = (4, 8) if fmt_tag == _WAVE_FORMAT_FLOAT else (1, 2, 3, 4) if fmt_tag == _WAVE_FORMAT_PCM else ()
+            if sample_width not in supported:
+                raise AudioDecodeError(f"지원하지 않는 WAV 형식: tag={fmt_tag}, {sample_width * 8}bit")
+            # 브라우저 녹음은 스트리밍 중 크기를 0/최댓값으로 남기기도 하므로 남은 길이로 제한
+            end = len(data) if size in (0, 0xFFFFFFFF) else min(len(data), body + size)
+            audio = pcm_to_float(view[body:end], sample_width, max(1, channels), fmt_tag == _WAVE_FORMAT_FLOAT)
+            return audio, sample_rate
+        pos = body + size + (size & 1)
+    raise AudioDecodeError("WAV data 청크 없음")
+
+
+def _decode_compressed(data: bytes, audio_format: str) -> Tuple[np.ndarray, int]:
+    """압축 오디오 디코딩 (pydub + ffmpeg)"""
+    try:
+        from pydub import AudioSegment
+    except ImportError as e:
+        raise AudioDecodeError(f"{audio_format} 디코딩에 pydub(ffmpeg)가 필요함") from e
+    try:
+        segment = AudioSegment.from_file(io.BytesIO(data), format=audio_format)
+    except Exception as e:
+        raise AudioDecodeError(f"{audio_format} 디코딩 실패: {e}") from e
+    raw = memoryview(segment.raw_data)
+    return pcm_to_float(raw, segment.sample_width, segment.channels), segment.frame_rate
+
+
+def decode(data: bytes, sample_rate: int = 16000, sample_width: int = 2, raw_pcm: bool = False) -> Tuple[np.ndarray, int, str]:
+    """
+    오디오 바이트를 모노 float32 배열로 디코딩
+
+    Args:
+        data: 오디오 바이트 (컨테이너 또는 헤더 없는 모노 PCM)
+        sample_rate / sample_width: 헤더 없는 PCM일 때의 형식
+        raw_pcm: 호출자가 헤더 없는 PCM이라고 알려 줌 (MP3 감지 생략)
+
+    Returns:
+        (샘플, 샘플레이트, 감지된 형식)
+
+    Raises:
+        AudioDecodeError: 지원하지 않거나 손상된 오디오
+    """
+    audio_format = detect_format(data, raw_pcm)
+    if audio_format == "wav":
+        samples, rate = _parse_wav(data)
+    elif audio_format == "pcm":
+        if sample_width not in (1, 2, 3, 4):
+            raise AudioDecodeError(f"지원하지 않는 PCM 샘플 크기: {sample_width}")
+        samples, rate = pcm_to_float(memoryview(data), sample_width, 1), sample_rate
+    else:
+        samples, rate = _decode_compressed(data, audio_format)
+    return samples, rate, audio_format
+
+
+def float_to_pcm16(samples: np.ndarray) -> bytes:
+    """float32 [-1, 1] → 16bit PCM 바이트 (리샘플링으로 ±1을 살짝 넘은 샘플이 반대 부호로 넘어가지 않게 잘라냄)"""
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype(np.int16).tobytes()
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """
+    샘플레이트 변환
+    정수배 다운샘플링(48k→16k 등)은 구간 평균 후 솎아내기, 그 외는 이동 평균 저역 통과 후 선형 보간
+    """
+    if from_rate == to_rate or not len(samples):
+        return samples
+    if from_rate > to_rate and from_rate % to_rate == 0:
+        factor = from_rate // to_rate
+        usable = len(samples) // factor * factor
+        return samples[:usable].reshape(-1, factor).mean(axis=1, dtype=np.float32)
+    if from_rate > to_rate:
+        width = int(round(from_rate / to_rate))
+        if width > 1:
+            samples = np.convolve(samples, np.full(width, 1.0 / width, dtype=np.float32), mode="same")
+    target_len = int(len(samples) * to_rate / from_rate)
+    positions = np.arange(target_len, dtype=np.float64) * (from_rate / to_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def frame_dbfs(samples: np.ndarray, frame: int) -> np.ndarray:
+    """프레임별 에너지(dBFS) - 프레임 분할은 reshape 뷰, 제곱합은 einsum으로 임시 배열 없이 계산"""
+    count = len(samples) // frame
+    frames = samples[:count * frame].reshape(count, frame)
+    energy = np.einsum("ij,ij->i", frames, frames) / frame
+    return 10.0 * np.log10(energy + 1e-12)
+
+
+def _first_run(voiced: np.ndarray, length: int) -> Optional[int]:
+    """voiced에서 length개 이상 연속 True가 시작되는 첫 위치"""
+    if length <= 1:
+        hits = np.flatnonzero(voiced)
+        return int(hits[0]) if len(hits) else None
+    runs = np.convolve(voiced.astype(np.int8), np.ones(length, dtype=np.int8), mode="valid")
+    hits = np.flatnonzero(runs == length)
+    return int(hits[0]) if len(hits) else None
+
+
+def speech_bounds(samples: np.ndarray, sample_rate: int) -> Optional[Tuple[int, int]]:
+    """
+    에너지 기반 VAD로 발화 구간(샘플 위치) 계산
+
+    임계값 = max(SILENCE_DBFS, min(잡음 바닥 + 6dB, 피크 - 20dB)):
+    조용한 곳에서는 잡음 바로 위, 시끄러운 곳에서는 잡음 수준까지 내려가 말소리를 잘라먹지 않는다.
+
+    Returns:
+        (시작, 끝) 또는 None (말소리 없음)
+    """
+    frame = max(1, sample_rate * FRAME_MS // 1000)
+    levels = frame_dbfs(samples, frame)
+    if not len(levels) or levels.max() < SILENCE_DBFS:
+        return None
+    noise_floor = float(np.percentile(levels, 10))
+    threshold = max(SILENCE_DBFS, min(noise_floor + 6.0, float(levels.max()) - 20.0))
+    voiced = levels >= threshold
+    run = min(MIN_SPEECH_FRAMES, int(voiced.sum()))
+    start = _first_run(voiced, run)
+    end = _first_run(voiced[::-1], run)
+    if start is None or end is None:
+        return None
+    pad = sample_rate * PAD_MS // 1000
+    return max(0, start * frame - pad), min(len(samples), (len(levels) - end) * frame + pad)
+
+
+def normalize_loudness(samples: np.ndarray, target_dbfs: float = TARGET_DBFS) -> float:
+    """
+    RMS를 목표 dBFS로 맞춤 (제자리 연산, 피크 PEAK_LIMIT / 증폭 MAX_GAIN_DB 제한)
+
+    Returns:
+        적용한 이득(dB)
+    """
+    if not len(samples):
+        return 0.0
+    rms = float(np.sqrt(np.dot(samples, samples) / len(samples)))
+    peak = float(np.abs(samples).max())
+    if rms <= 0.0 or peak <= 0.0:
+        return 0.0
+    gain = min(10 ** ((target_dbfs - 20 * np.log10(rms)) / 20), 10 ** (MAX_GAIN_DB / 20), PEAK_LIMIT / peak)
+    samples *= np.float32(gain)
+    return float(20 * np.log10(gain))
+
+
+class PreparedAudio:
+    """
+    전처리된 모노 오디오
+
+    Args:
+        samples: float32 [-1, 1] 샘플 (발화 구간 뷰)
+        sample_rate: 샘플레이트
+        source_format: 감지된 입력 형식
+        input_seconds: 전처리 전 길이(초)
+        input_bytes: 전처리 전 크기
+    """
+    __slots__ = ("samples", "sample_rate", "source_format", "input_seconds", "input_bytes", "gain_db", "_pcm16")
+
+    def __init__(self, samples: np.ndarray, sample_rate: int, source_format: str, input_seconds: float, input_bytes: int, gain_db: float = 0.0):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.source_format = source_format
+        self.input_seconds = input_seconds
+        self.input_bytes = input_bytes
+        self.gain_db = gain_db
+        self._pcm16: Optional[bytes] = None
+
+    @property
+    def seconds(self) -> float:
+        return len(self.samples) / self.sample_rate if self.sample_rate else 0.0
+
+    @property
+    def is_silent(self) -> bool:
+        return not len(self.samples)
+
+    def pcm16(self) -> bytes:
+        """16bit 모노 PCM 바이트 (PCM 입력 엔진용, 한 번만 변환)"""
+        if self._pcm16 is None:
+            self._pcm16 = float_to_pcm16(self.samples)
+        return self._pcm16
+
+
+class AudioPreprocessor:
+    """
+    STT 입력 전처리기 (감소한 오디오 길이/크기 누적 집계)
+
+    Args:
+        vad: 앞뒤 무음 제거
+        normalize: 음량 정규화
+        target_dbfs: 정규화 목표 RMS
+    """
+
+    def __init__(self, vad: bool = True, normalize: bool = True, target_dbfs: float = TARGET_DBFS):
+        self.vad = vad
+        self.normalize = normalize
+        self.target_dbfs = target_dbfs
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.silent = 0
+        self.input_seconds = 0.0
+        self.output_seconds = 0.0
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.formats: Dict[str, int] = {}
+
+    def process(
+        self,
+        data: bytes,
+        sample_rate: int = 16000,
+        sample_width: int = 2,
+        target_rate: int = 16000,
+        raw_pcm: bool = False
+    ) -> PreparedAudio:
+        """
+        디코딩 → 리샘플링 → 무음 제거 → 음량 정규화
+
+        Args:
+            data: 오디오 바이트 (컨테이너 또는 헤더 없는 모노 PCM)
+            sample_rate / sample_width: 헤더 없는 PCM일 때의 형식
+            target_rate: STT 엔진 입력 샘플레이트
+            raw_pcm: 호출자가 헤더 없는 PCM이라고 알려 줌 (MP3 감지 생략)
+
+        Raises:
+            AudioDecodeError: 지원하지 않거나 손상된 오디오
+        """
+        with metrics.span("audio_preprocess"):
+            samples, rate, audio_format = decode(data, sample_rate, sample_width, raw_pcm)
+            input_seconds = len(samples) / rate if rate else 0.0
+            samples = resample(samples, rate, target_rate)
+            gain_db = 0.0
+            if self.vad:
+                bounds = speech_bounds(samples, target_rate)
+                samples = samples[bounds[0]:bounds[1]] if bounds else samples[:0]
+            if self.normalize and len(samples):
+                gain_db = normalize_loudness(samples, self.target_dbfs)
+            prepared = PreparedAudio(samples, target_rate, audio_format, input_seconds, len(data), gain_db)
+
+        output_bytes = len(samples) * 2
+        with self._lock:
+            self.calls += 1
+            self.silent += prepared.is_silent
+            self.input_seconds += input_seconds
+            self.output_seconds += prepared.seconds
+            self.input_bytes += len(data)
+            self.output_bytes += output_bytes
+            self.formats[audio_format] = self.formats.get(audio_format, 0) + 1
+        metrics.STT_AUDIO_SECONDS.inc(input_seconds, stage="input")
+        metrics.STT_AUDIO_SECONDS.inc(prepared.seconds, stage="processed")
+        return prepared
+
+    def stats(self) -> Dict[str, Any]:
+        """처리한 오디오 길이/크기와 줄어든 비율"""
+        saved = self.input_seconds - self.output_seconds
+        return {
+            "calls": self.calls,
+            "silent_skipped": self.silent,
+            "input_seconds": self.input_seconds,
+            "processed_seconds": self.output_seconds,
+            "saved_seconds": saved,
+            "saved_ratio": saved / self.input_seconds if self.input_seconds else 0.0,
+            "input_bytes": self.input_bytes,
+            "payload_bytes": self.output_bytes,
+            "formats": dict(self.formats)
+        }
@@ -0,0 +1,11 @@
+"""
+AI BURGER HOUSE - 성능 벤치마크 스크립트 모음
+저장소 루트에서 `python -m benchmarks.<모듈명>` 형태로 실행
+"""
+import os
+
+# 이전 실행이 남긴 워커 간 공유 캐시/미리 계산한 응답 표가 측정에 섞이지 않도록, 측정 요청이 주문 이벤트 로그에
+# 남지 않도록 기본은 끔 (환경변수로 지정하면 그대로 사용)
+os.environ.setdefault("KIOSK_SHARED_CACHE", "off")
+os.environ.setdefault("KIOSK_EVENT_LOG", "off")
+os.environ.setdefault("KIOSK_ANSWER_TABLE", "off")
@@ -0,0 +1,58 @@
+"""
+음성 전처리 마이크로벤치마크
+앞뒤 무음이 붙은 합성 녹음(브라우저 WAV, 48kHz 스테레오)을 AudioPreprocessor로 처리해
+STT에 넘기는 오디오 길이/바이트가 얼마나 줄었는지와 호출당 전처리 시간을 보고한다.
+
+실행 예:
+    python -m benchmarks.bench_audio --speech 1.5 --lead 1.0 --tail 2.0 --calls 50
+"""
+import argparse
+import io
+import wave
+
+import numpy as np
+
+from audio_preprocess import AudioPreprocessor
+from benchmarks.bench_combo import time_calls
+
+
+def build_recording(speech: float, lead: float, tail: float, rate: int = 48000, channels: int = 2) -> bytes:
+    """무음(약한 잡음) - 말소리(변조된 사인파) - 무음 구간의 16bit WAV"""
+    rng = np.random.default_rng(7)
+    t = np.arange(int(rate * speech)) / rate
+    voice = 0.2 * np.sin(2 * np.pi * 220 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    signal = np.concatenate([np.zeros(int(rate * lead)), voice, np.zeros(int(rate * tail))])
+    signal += rng.normal(0, 0.0005, len(signal))
+    frames = np.repeat(signal[:, None], channels, axis=1)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setnchannels(channels)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        out.writeframes((np.clip(frames, -1, 1) * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="음성 전처리 마이크로벤치마크")
+    parser.add_argument("--speech", type=float, default=1.5, help="말소리 길이(초)")
+    parser.add_argument("--lead", type=float, default=1.0, help="앞 무음 길이(초)")
+    parser.add_argument("--tail", type=float, default=2.0, help="뒤 무음 길이(초)")
+    parser.add_argument("--target-rate", type=int, default=16000, help="STT 엔진 샘플레이트")
+    parser.add_argument("--calls", type=int, default=50, help="측정 호출 수")
+    args = parser.parse_args()
+
+    data = build_recording(args.speech, args.lead, args.tail)
+    preprocessor = AudioPreprocessor()
+    audio = preprocessor.process(data, target_rate=args.target_rate)
+    per_call_us = time_calls(lambda: preprocessor.process(data, target_rate=args.target_rate), args.calls)
+
+    print(f"입력: {audio.source_format} {audio.input_seconds:.2f}초, {audio.input_bytes:,} bytes")
+    print(f"출력: {audio.sample_rate}Hz 모노 {audio.seconds:.2f}초, {len(audio.pcm16()):,} bytes (이득 {audio.gain_db:+.1f}dB)")
+    print(f"  줄어든 오디오 {audio.input_seconds - audio.seconds:.2f}초 ({1 - audio.seconds / audio.input_seconds:.0%}), "
+          f"바이트 x{audio.input_bytes / max(1, len(audio.pcm16())):.1f} 감소")
+    print(f"  전처리 시간 {per_call_us / 1000:.2f} ms/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+세트 조합 탐색 마이크로벤치마크
+수천 개 메뉴의 합성 카탈로그에서 ComboEngine(bisect + 조기 종료)과
+모든 사이드×음료 쌍을 훑는 O(S·D) 방식의 호출당 시간을 비교한다.
+
+실행 예:
+    python -m benchmarks.bench_combo --items 3000 --calls 200
+"""
+import argparse
+import random
+import time
+from typing import Dict, List, Optional
+
+from combo_engine import ComboEngine
+from menu_index import MenuIndex
+
+ALLERGENS = ["wheat", "soy", "dairy", "eggs"]
+
+
+def build_catalog(items: int, seed: int = 42) -> List[Dict]:
+    """버거/사이드/음료를 1:1:1로 섞은 합성 메뉴"""
+    rng = random.Random(seed)
+    categories = [("버거", "BG", 5000, 12000), ("사이드", "SD", 1500, 6000), ("음료", "DR", 1000, 5500)]
+    catalog = []
+    for i in range(items):
+        category, prefix, low, high = categories[i % 3]
+        catalog.append({
+            "menu_id": f"{prefix}{i:05d}",
+            "category": category,
+            "name": f"{category} {i}",
+            "price": rng.randrange(low, high, 100),
+            "spicy": rng.randint(0, 3),
+            "calories": rng.randint(100, 900),
+            "protein": rng.randint(0, 45),
+            "allergy": rng.sample(ALLERGENS, rng.randint(0, 2)),
+            "tags": []
+        })
+    return catalog
+
+
+def naive_best(index: MenuIndex, mains: List[Dict], budget: Optional[int]) -> Optional[Dict]:
+    """비교 기준: 모든 사이드×음료 쌍 전수 탐색 (예산에 가장 가까운 조합)"""
+    best = None
+    sides, drinks = index.in_category("사이드"), index.in_category("음료")
+    for main in mains:
+        for side in sides:
+            for drink in drinks:
+                total = main["price"] + side["price"] + drink["price"]
+                if budget and total > budget:
+                    continue
+                if best is None or total > best["total_price"]:
+                    best = {"main": main, "side": side, "drink": drink, "total_price": total}
+    return best
+
+
+def time_calls(fn, calls: int) -> float:
+    """호출당 평균 시간(µs)"""
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="세트 조합 탐색 마이크로벤치마크")
+    parser.add_argument("--items", type=int, default=3000, help="합성 메뉴 수")
+    parser.add_argument("--calls", type=int, default=200, help="측정 호출 수")
+    parser.add_argument("--budget", type=int, default=15000)
+    parser.add_argument("--mains", type=int, default=4, help="메인 후보 수 (추천 개수)")
+    args = parser.parse_args()
+
+    index = MenuIndex(build_catalog(args.items))
+    mains = index.in_category("버거")[:args.mains]
+    engine = ComboEngine()
+
+    started = time.perf_counter()
+    engine.find_combos(index, mains, budget=args.budget)
+    cold_us = (time.perf_counter() - started) * 1e6
+
+    results = {}
+    for score in ("budget_fit", "protein", "calories"):
+        results[score] = time_calls(
+            lambda: engine.find_combos(index, mains, budget=args.budget, score=score, top_k=3),
+            args.calls
+        )
+    results["budget_fit + allergy"] = time_calls(
+        lambda: engine.find_combos(index, mains, budget=args.budget, allergies=["dairy"], top_k=3),
+        args.calls
+    )
+    naive_calls = max(1, args.calls // 100)
+    naive_us = time_calls(lambda: naive_best(index, mains, args.budget), naive_calls)
+
+    fast = engine.find_combos(index, mains, budget=args.budget, top_k=1)[0]
+    reference = naive_best(index, mains, args.budget)
+    assert fast["total_price"] == reference["total_price"], "조합 결과가 전수 탐색과 다름"
+
+    print(f"메뉴 {args.items}개, 메인 후보 {len(mains)}개, 예산 {args.budget:,}원")
+    print(f"  첫 호출 (테이블 생성 포함)          {cold_us:10.1f} µs")
+    for name, us in results.items():
+        print(f"  ComboEngine [{name:<22}] {us:10.1f} µs/call")
+    print(f"  전수 탐색 O(S·D)                   {naive_us:10.1f} µs/call  (x{naive_us / results['budget_fit']:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+이벤트 로그 벤치마크 - 요청 경로의 append 지연과 그룹 커밋 처리량
+생산자 스레드 여러 개가 추천 이벤트 크기의 이벤트를 기록할 때, 이벤트마다 직접 쓰고 fsync하는 방식과
+EventLog(백그라운드 그룹 커밋)의 fsync 정책별 호출 지연/처리량/fsync 횟수를 비교한다.
+
+실행 예:
+    python -m benchmarks.bench_event_log --threads 8 --events 2000
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List
+
+from event_log import EventLog, read_events
+
+SAMPLE = {
+    "request_id": "0123456789abcdef",
+    "text": "매운 거 좋아하는데 우유 알레르기 있어요",
+    "answer_source": "llm",
+    "menu_ids": ["B003", "B007", "S002"],
+    "budget": 10000,
+    "allergies": ["우유"],
+    "analysis_ms": 412.5
+}
+
+
+def run_producers(append: Callable[[int], None], threads: int, events: int) -> Dict[str, float]:
+    """스레드마다 events개 기록 - 호출 지연(µs) 분포와 전체 처리량"""
+    latencies: List[List[float]] = [[] for _ in range(threads)]
+
+    def produce(slot: int):
+        for i in range(events):
+            started = time.perf_counter()
+            append(i)
+            latencies[slot].append((time.perf_counter() - started) * 1e6)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=produce, args=(slot,)) for slot in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    merged = sorted(value for values in latencies for value in values)
+    return {
+        "p50_us": statistics.median(merged),
+        "p99_us": merged[int(len(merged) * 0.99) - 1],
+        "events_per_s": len(merged) / elapsed
+    }
+
+
+def bench_direct(directory: str, threads: int, events: int) -> Dict[str, float]:
+    """비교 기준: 요청 스레드에서 이벤트마다 직렬화 + write + fsync (잠금으로 직렬화)"""
+    lock = threading.Lock()
+    with open(os.path.join(directory, "direct.jsonl"), "ab") as f:
+        def append(i: int):
+            event = {"ts": time.time(), "seq": i, "type": "recommendation", **SAMPLE}
+            line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+            with lock:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+        result = run_producers(append, threads, events)
+    result["fsyncs"] = threads * events
+    return result
+
+
+def bench_log(directory: str, fsync: str, threads: int, events: int) -> Dict[str, float]:
+    """EventLog: append는 대기열 추가만, 쓰기/fsync는 작성 스레드에서 그룹 단위로"""
+    log = EventLog(directory, fsync=fsync, max_pending=threads * events)
+    result = run_producers(lambda i: log.append("recommendation", **SAMPLE), threads, events)
+    drained = time.perf_counter()
+    log.flush(timeout=60)
+    result["drain_ms"] = (time.perf_counter() - drained) * 1000
+    log.close()
+    stats = log.stats()
+    result.update(fsyncs=stats["fsyncs"], avg_group=stats["avg_group"], dropped=stats["dropped"])
+    read = sum(1 for _ in read_events(directory, types=("recommendation",)))
+    assert read == stats["written"] == threads * events, f"기록 {stats['written']}건, 읽기 {read}건"
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="이벤트 로그 벤치마크 (append 지연/그룹 커밋)")
+    parser.add_argument("--threads", type=int, default=8, help="생산자 스레드 수")
+    parser.add_argument("--events", type=int, default=2000, help="스레드당 이벤트 수")
+    parser.add_argument("--direct-events", type=int, default=200, help="직접 fsync 방식의 스레드당 이벤트 수 (느림)")
+    args = parser.parse_args()
+
+    print(f"생산자 {args.threads}개 스레드")
+    with tempfile.TemporaryDirectory() as tmp:
+        direct = bench_direct(tmp, args.threads, args.direct_events)
+        print(
+            f"  직접 write+fsync   p50 {direct['p50_us']:9.1f} µs  p99 {direct['p99_us']:9.1f} µs  "
+            f"{direct['events_per_s']:9.0f} events/s  fsync {direct['fsyncs']}회"
+        )
+    for policy in ("always", "interval", "never"):
+        with tempfile.TemporaryDirectory() as tmp:
+            result = bench_log(tmp, policy, args.threads, args.events)
+        print(
+            f"  EventLog {policy:<9} p50 {result['p50_us']:9.1f} µs  p99 {result['p99_us']:9.1f} µs  "
+            f"{result['events_per_s']:9.0f} events/s  fsync {result['fsyncs']}회  "
+            f"그룹 평균 {result['avg_group']}건  남은 기록 {result['drain_ms']:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
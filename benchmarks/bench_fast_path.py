@@ -0,0 +1,81 @@
+"""
+규칙 기반 빠른 경로 vs LLM 경로 지연 시간 벤치마크
+단순 조건 문장을 두 경로로 각각 처리해 p50/p99 지연(ms)을 비교한다.
+LLM 경로는 스텁 Ollama 서버에 대해 측정하므로 --latency로 실제 모델 지연을 흉내낼 수 있다.
+
+실행 예:
+    python -m benchmarks.bench_fast_path --rounds 200 --latency 0.05
+"""
+import argparse
+import contextlib
+import io
+import statistics
+import time
+from typing import Callable, List
+
+from benchmarks.stub_ollama import StubOllamaServer
+from intent_parser import answer_from_rules
+from llm_engine import OllamaEngine
+from menu_data import MENU_DATA
+from menu_recommender import _recommend_with_llm
+
+SIMPLE_QUERIES = [
+    "5천원 이하",
+    "매운 버거 추천해줘",
+    "우유 빼고 버거 추천해줘",
+    "단백질 많은 거",
+    "만원 이하로 고단백 메뉴",
+    "7,500원 이하 버거",
+    "안 매운 치킨 버거",
+    "시원한 음료 주세요",
+    # 조사 '이' 뒤의 금액 (2만원으로 읽으면 안 됨)
+    "메뉴 좀 추천해줘 가격이 만원 이하로",
+    "예산이 만원이야",
+    "버거 중에 가격이 만원 이하",
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(call: Callable[[str], object], rounds: int) -> List[float]:
+    """각 질의를 rounds번 돌려 호출별 지연(ms) 수집"""
+    samples = []
+    for _ in range(rounds):
+        for query in SIMPLE_QUERIES:
+            started = time.perf_counter()
+            call(query)
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="규칙 기반 빠른 경로 벤치마크")
+    parser.add_argument("--rounds", type=int, default=100, help="질의 세트 반복 횟수")
+    parser.add_argument("--latency", type=float, default=0.0, help="스텁 LLM 응답 지연(초)")
+    args = parser.parse_args()
+
+    handled = sum(answer_from_rules(MENU_DATA, q) is not None for q in SIMPLE_QUERIES)
+    rule_samples = measure(lambda q: answer_from_rules(MENU_DATA, q), args.rounds)
+
+    with StubOllamaServer(latency=args.latency) as server:
+        engine = OllamaEngine(base_url=server.base_url)
+        # 디버그 출력은 측정에서 제외
+        with contextlib.redirect_stdout(io.StringIO()):
+            llm_samples = measure(lambda q: _recommend_with_llm(MENU_DATA, q, engine), args.rounds)
+        engine.close()
+
+    print(f"질의 {len(SIMPLE_QUERIES)}종 × {args.rounds}회, 규칙 경로 처리 가능: {handled}/{len(SIMPLE_QUERIES)}")
+    print(f"{'경로':<10} {'p50(ms)':>10} {'p99(ms)':>10} {'mean(ms)':>10}")
+    for name, samples in (("rules", rule_samples), ("llm", llm_samples)):
+        print(
+            f"{name:<10} {percentile(samples, 50):10.3f} {percentile(samples, 99):10.3f} "
+            f"{statistics.fmean(samples):10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+HTTP 클라이언트 벤치마크
+요청마다 새 연결(requests.post) vs 풀링 세션 vs 비동기 클라이언트(agenerate_response)의
+처리량(req/s)과 최대 스레드 수를 스텁 Ollama 서버에 대해 비교한다.
+
+1) 같은 동시성: 스레드 N개 vs 비동기 요청 N개 - 연결 재사용/요청당 오버헤드 비교
+   (LLM 지연이 크면 세 방식 모두 동시성 × 1/지연에 묶여 차이가 거의 없음)
+2) 같은 스레드 예산: 워커 스레드 --threads개(파이프라인 워커 수)의 동기 호출 vs
+   스레드 하나에서 --concurrency개를 동시에 보내는 비동기 호출 - 스레드를 늘리지 않고 처리량이 늘어나는지
+
+실행 예:
+    python -m benchmarks.bench_http_client --requests 300 --concurrency 16 --latency 0.02
+    python -m benchmarks.bench_http_client --requests 200 --concurrency 32 --latency 0.1 --threads 4
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Tuple
+
+import requests
+
+from llm_engine import OllamaEngine
+from llm_scheduler import LLMScheduler
+
+PROMPT = "매운 버거 추천해줘"
+
+
+class _FreshConnectionSession:
+    """기존 방식 재현: 모듈 레벨 requests.get/post (매 요청 새 TCP 연결)"""
+
+    def get(self, *args, **kwargs):
+        return requests.get(*args, **kwargs)
+
+    def post(self, *args, **kwargs):
+        return requests.post(*args, **kwargs)
+
+    def close(self):
+        pass
+
+
+def peak_threads(run: Callable[[], float]) -> Tuple[float, int]:
+    """run() 동안의 최대 스레드 수 (벤치마크 스레드 자신은 제외)"""
+    peak = threading.active_count()
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.wait(0.005):
+            peak = max(peak, threading.active_count() - 1)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        rps = run()
+    finally:
+        done.set()
+        sampler.join()
+    return rps, peak
+
+
+def run_threaded(engine: OllamaEngine, total: int, concurrency: int) -> float:
+    """스레드 풀로 total건 실행 후 req/s 반환"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: engine.generate_response(PROMPT), range(total)))
+    return total / (time.perf_counter() - started)
+
+
+def _start_stub(port: int, latency: float) -> subprocess.Popen:
+    """GIL 경합을 피하기 위해 스텁 서버를 별도 프로세스로 실행"""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_ollama", "--port", str(port), "--latency", str(latency)],
+        stdout=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(base_url, timeout=0.5)
+            return proc
+        except requests.RequestException:
+            time.sleep(0.05)
+    proc.terminate()
+    raise RuntimeError("스텁 Ollama 서버 기동 실패")
+
+
+async def _run_async(engine: OllamaEngine, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await engine.agenerate_response(PROMPT)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    await engine.aclose()
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OllamaEngine HTTP 클라이언트 벤치마크")
+    parser.add_argument("--requests", type=int, default=300, help="모드별 요청 수")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시 요청 수")
+    parser.add_argument("--latency", type=float, default=0.0, help="스텁 서버 응답 지연(초)")
+    parser.add_argument("--threads", type=int, default=4, help="스레드 예산 비교의 동기 워커 스레드 수")
+    parser.add_argument("--port", type=int, default=11436, help="스텁 서버 포트")
+    args = parser.parse_args()
+
+    stub = _start_stub(args.port, args.latency)
+    try:
+        base_url = f"http://127.0.0.1:{args.port}"
+        # 클라이언트 비교가 목적이므로 스케줄러는 동시 실행 수를 제한하지 않게 설정
+        scheduler = LLMScheduler(max_concurrency=args.concurrency, max_queue=args.requests)
+        fresh = OllamaEngine(base_url=base_url, scheduler=scheduler)
+        fresh.session = _FreshConnectionSession()
+        engine = OllamaEngine(base_url=base_url, pool_size=args.concurrency, scheduler=scheduler)
+
+        run_async = lambda: asyncio.run(_run_async(engine, args.requests, args.concurrency))
+        same_concurrency = {
+            "fresh_connection (requests.post)": peak_threads(lambda: run_threaded(fresh, args.requests, args.concurrency)),
+            "pooled_session (generate_response)": peak_threads(lambda: run_threaded(engine, args.requests, args.concurrency)),
+            "async_client (agenerate_response)": peak_threads(run_async),
+        }
+        same_threads = {
+            f"pooled_session, 스레드 {args.threads}개": peak_threads(lambda: run_threaded(engine, args.requests, args.threads)),
+            f"async_client, 동시 {args.concurrency}건": peak_threads(run_async),
+        }
+        engine.close()
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    print(f"요청 {args.requests}건, 스텁 지연 {args.latency}s")
+    for title, results in (
+        (f"같은 동시성 {args.concurrency}", same_concurrency),
+        (f"같은 스레드 예산 (동기 워커 {args.threads}개)", same_threads),
+    ):
+        print(f"  {title}")
+        baseline = next(iter(results.values()))[0]
+        for name, (rps, threads) in results.items():
+            print(f"    {name:<38} {rps:8.1f} req/s  (x{rps / baseline:.2f})  최대 스레드 {threads}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+응답 표 미리 계산 벤치마크 - 배치 처리량과 실제 트래픽 coverage
+자주 나오는 문장이 반복되는(Zipf 분포) 과거 주문 코퍼스와, 같은 분포에서 따로 뽑은 실시간 트래픽을 만들어
+1) precompute.build로 과거 코퍼스의 응답 표 생성 (중복 제거 + 프로세스 풀 + 동시 LLM 호출 제한)
+2) 실시간 트래픽 중 응답 표/규칙 기반으로 바로 답하는 비율
+3) 실시간 트래픽 응답 시간: 응답 표 있음 vs 없음 (LLM은 스텁 Ollama 서버)
+을 보고한다. 띄어쓰기/문장부호만 다른 변형 문장을 섞어 정규화 기준 중복 제거도 확인한다.
+
+실행 예:
+    python -m benchmarks.bench_precompute --history 3000 --live 300 --workers 4 --llm-concurrency 2
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import List
+
+from benchmarks.replay import DEFAULT_CORPUS, load_corpus
+from benchmarks.stub_ollama import StubOllamaServer
+
+OPENERS = ["오늘", "점심으로", "친구랑 먹을", "배고픈데", "다이어트 중인데", "운동 끝나고", "비 오는 날", "야식으로"]
+MOODS = ["든든한", "가벼운", "색다른", "달달한", "짭짤한", "인기 있는"]
+TARGETS = ["거", "메뉴", "버거", "세트"]
+ENDINGS = ["추천해줘", "뭐가 좋아?", "골라줘"]
+
+
+def phrase_pool() -> List[str]:
+    """코퍼스 문장 + 조합 문장 (빈도 순위는 무작위)"""
+    phrases = [row["text"] for row in load_corpus(DEFAULT_CORPUS)]
+    phrases += [" ".join(parts) for parts in itertools.product(OPENERS, MOODS, TARGETS, ENDINGS)]
+    random.Random(3).shuffle(phrases)
+    return phrases
+
+
+def sample_traffic(phrases: List[str], count: int, seed: int, skew: float = 1.1) -> List[str]:
+    """Zipf 분포로 문장을 뽑고 일부는 띄어쓰기/문장부호만 바꾼 변형으로"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** skew for rank in range(len(phrases))]
+    texts = []
+    for text in rng.choices(phrases, weights, k=count):
+        roll = rng.random()
+        if roll < 0.15:
+            text = text.replace(" ", "")
+        elif roll < 0.3:
+            text = text.rstrip("?!.") + rng.choice(["!", "~", ".", "!!"])
+        texts.append(text)
+    return texts
+
+
+def time_answers(texts: List[str], engine) -> List[float]:
+    """recommend_menus 응답 시간(ms) - 매번 분석 캐시를 비워 표/규칙/LLM 경로만 측정"""
+    from intent_cache import get_intent_cache
+    from menu_data import MENU_DATA
+    from menu_recommender import recommend_menus
+    timings = []
+    for text in texts:
+        get_intent_cache().clear()
+        started = time.perf_counter()
+        recommend_menus(MENU_DATA, text, engine)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="응답 표 미리 계산 벤치마크 (처리량/coverage)")
+    parser.add_argument("--history", type=int, default=3000, help="과거 코퍼스 문장 수")
+    parser.add_argument("--live", type=int, default=300, help="실시간 트래픽 문장 수")
+    parser.add_argument("--workers", type=int, default=4, help="워커 프로세스 수")
+    parser.add_argument("--llm-concurrency", type=int, default=2, help="동시 LLM 호출 수")
+    parser.add_argument("--latency", type=float, default=0.1, help="스텁 LLM 첫 토큰 지연(초)")
+    args = parser.parse_args()
+
+    phrases = phrase_pool()
+    history = sample_traffic(phrases, args.history, seed=1)
+    live = sample_traffic(phrases, args.live, seed=2)
+
+    with StubOllamaServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        # 워커 프로세스는 환경변수로 스텁 서버 주소를 받음
+        os.environ["KIOSK_OLLAMA_URLS"] = server.base_url
+        corpus_path = os.path.join(tmp, "history.txt")
+        with open(corpus_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(history) + "\n")
+        table_path = os.path.join(tmp, "answer_table.json")
+
+        import answer_table
+        import precompute
+        from llm_engine import OllamaEngine
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = precompute.build(
+                corpus_path, table_path, workers=args.workers, llm_concurrency=args.llm_concurrency
+            )
+        llm_calls = server.request_count
+        table = answer_table.AnswerTable.load(table_path)
+        covered = precompute.coverage(table, live)
+
+        engine = OllamaEngine(base_url=server.base_url)
+        with contextlib.redirect_stdout(io.StringIO()):
+            answer_table._table = answer_table.AnswerTable()
+            without_table = time_answers(live, engine)
+            answer_table._table = table
+            with_table = time_answers(live, engine)
+        engine.close()
+
+    sources = ", ".join(f"{name} {count}" for name, count in sorted(report["sources"].items()))
+    print(f"과거 코퍼스 {report['utterances']}문장 → 중복 제거 {report['unique']}문장 ({sources})")
+    print(
+        f"  워커 {args.workers}개, 동시 LLM {args.llm_concurrency}: {report['compute_seconds']:.1f} s, "
+        f"{report['unique_per_second']:.1f} 문장/s (과거 문장 기준 {report['utterances'] / report['compute_seconds']:.1f}/s), "
+        f"LLM 호출 {llm_calls}회"
+    )
+    print(f"  응답 표 {report['entries']}항목, {report['table_bytes'] / 1024:.1f} KB")
+    print(
+        f"실시간 트래픽 {covered['utterances']}문장: 응답 표 {covered['precomputed'] / covered['utterances']:.1%}, "
+        f"규칙 기반 {covered['rules'] / covered['utterances']:.1%}, LLM 필요 {covered['llm'] / covered['utterances']:.1%}"
+    )
+    print(
+        f"  응답 시간 p50 / 평균: 표 없음 {statistics.median(without_table):7.2f} / {statistics.mean(without_table):7.2f} ms, "
+        f"표 있음 {statistics.median(with_table):7.2f} / {statistics.mean(with_table):7.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+메뉴 점수 엔진 마이크로벤치마크
+합성 카탈로그에서 MenuScorer(배열 마스크 + argpartition top-k, 배치)와
+메뉴마다 조건을 검사하고 전체를 정렬하는 파이썬 방식의 질의당 시간을 비교한다.
+
+실행 예:
+    python -m benchmarks.bench_scoring --items 5000 --calls 200 --batch 64
+"""
+import argparse
+import random
+from typing import Any, Dict, List
+
+from benchmarks.bench_combo import build_catalog, time_calls
+from intent_parser import parse_intent
+from menu_index import MenuIndex
+
+TAGS = ["meat", "beef", "chicken", "spicy", "cheese", "healthy", "cold", "premium"]
+
+QUERIES = [
+    "5천원 이하",
+    "우유 빼고 매운 버거",
+    "만원 이하로 고단백 메뉴",
+    "안 매운 치킨 버거",
+    "칼로리 낮은 음료",
+    "치즈 들어간 프리미엄 버거",
+    "계란 빼고 저렴한 사이드",
+    "아주 매운 거",
+]
+
+
+def naive_top_k(menus: List[Dict], parsed: Dict[str, Any], k: int) -> List[Dict]:
+    """비교 기준: 메뉴별 조건 검사 + 전체 정렬 (점수 엔진 도입 전 규칙 경로와 같은 순위)"""
+    allergies = set(parsed["allergies"])
+    filtered = [
+        m for m in menus
+        if not (parsed["budget"] and m["price"] > parsed["budget"])
+        and not allergies.intersection(m.get("allergy", []))
+        and (parsed["spicy_min"] is None or m.get("spicy", 0) >= parsed["spicy_min"])
+        and (parsed["spicy_max"] is None or m.get("spicy", 0) <= parsed["spicy_max"])
+        and (not parsed["categories"] or m["category"] in parsed["categories"])
+    ]
+    wanted = set(parsed["tags"])
+    sort_by = parsed["sort_by"]
+
+    def key(menu: Dict):
+        if sort_by == "protein":
+            metric = -menu.get("protein", 0)
+        elif sort_by == "calories":
+            metric = menu.get("calories", 0)
+        elif sort_by == "price":
+            metric = menu["price"]
+        else:
+            metric = -menu["price"] if parsed["budget"] else 0
+        return (-len(wanted.intersection(menu.get("tags", []))), menu["category"] != "버거", metric)
+
+    ranked = sorted(filtered, key=key)
+    if wanted:
+        ranked = [m for m in ranked if wanted.intersection(m.get("tags", []))] or ranked
+    return ranked[:k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="메뉴 점수 엔진 마이크로벤치마크")
+    parser.add_argument("--items", type=int, default=5000, help="합성 메뉴 수")
+    parser.add_argument("--calls", type=int, default=200, help="측정 호출 수")
+    parser.add_argument("--batch", type=int, default=64, help="배치 API에 한 번에 넣을 질의 수")
+    parser.add_argument("--top-k", type=int, default=4)
+    args = parser.parse_args()
+
+    catalog = build_catalog(args.items)
+    rng = random.Random(7)
+    for menu in catalog:
+        menu["tags"] = rng.sample(TAGS, rng.randint(0, 3))
+    index = MenuIndex(catalog)
+    scorer = index.scorer
+    parsed = [parse_intent(q) for q in QUERIES]
+
+    for query in parsed:
+        expected = [m["menu_id"] for m in naive_top_k(catalog, query, args.top_k)]
+        assert [m["menu_id"] for m in scorer.top_k(query, args.top_k)] == expected, "점수 엔진 순위가 기준과 다름"
+
+    batch = [parsed[i % len(parsed)] for i in range(args.batch)]
+    naive_us = time_calls(lambda: [naive_top_k(catalog, q, args.top_k) for q in parsed], args.calls) / len(parsed)
+    single_us = time_calls(lambda: [scorer.top_k(q, args.top_k) for q in parsed], args.calls) / len(parsed)
+    batch_us = time_calls(lambda: scorer.top_k_batch(batch, args.top_k), args.calls) / len(batch)
+
+    print(f"메뉴 {args.items}개, 질의 {len(parsed)}종, top-{args.top_k}")
+    print(f"  파이썬 필터 + 정렬          {naive_us:10.1f} µs/query")
+    print(f"  MenuScorer.top_k            {single_us:10.1f} µs/query  (x{naive_us / single_us:.1f})")
+    print(f"  MenuScorer.top_k_batch({args.batch:<3}) {batch_us:9.1f} µs/query  (x{naive_us / batch_us:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+워커 간 공유 캐시 벤치마크 - 여러 프로세스가 같은 질문을 동시에 할 때의 LLM 호출 수
+프록시 뒤의 워커처럼 프로세스 N개를 띄우고, 코퍼스에서 LLM이 필요한 문장을 모든 워커가 같은 순서로
+동시에 보낸다. 프로세스마다 IntentCache가 따로이므로 공유 캐시가 없으면 LLM 호출이 워커 수만큼 늘고,
+공유 캐시(SQLite WAL 대역)를 쓰면 문장당 1회가 되어야 한다. LLM은 스텁 Ollama 서버로 대체한다.
+
+실행 예:
+    python -m benchmarks.bench_shared_cache --workers 4 --latency 0.3
+    python -m benchmarks.bench_shared_cache --url redis://localhost:6379/15
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.replay import DEFAULT_CORPUS, load_corpus
+from benchmarks.stub_ollama import StubOllamaServer
+
+
+def worker(url: str, base_url: str, texts: List[str], barrier, results):
+    """워커 프로세스: 모든 워커가 준비되면 같은 문장들을 차례로 추천 요청"""
+    os.environ["KIOSK_SHARED_CACHE"] = url
+    from llm_engine import OllamaEngine
+    from menu_data import MENU_DATA
+    from menu_recommender import recommend_menus
+    from shared_cache import get_shared_cache
+
+    engine = OllamaEngine(base_url=base_url)
+    sources: Dict[str, int] = {}
+    barrier.wait()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for text in texts:
+            intent, _ = recommend_menus(MENU_DATA, text, engine)
+            sources[intent["source"]] = sources.get(intent["source"], 0) + 1
+    elapsed = time.perf_counter() - started
+    engine.close()
+    shared = get_shared_cache()
+    results.put({"seconds": elapsed, "sources": sources, "shared": shared.stats() if shared else None})
+
+
+def run(url: str, workers: int, texts: List[str], canned: Dict[str, str], latency: float) -> Dict:
+    """워커 N개를 동시에 돌리고 LLM 호출 수와 걸린 시간을 모음"""
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    with StubOllamaServer(latency=latency, json_responses=canned) as server:
+        processes = [
+            context.Process(target=worker, args=(url, server.base_url, texts, barrier, results))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        llm_calls = server.request_count
+
+    sources: Dict[str, int] = {}
+    for outcome in outcomes:
+        for source, count in outcome["sources"].items():
+            sources[source] = sources.get(source, 0) + count
+    return {
+        "llm_calls": llm_calls,
+        "seconds": max(outcome["seconds"] for outcome in outcomes),
+        "sources": sources,
+        "shared": [outcome["shared"] for outcome in outcomes if outcome["shared"]]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="워커 간 공유 캐시 벤치마크 (프로세스 N개, 같은 질문)")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL 코퍼스 경로")
+    parser.add_argument("--workers", type=int, default=4, help="워커 프로세스 수")
+    parser.add_argument("--latency", type=float, default=0.3, help="스텁 LLM 첫 토큰 지연(초)")
+    parser.add_argument("--url", help="공유 캐시 주소 (기본: 임시 디렉터리의 SQLite 파일)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    canned = {
+        row["text"]: json.dumps(row["llm_response"], ensure_ascii=False)
+        for row in corpus if row.get("llm_response")
+    }
+    texts = list(canned)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{os.path.join(tmp, 'shared.db')}"
+        if args.url:
+            from shared_cache import open_client
+            open_client(args.url).flushdb()
+        baseline = run("off", args.workers, texts, canned, args.latency)
+        shared = run(url, args.workers, texts, canned, args.latency)
+
+    print(f"워커 {args.workers}개 × LLM 문장 {len(texts)}개 (스텁 LLM 지연 {args.latency}s)")
+    print(f"  공유 캐시 없음   LLM 호출 {baseline['llm_calls']:4d}회   {baseline['seconds']:6.2f} s   {baseline['sources']}")
+    print(f"  공유 캐시 사용   LLM 호출 {shared['llm_calls']:4d}회   {shared['seconds']:6.2f} s   {shared['sources']}")
+    totals: Dict[str, int] = {}
+    for stats in shared["shared"]:
+        for name in ("hits", "computed", "waited", "joined", "timeouts", "errors"):
+            totals[name] = totals.get(name, 0) + stats[name]
+    print(f"  공유 캐시 결과 합계: {', '.join(f'{name} {count}' for name, count in totals.items())}")
+
+
+if __name__ == "__main__":
+    main()
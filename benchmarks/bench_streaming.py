@@ -0,0 +1,191 @@
+"""
+스트리밍 음성 입력 벤치마크 - 발화 끝 → 추천 지연
+코퍼스 문장마다 어절 수만큼 말소리 구간이 있는 합성 음성을 실시간 속도로 청크 전송하고,
+같은 발화 종료 감지(ENDPOINT_MS) 시점에서 두 방식을 비교한다.
+- 일괄: 종료 판정 후 전체 오디오를 인식하고 그 문장으로 분석 (기존 mic_recorder 흐름)
+- 스트리밍: StreamingTranscriber 부분 인식 + EarlyAnalysis 선행 분석
+
+인식 엔진은 로컬 대역(ScriptedBackend)으로, 받은 오디오의 말소리 구간 수만큼 문장 앞부분 어절을 돌려준다.
+인식 시간은 새로 받은 오디오 길이 × --rtf (Vosk처럼 이어서 인식하는 엔진),
+--redecode면 쌓인 오디오 전체 길이 × --rtf (Whisper처럼 매번 다시 인식하는 엔진). LLM은 스텁 Ollama 서버로 대체한다.
+
+실행 예:
+    python -m benchmarks.bench_streaming --utterances 8 --rtf 0.3 --latency 0.3
+    python -m benchmarks.bench_streaming --redecode --step 1.0
+"""
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from audio_preprocess import PreparedAudio
+from benchmarks.replay import DEFAULT_CORPUS, load_corpus
+from benchmarks.stub_ollama import StubOllamaServer
+from intent_cache import get_intent_cache
+from llm_engine import OllamaEngine
+from menu_data import MENU_DATA
+from pipeline import KioskPipeline, PipelineTrace
+from stt_backends import STTBackend, STTService, STTStream
+from stt_streaming import ENDPOINT_MS, StreamingTranscriber
+
+RATE = 16000
+WORD_SECONDS = 0.35
+GAP_SECONDS = 0.1
+CHUNK_SECONDS = 0.1
+
+
+class ScriptedBackend(STTBackend):
+    """
+    인식 엔진 대역: 받은 오디오에 담긴 말소리 구간 수만큼 현재 문장의 앞 어절을 돌려줌
+
+    Args:
+        rtf: 인식 시간 / 오디오 길이
+        step_seconds: 재인식 간격 (redecode일 때)
+        redecode: 스트리밍 시 쌓인 오디오 전체를 다시 인식 (False면 새 오디오만 이어서 인식)
+    """
+    name = "scripted"
+
+    def __init__(self, rtf: float, step_seconds: float, redecode: bool = False):
+        super().__init__()
+        self.rtf = rtf
+        self.stream_step_seconds = step_seconds
+        self.redecode = redecode
+        self.words: List[str] = []
+
+    def open_stream(self) -> STTStream:
+        return super().open_stream() if self.redecode else _IncrementalStream(self)
+
+    def _words_heard(self, samples: np.ndarray) -> int:
+        frame = RATE // 50
+        count = len(samples) // frame
+        voiced = (np.abs(samples[:count * frame].reshape(count, frame)).max(axis=1) > 0.05).astype(np.int8)
+        return int(np.count_nonzero(np.diff(np.concatenate([[0], voiced])) == 1))
+
+    def _transcribe_samples(self, audio: PreparedAudio) -> Optional[str]:
+        time.sleep(audio.seconds * self.rtf)
+        return " ".join(self.words[:self._words_heard(audio.samples)])
+
+    def _transcribe(self, pcm: bytes, sample_rate: int, sample_width: int) -> Optional[str]:
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        return self._transcribe_samples(PreparedAudio(samples, sample_rate, "pcm", len(samples) / sample_rate, len(pcm)))
+
+
+class _IncrementalStream(STTStream):
+    """이어서 인식하는 스트리밍 대역: 청크마다 새 오디오 길이만큼만 인식 시간이 듦"""
+
+    def __init__(self, backend: ScriptedBackend):
+        super().__init__(backend)
+        self._chunks: List[np.ndarray] = []
+
+    def _accept(self, samples: np.ndarray, decode: bool) -> Optional[str]:
+        time.sleep(len(samples) / RATE * self.backend.rtf)
+        self._chunks.append(samples)
+        self.decodes += 1
+        heard = np.concatenate(self._chunks)
+        return " ".join(self.backend.words[:self.backend._words_heard(heard)])
+
+    def _finish(self) -> Optional[str]:
+        return self.hypothesis
+
+
+def synthesize(words: List[str], lead: float = 0.3, tail: float = 1.0) -> np.ndarray:
+    """어절마다 톤 구간 하나, 어절 사이 짧은 간격, 앞뒤 무음 (잡음 바닥 포함)"""
+    rng = np.random.default_rng(len(words))
+    t = np.arange(int(RATE * WORD_SECONDS)) / RATE
+    burst = (0.3 * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+    parts = [np.zeros(int(RATE * lead), dtype=np.float32)]
+    for i, _ in enumerate(words):
+        parts.append(burst)
+        if i < len(words) - 1:
+            parts.append(np.zeros(int(RATE * GAP_SECONDS), dtype=np.float32))
+    parts.append(np.zeros(int(RATE * tail), dtype=np.float32))
+    signal = np.concatenate(parts)
+    signal += rng.normal(0, 0.001, len(signal)).astype(np.float32)
+    return (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+
+
+def play(pcm: np.ndarray, transcriber: StreamingTranscriber, realtime: bool):
+    """청크를 녹음 속도로 전송 (발화 종료가 감지되면 중단)"""
+    step = int(RATE * CHUNK_SECONDS)
+    started = time.perf_counter()
+    for i, offset in enumerate(range(0, len(pcm), step)):
+        if realtime:
+            time.sleep(max(0.0, started + (i + 1) * CHUNK_SECONDS - time.perf_counter()))
+        transcriber.feed(pcm[offset:offset + step].tobytes())
+        if transcriber.ended:
+            return
+
+
+def run_batch(pipeline: KioskPipeline, service: STTService, pcm: np.ndarray) -> float:
+    """일괄 방식: 발화 종료 판정(ENDPOINT_MS) 뒤 전체 인식 + 분석 (발화 끝 기준 ms)"""
+    started = time.perf_counter()
+    text = service.transcribe(pcm.tobytes(), RATE, 2)
+    pipeline.analyze(text, PipelineTrace())
+    return ENDPOINT_MS + (time.perf_counter() - started) * 1000
+
+
+def run_streaming(pipeline: KioskPipeline, service: STTService, pcm: np.ndarray, realtime: bool) -> Dict:
+    """스트리밍 방식: 부분 인식 + 선행 분석 (발화 끝 기준 ms와 결과 경로)"""
+    early = pipeline.start_early_analysis()
+    transcriber = StreamingTranscriber(service, RATE, 2, on_stable=early.update, on_pause=early.speculate)
+    play(pcm, transcriber, realtime)
+    text = transcriber.finish()
+    early.finish(text, PipelineTrace(), transcriber.speech_end_at)
+    return {"ms": early.speech_end_ms, "path": early.path, "partials": transcriber.partials}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="스트리밍 음성 입력 벤치마크 (발화 끝 → 추천 지연)")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL 코퍼스 경로")
+    parser.add_argument("--utterances", type=int, default=8, help="측정할 문장 수 (코퍼스에서 고르게 선택)")
+    parser.add_argument("--rtf", type=float, default=0.3, help="대역 인식 엔진의 실시간 배율")
+    parser.add_argument("--step", type=float, default=0.5, help="--redecode 재인식 간격(초)")
+    parser.add_argument("--redecode", action="store_true", help="매번 전체를 다시 인식하는 엔진으로 측정")
+    parser.add_argument("--latency", type=float, default=0.3, help="스텁 LLM 첫 토큰 지연(초)")
+    parser.add_argument("--fast", action="store_true", help="실시간 대기 없이 전송 (선행 분석 시간이 줄어듦)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    rows = corpus[::max(1, len(corpus) // args.utterances)][:args.utterances]
+    canned = {
+        row["text"]: json.dumps(row["llm_response"], ensure_ascii=False)
+        for row in corpus if row.get("llm_response")
+    }
+    backend = ScriptedBackend(args.rtf, args.step, args.redecode)
+    service = STTService(backend_names=[], preprocess=False)
+    service.backends = [backend]
+
+    batch_ms: List[float] = []
+    stream_ms: List[float] = []
+    paths: Dict[str, int] = {}
+    with StubOllamaServer(latency=args.latency, json_responses=canned) as server:
+        engine = OllamaEngine(base_url=server.base_url)
+        pipeline = KioskPipeline(MENU_DATA, engine)
+        # 추천 로직의 디버그 출력은 측정에서 제외
+        with contextlib.redirect_stdout(io.StringIO()):
+            for row in rows:
+                backend.words = row["text"].split()
+                pcm = synthesize(backend.words)
+                get_intent_cache().clear()
+                batch_ms.append(run_batch(pipeline, service, pcm))
+                get_intent_cache().clear()
+                result = run_streaming(pipeline, service, pcm, not args.fast)
+                stream_ms.append(result["ms"])
+                paths[result["path"]] = paths.get(result["path"], 0) + 1
+        engine.close()
+
+    mode = f"재인식 {args.step}s 간격" if args.redecode else "이어서 인식"
+    print(f"문장 {len(rows)}개, 인식 RTF {args.rtf} ({mode}), LLM 지연 {args.latency}s, 발화 종료 판정 {ENDPOINT_MS}ms 무음")
+    print("발화 끝 → 추천 준비 (종료 판정 대기 포함)")
+    print(f"  일괄 인식 후 분석     p50 {statistics.median(batch_ms):8.1f} ms   max {max(batch_ms):8.1f} ms")
+    print(f"  스트리밍 + 선행 분석  p50 {statistics.median(stream_ms):8.1f} ms   max {max(stream_ms):8.1f} ms")
+    print(f"  결과 경로: {', '.join(f'{name} {count}' for name, count in sorted(paths.items()))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+주문 문장 재생(replay) 벤치마크
+JSONL 코퍼스의 손님 문장을 recommend_menus → suggest_combo (→ 권유 문장) 순서로 재생하고
+단계별 p50/p95/p99 지연, 처리량, 응답 경로(규칙/캐시/LLM/대체) 비율을 JSON/CSV로 남긴다.
+LLM은 스텁 Ollama 서버로 대체하므로 --latency/--token-delay로 모델 속도를 흉내낸다.
+
+코퍼스 형식 (한 줄에 하나):
+    {"text": "손님 문장", "llm_response": {...}}   # llm_response는 선택 (스텁이 돌려줄 분석 JSON)
+
+실행 예:
+    python -m benchmarks.replay --concurrency 8 --requests 500 --latency 0.3
+    python -m benchmarks.replay --rate 20 --duration 30 --json out.json --csv out.csv --label v1.2
+    python -m benchmarks.replay --unconstrained --token-delay 0.01   # 생성 프로필 끄고 토큰 수 비교
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from benchmarks.bench_fast_path import percentile
+from benchmarks.stub_ollama import StubOllamaServer
+from intent_cache import IntentCache
+from llm_engine import OllamaEngine
+from llm_scheduler import PRIORITY_PITCH, LLMScheduler
+from menu_data import MENU_DATA
+from menu_recommender import recommend_menus, suggest_combo
+from pipeline import PITCH_PROFILE, PipelineTrace, build_pitch_prompt
+from prompt_builder import get_prompt_builder
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus.jsonl")
+SOURCES = ("rules", "precomputed", "cache", "llm", "fallback", "shed")
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    """JSONL 코퍼스 로드 (text 필드가 없는 줄은 건너뜀)"""
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            if row.get("text"):
+                rows.append(row)
+    return rows
+
+
+class ReplayRunner:
+    """
+    코퍼스 한 건을 처리하고 단계별 시간을 모으는 실행기
+
+    Args:
+        engine: 스텁 서버를 가리키는 OllamaEngine
+        cache: 분석 캐시 (실행마다 새로 만들어 결과를 재현 가능하게 함)
+        pitch: 권유 문장 생성까지 측정할지
+        constrained: 권유 문장에 생성 프로필(1문장 상한)을 쓸지
+    """
+
+    def __init__(self, engine: OllamaEngine, cache: IntentCache, pitch: bool, constrained: bool = True):
+        self.engine = engine
+        self.cache = cache
+        self.pitch = pitch
+        self.constrained = constrained
+        self.traces: List[PipelineTrace] = []
+        self.sources: Dict[str, int] = {source: 0 for source in SOURCES}
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def run_one(self, text: str, scheduled: Optional[float] = None):
+        """
+        문장 하나 처리
+
+        Args:
+            text: 손님 문장
+            scheduled: 열린 루프에서 요청이 도착했어야 할 시각 (대기 시간 측정용)
+        """
+        trace = PipelineTrace()
+        if scheduled is not None:
+            trace.started = scheduled
+            trace.record("queue", scheduled, time.perf_counter())
+        try:
+            with trace.stage("analysis"):
+                intent, recommendations = recommend_menus(MENU_DATA, text, self.engine, cache=self.cache)
+            with trace.stage("combo"):
+                suggest_combo(recommendations, MENU_DATA, budget=intent.get("budget"), allergies=intent.get("allergies"))
+            if self.pitch:
+                with trace.stage("pitch"):
+                    self.engine.generate_response(
+                        build_pitch_prompt(text, recommendations),
+                        json_mode=False,
+                        priority=PRIORITY_PITCH,
+                        profile=PITCH_PROFILE if self.constrained else None
+                    )
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            print(f"재생 에러: {e}")
+            return
+        trace.record("total", trace.started, time.perf_counter())
+        with self._lock:
+            self.traces.append(trace)
+            source = intent.get("source", "fallback")
+            self.sources[source] = self.sources.get(source, 0) + 1
+
+
+def run_closed_loop(runner: ReplayRunner, texts: List[str], concurrency: int, total: int):
+    """닫힌 루프: 워커 N개가 응답을 받는 즉시 다음 요청을 보냄"""
+    counter = iter(range(total))
+    counter_lock = threading.Lock()
+
+    def worker():
+        while True:
+            with counter_lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            runner.run_one(texts[i % len(texts)])
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_open_loop(runner: ReplayRunner, texts: List[str], concurrency: int, rate: float, total: int, seed: int):
+    """열린 루프: 응답과 무관하게 포아송 도착(평균 rate/초)으로 요청, 동시 처리는 concurrency까지"""
+    rng = random.Random(seed)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        next_arrival = time.perf_counter()
+        for i in range(total):
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(runner.run_one, texts[i % len(texts)], next_arrival)
+            next_arrival += rng.expovariate(rate)
+
+
+def summarize(runner: ReplayRunner, elapsed: float, cache: IntentCache, engine: OllamaEngine) -> Dict[str, Any]:
+    """단계별 지연 분포와 응답 경로 비율 집계"""
+    durations: Dict[str, List[float]] = {}
+    for trace in runner.traces:
+        for name, timing in trace.as_dict().items():
+            durations.setdefault(name, []).append(timing["duration_ms"])
+
+    stages = {
+        name: {
+            "count": len(values),
+            "mean_ms": sum(values) / len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99)
+        }
+        for name, values in sorted(durations.items())
+    }
+    completed = len(runner.traces)
+    sources = dict(runner.sources)
+    rate = (lambda n: n / completed if completed else 0.0)
+    return {
+        "requests": completed,
+        "errors": runner.errors,
+        "elapsed_s": elapsed,
+        "throughput_rps": completed / elapsed if elapsed else 0.0,
+        "stages": stages,
+        "sources": sources,
+        "rates": {
+            "rules_rate": rate(sources.get("rules", 0)),
+            "cache_hit_rate": cache.stats()["hit_rate"],
+            "llm_rate": rate(sources.get("llm", 0)),
+            "fallback_rate": rate(sources.get("fallback", 0) + sources.get("shed", 0))
+        },
+        "intent_cache": cache.stats(),
+        "scheduler": engine.scheduler.stats()
+    }
+
+
+def write_csv(path: str, label: str, report: Dict[str, Any]):
+    """릴리스 간 비교용 평면 CSV (단계 행 + 비율/처리량 행)"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["label", "kind", "name", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "value"])
+        for name, s in report["stages"].items():
+            writer.writerow([label, "stage", name, s["count"],
+                             f"{s['mean_ms']:.3f}", f"{s['p50_ms']:.3f}", f"{s['p95_ms']:.3f}", f"{s['p99_ms']:.3f}", ""])
+        for name, value in report["rates"].items():
+            writer.writerow([label, "rate", name, "", "", "", "", "", f"{value:.4f}"])
+        writer.writerow([label, "throughput", "throughput_rps", report["requests"], "", "", "", "", f"{report['throughput_rps']:.3f}"])
+        if "tokens_per_llm_request" in report:
+            writer.writerow([label, "tokens", "tokens_per_llm_request", report["stub_llm_requests"], "", "", "", "", f"{report['tokens_per_llm_request']:.2f}"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="주문 문장 재생 벤치마크")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL 코퍼스 경로")
+    parser.add_argument("--requests", type=int, default=None, help="총 요청 수 (기본: 코퍼스 크기)")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시 처리 수 (닫힌 루프는 워커 수)")
+    parser.add_argument("--rate", type=float, default=None, help="열린 루프 도착률(요청/초), 없으면 닫힌 루프")
+    parser.add_argument("--duration", type=float, default=None, help="열린 루프 실행 시간(초), --requests 대신 사용")
+    parser.add_argument("--latency", type=float, default=0.3, help="스텁 LLM 첫 토큰 지연(초)")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="스텁 LLM 토큰 간 지연(초)")
+    parser.add_argument("--llm-concurrency", type=int, default=1, help="스케줄러 동시 LLM 요청 수")
+    parser.add_argument("--llm-queue", type=int, default=32, help="스케줄러 대기열 길이")
+    parser.add_argument("--no-cache", action="store_true", help="분석 캐시 끄기")
+    parser.add_argument("--no-pitch", action="store_true", help="권유 문장 생성 제외")
+    parser.add_argument("--unconstrained", action="store_true", help="생성 프로필(스키마/num_predict/stop) 끄기")
+    parser.add_argument("--seed", type=int, default=0, help="도착 간격/코퍼스 순서 시드")
+    parser.add_argument("--shuffle", action="store_true", help="코퍼스 순서 섞기")
+    parser.add_argument("--label", default="", help="결과에 붙일 릴리스/실험 이름")
+    parser.add_argument("--json", dest="json_path", help="JSON 결과 파일")
+    parser.add_argument("--csv", dest="csv_path", help="CSV 결과 파일")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        parser.error(f"코퍼스가 비어 있음: {args.corpus}")
+    if args.shuffle:
+        random.Random(args.seed).shuffle(corpus)
+    texts = [row["text"] for row in corpus]
+    canned = {
+        row["text"]: json.dumps(row["llm_response"], ensure_ascii=False)
+        for row in corpus if row.get("llm_response")
+    }
+    if args.rate and args.duration:
+        total = int(args.rate * args.duration)
+    else:
+        total = args.requests or len(texts)
+
+    cache = IntentCache(max_size=0 if args.no_cache else 256)
+    with StubOllamaServer(latency=args.latency, token_delay=args.token_delay, json_responses=canned) as server:
+        engine = OllamaEngine(
+            base_url=server.base_url,
+            pool_size=max(args.concurrency, args.llm_concurrency),
+            scheduler=LLMScheduler(max_concurrency=args.llm_concurrency, max_queue=args.llm_queue)
+        )
+        get_prompt_builder().constrained = not args.unconstrained
+        runner = ReplayRunner(engine, cache, pitch=not args.no_pitch, constrained=not args.unconstrained)
+        started = time.perf_counter()
+        # 추천 로직의 디버그 출력은 측정에서 제외
+        with contextlib.redirect_stdout(io.StringIO()):
+            if args.rate:
+                run_open_loop(runner, texts, args.concurrency, args.rate, total, args.seed)
+            else:
+                run_closed_loop(runner, texts, args.concurrency, total)
+        elapsed = time.perf_counter() - started
+        report = summarize(runner, elapsed, cache, engine)
+        report["stub_llm_requests"] = server.request_count
+        # 스텁이 실제로 보낸 토큰 수 (조기 중단/상한으로 줄어든 디코딩 양)
+        report["stub_tokens_sent"] = server.tokens_sent
+        report["tokens_per_llm_request"] = server.tokens_sent / server.request_count if server.request_count else 0.0
+        engine.close()
+
+    report["label"] = args.label
+    report["config"] = {
+        key: value for key, value in vars(args).items() if key not in ("json_path", "csv_path", "label")
+    }
+    report["config"]["mode"] = "open" if args.rate else "closed"
+
+    mode = f"열린 루프 {args.rate}/s" if args.rate else f"닫힌 루프 x{args.concurrency}"
+    print(f"{report['requests']}건 ({mode}), {elapsed:.1f}s, 처리량 {report['throughput_rps']:.1f} req/s, 에러 {report['errors']}건")
+    for name, s in report["stages"].items():
+        print(f"  {name:<10} p50 {s['p50_ms']:8.1f}ms  p95 {s['p95_ms']:8.1f}ms  p99 {s['p99_ms']:8.1f}ms")
+    print(f"  LLM 요청 {report['stub_llm_requests']}건, 생성 토큰 {report['stub_tokens_sent']}개 (요청당 {report['tokens_per_llm_request']:.1f})")
+    rates = report["rates"]
+    print(
+        f"  규칙 {rates['rules_rate']:.0%} · LLM {rates['llm_rate']:.0%} · "
+        f"캐시 적중 {rates['cache_hit_rate']:.0%} · 대체 응답 {rates['fallback_rate']:.0%}"
+    )
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.csv_path:
+        write_csv(args.csv_path, args.label, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+로컬 스텁 Ollama 서버 - 벤치마크용
+실제 모델 없이 /api/generate 응답 지연과 NDJSON 스트리밍을 흉내낸다.
+
+실행 예:
+    python -m benchmarks.stub_ollama --port 11435 --latency 0.05
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+# JSON 모드(의도 분석) 요청에 돌려줄 기본 응답
+DEFAULT_JSON_RESPONSE = json.dumps({
+    "understanding": "매운 버거 추천 요청",
+    "budget": None,
+    "allergies": [],
+    "recommended_menus": ["스파이시 할라피뇨 버거", "버비큐 비프 버거"],
+    "reason": "매운 맛을 원하셔서 맵기 단계가 높은 버거를 골랐습니다."
+}, ensure_ascii=False)
+
+# 일반 텍스트(권유 문장) 요청에 돌려줄 기본 응답
+# (1문장 지시를 넘겨 덧붙이는 모델을 흉내냄 - 줄바꿈 stop / num_predict 제한 효과 측정용)
+DEFAULT_TEXT_RESPONSE = (
+    "스파이시 할라피뇨 버거는 화끈한 매운맛으로 스트레스를 날려드려요!\n\n"
+    "참고로 더블 치즈 버거도 인기 메뉴이니 함께 고려해 보세요. 음료는 콜라를 추천드립니다."
+)
+
+# 분석 프롬프트 끝의 사용자 입력 (문장별 준비된 응답 조회용)
+_USER_INPUT_PATTERN = re.compile(r'\[사용자 입력\]\n"(.*)"\s*$', re.DOTALL)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Ollama /api/generate 호환 요청 핸들러"""
+    protocol_version = "HTTP/1.1"  # keep-alive 지원
+    disable_nagle_algorithm = True  # 작은 NDJSON 청크가 Nagle/지연 ACK에 묶이지 않도록
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_body(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def do_GET(self):
+        if self.path.startswith("/api/tags"):
+            body = json.dumps({"models": [{"name": self.server.model}]}).encode("utf-8")
+            self._send_body(200, body, "application/json")
+        else:
+            self._send_body(200, b"Ollama is running", "text/plain")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != "/api/generate":
+            self._send_body(404, b"not found", "text/plain")
+            return
+
+        server = self.server
+        text = server.response_for(payload)
+        options = payload.get("options") or {}
+        done_reason = "stop"
+        # stop 문자열은 출력에서 제외하고 거기서 끝냄 (Ollama와 같음)
+        for stop in options.get("stop") or []:
+            if stop and stop in text:
+                text = text[:text.index(stop)]
+        started = time.perf_counter()
+        time.sleep(server.latency)
+
+        with server.lock:
+            server.request_count += 1
+
+        if not payload.get("stream", True):
+            body = json.dumps({
+                "model": payload.get("model"),
+                "response": text,
+                "done": True
+            }, ensure_ascii=False).encode("utf-8")
+            self._send_body(200, body, "application/json")
+            return
+
+        # NDJSON 스트리밍: 토큰 단위로 끊어서 전송
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            step = max(1, server.chunk_chars)
+            chunks = [text[i:i + step] for i in range(0, len(text), step)]
+            # 청크 하나를 토큰 하나로 보고 num_predict에서 자름
+            num_predict = options.get("num_predict")
+            if num_predict is not None and 0 <= num_predict < len(chunks):
+                chunks = chunks[:num_predict]
+                done_reason = "length"
+            for piece in chunks:
+                chunk = {"model": payload.get("model"), "response": piece, "done": False}
+                self._write_chunk((json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8"))
+                with server.lock:
+                    server.tokens_sent += 1
+                if server.token_delay:
+                    time.sleep(server.token_delay)
+            elapsed_ns = int((time.perf_counter() - started) * 1e9)
+            final = {
+                "model": payload.get("model"),
+                "response": "",
+                "done": True,
+                "done_reason": done_reason,
+                "total_duration": elapsed_ns,
+                "prompt_eval_count": len(payload.get("prompt", "")) // 4,
+                "prompt_eval_duration": int(server.latency * 1e9),
+                "eval_count": len(chunks),
+                "eval_duration": max(0, elapsed_ns - int(server.latency * 1e9))
+            }
+            self._write_chunk((json.dumps(final) + "\n").encode("utf-8"))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 스트림을 취소한 경우
+            pass
+
+
+class StubOllamaServer(ThreadingHTTPServer):
+    """
+    백그라운드 스레드에서 동작하는 스텁 Ollama 서버
+
+    Args:
+        port: 바인딩 포트 (0이면 임의 포트)
+        latency: 요청당 첫 토큰까지의 지연(초)
+        token_delay: 토큰 간 지연(초)
+        json_response: format=json 요청에 대한 응답 텍스트
+        text_response: 일반 요청에 대한 응답 텍스트
+        chunk_chars: 스트리밍 청크당 글자 수
+        json_responses: 사용자 입력별 format=json 응답 (없는 입력은 json_response)
+    """
+    daemon_threads = True
+    request_queue_size = 256  # 동시 연결 폭주 시 SYN 큐 초과로 리셋되지 않도록
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.0,
+        token_delay: float = 0.0,
+        json_response: str = DEFAULT_JSON_RESPONSE,
+        text_response: str = DEFAULT_TEXT_RESPONSE,
+        chunk_chars: int = 4,
+        model: str = "gemma2:latest",
+        json_responses: Optional[Dict[str, str]] = None
+    ):
+        super().__init__(("127.0.0.1", port), _StubHandler)
+        self.latency = latency
+        self.token_delay = token_delay
+        self.json_response = json_response
+        self.text_response = text_response
+        self.chunk_chars = chunk_chars
+        self.model = model
+        self.json_responses = json_responses or {}
+        self.request_count = 0
+        self.tokens_sent = 0  # 실제로 보낸 토큰 청크 수 (클라이언트가 끊으면 거기까지)
+        self.lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def handle_error(self, request, client_address):
+        # 클라이언트가 keep-alive 연결을 끊는 것은 정상 종료로 취급
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+    def response_for(self, payload: dict) -> str:
+        """요청에 돌려줄 응답 텍스트 (JSON 모드면 사용자 입력별 응답 우선)"""
+        if not payload.get("format"):
+            return self.text_response
+        if self.json_responses:
+            match = _USER_INPUT_PATTERN.search(payload.get("prompt", ""))
+            if match and match.group(1) in self.json_responses:
+                return self.json_responses[match.group(1)]
+        return self.json_response
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def start(self) -> "StubOllamaServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "StubOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="스텁 Ollama 서버")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.05, help="첫 토큰 지연(초)")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="토큰 간 지연(초)")
+    args = parser.parse_args()
+
+    server = StubOllamaServer(port=args.port, latency=args.latency, token_delay=args.token_delay)
+    print(f"스텁 Ollama 서버 실행 중: {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Combo Engine - 예산 안에서 최적의 메인+사이드+음료 조합 탐색
+가격 정렬 배열 + 접두 최댓값(prefix-best) + bisect로 사이드마다 최적 음료를 O(log D)에 찾고,
+지배되는(더 비싸면서 점수가 낮은) 사이드를 제외한 뒤 점수 상한으로 조기 종료한다.
+"""
+import heapq
+import threading
+from bisect import bisect_right
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+from menu_index import MenuIndex
+
+Menu = Dict[str, Any]
+# 항목별 점수 함수: (메뉴, 컨텍스트) -> 점수 (높을수록 좋음, 조합 점수는 항목 점수의 합)
+ItemScorer = Callable[[Menu, Dict[str, Any]], float]
+
+
+def _budget_fit(menu: Menu, context: Dict[str, Any]) -> float:
+    # 예산이 있으면 총액이 예산에 가까울수록, 없으면 저렴할수록 높은 점수
+    return menu["price"] if context.get("budget") else -menu["price"]
+
+
+def _protein(menu: Menu, context: Dict[str, Any]) -> float:
+    return menu.get("protein", 0)
+
+
+def _low_calories(menu: Menu, context: Dict[str, Any]) -> float:
+    return -menu.get("calories", 0)
+
+
+def _spicy_match(menu: Menu, context: Dict[str, Any]) -> float:
+    preferred = context.get("spicy")
+    if preferred is None:
+        return 0.0
+    return -abs(menu.get("spicy", 0) - preferred)
+
+
+def _budget_fit_ceiling(context: Dict[str, Any]) -> Optional[float]:
+    # 예산이 있으면 총액(=점수 합)은 예산을 넘을 수 없음
+    return context.get("budget") or None
+
+
+SCORERS: Dict[str, ItemScorer] = {
+    "budget_fit": _budget_fit,
+    "protein": _protein,
+    "calories": _low_calories,
+    "spicy": _spicy_match,
+}
+
+# 조합 점수의 이론적 최댓값 (도달하면 탐색 조기 종료)
+SCORE_CEILINGS: Dict[str, Callable[[Dict[str, Any]], Optional[float]]] = {
+    "budget_fit": _budget_fit_ceiling,
+}
+
+
+class _CategoryTable:
+    """카테고리 하나에 대한 조합 탐색용 배열 (알레르기 제외/점수 기준별로 캐시)"""
+    __slots__ = ("by_price", "prices", "prefix_best", "frontier", "max_score")
+
+    def __init__(self, menus: List[Menu], scorer: ItemScorer, context: Dict[str, Any]):
+        # 가격 오름차순 + 각 위치까지의 최고 점수 항목 (가격 상한 질의용)
+        self.by_price = menus
+        self.prices = [m["price"] for m in menus]
+        self.prefix_best: List[Tuple[float, Menu]] = []
+        # 파레토 프런티어: 더 싼 항목보다 점수가 높은 항목만 (가격↑ = 점수↑)
+        frontier: List[Tuple[float, Menu]] = []
+        best: Optional[Tuple[float, Menu]] = None
+        for menu in menus:
+            score = scorer(menu, context)
+            if best is None or score > best[0]:
+                best = (score, menu)
+                if frontier and frontier[-1][1]["price"] == menu["price"]:
+                    frontier[-1] = best
+                else:
+                    frontier.append(best)
+            self.prefix_best.append(best)
+        # 점수 내림차순 (상한 기반 조기 종료용)
+        self.frontier = frontier[::-1]
+        self.max_score = best[0] if best else 0.0
+
+    def best_under(self, max_price: Optional[float]) -> Optional[Tuple[float, Menu]]:
+        """가격 상한 이하에서 점수가 가장 높은 항목 (bisect, O(log n))"""
+        if not self.by_price:
+            return None
+        if max_price is None:
+            return self.prefix_best[-1]
+        pos = bisect_right(self.prices, max_price)
+        return self.prefix_best[pos - 1] if pos else None
+
+
+class ComboEngine:
+    """
+    세트 조합 탐색기
+
+    Args:
+        main_category: 메인 카테고리
+        side_category: 사이드 카테고리
+        drink_category: 음료 카테고리
+        max_cached_tables: 캐시할 카테고리 테이블 수
+    """
+
+    def __init__(
+        self,
+        main_category: str = "버거",
+        side_category: str = "사이드",
+        drink_category: str = "음료",
+        max_cached_tables: int = 64
+    ):
+        self.main_category = main_category
+        self.side_category = side_category
+        self.drink_category = drink_category
+        self.max_cached_tables = max_cached_tables
+        self._tables: Dict[Tuple, _CategoryTable] = {}
+        self._lock = threading.Lock()
+
+    def _table(
+        self,
+        index: MenuIndex,
+        category: str,
+        allergies: FrozenSet[str],
+        score_name: str,
+        scorer: ItemScorer,
+        context: Dict[str, Any]
+    ) -> _CategoryTable:
+        """메뉴 버전/카테고리/알레르기/점수 기준별 테이블 (이름 있는 점수 함수만 캐시)"""
+        key = (index.version, category, allergies, score_name, bool(context.get("budget")), context.get("spicy"))
+        table = self._tables.get(key) if score_name else None
+        if table is None:
+            menus = index.excluding_allergens(allergies, index.sorted_by_price(category))
+            table = _CategoryTable(menus, scorer, context)
+            if score_name:
+                with self._lock:
+                    if len(self._tables) >= self.max_cached_tables:
+                        self._tables.clear()
+                    self._tables[key] = table
+        return table
+
+    def find_combos(
+        self,
+        index: MenuIndex,
+        mains: Iterable[Menu],
+        budget: Optional[int] = None,
+        allergies: Iterable[str] = (),
+        score: Union[str, ItemScorer] = "budget_fit",
+        top_k: int = 3,
+        spicy: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        예산 안에서 점수가 높은 조합 top-k 탐색
+
+        Args:
+            index: 메뉴 인덱스
+            mains: 메인 후보 목록
+            budget: 총액 상한 (None이면 제한 없음)
+            allergies: 제외할 알레르기 코드
+            score: 점수 기준 이름(SCORERS) 또는 항목 점수 함수
+            top_k: 반환할 조합 수 (메인+사이드 조합마다 최적 음료 하나,
+                   더 싼 사이드보다 점수가 낮은 사이드는 후보에서 제외)
+            spicy: 선호 맵기 (score="spicy"일 때 사용)
+
+        Returns:
+            점수 내림차순 조합 목록 [{"main", "side", "drink", "total_price", "score"}, ...]
+        """
+        if isinstance(score, str):
+            score_name, scorer = score, SCORERS[score]
+        else:
+            score_name, scorer = "", score
+        allergy_set = frozenset(allergies)
+        context = {"budget": budget, "spicy": spicy}
+        ceiling_fn = SCORE_CEILINGS.get(score_name)
+        ceiling = ceiling_fn(context) if ceiling_fn else None
+
+        sides = self._table(index, self.side_category, allergy_set, score_name, scorer, context)
+        drinks = self._table(index, self.drink_category, allergy_set, score_name, scorer, context)
+        if not sides.by_price or not drinks.by_price:
+            return []
+        min_drink_price = drinks.prices[0]
+
+        # (점수, 순번, 조합) 최소 힙으로 top-k 유지
+        heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        counter = 0
+        seen_mains = set()
+        for main in mains:
+            if ceiling is not None and len(heap) >= top_k and heap[0][0] >= ceiling:
+                break  # 이미 최댓값 조합으로 top-k가 찼음
+            if main["menu_id"] in seen_mains or allergy_set.intersection(main.get("allergy", [])):
+                continue
+            seen_mains.add(main["menu_id"])
+            remaining = budget - main["price"] if budget else None
+            if remaining is not None and remaining < sides.prices[0] + min_drink_price:
+                continue
+            main_score = scorer(main, context)
+
+            for side_score, side in sides.frontier:
+                bound = main_score + side_score + drinks.max_score
+                if ceiling is not None:
+                    bound = min(bound, ceiling)
+                if len(heap) >= top_k and bound <= heap[0][0]:
+                    break  # 남은 사이드는 점수가 더 낮으므로 top-k에 들 수 없음
+                if remaining is not None and side["price"] + min_drink_price > remaining:
+                    continue
+                best_drink = drinks.best_under(remaining - side["price"] if remaining is not None else None)
+                if best_drink is None:
+                    continue
+                drink_score, drink = best_drink
+                total_score = main_score + side_score + drink_score
+                combo = {
+                    "main": main,
+                    "side": side,
+                    "drink": drink,
+                    "total_price": main["price"] + side["price"] + drink["price"],
+                    "score": total_score
+                }
+                counter += 1
+                if len(heap) < top_k:
+                    heapq.heappush(heap, (total_score, -counter, combo))
+                elif total_score > heap[0][0]:
+                    heapq.heapreplace(heap, (total_score, -counter, combo))
+
+        return [combo for _, _, combo in sorted(heap, key=lambda x: (-x[0], -x[1]))]
+
+
+# 싱글톤 인스턴스 관리
+_combo_engine: Optional[ComboEngine] = None
+
+def get_combo_engine() -> ComboEngine:
+    """ComboEngine 싱글톤 인스턴스 반환"""
+    global _combo_engine
+    if _combo_engine is None:
+        _combo_engine = ComboEngine()
+    return _combo_engine
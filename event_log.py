@@ -0,0 +1,437 @@
+"""
+Event Log - 추천/조합 수락/지연 이벤트의 추가 전용(JSONL) 기록
+- append()는 메모리 대기열에 넣기만 하고 바로 반환: 직렬화/쓰기/fsync는 백그라운드 작성 스레드가 담당
+- 그룹 커밋: 첫 이벤트 뒤 max_delay 동안 모인 이벤트(최대 batch_size개)를 write 한 번으로 기록
+- fsync 정책: always(그룹마다) / interval(fsync_interval초마다, 기본) / never(OS에 맡김)
+- 대기열은 max_pending개로 제한: 넘치면 버리고 개수를 셈 (block_timeout > 0이면 그만큼 기다림)
+  → 디스크가 느려도 손님 요청 경로에 지연이 더해지지 않음
+- 프로세스마다 자기 세그먼트 파일(events-<시각>-<pid>-<번호>.jsonl)에 쓰고 segment_bytes를 넘으면 새 파일로 교체
+- read_events()는 세그먼트를 시각 순으로 합쳐 한 줄씩 흘려 읽음 (follow=True면 새 이벤트를 계속 따라 읽음)
+
+이벤트 줄 형식: {"ts": 유닉스 시각, "pid": 프로세스, "seq": 프로세스 내 순번, "type": 종류, ...필드}
+
+KIOSK_EVENT_LOG 환경변수: 로그 디렉터리 (기본 results/events, off면 기록 안 함)
+KIOSK_EVENT_FSYNC 환경변수: fsync 정책 (기본 interval)
+
+실행 예:
+    python -m event_log tail results/events --follow
+    python -m event_log csv results/events results/performance_metrics.csv
+"""
+import argparse
+import atexit
+import csv
+import glob
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import metrics
+
+DEFAULT_DIRECTORY = os.path.join("results", "events")
+FSYNC_POLICIES = ("always", "interval", "never")
+SEGMENT_PATTERN = "events-*.jsonl"
+
+# performance_metrics.csv 열 (latency 이벤트 + 같은 요청의 recommendation 이벤트)
+CSV_STAGES = ("stt", "analysis", "combo", "pitch_first_token", "pitch", "tts")
+
+
+class EventLog:
+    """
+    백그라운드 그룹 커밋 이벤트 로그
+
+    Args:
+        directory: 세그먼트 파일 디렉터리 (자동 생성)
+        fsync: fsync 정책 (always / interval / never)
+        fsync_interval: interval 정책의 fsync 간격(초)
+        batch_size: 한 번에 기록할 최대 이벤트 수
+        max_delay: 첫 이벤트 뒤 같은 그룹으로 모을 최대 대기(초)
+        max_pending: 대기열 상한 (메모리 상한)
+        block_timeout: 대기열이 찼을 때 append가 기다릴 최대 시간(초), 0이면 바로 버림
+        segment_bytes: 세그먼트 파일 최대 크기
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_DIRECTORY,
+        fsync: str = "interval",
+        fsync_interval: float = 1.0,
+        batch_size: int = 512,
+        max_delay: float = 0.05,
+        max_pending: int = 10000,
+        block_timeout: float = 0.0,
+        segment_bytes: int = 64 * 1024 * 1024
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync 정책은 {FSYNC_POLICIES} 중 하나: {fsync}")
+        self.directory = directory
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.block_timeout = block_timeout
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._pending: "deque[Dict[str, Any]]" = deque()
+        self._cond = threading.Condition()
+        self._seq = 0            # append로 받은 마지막 순번
+        self._written_seq = 0    # 파일에 쓴 마지막 순번
+        self._synced_seq = 0     # fsync 정책대로 내려 쓴 마지막 순번
+        self._failed_seq = 0     # 쓰기에 실패해 버린 그룹의 마지막 순번
+        self._flushed_seq = 0    # 직전 flush()가 확인한 순번 (그 뒤의 실패만 다음 flush가 보고)
+        self._flush_requested = False
+        self._closing = False
+        self._file = None
+        self._segment_size = 0
+        self._segment_count = 0
+        self._dirty = False      # 쓰고 아직 fsync하지 않은 데이터 있음
+        self._last_fsync = time.monotonic()
+        self._stats = {"appended": 0, "written": 0, "dropped": 0, "groups": 0, "fsyncs": 0, "bytes": 0, "errors": 0}
+
+        self._thread = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+        self._thread.start()
+
+    # ===== 요청 경로 =====
+    def append(self, event_type: str, **fields: Any) -> bool:
+        """
+        이벤트를 대기열에 추가 (직렬화는 작성 스레드에서 하므로 필드 값은 이후에 고치지 말 것)
+
+        Returns:
+            받았으면 True, 대기열이 차서 버렸으면 False
+        """
+        with self._cond:
+            if len(self._pending) >= self.max_pending and self.block_timeout > 0:
+                self._cond.wait_for(
+                    lambda: len(self._pending) < self.max_pending or self._closing, self.block_timeout
+                )
+            if len(self._pending) >= self.max_pending or self._closing:
+                self._stats["dropped"] += 1
+                metrics.EVENT_LOG.inc(result="dropped")
+                return False
+            self._seq += 1
+            self._pending.append(
+                {"ts": round(time.time(), 6), "pid": os.getpid(), "seq": self._seq, "type": event_type, **fields}
+            )
+            self._stats["appended"] += 1
+            # 그룹이 다 찼을 때와 첫 이벤트일 때만 작성 스레드를 깨움
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        지금까지 받은 이벤트를 모두 쓰고 fsync할 때까지 대기 (정책이 never면 fsync 생략)
+
+        Returns:
+            모두 기록했으면 True, 시간 초과이거나 직전 flush() 뒤 받은 이벤트 중 쓰기에 실패한 것이 있으면 False
+        """
+        with self._cond:
+            since, target = self._flushed_seq, self._seq
+            self._flushed_seq = target
+            self._flush_requested = True
+            self._cond.notify_all()
+            self._cond.wait_for(
+                lambda: max(self._synced_seq, self._failed_seq) >= target or not self._thread.is_alive(), timeout
+            )
+            return self._synced_seq >= target and self._failed_seq <= since
+
+    def close(self, timeout: float = 5.0):
+        """남은 이벤트를 기록하고 작성 스레드 종료"""
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    # ===== 작성 스레드 =====
+    def _run(self):
+        while True:
+            with self._cond:
+                batch, force = self._next_group()
+                if batch is None:
+                    break
+            if batch:
+                self._write_group(batch, force)
+            elif force or time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._sync()
+        self._sync()
+        if self._file is not None:
+            self._file.close()
+
+    def _next_group(self) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        """(잠금 안에서) 다음 그룹을 꺼냄 - 종료 후 대기열이 비면 (None, False)"""
+        while not self._pending and not self._closing and not self._flush_requested:
+            # interval 정책: 새 이벤트가 없어도 쓴 데이터는 fsync_interval 안에 fsync
+            wait = self.fsync_interval if self._dirty and self.fsync == "interval" else None
+            if not self._cond.wait(wait):
+                return [], False
+        if not self._pending and self._closing:
+            return None, False
+        # 그룹 커밋 창: 그룹이 덜 찼으면 max_delay 동안 더 모음
+        deadline = time.monotonic() + self.max_delay
+        while len(self._pending) < self.batch_size and not self._closing and not self._flush_requested:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._cond.wait(remaining):
+                break
+        count = min(len(self._pending), self.batch_size)
+        batch = [self._pending.popleft() for _ in range(count)]
+        force = self._flush_requested and not self._pending
+        if force:
+            self._flush_requested = False
+        self._cond.notify_all()  # 대기열 자리가 난 것을 기다리는 append에 알림
+        return batch, force
+
+    def _open_segment(self):
+        if self._file is not None:
+            self._sync()
+            old, self._file = self._file, None  # 새 파일을 못 열어도 닫힌 파일에 쓰지 않도록 먼저 비움
+            old.close()
+        self._segment_count += 1
+        name = f"events-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._segment_count:04d}.jsonl"
+        self._file = open(os.path.join(self.directory, name), "ab")
+        self._segment_size = self._file.tell()
+
+    def _write_group(self, batch: List[Dict[str, Any]], force: bool):
+        started = time.perf_counter()
+        lines = []
+        for event in batch:
+            try:
+                lines.append(json.dumps(event, ensure_ascii=False, default=str))
+            except (TypeError, ValueError) as e:
+                self._stats["errors"] += 1
+                print(f"이벤트 직렬화 실패 ({event.get('type')}): {e}")
+        data = ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+        ok = False
+        try:
+            if self._file is None or self._segment_size + len(data) > self.segment_bytes:
+                self._open_segment()
+            self._file.write(data)
+            self._file.flush()
+            self._segment_size += len(data)
+            self._dirty = True
+            ok = True
+        except (OSError, ValueError) as e:
+            # 쓰기 스레드가 죽으면 이후 이벤트가 모두 버려지므로 그룹 단위로 실패를 기록하고 계속
+            self._stats["errors"] += 1
+            print(f"이벤트 로그 쓰기 실패: {e}")
+        with self._cond:
+            if ok:
+                self._written_seq = batch[-1]["seq"]
+                self._stats["written"] += len(lines)
+                self._stats["groups"] += 1
+                self._stats["bytes"] += len(data)
+            else:
+                # 기록된 것으로 세지 않음 → 이 그룹을 기다리는 flush()는 False를 받음
+                self._failed_seq = batch[-1]["seq"]
+                self._stats["dropped"] += len(lines)
+                self._cond.notify_all()
+        if self.fsync != "interval" or force or time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._sync()
+        metrics.EVENT_LOG.inc(len(lines), result="written" if ok else "dropped")
+        metrics.EVENT_LOG_COMMIT_SECONDS.observe(time.perf_counter() - started, fsync=self.fsync)
+
+    def _sync(self):
+        """정책대로 내려 쓰고 flush() 대기자에게 알림 (never면 fsync 없이 OS 버퍼까지)"""
+        if self._file is not None and self._dirty and self.fsync != "never":
+            try:
+                os.fsync(self._file.fileno())
+                self._stats["fsyncs"] += 1
+            except (OSError, ValueError) as e:
+                self._stats["errors"] += 1
+                print(f"이벤트 로그 fsync 실패: {e}")
+        self._dirty = False
+        self._last_fsync = time.monotonic()
+        with self._cond:
+            self._synced_seq = self._written_seq
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """이벤트 로그 통계 (대기열 길이, 평균 그룹 크기 포함)"""
+        with self._cond:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["pending"] = len(self._pending)
+        stats["avg_group"] = round(stats["written"] / stats["groups"], 1) if stats["groups"] else 0.0
+        stats["fsync"] = self.fsync
+        stats["directory"] = self.directory
+        return stats
+
+
+# ===== 읽기 =====
+def _segments(directory: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN)))
+
+
+def _read_lines(path: str, offset: int = 0) -> Iterator[Tuple[Dict[str, Any], int]]:
+    """세그먼트의 완성된 줄만 (이벤트, 다음 오프셋)으로 - 쓰는 중이거나 잘린 마지막 줄은 건너뜀"""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                return
+            offset += len(line)
+            try:
+                yield json.loads(line), offset
+            except ValueError:
+                continue
+
+
+def read_events(
+    directory: str = DEFAULT_DIRECTORY,
+    types: Optional[Iterable[str]] = None,
+    since: Optional[float] = None,
+    follow: bool = False,
+    poll_interval: float = 0.5
+) -> Iterator[Dict[str, Any]]:
+    """
+    이벤트 로그를 한 줄씩 흘려 읽기 (전체를 메모리에 올리지 않음)
+
+    Args:
+        directory: 세그먼트 파일 디렉터리
+        types: 읽을 이벤트 종류 (None이면 전부)
+        since: 이 유닉스 시각 이후 이벤트만
+        follow: True면 끝에 도달한 뒤에도 새 이벤트를 계속 읽음 (tail -f)
+        poll_interval: follow 모드의 파일 확인 간격(초)
+
+    Yields:
+        이벤트 dict (follow가 아니면 여러 프로세스의 세그먼트를 시각 순으로 합침)
+    """
+    wanted = set(types) if types else None
+
+    def keep(event: Dict[str, Any]) -> bool:
+        return (wanted is None or event.get("type") in wanted) and (since is None or event.get("ts", 0) >= since)
+
+    if not follow:
+        streams = [(event for event, _ in _read_lines(path)) for path in _segments(directory)]
+        for event in heapq.merge(*streams, key=lambda e: (e.get("ts", 0), e.get("seq", 0))):
+            if keep(event):
+                yield event
+        return
+
+    offsets: Dict[str, int] = {}
+    while True:
+        for path in _segments(directory):
+            for event, offset in _read_lines(path, offsets.get(path, 0)):
+                offsets[path] = offset
+                if keep(event):
+                    yield event
+        time.sleep(poll_interval)
+
+
+def export_latency_csv(events: Iterable[Dict[str, Any]], path: str) -> int:
+    """
+    요청별 지연을 CSV로 저장 (README의 results/performance_metrics.csv)
+
+    Args:
+        events: read_events() 결과 (recommendation, latency 이벤트 사용)
+        path: 출력 CSV 경로
+
+    Returns:
+        기록한 행 수
+    """
+    # latency 이벤트는 같은 요청의 recommendation 이벤트 뒤에 오므로 최근 요청만 기억
+    recent: Dict[str, Dict[str, Any]] = {}
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            ["timestamp", "request_id", "answer_source", "recommendations", "end_to_end_ms", "serial_ms"]
+            + [f"{stage}_ms" for stage in CSV_STAGES]
+        )
+        for event in events:
+            request_id = event.get("request_id")
+            if event.get("type") == "recommendation":
+                recent[request_id] = event
+                if len(recent) > 10000:
+                    recent.pop(next(iter(recent)))
+            elif event.get("type") == "latency":
+                rec = recent.pop(request_id, {})
+                stages = event.get("stages") or {}
+                writer.writerow(
+                    [
+                        time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(event["ts"])),
+                        request_id,
+                        rec.get("answer_source", ""),
+                        len(rec.get("menu_ids", [])),
+                        event.get("end_to_end_ms"),
+                        event.get("serial_ms")
+                    ]
+                    + [stages.get(stage, "") for stage in CSV_STAGES]
+                )
+                rows += 1
+    return rows
+
+
+# 싱글톤 인스턴스 관리
+_log: Optional[EventLog] = None
+_log_ready = False
+_log_lock = threading.Lock()
+
+def get_event_log(**kwargs) -> Optional[EventLog]:
+    """
+    EventLog 싱글톤 인스턴스 반환 (종료 시 남은 이벤트 기록)
+
+    Args:
+        **kwargs: 최초 생성 시 EventLog 초기화 파라미터
+
+    Returns:
+        EventLog 인스턴스, 사용 안 함(off)이거나 디렉터리를 만들 수 없으면 None
+    """
+    global _log, _log_ready
+    if not _log_ready:
+        with _log_lock:
+            if not _log_ready:
+                directory = kwargs.pop("directory", None) or os.environ.get("KIOSK_EVENT_LOG", DEFAULT_DIRECTORY)
+                kwargs.setdefault("fsync", os.environ.get("KIOSK_EVENT_FSYNC", "interval"))
+                if directory.strip().lower() not in ("", "off", "0", "none"):
+                    try:
+                        _log = EventLog(directory, **kwargs)
+                        atexit.register(_log.close)
+                    except (OSError, ValueError) as e:
+                        print(f"이벤트 로그를 열 수 없음 ({directory}): {e}")
+                _log_ready = True
+    return _log
+
+
+def log_event(event_type: str, **fields: Any) -> bool:
+    """전역 이벤트 로그에 추가 (꺼져 있으면 아무것도 안 함)"""
+    log = get_event_log()
+    return log.append(event_type, **fields) if log is not None else False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="키오스크 이벤트 로그 읽기")
+    sub = parser.add_subparsers(dest="command", required=True)
+    tail = sub.add_parser("tail", help="이벤트를 JSON 줄로 출력")
+    tail.add_argument("directory", nargs="?", default=DEFAULT_DIRECTORY)
+    tail.add_argument("--type", action="append", dest="types", help="이벤트 종류 (여러 번 지정 가능)")
+    tail.add_argument("--since", type=float, help="이 시각(초 전) 이후만")
+    tail.add_argument("--follow", action="store_true", help="새 이벤트를 계속 따라 읽음")
+    export = sub.add_parser("csv", help="요청별 지연 CSV 저장")
+    export.add_argument("directory", nargs="?", default=DEFAULT_DIRECTORY)
+    export.add_argument("output", nargs="?", default=os.path.join("results", "performance_metrics.csv"))
+    args = parser.parse_args()
+
+    if args.command == "tail":
+        since = time.time() - args.since if args.since else None
+        try:
+            for event in read_events(args.directory, args.types, since, follow=args.follow):
+                sys.stdout.write(json.dumps(event, ensure_ascii=False) + "\n")
+                sys.stdout.flush()
+        except KeyboardInterrupt:
+            pass
+    else:
+        rows = export_latency_csv(read_events(args.directory, ("recommendation", "latency")), args.output)
+        print(f"{args.output}: 요청 {rows}건")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Intent Cache - 자주 들어오는 주문 문장의 분석 결과 캐시
+1단계: 정규화된 입력의 정확 일치
+2단계(선택): 문자 n-gram TF-IDF 코사인 유사도 매칭
+
+KIOSK_INTENT_SIMILARITY 환경변수: 유사도 매칭 임계값 (예: 0.85, 기본 off = 정확 일치만)
+"""
+import copy
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+CacheValue = Tuple[Dict, List[Dict]]
+
+_PUNCT_PATTERN = re.compile(r"[^\w]+", re.UNICODE)
+_NUMBER_PATTERN = re.compile(r"\d+")
+# 부정/제외 표현 (정규화 키 기준, 예산 표현 "안으로/안에서/안쪽"은 제외)
+# "안 매운 버거" vs "매운 버거"처럼 글자는 거의 같아도 뜻이 반대 → 양쪽이 같아야 유사 매칭
+_NEGATION_PATTERN = re.compile(r"안(?!으로|에서|쪽)|않|말고|빼|없|제외|못|싫|덜")
+
+
+def normalize_text(text: str) -> str:
+    """
+    캐시 키용 입력 정규화
+    - NFKC: 분리된 한글 자모(ᄆ+ㅐ+ᄋ...)를 완성형으로 합치고 전각 문자 통일
+    - 소문자화, 문장부호 및 공백 제거 (띄어쓰기 차이 무시)
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return _PUNCT_PATTERN.sub("", text).replace("_", "")
+
+
+def _char_ngrams(text: str, sizes: Tuple[int, ...] = (2, 3)) -> Counter:
+    """문자 n-gram 빈도 (짧은 입력은 문자 단위로 대체)"""
+    grams: Counter = Counter()
+    for n in sizes:
+        grams.update(text[i:i + n] for i in range(len(text) - n + 1))
+    if not grams:
+        grams.update(text)
+    return grams
+
+
+class _Entry:
+    """캐시 엔트리"""
+    __slots__ = ("value", "expires_at", "cost_ms", "grams", "numbers", "negations")
+
+    def __init__(
+        self,
+        value: CacheValue,
+        expires_at: float,
+        cost_ms: float,
+        grams: Counter,
+        numbers: Tuple[str, ...],
+        negations: Tuple[str, ...]
+    ):
+        self.value = value
+        self.expires_at = expires_at
+        self.cost_ms = cost_ms
+        self.grams = grams
+        self.numbers = numbers
+        self.negations = negations
+
+
+class IntentCache:
+    """
+    LRU + TTL 기반 (intent, recommendations) 캐시
+
+    Args:
+        max_size: 최대 엔트리 수 (초과 시 가장 오래 안 쓴 항목 제거)
+        ttl: 엔트리 유효 시간(초)
+        similarity_threshold: 유사도 매칭 임계값 (None이면 정확 일치만 사용, 권장 0.85)
+    """
+
+    def __init__(
+        self,
+        max_size: int = 256,
+        ttl: float = 1800,
+        similarity_threshold: Optional[float] = None
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._doc_freq: Counter = Counter()
+        self._menu_version: Optional[str] = None
+        self._lock = threading.Lock()
+
+        # 지표
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.saved_llm_ms = 0.0
+
+    # ===== 내부 유틸 =====
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._doc_freq.subtract(entry.grams.keys())
+        self._doc_freq += Counter()  # 0 이하 항목 정리
+
+    def _sync_version(self, menu_version: str):
+        """메뉴 버전이 바뀌면 전체 무효화"""
+        if menu_version != self._menu_version:
+            self._entries.clear()
+            self._doc_freq.clear()
+            self._menu_version = menu_version
+
+    def _tfidf(self, grams: Counter) -> Dict[str, float]:
+        total_docs = len(self._entries) + 1
+        return {
+            g: (1 + math.log(tf)) * (math.log((1 + total_docs) / (1 + self._doc_freq.get(g, 0))) + 1)
+            for g, tf in grams.items()
+        }
+
+    @staticmethod
+    def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+        if len(a) > len(b):
+            a, b = b, a
+        dot = sum(w * b.get(g, 0.0) for g, w in a.items())
+        if not dot:
+            return 0.0
+        norm = math.sqrt(sum(w * w for w in a.values())) * math.sqrt(sum(w * w for w in b.values()))
+        return dot / norm if norm else 0.0
+
+    def _find_similar(
+        self, grams: Counter, numbers: Tuple[str, ...], negations: Tuple[str, ...], now: float
+    ) -> Optional[_Entry]:
+        """
+        임계값 이상으로 가장 유사한 엔트리 검색
+        (숫자나 부정 표현이 다르면 제외: "5천원" vs "6천원", "안 매운" vs "매운")
+        """
+        query = self._tfidf(grams)
+        best_key, best_score = None, self.similarity_threshold
+        for key, entry in self._entries.items():
+            if entry.expires_at < now or entry.numbers != numbers or entry.negations != negations:
+                continue
+            score = self._cosine(query, self._tfidf(entry.grams))
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            return None
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key]
+
+    @staticmethod
+    def _clone(value: CacheValue, user_input: str) -> CacheValue:
+        """호출자가 결과를 수정해도 캐시가 오염되지 않도록 복사"""
+        intent, recommendations = value
+        intent = copy.deepcopy(intent)
+        intent["description"] = user_input
+        return intent, list(recommendations)
+
+    # ===== 공개 API =====
+    def get(self, user_input: str, menu_version: str) -> Optional[CacheValue]:
+        """
+        캐시 조회
+
+        Args:
+            user_input: 사용자 입력 원문
+            menu_version: 현재 메뉴 버전 (MenuIndex.version)
+
+        Returns:
+            (intent, recommendations) 또는 None
+        """
+        key = normalize_text(user_input)
+        now = time.monotonic()
+        with self._lock:
+            self._sync_version(menu_version)
+
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at < now:
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+            elif self.similarity_threshold is not None and self._entries:
+                entry = self._find_similar(
+                    _char_ngrams(key), tuple(_NUMBER_PATTERN.findall(key)), tuple(_NEGATION_PATTERN.findall(key)), now
+                )
+                if entry is not None:
+                    self.similar_hits += 1
+
+            if entry is None:
+                self.misses += 1
+                return None
+            self.saved_llm_ms += entry.cost_ms
+            value = entry.value
+
+        return self._clone(value, user_input)
+
+    def put(self, user_input: str, menu_version: str, value: CacheValue, cost_ms: float = 0.0):
+        """
+        분석 결과 저장
+
+        Args:
+            user_input: 사용자 입력 원문
+            menu_version: 현재 메뉴 버전
+            value: (intent, recommendations) 튜플
+            cost_ms: 이 결과를 만드는 데 든 LLM 시간 (적중 시 절약 시간으로 집계)
+        """
+        key = normalize_text(user_input)
+        if not key:
+            return
+        grams = _char_ngrams(key)
+        with self._lock:
+            self._sync_version(menu_version)
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(
+                value=self._clone(value, user_input),
+                expires_at=time.monotonic() + self.ttl,
+                cost_ms=cost_ms,
+                grams=grams,
+                numbers=tuple(_NUMBER_PATTERN.findall(key)),
+                negations=tuple(_NEGATION_PATTERN.findall(key))
+            )
+            self._doc_freq.update(grams.keys())
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        """전체 캐시 비우기"""
+        with self._lock:
+            self._entries.clear()
+            self._doc_freq.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """적중률 및 절약된 LLM 시간 지표"""
+        with self._lock:
+            hits = self.exact_hits + self.similar_hits
+            lookups = hits + self.misses
+            return {
+                "size": len(self._entries),
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "saved_llm_ms": round(self.saved_llm_ms, 1)
+            }
+
+
+# 싱글톤 인스턴스 관리
+_cache: Optional[IntentCache] = None
+
+def get_intent_cache(**kwargs) -> IntentCache:
+    """
+    IntentCache 싱글톤 인스턴스 반환
+
+    Args:
+        **kwargs: 최초 생성 시 IntentCache 초기화 파라미터
+                  (similarity_threshold가 없으면 KIOSK_INTENT_SIMILARITY 환경변수)
+
+    Returns:
+        IntentCache 인스턴스
+    """
+    global _cache
+    if _cache is None:
+        if "similarity_threshold" not in kwargs:
+            kwargs["similarity_threshold"] = _similarity_from_env()
+        _cache = IntentCache(**kwargs)
+    return _cache
+
+
+def _similarity_from_env() -> Optional[float]:
+    """KIOSK_INTENT_SIMILARITY 값 (off/빈 값/잘못된 값이면 None)"""
+    value = os.environ.get("KIOSK_INTENT_SIMILARITY", "off").strip().lower()
+    if value in ("", "off", "0", "none"):
+        return None
+    try:
+        threshold = float(value)
+    except ValueError:
+        print(f"KIOSK_INTENT_SIMILARITY 값이 잘못됨: {value}")
+        return None
+    if not 0.0 < threshold <= 1.0:
+        print(f"KIOSK_INTENT_SIMILARITY는 0~1 사이여야 함: {value}")
+        return None
+    return threshold
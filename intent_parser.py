@@ -0,0 +1,292 @@
+"""
+Intent Parser - 규칙 기반 한국어 주문 의도 분석
+예산/알레르기/맵기/영양 선호처럼 단순한 조건은 LLM 없이 메뉴 필드로 바로 응답
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from menu_index import get_menu_index
+
+# 응답 가능하다고 판단하는 최소 신뢰도
+CONFIDENCE_THRESHOLD = 0.8
+
+# ===== 숫자 표현 =====
+_KOREAN_DIGITS = {"일": 1, "이": 2, "삼": 3, "사": 4, "오": 5, "육": 6, "칠": 7, "팔": 8, "구": 9}
+# 한글 숫자는 단어 첫 글자이거나 만/천 바로 뒤일 때만 ("가격이 만원"의 조사 '이'를 2로 읽지 않도록)
+_NUM = r"(?:\d+(?:[.,]\d+)*|(?:(?<![가-힣])|(?<=[만천]))[일이삼사오육칠팔구])"
+# 숫자와 단위 사이 공백은 아라비아 숫자 뒤에만 허용 ("1 만원"은 되고 "이 만원"은 안 됨)
+_GAP = r"(?:(?<=\d)\s*)?"
+_AMOUNT_PATTERN = re.compile(
+    rf"(?:(?P<man>{_NUM})?{_GAP}만)?\s*(?:(?P<cheon>{_NUM})?{_GAP}천)?\s*(?:(?P<baek>{_NUM}){_GAP}백)?\s*(?P<plain>\d[\d,]*)?\s*원"
+)
+_BUDGET_CAP_PATTERN = re.compile(r"\s*(?:짜리)?\s*(?:이하|이내|까지|미만|안으로|안에서|안쪽|아래|넘지\s*않게|넘지\s*않는|내로|선에서)")
+
+# ===== 키워드 사전 =====
+ALLERGEN_LEXICON: Dict[str, Tuple[str, ...]] = {
+    "dairy": ("우유", "유제품", "치즈", "유당", "락토스"),
+    "wheat": ("밀가루", "글루텐", "밀"),
+    "soy": ("대두", "콩"),
+    "eggs": ("계란", "달걀", "난류"),
+}
+_ALLERGEN_NEGATION = r"(?:\s*(?:은|는|이|가|을|를|도)?\s*(?:빼고|빼서|빼줘|빼주세요|없는|없이|제외|안\s*들어간|못\s*먹|알레르기|알러지|알레르기가|알러지가))"
+
+CATEGORY_LEXICON: Dict[str, Tuple[str, ...]] = {
+    "버거": ("버거", "햄버거"),
+    "사이드": ("사이드", "감자튀김", "너겟", "나초", "곁들임"),
+    "음료": ("음료수", "음료", "마실", "드링크", "쉐이크", "콜라", "소다"),
+}
+
+TAG_LEXICON: Dict[str, Tuple[str, ...]] = {
+    "chicken": ("치킨", "닭"),
+    "beef": ("소고기", "비프", "쇠고기"),
+    "cheese": ("치즈",),
+    "bbq": ("바베큐", "비비큐", "bbq"),
+    "mushroom": ("버섯", "머쉬룸"),
+    "vegetarian": ("채식", "베지", "비건", "고기 없는"),
+    "premium": ("프리미엄", "고급"),
+    "popular": ("인기", "잘 나가는", "베스트"),
+    "classic": ("클래식", "기본"),
+    "crispy": ("바삭",),
+    "fried": ("튀긴", "튀김"),
+    "cold": ("시원한", "차가운"),
+}
+
+_MILD_PATTERN = re.compile(r"(?:안\s*매운|맵지\s*않은|맵지\s*않게|안\s*맵게|덜\s*매운|순한|매운\s*거?\s*(?:싫|못\s*먹|빼고))")
+_SPICY_PATTERN = re.compile(r"(?:아주\s*|제일\s*|엄청\s*|많이\s*)?(?:매운|맵게|매콤|화끈|얼큰|스파이시)")
+_VERY_SPICY_PATTERN = re.compile(r"(?:아주|제일|엄청|가장|많이|완전)\s*(?:매운|맵게)")
+_HIGH_PROTEIN_PATTERN = re.compile(r"(?:고단백|단백질\s*(?:이|가)?\s*(?:많은|많이|높은|풍부)|프로틴|벌크업|운동\s*후)")
+_LOW_CALORIE_PATTERN = re.compile(r"(?:저칼로리|칼로리\s*(?:가|이)?\s*(?:낮은|적은)|다이어트|가벼운|가볍게|살\s*안\s*찌는)")
+_CHEAP_PATTERN = re.compile(r"(?:싼|저렴한|가성비|제일\s*싼)")
+
+# 의미 없는 요청 표현 (신뢰도 계산 시 제외되는 토큰)
+_FILLER_PATTERN = re.compile(
+    r"(?:추천|해|줘|주세요|주실래요|줄래|부탁|메뉴|먹고|싶어|먹을래|원해|있어|있나요|뭐|뭐가|"
+    r"알려|골라|좀|조금|하나|한|거|것|걸|그리고|중에|중|좋겠어|좋아|요)*"
+    r"(?:은|는|이|가|을|를|도|로|으로|에|에서|의|랑|하고|요)?"
+)
+
+def _to_number(token: Optional[str]) -> Optional[float]:
+    if not token:
+        return None
+    if token in _KOREAN_DIGITS:
+        return float(_KOREAN_DIGITS[token])
+    return float(token.replace(",", ""))
+
+
+def parse_amount(match: re.Match) -> Optional[int]:
+    """
+    금액 표현을 원 단위 정수로 변환
+
+    예: "5천원" → 5000, "만오천원" → 15000, "1만 2천원" → 12000, "7,500원" → 7500
+    """
+    man, cheon, baek, plain = match.group("man"), match.group("cheon"), match.group("baek"), match.group("plain")
+    text = match.group(0)
+    total = 0.0
+    if "만" in text:
+        total += (_to_number(man) or 1) * 10000
+    if "천" in text:
+        total += (_to_number(cheon) or 1) * 1000
+    if baek:
+        total += _to_number(baek) * 100
+    if plain:
+        total += _to_number(plain)
+    return int(total) if total > 0 else None
+
+
+def _keyword_pattern(keywords: Tuple[str, ...]) -> re.Pattern:
+    alternatives = sorted((re.escape(k).replace(r"\ ", r"\s*") for k in keywords), key=len, reverse=True)
+    return re.compile("|".join(alternatives))
+
+
+# 미리 컴파일된 사전 패턴
+_ALLERGEN_PATTERNS = {
+    code: re.compile(rf"(?:{_keyword_pattern(words).pattern}){_ALLERGEN_NEGATION}")
+    for code, words in ALLERGEN_LEXICON.items()
+}
+_CATEGORY_PATTERNS = {cat: _keyword_pattern(words) for cat, words in CATEGORY_LEXICON.items()}
+_TAG_PATTERNS = {tag: _keyword_pattern(words) for tag, words in TAG_LEXICON.items()}
+
+
+def parse_intent(user_input: str) -> Dict[str, Any]:
+    """
+    사용자 입력에서 주문 조건 추출
+
+    Args:
+        user_input: 사용자 입력 텍스트
+
+    Returns:
+        {
+          "budget": 예산(원) 또는 None,
+          "allergies": 제외할 알레르기 코드 목록,
+          "spicy_min"/"spicy_max": 맵기 범위 또는 None,
+          "categories": 요청 카테고리 목록,
+          "tags": 선호 태그 목록,
+          "sort_by": "protein" | "calories" | "price" | None,
+          "confidence": 0~1 (입력 중 해석된 부분의 비율)
+        }
+    """
+    text = (user_input or "").strip()
+    spans: List[Tuple[int, int]] = []
+    parsed: Dict[str, Any] = {
+        "budget": None,
+        "allergies": [],
+        "spicy_min": None,
+        "spicy_max": None,
+        "categories": [],
+        "tags": [],
+        "sort_by": None,
+        "confidence": 0.0
+    }
+
+    # 1. 예산 ("5천원 이하", "만원 안으로", "7,500원까지")
+    for match in _AMOUNT_PATTERN.finditer(text):
+        amount = parse_amount(match)
+        if amount is None:
+            continue
+        cap = _BUDGET_CAP_PATTERN.match(text, match.end())
+        parsed["budget"] = amount
+        spans.append((match.start(), cap.end() if cap else match.end()))
+        break
+
+    # 2. 알레르기 제외 ("우유 빼고", "계란 알레르기")
+    for code, pattern in _ALLERGEN_PATTERNS.items():
+        for match in pattern.finditer(text):
+            if code not in parsed["allergies"]:
+                parsed["allergies"].append(code)
+            spans.append(match.span())
+
+    # 3. 맵기
+    mild = _MILD_PATTERN.search(text)
+    if mild:
+        parsed["spicy_max"] = 1
+        spans.append(mild.span())
+    else:
+        spicy = _SPICY_PATTERN.search(text)
+        if spicy:
+            parsed["spicy_min"] = 3 if _VERY_SPICY_PATTERN.search(text) else 2
+            spans.append(spicy.span())
+
+    # 4. 영양/가격 선호
+    for pattern, sort_by in ((_HIGH_PROTEIN_PATTERN, "protein"), (_LOW_CALORIE_PATTERN, "calories"), (_CHEAP_PATTERN, "price")):
+        match = pattern.search(text)
+        if match:
+            parsed["sort_by"] = parsed["sort_by"] or sort_by
+            spans.append(match.span())
+
+    # 5. 카테고리 / 태그
+    allergy_spans = list(spans)
+    for cat, pattern in _CATEGORY_PATTERNS.items():
+        for match in pattern.finditer(text):
+            if cat not in parsed["categories"]:
+                parsed["categories"].append(cat)
+            spans.append(match.span())
+    for tag, pattern in _TAG_PATTERNS.items():
+        for match in pattern.finditer(text):
+            # "치즈 빼고"처럼 알레르기 제외에 쓰인 단어는 선호 태그로 보지 않음
+            if any(s <= match.start() < e for s, e in allergy_spans):
+                continue
+            if tag not in parsed["tags"]:
+                parsed["tags"].append(tag)
+            spans.append(match.span())
+
+    parsed["confidence"] = _coverage(text, spans) if _has_constraint(parsed) else 0.0
+    return parsed
+
+
+def _has_constraint(parsed: Dict[str, Any]) -> bool:
+    return bool(
+        parsed["budget"] or parsed["allergies"] or parsed["spicy_min"] is not None
+        or parsed["spicy_max"] is not None or parsed["categories"] or parsed["tags"] or parsed["sort_by"]
+    )
+
+
+def _coverage(text: str, spans: List[Tuple[int, int]]) -> float:
+    """해석된 구간과 요청 표현 토큰을 제외하고 남은 글자 비율로 신뢰도 계산"""
+    chars = list(text)
+    for start, end in spans:
+        for i in range(start, end):
+            chars[i] = " "
+    tokens = re.sub(r"[.,!?~]", " ", "".join(chars)).split()
+    leftover = sum(len(t) for t in tokens if not _FILLER_PATTERN.fullmatch(t))
+    meaningful = len(re.sub(r"\s+", "", text))
+    if not meaningful:
+        return 0.0
+    return max(0.0, 1.0 - leftover / meaningful)
+
+
+def _describe(parsed: Dict[str, Any]) -> str:
+    """추출된 조건을 사람이 읽을 수 있는 요약으로 변환"""
+    parts = []
+    if parsed["budget"]:
+        parts.append(f"예산 {parsed['budget']:,}원 이하")
+    if parsed["allergies"]:
+        parts.append(f"{', '.join(parsed['allergies'])} 제외")
+    if parsed["spicy_min"] is not None:
+        parts.append("매운 맛")
+    if parsed["spicy_max"] is not None:
+        parts.append("순한 맛")
+    if parsed["sort_by"] == "protein":
+        parts.append("고단백")
+    elif parsed["sort_by"] == "calories":
+        parts.append("저칼로리")
+    elif parsed["sort_by"] == "price":
+        parts.append("저렴한 가격")
+    if parsed["categories"]:
+        parts.append("/".join(parsed["categories"]))
+    if parsed["tags"]:
+        parts.append(", ".join(parsed["tags"]))
+    return " · ".join(parts)
+
+
+def filter_menus(menu_data: List[Dict], parsed: Dict[str, Any]) -> List[Dict]:
+    """추출된 조건(예산/알레르기/맵기/카테고리)을 만족하는 메뉴 목록 (열 배열 마스크 연산)"""
+    return get_menu_index(menu_data).columns.filter(
+        max_price=parsed["budget"] or None,
+        exclude_allergens=parsed["allergies"],
+        spicy_min=parsed["spicy_min"],
+        spicy_max=parsed["spicy_max"],
+        categories=parsed["categories"]
+    )
+
+
+def answer_from_rules(
+    menu_data: List[Dict],
+    user_input: str,
+    limit: int = 4,
+    threshold: float = CONFIDENCE_THRESHOLD
+) -> Optional[Tuple[Dict, List[Dict]]]:
+    """
+    규칙만으로 충분히 답할 수 있으면 (intent, recommendations) 반환
+
+    Args:
+        menu_data: 전체 메뉴 목록
+        user_input: 사용자 입력 텍스트
+        limit: 최대 추천 개수
+        threshold: 응답에 필요한 최소 신뢰도
+
+    Returns:
+        (intent, recommendations) 또는 None (모호한 입력 → LLM 위임)
+    """
+    parsed = parse_intent(user_input)
+    if parsed["confidence"] < threshold:
+        return None
+
+    # 조건 필터 + 태그 일치 → 버거 우선 → 정렬 기준 순위를 전체 메뉴에 대해 한 번에 계산
+    recommendations = get_menu_index(menu_data).scorer.top_k(parsed, limit)
+    if not recommendations:
+        return None
+    # 원하는 태그를 가진 메뉴가 하나도 없으면 규칙으로 답하지 않음
+    if parsed["tags"] and not set(parsed["tags"]).intersection(recommendations[0].get("tags", [])):
+        return None
+
+    understanding = _describe(parsed)
+    intent = {
+        "description": user_input,
+        "allergies": parsed["allergies"],
+        "budget": parsed["budget"],
+        "preferences": parsed["tags"],
+        "understanding": understanding,
+        "reason": f"요청하신 조건({understanding})에 맞는 메뉴입니다.",
+        "source": "rules"
+    }
+    return intent, recommendations
@@ -0,0 +1,446 @@
+"""
+Kiosk API - Streamlit 없이 동작하는 주문 API (ASGI)
+- POST /recommend : 의도 분석 → 조합 → 권유 문장 토큰을 NDJSON 이벤트로 스트리밍
+- POST /pitch     : 권유 문장 토큰 스트리밍 (NDJSON)
+- POST /combo     : 추천 메뉴 기준 세트 조합 top-k
+- POST /combo/accept: 손님이 제안된 조합으로 주문함 (이벤트 로그 기록)
+- POST /stt       : 오디오(WAV/WebM/Ogg/MP3 또는 PCM) → 텍스트 (PCM이면 ?sample_rate=16000&sample_width=2)
+- POST /stt/stream: 말하는 동안 청크로 보내는 PCM → 부분 인식/선행 분석/추천 NDJSON 이벤트
+- POST /tts       : 텍스트 → 오디오 (MP3/WAV 바이트 스트리밍)
+- GET  /health    : 준비 상태(time-to-ready), 메뉴 버전, STT 전처리, LLM 엔드포인트/대기열/파이프라인 지표
+- GET  /metrics   : 단계별 지연 히스토그램/카운터 (Prometheus text exposition)
+
+실행: uvicorn kiosk_api:app --host 0.0.0.0 --port 8000
+엔진 풀, 분석 캐시, TTS 캐시, 스케줄러는 워커 프로세스 안의 모든 요청이 공유한다.
+블로킹 작업(LLM/STT/TTS)은 스레드에서 실행해 이벤트 루프를 막지 않는다.
+"""
+import asyncio
+import json
+import os
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+import metrics
+from answer_table import get_answer_table
+from event_log import get_event_log
+from llm_engine import get_engine
+from menu_data import get_menu_data
+from menu_index import get_menu_index
+from menu_recommender import suggest_combos
+from menu_store import get_menu_store
+from pipeline import KioskPipeline, PipelineTrace, get_pipeline
+from shared_cache import get_shared_cache
+from startup import get_startup
+from stt_backends import STTUnavailableError, get_stt_service
+from stt_streaming import StreamingTranscriber
+from tts_service import get_tts_service
+
+AUDIO_CONTENT_TYPES = {"mp3": "audio/mpeg", "wav": "audio/wav"}
+AUDIO_CHUNK_SIZE = 64 * 1024
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class HTTPError(Exception):
+    """핸들러에서 던지면 해당 상태 코드의 JSON 에러 응답으로 변환"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# ===== 공유 상태 (워커 프로세스당 한 번 생성) =====
+_state_lock = threading.Lock()
+_pipeline: Optional[KioskPipeline] = None
+
+def get_api_pipeline() -> KioskPipeline:
+    """엔진 풀 + 파이프라인 (최초 요청 또는 lifespan 시작 시 생성)"""
+    global _pipeline
+    if _pipeline is None:
+        with _state_lock:
+            if _pipeline is None:
+                engine = get_engine(
+                    "ollama",
+                    model=os.environ.get("KIOSK_OLLAMA_MODEL", "gemma2:latest"),
+                    base_url="http://localhost:11434"
+                )
+                _pipeline = get_pipeline(None, engine)
+    return _pipeline
+
+
+# ===== 요청/응답 헬퍼 =====
+async def _read_body(receive: Receive) -> bytes:
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise HTTPError(499, "client disconnected")
+        body.extend(message.get("body", b""))
+        if len(body) > MAX_BODY_BYTES:
+            raise HTTPError(413, "request body too large")
+        if not message.get("more_body"):
+            return bytes(body)
+
+
+async def _iter_body(receive: Receive) -> AsyncIterator[bytes]:
+    """요청 본문을 도착하는 청크 단위로 전달 (스트리밍 업로드)"""
+    total = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise HTTPError(499, "client disconnected")
+        chunk = message.get("body", b"")
+        total += len(chunk)
+        if total > MAX_BODY_BYTES:
+            raise HTTPError(413, "request body too large")
+        if chunk:
+            yield chunk
+        if not message.get("more_body"):
+            return
+
+
+async def _read_json(receive: Receive) -> Dict[str, Any]:
+    body = await _read_body(receive)
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "invalid JSON body")
+    if not isinstance(data, dict):
+        raise HTTPError(400, "JSON body must be an object")
+    return data
+
+
+async def _send_json(send: Send, status: int, payload: Any):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_stream(send: Send, content_type: str, chunks: AsyncIterator[bytes], headers: Optional[List[Tuple[bytes, bytes]]] = None):
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", content_type.encode())] + (headers or []),
+    })
+    async for chunk in chunks:
+        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _event(name: str, **fields) -> bytes:
+    """NDJSON 이벤트 한 줄"""
+    return (json.dumps({"event": name, **fields}, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _menus_by_names(names: Any) -> List[Dict]:
+    if not isinstance(names, list):
+        raise HTTPError(400, "recommendations must be a list of menu names")
+    return get_menu_index(get_menu_data()).find_by_names(names)
+
+
+async def _pitch_events(pipeline: KioskPipeline, text: str, intent: Dict, recommendations: List[Dict], trace: PipelineTrace) -> AsyncIterator[bytes]:
+    """권유 문장 토큰 이벤트 (클라이언트가 끊으면 생성도 중단)"""
+    tokens = pipeline.astream_pitch(text, intent, recommendations, trace)
+    pitch = ""
+    try:
+        async for token in tokens:
+            pitch += token
+            yield _event("token", token=token)
+        yield _event("pitch", text=pitch.strip())
+    finally:
+        await tokens.aclose()
+
+
+# ===== 핸들러 =====
+async def handle_recommend(scope: Scope, receive: Receive, send: Send):
+    """
+    요청: {"text": "...", "pitch": true, "stream": true}
+    스트리밍 응답 이벤트: intent → combo → token* → pitch → done
+    """
+    data = await _read_json(receive)
+    text = str(data.get("text", "")).strip()
+    if not text:
+        raise HTTPError(400, "text is required")
+    pipeline = get_api_pipeline()
+    trace = PipelineTrace()
+    intent, recommendations, combo_future = await asyncio.to_thread(pipeline.analyze, text, trace)
+
+    async def events() -> AsyncIterator[bytes]:
+        yield _event("intent", intent=intent, recommendations=recommendations, request_id=trace.request_id)
+        yield _event("combo", combo=await asyncio.wrap_future(combo_future))
+        if data.get("pitch", True):
+            async for line in _pitch_events(pipeline, text, intent, recommendations, trace):
+                yield line
+        pipeline.finish(trace)
+        yield _event("done", timings=trace.as_dict())
+
+    if not data.get("stream", True):
+        result: Dict[str, Any] = {}
+        async for line in events():
+            event = json.loads(line)
+            name = event.pop("event")
+            if name != "token":
+                result.update(event)
+        await _send_json(send, 200, result)
+        return
+    await _send_stream(send, "application/x-ndjson; charset=utf-8", events())
+
+
+async def handle_pitch(scope: Scope, receive: Receive, send: Send):
+    """
+    요청: {"text": "...", "intent": {...}, "recommendations": ["메뉴이름", ...]}
+    스트리밍 응답 이벤트: token* → pitch
+    """
+    data = await _read_json(receive)
+    text = str(data.get("text", "")).strip()
+    intent = data.get("intent") or {}
+    if not isinstance(intent, dict):
+        raise HTTPError(400, "intent must be an object")
+    recommendations = _menus_by_names(data.get("recommendations", []))
+    pipeline = get_api_pipeline()
+    await _send_stream(
+        send,
+        "application/x-ndjson; charset=utf-8",
+        _pitch_events(pipeline, text, intent, recommendations, PipelineTrace())
+    )
+
+
+async def handle_combo(scope: Scope, receive: Receive, send: Send):
+    """요청: {"recommendations": ["메뉴이름", ...], "budget", "allergies", "score", "top_k"}"""
+    data = await _read_json(receive)
+    recommendations = _menus_by_names(data.get("recommendations", []))
+    try:
+        combos = suggest_combos(
+            recommendations,
+            get_menu_data(),
+            budget=data.get("budget"),
+            allergies=data.get("allergies") or [],
+            score=data.get("score", "budget_fit"),
+            top_k=int(data.get("top_k", 3))
+        )
+    except (KeyError, ValueError, TypeError) as e:
+        raise HTTPError(400, f"invalid combo request: {e}")
+    await _send_json(send, 200, {"combos": combos})
+
+
+async def handle_combo_accept(scope: Scope, receive: Receive, send: Send):
+    """요청: {"request_id": "intent 이벤트의 request_id", "combo": {"main", "side", "drink", "total_price"}}"""
+    data = await _read_json(receive)
+    combo = data.get("combo")
+    if not isinstance(combo, dict) or not isinstance(combo.get("main"), dict):
+        raise HTTPError(400, "combo is required")
+    try:
+        get_api_pipeline().accept_combo(str(data.get("request_id", "")), combo)
+    except (KeyError, TypeError) as e:
+        raise HTTPError(400, f"invalid combo: {e}")
+    await _send_json(send, 202, {"accepted": True})
+
+
+async def handle_stt(scope: Scope, receive: Receive, send: Send):
+    """요청 본문: 오디오 파일 또는 모노 PCM 바이트, 쿼리: sample_rate, sample_width (PCM일 때만 사용, 주면 PCM으로 간주)"""
+    query = parse_qs(scope.get("query_string", b"").decode())
+    raw_pcm = "sample_rate" in query or "sample_width" in query
+    try:
+        sample_rate = int(query.get("sample_rate", ["16000"])[0])
+        sample_width = int(query.get("sample_width", ["2"])[0])
+    except ValueError:
+        raise HTTPError(400, "sample_rate and sample_width must be integers")
+    pcm = await _read_body(receive)
+    if not pcm:
+        raise HTTPError(400, "audio body is required")
+    try:
+        text = await asyncio.to_thread(get_stt_service().transcribe, pcm, sample_rate, sample_width, raw_pcm)
+    except STTUnavailableError as e:
+        raise HTTPError(503, f"API_ERROR: {e}")
+    await _send_json(send, 200, {"text": text})
+
+
+async def handle_stt_stream(scope: Scope, receive: Receive, send: Send):
+    """
+    요청 본문: 말하는 동안 청크 전송(chunked)하는 모노 PCM, 쿼리: sample_rate, sample_width
+    스트리밍 응답 이벤트: (partial | pause | early_intent)* → endpoint → transcript → intent → combo → done
+    발화 종료(멈춤 ENDPOINT_MS)를 감지하면 남은 본문을 기다리지 않고 추천까지 응답한다.
+    """
+    query = parse_qs(scope.get("query_string", b"").decode())
+    try:
+        sample_rate = int(query.get("sample_rate", ["16000"])[0])
+        sample_width = int(query.get("sample_width", ["2"])[0])
+    except ValueError:
+        raise HTTPError(400, "sample_rate and sample_width must be integers")
+    pipeline = get_api_pipeline()
+    trace = PipelineTrace()
+    early = pipeline.start_early_analysis()
+    try:
+        transcriber = await asyncio.to_thread(
+            StreamingTranscriber, None, sample_rate, sample_width, early.update, early.speculate
+        )
+    except ValueError as e:
+        raise HTTPError(400, str(e))
+    except STTUnavailableError as e:
+        raise HTTPError(503, f"API_ERROR: {e}")
+
+    async def events() -> AsyncIterator[bytes]:
+        latest = None
+        try:
+            async for chunk in _iter_body(receive):
+                for event in await asyncio.to_thread(transcriber.feed, chunk):
+                    name = event.pop("event")
+                    yield _event(name, **event)
+                if early.latest is not latest:
+                    latest = early.latest
+                    yield _event("early_intent", **latest)
+                if transcriber.ended:
+                    break
+        except HTTPError as e:
+            # 응답을 이미 시작했으므로 상태 코드 대신 에러 이벤트로 알림
+            yield _event("error", error=e.message)
+            return
+        try:
+            with trace.stage("stt_final"):
+                text = await asyncio.to_thread(transcriber.finish)
+        except STTUnavailableError as e:
+            yield _event("error", error=f"API_ERROR: {e}")
+            return
+        for event in transcriber.pop_events():
+            name = event.pop("event")
+            yield _event(name, **event)
+        yield _event("transcript", text=text, stt=transcriber.stats())
+        if not text:
+            yield _event("done", timings=trace.as_dict())
+            return
+        intent, recommendations, combo_future = await asyncio.to_thread(
+            early.finish, text, trace, transcriber.speech_end_at
+        )
+        yield _event(
+            "intent",
+            intent=intent,
+            recommendations=recommendations,
+            request_id=trace.request_id,
+            path=early.path,
+            speech_end_to_recommendation_ms=early.speech_end_ms
+        )
+        yield _event("combo", combo=await asyncio.wrap_future(combo_future))
+        pipeline.finish(trace)
+        yield _event("done", timings=trace.as_dict())
+
+    try:
+        await _send_stream(send, "application/x-ndjson; charset=utf-8", events())
+    finally:
+        transcriber.close()  # 연결이 끊겨 끝까지 받지 못한 세션의 인식 워커 정리
+
+
+async def handle_tts(scope: Scope, receive: Receive, send: Send):
+    """요청: {"text": "...", "lang": "ko", "slow": false} → 오디오 바이트"""
+    data = await _read_json(receive)
+    text = str(data.get("text", "")).strip()
+    if not text:
+        raise HTTPError(400, "text is required")
+    result = await asyncio.to_thread(
+        get_tts_service().synthesize, text, data.get("lang", "ko"), bool(data.get("slow", False))
+    )
+    if result is None:
+        raise HTTPError(503, "TTS unavailable")
+    audio, audio_format = result
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for start in range(0, len(audio), AUDIO_CHUNK_SIZE):
+            yield audio[start:start + AUDIO_CHUNK_SIZE]
+
+    await _send_stream(
+        send,
+        AUDIO_CONTENT_TYPES.get(audio_format, "application/octet-stream"),
+        chunks(),
+        headers=[(b"content-length", str(len(audio)).encode())]
+    )
+
+
+async def handle_health(scope: Scope, receive: Receive, send: Send):
+    pipeline = get_api_pipeline()
+    engine = pipeline.engine
+    shared = get_shared_cache()
+    event_log = get_event_log()
+    await _send_json(send, 200, {
+        "startup": get_startup().stats(),
+        "menu": get_menu_store().stats(),
+        "answer_table": get_answer_table().stats(),
+        "stt": {"backends": get_stt_service().stats(), "preprocess": get_stt_service().preprocess_stats()},
+        "shared_cache": shared.stats() if shared else None,
+        "event_log": event_log.stats() if event_log else None,
+        "llm_available": bool(engine and engine.is_available),
+        "endpoints": engine.stats() if engine else [],
+        "scheduler": engine.scheduler.stats() if engine else {},
+        "pipeline": pipeline.stats()
+    })
+
+
+async def handle_metrics(scope: Scope, receive: Receive, send: Send):
+    body = metrics.render_prometheus().encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"text/plain; version=0.0.4; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+ROUTES: Dict[Tuple[str, str], Callable[[Scope, Receive, Send], Awaitable[None]]] = {
+    ("POST", "/recommend"): handle_recommend,
+    ("POST", "/pitch"): handle_pitch,
+    ("POST", "/combo"): handle_combo,
+    ("POST", "/combo/accept"): handle_combo_accept,
+    ("POST", "/stt"): handle_stt,
+    ("POST", "/stt/stream"): handle_stt_stream,
+    ("POST", "/tts"): handle_tts,
+    ("GET", "/health"): handle_health,
+    ("GET", "/metrics"): handle_metrics,
+}
+
+
+async def _lifespan(receive: Receive, send: Send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # 엔진 풀 생성은 즉시 끝나고(연결 확인은 백그라운드), 모델 로드/음성 준비는 startup 스레드가 진행
+            pipeline = await asyncio.to_thread(get_api_pipeline)
+            get_startup().start(pipeline.engine, get_menu_data())
+            metrics.start_file_exporter()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if _pipeline is not None and _pipeline.engine is not None:
+                _pipeline.engine.close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope: Scope, receive: Receive, send: Send):
+    """ASGI 진입점"""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    handler = ROUTES.get((scope["method"], scope["path"]))
+    if handler is None:
+        allowed = any(path == scope["path"] for _, path in ROUTES)
+        await _send_json(send, 405 if allowed else 404, {"error": "method not allowed" if allowed else "not found"})
+        return
+    try:
+        await handler(scope, receive, send)
+    except HTTPError as e:
+        await _send_json(send, e.status, {"error": e.message})
@@ -0,0 +1,221 @@
+"""
+Kiosk API Client - kiosk_api 서버를 호출하는 얇은 클라이언트
+KIOSK_API_URL이 설정되면 Streamlit 앱은 로컬 엔진 대신 이 클라이언트를 사용한다.
+KioskPipeline과 같은 메서드(analyze / start_pitch / finish / stats)를 제공한다.
+"""
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+from pipeline import PipelineTrace, PitchStream, TraceHistory
+
+# 서버 상태 확인 결과 재사용 시간(초) - Streamlit rerun마다 /health를 부르지 않도록
+HEALTH_TTL = 5.0
+
+
+class KioskAPIClient:
+    """
+    kiosk_api HTTP 클라이언트 (keep-alive 연결 재사용)
+
+    Args:
+        base_url: API 서버 주소 (예: http://kiosk-api:8000)
+        timeout: 요청 타임아웃(초)
+        max_workers: 음성 합성 워커 스레드 수 (권유 문장 수신은 별도 스레드 풀)
+    """
+
+    def __init__(self, base_url: str, timeout: float = 60.0, max_workers: int = 4):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.history = TraceHistory()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kiosk-client")
+        self._pitch_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kiosk-client-pitch")
+        self._health_lock = threading.Lock()
+        self._available = False
+        self._checked_at: Optional[float] = None
+
+    def health(self) -> Optional[Dict[str, Any]]:
+        """서버 상태 (연결 실패 시 None)"""
+        try:
+            response = self.session.get(f"{self.base_url}/health", timeout=3)
+            return response.json() if response.status_code == 200 else None
+        except (requests.RequestException, ValueError):
+            return None
+
+    @property
+    def is_available(self) -> bool:
+        """서버와 LLM이 모두 응답 가능한지 (HEALTH_TTL 동안은 마지막 확인 결과)"""
+        with self._health_lock:
+            now = time.monotonic()
+            if self._checked_at is None or now - self._checked_at >= HEALTH_TTL:
+                health = self.health()
+                self._available = bool(health and health.get("llm_available"))
+                self._checked_at = now
+            return self._available
+
+    def _events(self, path: str, payload: Any, **kwargs) -> Iterator[Dict[str, Any]]:
+        """NDJSON 이벤트 스트림 (제너레이터가 닫히면 연결 종료, payload가 dict가 아니면 본문 그대로 전송)"""
+        body = {"json": payload} if isinstance(payload, dict) else {"data": payload}
+        response = self.session.post(f"{self.base_url}{path}", timeout=self.timeout, stream=True, **body, **kwargs)
+        try:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+        finally:
+            response.close()
+
+    def analyze(self, user_input: str, trace: PipelineTrace) -> Tuple[Dict, List[Dict], Future]:
+        """
+        의도 분석 + 조합 (권유 문장은 start_pitch로 따로 요청)
+
+        Returns:
+            (intent, recommendations, 조합 Future) 튜플
+            (서버 연결 실패 시 로컬 대체 응답과 같은 source="fallback" intent와 빈 추천)
+        """
+        intent: Dict = {}
+        recommendations: List[Dict] = []
+        combo_future: Future = Future()
+        with trace.stage("analysis"):
+            try:
+                for event in self._events("/recommend", {"text": user_input, "pitch": False}):
+                    if event["event"] == "intent":
+                        intent, recommendations = event["intent"], event["recommendations"]
+                        # 조합 수락 이벤트가 서버 로그의 같은 요청에 묶이도록 서버의 요청 ID를 사용
+                        trace.request_id = event.get("request_id", trace.request_id)
+                    elif event["event"] == "combo":
+                        combo_future.set_result(event["combo"])
+            except (requests.RequestException, ValueError) as e:
+                print(f"API 분석 요청 실패: {e}")
+                with self._health_lock:
+                    self._checked_at = None
+                if not intent:
+                    intent = {
+                        "description": user_input,
+                        "allergies": [],
+                        "budget": None,
+                        "preferences": [],
+                        "understanding": "",
+                        "source": "fallback"
+                    }
+        if not combo_future.done():
+            combo_future.set_result(None)
+        return intent, recommendations, combo_future
+
+    def _pitch_tokens(self, user_input: str, intent: Dict, recommendations: List[Dict]) -> Iterator[str]:
+        payload = {
+            "text": user_input,
+            "intent": intent,
+            "recommendations": [m["name"] for m in recommendations]
+        }
+        try:
+            for event in self._events("/pitch", payload):
+                if event["event"] == "token":
+                    yield event["token"]
+        except requests.RequestException as e:
+            print(f"API 권유 문장 에러: {e}")
+
+    def start_pitch(
+        self,
+        user_input: str,
+        intent: Dict,
+        recommendations: List[Dict],
+        trace: PipelineTrace,
+        cancel_event: Optional[threading.Event] = None,
+        speak: bool = True
+    ) -> PitchStream:
+        """권유 문장 스트리밍 시작 (문장 단위 음성은 서버 /tts로 합성)"""
+        return PitchStream(
+            self._executor,
+            self._pitch_tokens(user_input, intent, recommendations),
+            trace,
+            cancel_event or threading.Event(),
+            speak=speak,
+            synthesize=self.text_to_speech,
+            producer_executor=self._pitch_executor
+        )
+
+    def transcribe_audio(self, audio_bytes: Any) -> Optional[str]:
+        """voice_utils.transcribe_audio와 같은 반환 규칙 (텍스트 / None / "API_ERROR")"""
+        if not audio_bytes:
+            return None
+        sample_rate, sample_width = 16000, 2
+        if isinstance(audio_bytes, dict):
+            pcm = audio_bytes.get("bytes")
+            sample_rate = audio_bytes.get("sample_rate") or sample_rate
+            sample_width = audio_bytes.get("sample_width") or sample_width
+        else:
+            pcm = audio_bytes
+        if not pcm:
+            return None
+        try:
+            response = self.session.post(
+                f"{self.base_url}/stt",
+                params={"sample_rate": sample_rate, "sample_width": sample_width},
+                data=pcm,
+                timeout=self.timeout
+            )
+            if response.status_code != 200:
+                print(f"API STT 에러: {response.status_code}")
+                return "API_ERROR"
+            return response.json().get("text")
+        except (requests.RequestException, ValueError) as e:
+            print(f"API STT 에러: {e}")
+            return "API_ERROR"
+
+    def stream_voice(self, chunks: Iterable[bytes], sample_rate: int = 16000, sample_width: int = 2) -> Iterator[Dict[str, Any]]:
+        """
+        말하는 동안 PCM 청크를 /stt/stream으로 보내고 이벤트를 받음
+
+        requests는 업로드가 끝난 뒤 응답을 읽으므로 chunks는 발화가 끝나면(클라이언트 VAD/버튼) 멈춰야 한다.
+
+        Args:
+            chunks: 모노 PCM 청크 (녹음되는 대로 내놓는 이터러블)
+            sample_rate / sample_width: PCM 형식
+
+        Returns:
+            이벤트 이터레이터 (partial, pause, early_intent, endpoint, transcript, intent, combo, done)
+        """
+        return self._events(
+            "/stt/stream",
+            iter(chunks),
+            params={"sample_rate": sample_rate, "sample_width": sample_width}
+        )
+
+    def text_to_speech(self, text: str, lang: str = "ko", slow: bool = False) -> Optional[bytes]:
+        """voice_utils.text_to_speech와 같은 반환 규칙 (오디오 바이트 / None)"""
+        if not text or not text.strip():
+            return None
+        try:
+            response = self.session.post(
+                f"{self.base_url}/tts",
+                json={"text": text, "lang": lang, "slow": slow},
+                timeout=self.timeout
+            )
+            return response.content if response.status_code == 200 else None
+        except requests.RequestException as e:
+            print(f"API TTS 에러: {e}")
+            return None
+
+    def accept_combo(self, request_id: str, combo: Dict):
+        """조합 수락을 서버 이벤트 로그에 기록 (실패해도 주문 화면은 그대로 진행)"""
+        try:
+            self.session.post(
+                f"{self.base_url}/combo/accept",
+                json={"request_id": request_id, "combo": combo},
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            print(f"API 조합 수락 기록 에러: {e}")
+
+    def finish(self, trace: PipelineTrace):
+        """완료된 요청을 지표 집계에 추가"""
+        self.history.add(trace)
+
+    def stats(self) -> Dict[str, Any]:
+        """클라이언트에서 측정한 단계별 지연 지표"""
+        return self.history.stats()
@@ -1,39 +1,499 @@
 """
 LLM Engine - Ollama 기반 로컬 LLM 엔진
+get_engine()은 여러 Ollama 서버에 요청을 분산하는 OllamaEnginePool을 반환한다.
 """
+import asyncio
+import os
 import requests
 import json
-from typing import Optional
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+from urllib3.util.retry import Retry
+import metrics
+from llm_scheduler import PRIORITY_INTENT, LLMScheduler, SchedulerRejected, get_llm_scheduler
 
-class OllamaEngine:
+DEFAULT_NUM_CTX = 2048
+# 키오스크 전용 장비: 모델을 메모리에 고정 (언로드되면 다음 손님이 모델 로드 시간을 기다림)
+DEFAULT_KEEP_ALIVE = "-1"
+
+
+def _parse_keep_alive(value: str) -> Any:
+    """keep_alive 설정값 변환 ("-1"/"300"처럼 단위 없는 숫자는 초 단위 정수, 그 외 "30m" 등은 그대로)"""
+    value = value.strip()
+    return int(value) if value.lstrip("-").isdigit() else value
+
+
+class GenerationProfile:
+    """
+    호출 종류별 생성 옵션 (의도 분석 JSON / 권유 문장 등)
+
+    Args:
+        name: 프로필 이름 (지표 레이블)
+        temperature: 샘플링 온도
+        num_predict: 최대 생성 토큰 수 (None이면 제한 없음)
+        stop: 중단 문자열 목록
+        format: "json", JSON 스키마(dict) 또는 None(일반 텍스트)
+    """
+    __slots__ = ("name", "temperature", "num_predict", "stop", "format")
+
+    def __init__(
+        self,
+        name: str,
+        temperature: float,
+        num_predict: Optional[int] = None,
+        stop: Optional[List[str]] = None,
+        format: Any = None
+    ):
+        self.name = name
+        self.temperature = temperature
+        self.num_predict = num_predict
+        self.stop = list(stop or [])
+        self.format = format
+
+
+# profile 없이 json_mode만 지정한 호출의 기본값 (기존 동작)
+JSON_PROFILE = GenerationProfile("json", temperature=0.3, format="json")
+TEXT_PROFILE = GenerationProfile("text", temperature=0.7)
+
+
+class BaseEngine:
+    """
+    토큰 스트림(_iter_tokens) 위에 공통 동기 API를 제공하는 엔진 기반 클래스
+    하위 클래스는 is_available과 _iter_tokens(에러를 그대로 전달)를 구현한다.
+    """
+    is_available = False
+
+    def _iter_tokens(
+        self,
+        prompt: str,
+        json_mode: bool,
+        cancel_event: Optional[threading.Event] = None,
+        stats: Optional[dict] = None,
+        priority: int = PRIORITY_INTENT,
+        max_wait: Optional[float] = None,
+        profile: Optional[GenerationProfile] = None
+    ) -> Iterator[str]:
+        raise NotImplementedError
+
+    def stream_response(
+        self,
+        prompt: str,
+        json_mode: bool = False,
+        cancel_event: Optional[threading.Event] = None,
+        priority: int = PRIORITY_INTENT,
+        max_wait: Optional[float] = None,
+        profile: Optional[GenerationProfile] = None
+    ) -> Iterator[str]:
+        """
+        LLM 응답을 토큰 단위로 스트리밍
+
+        Args:
+            prompt: 입력 프롬프트
+            json_mode: JSON 형식 강제 여부
+            cancel_event: 설정되면 스트림을 중단하는 이벤트 (세션 rerun 시 취소용)
+            priority: 스케줄러 우선순위 (낮을수록 먼저)
+            max_wait: 스케줄러 대기 시한(초), None이면 우선순위별 기본값
+            profile: 생성 옵션 (None이면 json_mode에 따른 기본 프로필)
+
+        Yields:
+            생성된 토큰 문자열 (에러/거절 시 조용히 종료)
+        """
+        if not self.is_available:
+            return
+
+        try:
+            yield from self._iter_tokens(prompt, json_mode, cancel_event, priority=priority, max_wait=max_wait, profile=profile)
+        except SchedulerRejected as e:
+            print(f"LLM 요청 거절 ({e.reason})")
+        except requests.Timeout:
+            print("Ollama 타임아웃 에러")
+        except requests.RequestException as e:
+            print(f"Ollama 연결 에러: {e}")
+        except Exception as e:
+            print(f"Ollama 에러: {e}")
+
+    def generate_response(
+        self,
+        prompt: str,
+        json_mode: bool = True,
+        stats: Optional[dict] = None,
+        priority: int = PRIORITY_INTENT,
+        max_wait: Optional[float] = None,
+        stop_when: Optional[Callable[[str], bool]] = None,
+        profile: Optional[GenerationProfile] = None
+    ) -> Optional[str]:
+        """
+        LLM 응답 생성 (스트리밍 결과를 모아 반환하는 래퍼)
+
+        Args:
+            prompt: 입력 프롬프트
+            json_mode: JSON 형식 강제 여부
+            stats: 주어지면 Ollama 생성 통계(prompt_eval_count 등)를 채울 딕셔너리
+                   (스케줄러가 거절하면 "shed"에 사유, 조기 중단하면 "early_stop"에 True 기록)
+            priority: 스케줄러 우선순위 (낮을수록 먼저)
+            max_wait: 스케줄러 대기 시한(초), None이면 우선순위별 기본값
+            stop_when: 토큰마다 호출, True를 반환하면 연결을 끊어 남은 생성을 중단
+            profile: 생성 옵션 (None이면 json_mode에 따른 기본 프로필)
+
+        Returns:
+            생성된 응답 텍스트 또는 None
+        """
+        if not self.is_available:
+            return None
+
+        try:
+            tokens = self._iter_tokens(prompt, json_mode, stats=stats, priority=priority, max_wait=max_wait, profile=profile)
+            if stop_when is None:
+                return "".join(tokens).strip()
+            parts = []
+            try:
+                for token in tokens:
+                    parts.append(token)
+                    if stop_when(token):
+                        if stats is not None:
+                            stats["early_stop"] = True
+                        break
+            finally:
+                tokens.close()
+            return "".join(parts).strip()
+
+        except SchedulerRejected as e:
+            print(f"LLM 요청 거절 ({e.reason})")
+            if stats is not None:
+                stats["shed"] = e.reason
+            return None
+
+        except requests.Timeout:
+            print("Ollama 타임아웃 에러")
+            return None
+        except requests.HTTPError as e:
+            print(e)
+            return None
+        except requests.RequestException as e:
+            print(f"Ollama 연결 에러: {e}")
+            return None
+        except Exception as e:
+            print(f"Ollama 에러: {e}")
+            return None
+
+
+class OllamaEngine(BaseEngine):
     """Ollama (로컬 LLM) 엔진"""
 
     def __init__(
         self,
         model: str = "gemma2:latest",
         base_url: str = "http://localhost:11434",
-        timeout: int = 300
+        timeout: int = 300,
+        pool_size: int = 10,
+        max_retries: int = 2,
+        keep_alive: Optional[str] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        num_ctx: Optional[int] = None,
+        check_connection: bool = True
     ):
+        """
+        Args:
+            model: Ollama 모델 이름
+            base_url: Ollama 서버 주소
+            timeout: 요청 타임아웃(초)
+            pool_size: keep-alive 연결 풀 크기 (동기/비동기 클라이언트 공통)
+            max_retries: 연결 실패 및 502/503/504 응답 재시도 횟수
+            keep_alive: 마지막 요청 후 모델(및 프롬프트 KV 캐시)을 메모리에 유지할 시간
+                        (None이면 KIOSK_OLLAMA_KEEP_ALIVE 또는 -1 = 계속 유지)
+            scheduler: 동시 실행/우선순위 스케줄러 (None이면 프로세스 공용 스케줄러)
+            num_ctx: 컨텍스트 길이 (None이면 KIOSK_OLLAMA_NUM_CTX 또는 2048)
+                     모든 호출이 같은 값을 써야 함 - 호출마다 다르면 Ollama가 모델을 다시 로드함
+            check_connection: False면 생성 시 연결 확인(최대 3초)을 건너뛰고 사용 가능으로 간주
+                              (엔진 풀이 백그라운드 헬스 체크로 확인)
+        """
         self.model = model
         self.base_url = base_url
         self.timeout = timeout
-        self.is_available = self._check_connection()
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.keep_alive = _parse_keep_alive(
+            keep_alive if keep_alive is not None else os.environ.get("KIOSK_OLLAMA_KEEP_ALIVE", DEFAULT_KEEP_ALIVE)
+        )
+        self.num_ctx = num_ctx or int(os.environ.get("KIOSK_OLLAMA_NUM_CTX", DEFAULT_NUM_CTX))
+        self.scheduler = scheduler if scheduler is not None else get_llm_scheduler()
+        self.session = self._create_session()
+        self._async_client = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.is_available = self._check_connection() if check_connection else True
+
+    def _create_session(self) -> requests.Session:
+        """keep-alive 연결을 재사용하는 풀링 세션 생성"""
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=0,  # 생성 도중 끊긴 요청은 중복 생성을 막기 위해 재시도하지 않음
+            backoff_factor=0.2,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"})
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+            pool_block=False
+        )
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
     def _check_connection(self) -> bool:
         """Ollama 서버 연결 확인"""
         try:
-            response = requests.get(f"{self.base_url}", timeout=3)
+            response = self.session.get(f"{self.base_url}", timeout=3)
             return response.status_code == 200
         except requests.RequestException:
             return False
 
-    def generate_response(self, prompt: str, json_mode: bool = True) -> Optional[str]:
+    def warm_up(self) -> Dict[str, Any]:
+        """
+        모델을 메모리에 올려 두는 빈 프롬프트 요청 (keep_alive로 고정)
+        num_ctx를 실제 요청과 같게 보내야 첫 요청에서 모델을 다시 로드하지 않는다.
+
+        Returns:
+            Ollama 응답 (load_duration 등, 나노초)
+
+        Raises:
+            requests.RequestException: 연결 실패 또는 에러 응답
+        """
+        response = self.session.post(
+            f"{self.base_url}/api/generate",
+            json={
+                "model": self.model,
+                "prompt": "",
+                "stream": False,
+                "keep_alive": self.keep_alive,
+                "options": {"num_ctx": self.num_ctx}
+            },
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        """풀링된 HTTP 세션 종료"""
+        self.session.close()
+
+    def _build_payload(self, prompt: str, json_mode: bool, stream: bool, profile: Optional[GenerationProfile] = None) -> dict:
+        """/api/generate 요청 페이로드 생성"""
+        if profile is None:
+            profile = JSON_PROFILE if json_mode else TEXT_PROFILE
+        options: Dict[str, Any] = {
+            "temperature": profile.temperature,
+            "num_ctx": self.num_ctx
+        }
+        if profile.num_predict is not None:
+            options["num_predict"] = profile.num_predict
+        if profile.stop:
+            options["stop"] = profile.stop
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": options
+        }
+
+        # JSON 모드(또는 스키마)일 때만 포맷 강제
+        if profile.format is not None:
+            payload["format"] = profile.format
+        return payload
+
+    def _iter_tokens(
+        self,
+        prompt: str,
+        json_mode: bool,
+        cancel_event: Optional[threading.Event] = None,
+        stats: Optional[dict] = None,
+        priority: int = PRIORITY_INTENT,
+        max_wait: Optional[float] = None,
+        profile: Optional[GenerationProfile] = None
+    ) -> Iterator[str]:
+        """
+        Ollama NDJSON 스트림을 읽어 토큰 단위로 반환 (에러는 호출자에게 전달)
+
+        스케줄러 슬롯을 얻은 뒤 요청하고 스트림이 끝날 때까지 점유한다.
+        제너레이터가 닫히거나 cancel_event가 설정되면 연결을 끊어
+        Ollama 쪽 생성도 함께 중단시킨다.
+        stats가 주어지면 마지막 청크의 통계(prompt_eval_count, eval_count 등)를 채운다.
         """
-        LLM 응답 생성
+        with self.scheduler.slot(priority, max_wait):
+            yield from self._iter_stream(prompt, json_mode, cancel_event, stats, profile)
+
+    def _iter_stream(
+        self,
+        prompt: str,
+        json_mode: bool,
+        cancel_event: Optional[threading.Event],
+        stats: Optional[dict],
+        profile: Optional[GenerationProfile] = None
+    ) -> Iterator[str]:
+        """/api/generate 스트리밍 요청 (스케줄러 슬롯 안에서 호출)"""
+        mode = profile.name if profile is not None else ("json" if json_mode else "text")
+        with metrics.span("llm_request", mode=mode):
+            started = time.perf_counter()
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json=self._build_payload(prompt, json_mode, stream=True, profile=profile),
+                timeout=self.timeout,
+                stream=True
+            )
+            try:
+                if response.status_code != 200:
+                    raise requests.HTTPError(
+                        f"Ollama API Error: {response.status_code}",
+                        response=response
+                    )
+
+                first_token = True
+                for line in response.iter_lines():
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise requests.RequestException(chunk["error"])
+                    token = chunk.get("response", "")
+                    if token:
+                        if first_token:
+                            first_token = False
+                            metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage="llm_first_token", mode=mode)
+                        yield token
+                    if chunk.get("done"):
+                        metrics.record_llm_stats(chunk, mode)
+                        if stats is not None:
+                            stats.update({k: v for k, v in chunk.items() if k not in ("response", "context")})
+                        return
+            finally:
+                response.close()
+
+    # ===== 비동기 클라이언트 (aiohttp) =====
+    async def _get_async_client(self):
+        """현재 이벤트 루프에 묶인 aiohttp.ClientSession 반환 (루프가 바뀌면 이전 세션을 닫고 재생성)"""
+        import aiohttp  # 비동기 경로를 쓸 때만 필요한 선택 의존성
+
+        loop = asyncio.get_running_loop()
+        if self._async_client is not None and self._async_loop is not loop:
+            # asyncio.run을 호출마다 쓰면 루프가 매번 바뀜 → 닫지 않으면 연결이 새고 "Unclosed client session" 경고
+            stale, self._async_client = self._async_client, None
+            try:
+                await stale.close()
+            except Exception as e:
+                print(f"이전 비동기 세션 종료 실패: {type(e).__name__}: {e}")
+        if self._async_client is None:
+            self._async_client = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._async_loop = loop
+        return self._async_client
+
+    async def _apost_generate(self, payload: dict):
+        """연결 실패 시 max_retries만큼 재시도하며 /api/generate 요청"""
+        import aiohttp
+
+        client = await self._get_async_client()
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await client.post(f"{self.base_url}/api/generate", json=payload)
+            except aiohttp.ClientConnectionError:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(0.2 * (2 ** attempt))
+
+    async def _aiter_tokens(
+        self,
+        prompt: str,
+        json_mode: bool,
+        stats: Optional[dict] = None,
+        priority: int = PRIORITY_INTENT,
+        max_wait: Optional[float] = None,
+        profile: Optional[GenerationProfile] = None
+    ) -> AsyncIterator[str]:
+        """_iter_tokens의 asyncio 버전 (스케줄러 슬롯은 스레드 없이 대기, 에러는 호출자에게 전달)"""
+        mode = profile.name if profile is not None else ("json" if json_mode else "text")
+        payload = self._build_payload(prompt, json_mode, stream=True, profile=profile)
+        async with self.scheduler.aslot(priority, max_wait):
+            started = time.perf_counter()
+            response = await self._apost_generate(payload)
+            try:
+                if response.status != 200:
+                    raise RuntimeError(f"Ollama API Error: {response.status}")
+                first_token = True
+                async for line in response.content:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(chunk["error"])
+                    token = chunk.get("response", "")
+                    if token:
+                        if first_token:
+                            first_token = False
+                            metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage="llm_first_token", mode=mode)
+                        yield token
+                    if chunk.get("done"):
+                        metrics.record_llm_stats(chunk, mode)
+                        if stats is not None:
+                            stats.update({k: v for k, v in chunk.items() if k not in ("response", "context")})
+                        return
+            finally:
+                response.release()
+
+    async def astream_response(
+        self,
+        prompt: str,
+        json_mode: bool = False,
+        priority: int = PRIORITY_INTENT,
+        max_wait: Optional[float] = None,
+        profile: Optional[GenerationProfile] = None
+    ) -> AsyncIterator[str]:
+        """
+        LLM 응답을 비동기로 토큰 단위 스트리밍 (동기 stream_response와 같은 우선순위/생성 옵션)
+
+        Yields:
+            생성된 토큰 문자열 (에러/거절 시 조용히 종료)
+        """
+        if not self.is_available:
+            return
+
+        try:
+            async for token in self._aiter_tokens(prompt, json_mode, priority=priority, max_wait=max_wait, profile=profile):
+                yield token
+        except SchedulerRejected as e:
+            print(f"LLM 요청 거절 ({e.reason})")
+        except Exception as e:
+            print(f"Ollama 비동기 에러: {type(e).__name__}: {e}")
+
+    async def agenerate_response(
+        self,
+        prompt: str,
+        json_mode: bool = True,
+        stats: Optional[dict] = None,
+        priority: int = PRIORITY_INTENT,
+        max_wait: Optional[float] = None,
+        profile: Optional[GenerationProfile] = None
+    ) -> Optional[str]:
+        """
+        LLM 응답 비동기 생성 (스레드를 점유하지 않고 여러 요청을 동시에 처리)
 
         Args:
             prompt: 입력 프롬프트
             json_mode: JSON 형식 강제 여부
+            stats: 주어지면 Ollama 생성 통계를 채울 딕셔너리 (스케줄러가 거절하면 "shed"에 사유)
+            priority: 스케줄러 우선순위 (낮을수록 먼저)
+            max_wait: 스케줄러 대기 시한(초), None이면 우선순위별 기본값
+            profile: 생성 옵션 (None이면 json_mode에 따른 기본 프로필)
 
         Returns:
             생성된 응답 텍스트 또는 None
@@ -42,60 +502,327 @@ class OllamaEngine:
             return None
 
         try:
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.3 if json_mode else 0.7,
-                    "num_ctx": 4096
-                }
-            }
+            tokens = [
+                token async for token in
+                self._aiter_tokens(prompt, json_mode, stats=stats, priority=priority, max_wait=max_wait, profile=profile)
+            ]
+            return "".join(tokens).strip()
+        except SchedulerRejected as e:
+            print(f"LLM 요청 거절 ({e.reason})")
+            if stats is not None:
+                stats["shed"] = e.reason
+            return None
+        except Exception as e:
+            print(f"Ollama 비동기 에러: {type(e).__name__}: {e}")
+            return None
 
-            # JSON 모드일 때만 포맷 강제
-            if json_mode:
-                payload["format"] = "json"
+    async def aclose(self):
+        """비동기 클라이언트 종료"""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+            self._async_loop = None
 
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                timeout=self.timeout
-            )
 
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("response", "").strip()
+class _Endpoint:
+    """풀 안의 Ollama 엔드포인트 하나의 라우팅/차단 상태"""
+    CLOSED = "closed"        # 정상 (요청 라우팅)
+    OPEN = "open"            # 차단 (쿨다운 후 헬스 체크로 재확인)
+    HALF_OPEN = "half_open"  # 재확인 중 (다음 요청 성공 시 정상 복귀)
+
+    def __init__(self, engine: OllamaEngine):
+        self.engine = engine
+        self.state = self.CLOSED if engine.is_available else self.OPEN
+        self.opened_at = 0.0
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ewma_latency = 0.0
+        self.total_requests = 0
+        self.total_failures = 0
+
+    @property
+    def routable(self) -> bool:
+        return self.state != self.OPEN
+
+
+class OllamaEnginePool(BaseEngine):
+    """
+    여러 Ollama 엔드포인트에 요청을 분산하는 엔진 풀
+    - 진행 중 요청이 가장 적은(같으면 평균 지연이 짧은) 엔드포인트로 라우팅
+    - 연속 실패가 임계값을 넘으면 차단하고, 쿨다운 뒤 헬스 체크가 성공하면 다시 투입
+    - 첫 토큰 전에 실패하면 다른 엔드포인트로 자동 재시도
+    - 백그라운드 헬스 체크로 재시작된 서버를 앱 재시작 없이 다시 사용
+    - 생성 시에는 연결을 확인하지 않고(첫 화면을 막지 않음) 헬스 스레드가 바로 첫 확인 후 probed 설정
+
+    Args:
+        base_urls: Ollama 서버 주소 목록
+        model: Ollama 모델 이름
+        health_interval: 헬스 체크 주기(초)
+        failure_threshold: 차단까지의 연속 실패 횟수
+        cooldown: 차단 후 재확인까지 대기 시간(초)
+        scheduler: 모든 엔드포인트가 공유할 스케줄러 (None이면 프로세스 공용 스케줄러)
+        **engine_kwargs: 엔드포인트별 OllamaEngine 초기화 파라미터
+    """
+
+    def __init__(
+        self,
+        base_urls: List[str],
+        model: str = "gemma2:latest",
+        health_interval: float = 10.0,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        scheduler: Optional[LLMScheduler] = None,
+        **engine_kwargs
+    ):
+        self.model = model
+        self.health_interval = health_interval
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.scheduler = scheduler if scheduler is not None else get_llm_scheduler()
+        self.endpoints = [
+            _Endpoint(OllamaEngine(model=model, base_url=url, scheduler=self.scheduler, check_connection=False, **engine_kwargs))
+            for url in base_urls
+        ]
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.probed = threading.Event()  # 첫 헬스 체크 완료
+        self._health_thread = threading.Thread(target=self._health_loop, name="ollama-health", daemon=True)
+        self._health_thread.start()
+
+    @property
+    def is_available(self) -> bool:
+        """요청을 받을 수 있는 엔드포인트가 하나라도 있는지"""
+        return any(endpoint.routable for endpoint in self.endpoints)
+
+    @property
+    def base_url(self) -> str:
+        """첫 번째 엔드포인트 주소 (단일 엔진 호환용)"""
+        return self.endpoints[0].engine.base_url
 
-            print(f"Ollama API Error: {response.status_code}")
+    def _pick(self, exclude: List[_Endpoint]) -> Optional[_Endpoint]:
+        """진행 중 요청 수 → 평균 지연 순으로 엔드포인트 선택"""
+        candidates = [e for e in self.endpoints if e.routable and e not in exclude]
+        if not candidates:
             return None
+        return min(candidates, key=lambda e: (e.outstanding, e.ewma_latency))
 
-        except requests.Timeout:
-            print("Ollama 타임아웃 에러")
+    def _record_success(self, endpoint: _Endpoint, latency: float):
+        with self._lock:
+            endpoint.total_requests += 1
+            endpoint.consecutive_failures = 0
+            endpoint.state = _Endpoint.CLOSED
+            endpoint.engine.is_available = True
+            # 지수 이동 평균 (최근 요청 가중치 0.2)
+            endpoint.ewma_latency = latency if not endpoint.ewma_latency else 0.8 * endpoint.ewma_latency + 0.2 * latency
+
+    def _record_failure(self, endpoint: _Endpoint):
+        with self._lock:
+            endpoint.total_requests += 1
+            endpoint.total_failures += 1
+            endpoint.consecutive_failures += 1
+            if endpoint.state == _Endpoint.HALF_OPEN or endpoint.consecutive_failures >= self.failure_threshold:
+                self._open(endpoint)
+
+    def _open(self, endpoint: _Endpoint):
+        if endpoint.state != _Endpoint.OPEN:
+            print(f"Ollama 엔드포인트 차단: {endpoint.engine.base_url}")
+        endpoint.state = _Endpoint.OPEN
+        endpoint.opened_at = time.monotonic()
+        endpoint.engine.is_available = False
+
+    def _health_loop(self):
+        self.check_health()
+        self.probed.set()
+        while not self._stop.wait(self.health_interval):
+            self.check_health()
+
+    def check_health(self):
+        """모든 엔드포인트 헬스 체크 (차단된 엔드포인트는 쿨다운이 지난 경우만)"""
+        for endpoint in self.endpoints:
+            if endpoint.state == _Endpoint.OPEN and time.monotonic() - endpoint.opened_at < self.cooldown:
+                continue
+            healthy = endpoint.engine._check_connection()
+            with self._lock:
+                if not healthy:
+                    self._open(endpoint)
+                elif endpoint.state == _Endpoint.OPEN:
+                    print(f"Ollama 엔드포인트 재확인: {endpoint.engine.base_url}")
+                    endpoint.state = _Endpoint.HALF_OPEN
+                    endpoint.consecutive_failures = 0
+                    endpoint.engine.is_available = True
+
+    def _iter_tokens(
+        self,
+        prompt: str,
+        json_mode: bool,
+        cancel_event: Optional[threading.Event] = None,
+        stats: Optional[dict] = None,
+        priority: int = PRIORITY_INTENT,
+        max_wait: Optional[float] = None,
+        profile: Optional[GenerationProfile] = None
+    ) -> Iterator[str]:
+        """엔드포인트를 골라 스트리밍, 첫 토큰 전 실패는 다른 엔드포인트로 재시도"""
+        tried: List[_Endpoint] = []
+        while True:
+            with self._lock:
+                endpoint = self._pick(tried)
+                if endpoint is None:
+                    raise requests.ConnectionError("사용 가능한 Ollama 엔드포인트 없음")
+                endpoint.outstanding += 1
+            tried.append(endpoint)
+            started = time.perf_counter()
+            yielded = False
+            try:
+                for token in endpoint.engine._iter_tokens(prompt, json_mode, cancel_event, stats, priority, max_wait, profile):
+                    yielded = True
+                    yield token
+                self._record_success(endpoint, time.perf_counter() - started)
+                return
+            except requests.RequestException as e:
+                self._record_failure(endpoint)
+                if yielded:
+                    raise
+                print(f"Ollama 엔드포인트 실패, 다른 서버로 재시도: {endpoint.engine.base_url} ({e})")
+            finally:
+                with self._lock:
+                    endpoint.outstanding -= 1
+
+    # ===== 비동기 경로 (동기 경로와 같은 라우팅/차단/재시도) =====
+    async def _aiter_tokens(
+        self,
+        prompt: str,
+        json_mode: bool,
+        stats: Optional[dict] = None,
+        priority: int = PRIORITY_INTENT,
+        max_wait: Optional[float] = None,
+        profile: Optional[GenerationProfile] = None
+    ) -> AsyncIterator[str]:
+        """_iter_tokens의 asyncio 버전 (첫 토큰 전 실패는 다른 엔드포인트로 재시도)"""
+        import aiohttp
+
+        tried: List[_Endpoint] = []
+        while True:
+            with self._lock:
+                endpoint = self._pick(tried)
+                if endpoint is None:
+                    raise ConnectionError("사용 가능한 Ollama 엔드포인트 없음")
+                endpoint.outstanding += 1
+            tried.append(endpoint)
+            started = time.perf_counter()
+            yielded = False
+            try:
+                async for token in endpoint.engine._aiter_tokens(prompt, json_mode, stats, priority, max_wait, profile):
+                    yielded = True
+                    yield token
+                self._record_success(endpoint, time.perf_counter() - started)
+                return
+            except (aiohttp.ClientError, asyncio.TimeoutError, RuntimeError, ValueError) as e:
+                self._record_failure(endpoint)
+                if yielded:
+                    raise
+                print(f"Ollama 엔드포인트 실패, 다른 서버로 재시도: {endpoint.engine.base_url} ({type(e).__name__}: {e})")
+            finally:
+                with self._lock:
+                    endpoint.outstanding -= 1
+
+    async def astream_response(
+        self,
+        prompt: str,
+        json_mode: bool = False,
+        priority: int = PRIORITY_INTENT,
+        max_wait: Optional[float] = None,
+        profile: Optional[GenerationProfile] = None
+    ) -> AsyncIterator[str]:
+        """엔드포인트를 골라 비동기 스트리밍 (에러/거절 시 조용히 종료)"""
+        if not self.is_available:
+            return
+
+        try:
+            async for token in self._aiter_tokens(prompt, json_mode, priority=priority, max_wait=max_wait, profile=profile):
+                yield token
+        except SchedulerRejected as e:
+            print(f"LLM 요청 거절 ({e.reason})")
+        except Exception as e:
+            print(f"Ollama 비동기 에러: {type(e).__name__}: {e}")
+
+    async def agenerate_response(
+        self,
+        prompt: str,
+        json_mode: bool = True,
+        stats: Optional[dict] = None,
+        priority: int = PRIORITY_INTENT,
+        max_wait: Optional[float] = None,
+        profile: Optional[GenerationProfile] = None
+    ) -> Optional[str]:
+        """엔드포인트를 골라 비동기 생성 (실패 시 None, 인자는 OllamaEngine.agenerate_response와 같음)"""
+        if not self.is_available:
             return None
-        except requests.RequestException as e:
-            print(f"Ollama 연결 에러: {e}")
+
+        try:
+            tokens = [
+                token async for token in
+                self._aiter_tokens(prompt, json_mode, stats=stats, priority=priority, max_wait=max_wait, profile=profile)
+            ]
+            return "".join(tokens).strip()
+        except SchedulerRejected as e:
+            print(f"LLM 요청 거절 ({e.reason})")
+            if stats is not None:
+                stats["shed"] = e.reason
             return None
         except Exception as e:
-            print(f"Ollama 에러: {e}")
+            print(f"Ollama 비동기 에러: {type(e).__name__}: {e}")
             return None
 
+    async def aclose(self):
+        """모든 엔드포인트의 비동기 클라이언트 종료"""
+        for endpoint in self.endpoints:
+            await endpoint.engine.aclose()
+
+    def close(self):
+        """헬스 체크 중지 및 모든 엔드포인트 세션 종료"""
+        self._stop.set()
+        for endpoint in self.endpoints:
+            endpoint.engine.close()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """엔드포인트별 상태/진행 중 요청/평균 지연/실패 지표"""
+        with self._lock:
+            return [
+                {
+                    "base_url": e.engine.base_url,
+                    "state": e.state,
+                    "outstanding": e.outstanding,
+                    "ewma_latency_ms": e.ewma_latency * 1000,
+                    "requests": e.total_requests,
+                    "failures": e.total_failures
+                }
+                for e in self.endpoints
+            ]
+
 
 # 싱글톤 인스턴스 관리
-_engine: Optional[OllamaEngine] = None
+_engine: Optional[OllamaEnginePool] = None
 
-def get_engine(engine_type: str = "ollama", **kwargs) -> Optional[OllamaEngine]:
+def get_engine(engine_type: str = "ollama", **kwargs) -> Optional[OllamaEnginePool]:
     """
-    LLM 엔진 싱글톤 인스턴스 반환
+    LLM 엔진 풀 싱글톤 인스턴스 반환
+
+    엔드포인트 목록은 base_urls 인자 → KIOSK_OLLAMA_URLS 환경변수(쉼표 구분) → base_url 순으로 정한다.
 
     Args:
         engine_type: 엔진 타입 (현재 ollama만 지원)
-        **kwargs: 엔진 초기화 파라미터
+        **kwargs: OllamaEnginePool / OllamaEngine 초기화 파라미터
 
     Returns:
-        OllamaEngine 인스턴스 또는 None
+        OllamaEnginePool 인스턴스 또는 None
     """
     global _engine
     if _engine is None:
         if engine_type == "ollama":
-            _engine = OllamaEngine(**kwargs)
-    return _engine
\ No newline at end of file
+            base_urls = kwargs.pop("base_urls", None)
+            base_url = kwargs.pop("base_url", "http://localhost:11434")
+            if not base_urls:
+                env_urls = os.environ.get("KIOSK_OLLAMA_URLS", "")
+                base_urls = [url.strip() for url in env_urls.split(",") if url.strip()] or [base_url]
+            _engine = OllamaEnginePool(base_urls, **kwargs)
+    return _engine
@@ -0,0 +1,273 @@
+"""
+LLM JSON Output - 의도 분석 응답(JSON) 파서
+- StreamingJSONParser: 토큰이 들어오는 동안 최상위 필드 완료 여부를 추적 → 필요한 필드가 끝나면 생성 조기 중단
+- repair_json: 코드 블록, 앞뒤 잡담, 작은따옴표, 따옴표 없는 키, None/True/False, 후행 쉼표, 잘린 출력 보정
+- parse_llm_json: 그대로 파싱 → 실패 시 보정 후 파싱, 결과 상태("ok"/"repaired"/"failed") 반환
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+_FENCE_PATTERN = re.compile(r"```(?:json)?")
+
+# 따옴표 없이 나오면 JSON 리터럴로 바꿀 단어
+_LITERALS = {
+    "null": "null", "None": "null", "NULL": "null", "Null": "null", "undefined": "null", "nil": "null",
+    "true": "true", "True": "true", "TRUE": "true",
+    "false": "false", "False": "false", "FALSE": "false",
+}
+
+
+class StreamingJSONParser:
+    """
+    스트리밍 토큰에서 최상위 객체의 필드 완료를 추적하는 증분 스캐너
+
+    feed()를 generate_response(stop_when=...)에 넘기면 stop_after 필드가 모두 끝난 순간 True를 반환해
+    남은 필드(reason 등) 생성을 기다리지 않고 연결을 끊는다.
+
+    Args:
+        stop_after: 완료되면 중단할 최상위 필드 이름들
+    """
+
+    def __init__(self, stop_after: Sequence[str] = ("recommended_menus",)):
+        self.stop_after = frozenset(stop_after)
+        self.completed: set = set()
+        self.closed = False  # 최상위 객체가 닫힘
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._quote = '"'
+        self._expect_key = False
+        self._key_chars: Optional[List[str]] = None
+        self._current_key: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """지금까지 받은 원문"""
+        return "".join(self._parts)
+
+    @property
+    def done(self) -> bool:
+        """필요한 필드가 모두 완료되었거나 객체가 닫혔는지"""
+        return self.closed or self.stop_after <= self.completed
+
+    def feed(self, chunk: str) -> bool:
+        """
+        토큰 추가
+
+        Returns:
+            더 이상 생성을 기다릴 필요가 없으면 True
+        """
+        self._parts.append(chunk)
+        for ch in chunk:
+            if self.closed:
+                break
+            self._step(ch)
+        return self.done
+
+    def _complete(self):
+        if self._current_key is not None:
+            self.completed.add(self._current_key)
+            self._current_key = None
+
+    def _step(self, ch: str):
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+                return
+            elif ch == self._quote:
+                self._in_string = False
+                if self._key_chars is not None:
+                    self._current_key = "".join(self._key_chars)
+                    self._key_chars = None
+                elif self._depth == 1:
+                    self._complete()  # 문자열 값 끝
+                return
+            if self._key_chars is not None:
+                self._key_chars.append(ch)
+            return
+
+        if self._depth == 0:
+            if ch == "{":
+                self._depth = 1
+                self._expect_key = True
+            return
+
+        if ch in "\"'":
+            self._in_string = True
+            self._quote = ch
+            if self._depth == 1 and self._expect_key:
+                self._key_chars = []
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+            if self._depth <= 1:
+                self._complete()  # 배열/객체 값 끝 (또는 최상위 객체 끝)
+            if self._depth == 0:
+                self.closed = True
+        elif self._depth == 1:
+            if ch == ":":
+                if self._key_chars:  # 따옴표 없는 키
+                    self._current_key = "".join(self._key_chars).strip()
+                self._key_chars = None
+                self._expect_key = False
+            elif ch == ",":
+                self._complete()  # 숫자/리터럴 값 끝
+                self._expect_key = True
+            elif self._expect_key and not ch.isspace():
+                if self._key_chars is None:
+                    self._key_chars = []
+                self._key_chars.append(ch)
+
+
+def _extract_object(text: str) -> Optional[str]:
+    """코드 블록 표시를 지우고 첫 '{'부터의 문자열 반환"""
+    text = _FENCE_PATTERN.sub("", text)
+    start = text.find("{")
+    return text[start:] if start >= 0 else None
+
+
+def repair_json(text: str, truncated: bool = False) -> Tuple[Optional[str], bool]:
+    """
+    흔한 LLM JSON 결함을 고친 문자열 반환
+
+    Args:
+        text: LLM 응답 원문
+        truncated: 조기 중단 등으로 끝이 잘린 것을 알고 있는지 (닫는 괄호 보충을 보정으로 세지 않음)
+
+    Returns:
+        (보정된 JSON 문자열 또는 None, 보정이 필요했는지)
+    """
+    body = _extract_object(text)
+    if body is None:
+        return None, False
+
+    out: List[str] = []
+    stack: List[str] = []
+    repaired = False
+    i, n = 0, len(body)
+    while i < n:
+        ch = body[i]
+        if ch in "\"'":
+            # 문자열: 작은따옴표 문자열은 큰따옴표로 다시 씀
+            quote = ch
+            if quote == "'":
+                repaired = True
+            j = i + 1
+            chars: List[str] = []
+            while j < n and body[j] != quote:
+                if body[j] == "\\" and j + 1 < n:
+                    if quote == "'" and body[j + 1] == "'":
+                        chars.append("'")
+                    else:
+                        chars.append(body[j:j + 2])
+                    j += 2
+                    continue
+                chars.append('\\"' if body[j] == '"' else body[j])
+                j += 1
+            if j >= n:
+                repaired = repaired or not truncated
+            out.append('"' + "".join(chars) + '"')
+            i = j + 1
+            continue
+
+        if ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            # 후행 쉼표 제거
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+                repaired = True
+            if stack:
+                out.append(stack.pop())
+            if not stack:
+                if body[i + 1:].strip():
+                    repaired = True  # 객체 뒤 잡담 무시
+                break
+        elif (ch.isalpha() or ch == "_") and not (out and out[-1][-1:].isdigit()):
+            j = i
+            while j < n and (body[j].isalnum() or body[j] == "_"):
+                j += 1
+            word = body[i:j]
+            k = j
+            while k < n and body[k].isspace():
+                k += 1
+            if k < n and body[k] == ":" and stack and stack[-1] == "}":
+                out.append(json.dumps(word, ensure_ascii=False))  # 따옴표 없는 키
+                repaired = True
+            elif word in _LITERALS:
+                out.append(_LITERALS[word])
+                repaired = repaired or word != _LITERALS[word]
+            else:
+                out.append(json.dumps(word, ensure_ascii=False))  # 따옴표 없는 문자열 값
+                repaired = True
+            i = j
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    if stack:
+        # 잘린 출력: 매달린 쉼표/키를 정리하고 열린 괄호를 닫음
+        while out and (out[-1].isspace() or out[-1] == ","):
+            out.pop()
+        if out and out[-1] == ":":
+            out.append("null")
+        elif out and out[-1].startswith('"') and stack[-1] == "}" and _is_dangling_key(out):
+            out.pop()
+            while out and (out[-1].isspace() or out[-1] == ","):
+                out.pop()
+        out.extend(reversed(stack))
+        repaired = repaired or not truncated
+    return "".join(out), repaired
+
+
+def _is_dangling_key(out: List[str]) -> bool:
+    """out의 마지막 문자열이 값 없이 끝난 키인지 ('{' 또는 ',' 바로 뒤의 문자열)"""
+    for token in reversed(out[:-1]):
+        if token.isspace():
+            continue
+        return token in ("{", ",")
+    return False
+
+
+def parse_llm_json(text: Optional[str], truncated: bool = False) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    LLM 응답에서 JSON 객체 추출
+
+    Args:
+        text: LLM 응답 원문
+        truncated: 조기 중단으로 끝이 잘린 응답인지
+
+    Returns:
+        (객체 또는 None, 상태 "ok" / "repaired" / "failed")
+    """
+    if not text:
+        return None, "failed"
+    body = _extract_object(text)
+    if body is None:
+        return None, "failed"
+    try:
+        value = json.loads(body)
+        if isinstance(value, dict):
+            return value, "ok"
+    except ValueError:
+        pass
+
+    fixed, repaired = repair_json(body, truncated=truncated)
+    if fixed is None:
+        return None, "failed"
+    try:
+        value = json.loads(fixed)
+    except ValueError:
+        return None, "failed"
+    if not isinstance(value, dict):
+        return None, "failed"
+    return value, "repaired" if repaired else "ok"
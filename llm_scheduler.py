@@ -0,0 +1,298 @@
+"""
+LLM Scheduler - 여러 키오스크 세션이 공유하는 Ollama 요청 스케줄러
+- 동시 실행 수를 Ollama 병렬 슬롯 수(OLLAMA_NUM_PARALLEL)에 맞춰 제한
+  (슬롯 안의 요청은 Ollama가 한 배치로 처리하므로 그 이상 보내면 서버 큐에서 대기만 길어짐)
+- 대기열은 우선순위 순서 (손님이 기다리는 의도 분석 > 부가적인 권유 문장)
+- 대기열이 가득 차거나 대기 시한을 넘기면 기다리지 않고 거절 → 호출자가 규칙 기반으로 응답
+- 스레드 호출자(acquire)와 asyncio 호출자(acquire_async)가 같은 대기열을 공유
+  (비동기 대기자는 스레드를 잡지 않고 Future로 기다리며, 슬롯이 나면 반환하는 쪽이 직접 입장시킴)
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+PRIORITY_INTENT = 0  # 손님이 결과를 기다리는 의도 분석
+PRIORITY_PITCH = 10  # 없어도 되는 권유 문장
+
+# 우선순위별 기본 대기 시한(초)
+DEFAULT_MAX_WAIT = {
+    PRIORITY_INTENT: 15.0,
+    PRIORITY_PITCH: 5.0,
+}
+
+
+class SchedulerRejected(Exception):
+    """대기열 초과 또는 대기 시한 초과로 요청이 거절됨"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "evicted", "started", "loop", "future", "admitted")
+
+    def __init__(
+        self,
+        priority: int,
+        seq: int,
+        started: float = 0.0,
+        loop: Optional[asyncio.AbstractEventLoop] = None
+    ):
+        self.priority = priority
+        self.seq = seq
+        self.evicted = False
+        self.started = started
+        # 비동기 대기자만: 입장/밀려남을 알리는 Future (대기자의 이벤트 루프에서 완료)
+        self.loop = loop
+        self.future: Optional[asyncio.Future] = loop.create_future() if loop is not None else None
+        self.admitted = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def notify(self) -> bool:
+        """비동기 대기자 깨우기 (루프가 이미 닫혔으면 False)"""
+        try:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+            return True
+        except RuntimeError:
+            return False
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class LLMScheduler:
+    """
+    우선순위 + 대기 시한이 있는 동시 실행 제한기
+
+    Args:
+        max_concurrency: 동시에 Ollama로 보낼 요청 수
+                         (None이면 KIOSK_LLM_CONCURRENCY → OLLAMA_NUM_PARALLEL → 1)
+        max_queue: 대기열 최대 길이
+        max_wait: 우선순위별 기본 대기 시한(초)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_queue: int = 32,
+        max_wait: Optional[Dict[int, float]] = None
+    ):
+        if max_concurrency is None:
+            max_concurrency = int(
+                os.environ.get("KIOSK_LLM_CONCURRENCY") or os.environ.get("OLLAMA_NUM_PARALLEL") or 1
+            )
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.max_wait = dict(DEFAULT_MAX_WAIT if max_wait is None else max_wait)
+        self._cond = threading.Condition()
+        self._waiters: List[_Waiter] = []  # 최소 힙 (우선순위, 도착 순서)
+        self._seq = itertools.count()
+        self._active = 0
+
+        # 지표
+        self.admitted = 0
+        self.shed_deadline = 0
+        self.rejected_full = 0
+        self.max_queue_depth = 0
+        self._waits_ms: "deque[float]" = deque(maxlen=1000)
+
+    def _remove(self, waiter: _Waiter):
+        self._waiters.remove(waiter)
+        heapq.heapify(self._waiters)
+
+    def _wake(self):
+        """(잠금 안에서) 맨 앞의 비동기 대기자는 바로 입장시키고, 스레드 대기자는 깨워서 스스로 입장하게 함"""
+        while self._waiters and self._active < self.max_concurrency and self._waiters[0].future is not None:
+            waiter = heapq.heappop(self._waiters)
+            self._admit(waiter.started)
+            waiter.admitted = True
+            if not waiter.notify():
+                self._active -= 1  # 대기하던 루프가 사라짐 → 슬롯을 바로 돌려받음
+        self._cond.notify_all()
+
+    def _make_room(self, priority: int):
+        """(잠금 안에서) 대기열이 가득 차면 가장 덜 중요한 대기 요청을 밀어내거나, 그보다 덜 중요하면 거절"""
+        if len(self._waiters) < self.max_queue:
+            return
+        worst = max(self._waiters)
+        if priority >= worst.priority:
+            self.rejected_full += 1
+            raise SchedulerRejected("queue_full")
+        worst.evicted = True
+        self._remove(worst)
+        if worst.future is not None:
+            worst.notify()
+        self._wake()
+
+    def acquire(self, priority: int = PRIORITY_INTENT, max_wait: Optional[float] = None):
+        """
+        실행 슬롯 획득 (release()로 반환)
+
+        Args:
+            priority: 낮을수록 먼저 실행
+            max_wait: 대기 시한(초), None이면 우선순위별 기본값
+
+        Raises:
+            SchedulerRejected: 대기열 초과("queue_full") 또는 시한 초과("deadline")
+        """
+        if max_wait is None:
+            max_wait = self.max_wait.get(priority, max(self.max_wait.values(), default=30.0))
+        started = time.perf_counter()
+        deadline = started + max_wait
+
+        with self._cond:
+            if self._active < self.max_concurrency and not self._waiters:
+                self._admit(started)
+                return
+
+            self._make_room(priority)
+            waiter = _Waiter(priority, next(self._seq), started)
+            heapq.heappush(self._waiters, waiter)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+            try:
+                while True:
+                    if waiter.evicted:
+                        self.rejected_full += 1
+                        raise SchedulerRejected("queue_full")
+                    if self._waiters[0] is waiter and self._active < self.max_concurrency:
+                        heapq.heappop(self._waiters)
+                        self._admit(started)
+                        # 슬롯이 더 남아 있으면 다음 대기자도 깨움
+                        self._wake()
+                        return
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self._remove(waiter)
+                        self.shed_deadline += 1
+                        self._wake()
+                        raise SchedulerRejected("deadline")
+                    self._cond.wait(remaining)
+            except BaseException:
+                if not waiter.evicted and waiter in self._waiters:
+                    self._remove(waiter)
+                    self._wake()
+                raise
+
+    async def acquire_async(self, priority: int = PRIORITY_INTENT, max_wait: Optional[float] = None):
+        """
+        acquire의 asyncio 버전 - 같은 대기열에서 스레드를 점유하지 않고 대기 (release()로 반환)
+
+        Raises:
+            SchedulerRejected: 대기열 초과("queue_full") 또는 시한 초과("deadline")
+        """
+        if max_wait is None:
+            max_wait = self.max_wait.get(priority, max(self.max_wait.values(), default=30.0))
+        started = time.perf_counter()
+
+        with self._cond:
+            if self._active < self.max_concurrency and not self._waiters:
+                self._admit(started)
+                return
+            self._make_room(priority)
+            waiter = _Waiter(priority, next(self._seq), started, asyncio.get_running_loop())
+            heapq.heappush(self._waiters, waiter)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), max_wait)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            with self._cond:
+                if waiter.admitted:
+                    self._active -= 1
+                    self._wake()
+                elif not waiter.evicted and waiter in self._waiters:
+                    self._remove(waiter)
+                    self._wake()
+            raise
+
+        # 시한 초과와 입장이 겹칠 수 있으므로 상태는 잠금 안에서 판정
+        with self._cond:
+            if waiter.admitted:
+                return
+            if waiter.evicted:
+                self.rejected_full += 1
+                raise SchedulerRejected("queue_full")
+            self._remove(waiter)
+            self.shed_deadline += 1
+            self._wake()
+            raise SchedulerRejected("deadline")
+
+    def _admit(self, started: float):
+        self._active += 1
+        self.admitted += 1
+        self._waits_ms.append((time.perf_counter() - started) * 1000)
+
+    def release(self):
+        """실행 슬롯 반환"""
+        with self._cond:
+            self._active -= 1
+            self._wake()
+
+    @contextmanager
+    def slot(self, priority: int = PRIORITY_INTENT, max_wait: Optional[float] = None) -> Iterator[None]:
+        """with 블록 동안 실행 슬롯 점유"""
+        self.acquire(priority, max_wait)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self, priority: int = PRIORITY_INTENT, max_wait: Optional[float] = None) -> AsyncIterator[None]:
+        """async with 블록 동안 실행 슬롯 점유"""
+        await self.acquire_async(priority, max_wait)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """대기열 깊이 / 대기 시간 / 거절 지표"""
+        with self._cond:
+            waits = sorted(self._waits_ms)
+            return {
+                "max_concurrency": self.max_concurrency,
+                "active": self._active,
+                "queue_depth": len(self._waiters),
+                "max_queue_depth": self.max_queue_depth,
+                "admitted": self.admitted,
+                "shed_deadline": self.shed_deadline,
+                "rejected_full": self.rejected_full,
+                "avg_wait_ms": sum(waits) / len(waits) if waits else 0.0,
+                "p95_wait_ms": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+            }
+
+
+# 싱글톤 인스턴스 관리 (같은 프로세스의 모든 세션/엔진이 공유)
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_llm_scheduler(**kwargs) -> LLMScheduler:
+    """
+    LLMScheduler 싱글톤 인스턴스 반환
+
+    Args:
+        **kwargs: 최초 생성 시 LLMScheduler 초기화 파라미터
+
+    Returns:
+        LLMScheduler 인스턴스
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler(**kwargs)
+    return _scheduler
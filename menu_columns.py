@@ -0,0 +1,141 @@
+"""
+Menu Columns - 메뉴 목록의 열(column) 배열 표현
+가격/맵기/칼로리/단백질은 NumPy 정수 배열, 카테고리는 코드 배열, 알레르기/태그는 비트마스크 배열로 저장해
+조건 필터를 메뉴 수만큼 도는 파이썬 루프 대신 배열 마스크 연산으로 처리한다.
+
+행 번호는 원래 메뉴 목록 순서와 같다 (select()가 원래 순서대로 메뉴를 돌려줌).
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+Menu = Dict[str, Any]
+
+
+class _BitVocabulary:
+    """문자열 → 비트 번호 사전과 메뉴별 비트마스크 (64개 단위로 uint64 열을 늘림)"""
+
+    def __init__(self, values_per_row: List[Iterable[str]]):
+        self.bits: Dict[str, int] = {}
+        for values in values_per_row:
+            for value in values:
+                self.bits.setdefault(value, len(self.bits))
+        words = max(1, (len(self.bits) + 63) // 64)
+        self.masks = np.zeros((len(values_per_row), words), dtype=np.uint64)
+        for row, values in enumerate(values_per_row):
+            for value in values:
+                bit = self.bits[value]
+                self.masks[row, bit // 64] |= np.uint64(1 << (bit % 64))
+
+    def query(self, values: Iterable[str]) -> Optional[np.ndarray]:
+        """값 목록의 비트마스크 (사전에 없는 값은 무시, 하나도 없으면 None)"""
+        query = np.zeros(self.masks.shape[1], dtype=np.uint64)
+        found = False
+        for value in values:
+            bit = self.bits.get(value)
+            if bit is not None:
+                query[bit // 64] |= np.uint64(1 << (bit % 64))
+                found = True
+        return query if found else None
+
+    def any_of(self, values: Iterable[str]) -> np.ndarray:
+        """값 중 하나라도 가진 행 마스크"""
+        query = self.query(values)
+        if query is None:
+            return np.zeros(len(self.masks), dtype=bool)
+        return (self.masks & query).any(axis=1)
+
+    def matrix(self) -> np.ndarray:
+        """행 × 값 0/1 행렬 (float32, 열 순서 = 비트 번호)"""
+        bits = np.arange(len(self.bits))
+        shifted = self.masks[:, bits // 64] >> (bits % 64).astype(np.uint64)
+        return (shifted & np.uint64(1)).astype(np.float32)
+
+
+class MenuColumns:
+    """
+    메뉴 목록의 열 배열 (읽기 전용, 메뉴 버전마다 한 번 생성)
+
+    Args:
+        menu_data: 전체 메뉴 목록
+    """
+
+    def __init__(self, menu_data: List[Menu]):
+        self.menus: List[Menu] = list(menu_data)
+        self.ids: List[str] = [m["menu_id"] for m in self.menus]
+        self.price = np.array([m["price"] for m in self.menus], dtype=np.int64)
+        self.spicy = np.array([m.get("spicy", 0) for m in self.menus], dtype=np.int16)
+        self.calories = np.array([m.get("calories", 0) for m in self.menus], dtype=np.int32)
+        self.protein = np.array([m.get("protein", 0) for m in self.menus], dtype=np.int32)
+
+        category_codes: Dict[str, int] = {}
+        for menu in self.menus:
+            category_codes.setdefault(menu["category"], len(category_codes))
+        self.category_names = list(category_codes)
+        self._category_codes = category_codes
+        self.category = np.array([category_codes[m["category"]] for m in self.menus], dtype=np.int16)
+
+        self.allergens = _BitVocabulary([m.get("allergy", []) for m in self.menus])
+        self.tags = _BitVocabulary([m.get("tags", []) for m in self.menus])
+
+    def __len__(self) -> int:
+        return len(self.menus)
+
+    def all(self) -> np.ndarray:
+        """모든 행이 True인 마스크"""
+        return np.ones(len(self.menus), dtype=bool)
+
+    def in_categories(self, categories: Iterable[str]) -> np.ndarray:
+        """카테고리 중 하나에 속한 행 마스크"""
+        codes = [self._category_codes[c] for c in categories if c in self._category_codes]
+        return np.isin(self.category, codes)
+
+    def mask(
+        self,
+        max_price: Optional[float] = None,
+        min_price: Optional[float] = None,
+        exclude_allergens: Iterable[str] = (),
+        spicy_min: Optional[int] = None,
+        spicy_max: Optional[int] = None,
+        categories: Optional[Iterable[str]] = None,
+        any_tags: Iterable[str] = ()
+    ) -> np.ndarray:
+        """
+        조건을 모두 만족하는 행 마스크 (None/빈 조건은 적용하지 않음)
+
+        Args:
+            max_price / min_price: 가격 범위 (포함)
+            exclude_allergens: 하나라도 들어 있으면 제외할 알레르기 코드
+            spicy_min / spicy_max: 맵기 범위 (포함)
+            categories: 허용 카테고리
+            any_tags: 하나 이상 가져야 하는 태그
+
+        Returns:
+            bool 배열 (길이 = 메뉴 수)
+        """
+        mask = self.all()
+        if max_price is not None:
+            mask &= self.price <= max_price
+        if min_price is not None:
+            mask &= self.price >= min_price
+        allergen_query = self.allergens.query(exclude_allergens)
+        if allergen_query is not None:
+            mask &= ~(self.allergens.masks & allergen_query).any(axis=1)
+        if spicy_min is not None:
+            mask &= self.spicy >= spicy_min
+        if spicy_max is not None:
+            mask &= self.spicy <= spicy_max
+        if categories:
+            mask &= self.in_categories(categories)
+        any_tags = list(any_tags)
+        if any_tags:
+            mask &= self.tags.any_of(any_tags)
+        return mask
+
+    def select(self, mask: np.ndarray) -> List[Menu]:
+        """마스크가 True인 메뉴 (원래 순서)"""
+        return [self.menus[i] for i in np.flatnonzero(mask)]
+
+    def filter(self, **conditions) -> List[Menu]:
+        """mask(**conditions)를 만족하는 메뉴 목록"""
+        return self.select(self.mask(**conditions))
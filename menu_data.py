@@ -1,8 +1,13 @@
 """
 AI BURGER HOUSE - 메뉴 데이터
 버거 9개 + 사이드 3개 + 음료 3개 (총 15개)
+
+MENU_DATA는 내장 기본 메뉴. KIOSK_MENU_PATH(JSON/SQLite)를 지정하면 menu_store가 그 파일을 읽고
+변경 시 다시 읽으므로, 아래 조회 함수는 항상 메뉴 저장소의 현재 스냅샷을 돌려준다.
 """
 from typing import List, Dict, Any
+from menu_index import MenuIndex
+from menu_store import get_menu_store
 
 MENU_DATA: List[Dict[str, Any]] = [
     # ===== 버거 (9개) =====
@@ -209,29 +214,30 @@ MENU_DATA: List[Dict[str, Any]] = [
 
 
 def get_menu_data() -> List[Dict[str, Any]]:
-    """메뉴 데이터 반환"""
-    return MENU_DATA
+    """현재 메뉴 데이터 반환 (메뉴 파일이 바뀌면 새 목록)"""
+    return get_menu_store().menus
+
+
+def get_menu_version() -> int:
+    """현재 메뉴 버전 번호 (메뉴가 교체될 때마다 증가)"""
+    return get_menu_store().version
+
+
+def get_menu_index() -> MenuIndex:
+    """현재 메뉴 데이터의 조회 인덱스 반환 (버전별로 한 번만 생성)"""
+    return get_menu_store().snapshot.index
 
 
 def get_categories() -> Dict[str, List[Dict[str, Any]]]:
     """카테고리별 메뉴 목록 반환"""
-    categories: Dict[str, List[Dict[str, Any]]] = {}
-    for menu in MENU_DATA:
-        cat = menu["category"]
-        if cat not in categories:
-            categories[cat] = []
-        categories[cat].append(menu)
-    return categories
+    return {cat: list(menus) for cat, menus in get_menu_index().by_category.items()}
 
 
 def get_menu_by_id(menu_id: str) -> Dict[str, Any] | None:
     """메뉴 ID로 메뉴 검색"""
-    for menu in MENU_DATA:
-        if menu["menu_id"] == menu_id:
-            return menu
-    return None
+    return get_menu_index().get(menu_id)
 
 
 def get_menus_by_tag(tag: str) -> List[Dict[str, Any]]:
     """태그로 메뉴 검색"""
-    return [m for m in MENU_DATA if tag in m["tags"]]
\ No newline at end of file
+    return list(get_menu_index().by_tag.get(tag, []))
\ No newline at end of file
@@ -0,0 +1,232 @@
+"""
+Menu Index - 메뉴 버전별로 한 번만 만드는 조회용 인덱스
+id/이름 딕셔너리, 태그/알레르기/카테고리 역색인, 카테고리별 가격 정렬 배열(bisect 범위 검색),
+조건 필터용 열 배열(MenuColumns)과 점수 엔진(MenuScorer) - 처음 쓸 때 생성
+"""
+import difflib
+import hashlib
+import json
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from menu_columns import MenuColumns
+from menu_scorer import MenuScorer
+
+Menu = Dict[str, Any]
+
+# 이름 비교 시 무시할 부분 (괄호 속 수량 표기, 공백/기호)
+_NAME_NOISE_PATTERN = re.compile(r"\([^)]*\)|[\s\-_·.,'\"]+")
+
+
+def normalize_name(name: str) -> str:
+    """메뉴 이름 비교용 정규화 ("치킨 너겟 (6개)" → "치킨너겟")"""
+    return _NAME_NOISE_PATTERN.sub("", name).lower()
+
+
+def menu_fingerprint(menu_data: List[Menu]) -> str:
+    """메뉴 데이터 내용 해시 (메뉴가 바뀌면 하위 캐시를 무효화하는 버전 키)"""
+    payload = json.dumps(menu_data, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class MenuIndex:
+    """
+    메뉴 조회 인덱스 (읽기 전용)
+
+    Args:
+        menu_data: 전체 메뉴 목록
+    """
+
+    def __init__(self, menu_data: List[Menu]):
+        self.menus: List[Menu] = list(menu_data)
+        self.version = menu_fingerprint(self.menus)
+
+        self.by_id: Dict[str, Menu] = {}
+        self.by_name: Dict[str, Menu] = {}
+        self.by_tag: Dict[str, List[Menu]] = {}
+        self.by_allergen: Dict[str, List[Menu]] = {}
+        self.by_category: Dict[str, List[Menu]] = {}
+
+        self._by_normalized_name: Dict[str, Menu] = {}
+        self._fuzzy_matches: Dict[str, Optional[Menu]] = {}
+        self._columns: Optional[MenuColumns] = None
+        self._scorer: Optional[MenuScorer] = None
+
+        for menu in self.menus:
+            self.by_id[menu["menu_id"]] = menu
+            self.by_name[menu["name"]] = menu
+            self._by_normalized_name.setdefault(normalize_name(menu["name"]), menu)
+            self.by_category.setdefault(menu["category"], []).append(menu)
+            for tag in menu.get("tags", []):
+                self.by_tag.setdefault(tag, []).append(menu)
+            for allergen in menu.get("allergy", []):
+                self.by_allergen.setdefault(allergen, []).append(menu)
+
+        # 카테고리별 가격 오름차순 배열 (bisect 범위 검색용)
+        self._sorted_menus: Dict[str, List[Menu]] = {}
+        self._sorted_prices: Dict[str, List[int]] = {}
+        for category, menus in self.by_category.items():
+            ordered = sorted(menus, key=lambda m: m["price"])
+            self._sorted_menus[category] = ordered
+            self._sorted_prices[category] = [m["price"] for m in ordered]
+
+    def __len__(self) -> int:
+        return len(self.menus)
+
+    @property
+    def columns(self) -> MenuColumns:
+        """열 배열 표현 (마스크 필터용, 처음 접근할 때 생성)"""
+        if self._columns is None:
+            self._columns = MenuColumns(self.menus)
+        return self._columns
+
+    @property
+    def scorer(self) -> MenuScorer:
+        """전체 메뉴 점수 엔진 (처음 접근할 때 생성)"""
+        if self._scorer is None:
+            self._scorer = MenuScorer(self.columns)
+        return self._scorer
+
+    @property
+    def categories(self) -> List[str]:
+        """카테고리 목록 (메뉴 등장 순서)"""
+        return list(self.by_category)
+
+    def get(self, menu_id: str) -> Optional[Menu]:
+        """메뉴 ID로 검색"""
+        return self.by_id.get(menu_id)
+
+    def match_name(self, name: str, cutoff: float = 0.75) -> Optional[Menu]:
+        """
+        LLM이 조금 다르게 쓴 메뉴 이름을 실제 메뉴로 매칭
+        정확히 일치 → 공백/괄호를 뺀 정규화 이름 일치 → 유사도(difflib) cutoff 이상 순서로 찾는다.
+        """
+        menu = self.by_name.get(name)
+        if menu is not None:
+            return menu
+        key = normalize_name(name)
+        if not key:
+            return None
+        if key in self._fuzzy_matches:
+            return self._fuzzy_matches[key]
+        menu = self._by_normalized_name.get(key)
+        if menu is None:
+            close = difflib.get_close_matches(key, list(self._by_normalized_name), n=1, cutoff=cutoff)
+            menu = self._by_normalized_name[close[0]] if close else None
+        if len(self._fuzzy_matches) < 1024:
+            self._fuzzy_matches[key] = menu
+        return menu
+
+    def find_by_names(self, names: Iterable[str], fuzzy: bool = False) -> List[Menu]:
+        """
+        이름 목록을 메뉴 객체로 변환 (입력 순서 유지, 없는 이름/중복 제외)
+
+        Args:
+            names: 메뉴 이름 목록
+            fuzzy: True면 match_name으로 비슷한 이름도 매칭 (LLM 출력용)
+        """
+        results: List[Menu] = []
+        seen = set()
+        for name in names:
+            if not isinstance(name, str):
+                continue
+            menu = self.match_name(name) if fuzzy else self.by_name.get(name)
+            if menu is not None and menu["menu_id"] not in seen:
+                seen.add(menu["menu_id"])
+                results.append(menu)
+        return results
+
+    def in_category(self, category: str) -> List[Menu]:
+        """카테고리 메뉴 목록 (원래 순서)"""
+        return self.by_category.get(category, [])
+
+    def sorted_by_price(self, category: str) -> List[Menu]:
+        """카테고리 메뉴 목록 (가격 오름차순)"""
+        return self._sorted_menus.get(category, [])
+
+    def price_range(self, category: str, min_price: Optional[int] = None, max_price: Optional[int] = None) -> List[Menu]:
+        """
+        가격 범위 검색 (bisect, O(log n + k))
+
+        Args:
+            category: 카테고리
+            min_price: 최소 가격 (포함)
+            max_price: 최대 가격 (포함)
+
+        Returns:
+            가격 오름차순 메뉴 목록
+        """
+        prices = self._sorted_prices.get(category)
+        if not prices:
+            return []
+        lo = bisect_left(prices, min_price) if min_price is not None else 0
+        hi = bisect_right(prices, max_price) if max_price is not None else len(prices)
+        return self._sorted_menus[category][lo:hi]
+
+    def excluding_allergens(self, allergens: Iterable[str], menus: Optional[List[Menu]] = None) -> List[Menu]:
+        """알레르기 성분이 들어간 메뉴 제외 (역색인으로 제외 집합 계산)"""
+        excluded = {
+            menu["menu_id"]
+            for allergen in allergens
+            for menu in self.by_allergen.get(allergen, [])
+        }
+        source = self.menus if menus is None else menus
+        if not excluded:
+            return list(source)
+        return [m for m in source if m["menu_id"] not in excluded]
+
+
+# 메뉴 목록 객체별 인덱스 캐시: (원본 목록, 인덱스) 쌍 튜플을 한 번에 교체
+# 메뉴 핫 리로드 직후 이전 목록으로 처리 중인 요청이 새 인덱스를 밀어내지 않도록 최근 2개까지 보관
+_MAX_CACHED_INDEXES = 2
+_cached: Tuple[Tuple[List[Menu], MenuIndex], ...] = ()
+_index_lock = threading.Lock()
+
+def _lookup(cached: Tuple[Tuple[List[Menu], MenuIndex], ...], menu_data: List[Menu]) -> Optional[MenuIndex]:
+    for menus, index in cached:
+        if menus is menu_data and len(index) == len(menu_data):
+            return index
+    return None
+
+def _remember(menu_data: List[Menu], index: MenuIndex):
+    global _cached
+    others = tuple(entry for entry in _cached if entry[0] is not menu_data)
+    _cached = ((menu_data, index),) + others[:_MAX_CACHED_INDEXES - 1]
+
+def get_menu_index(menu_data: List[Menu]) -> MenuIndex:
+    """
+    메뉴 목록에 대한 MenuIndex 반환 (같은 목록이면 재사용)
+
+    메뉴 목록 객체가 바뀌거나 길이가 달라지면 다시 만든다.
+    목록을 제자리에서 수정했다면 invalidate_menu_index()를 호출해야 한다.
+
+    Args:
+        menu_data: 전체 메뉴 목록
+
+    Returns:
+        MenuIndex 인스턴스
+    """
+    index = _lookup(_cached, menu_data)
+    if index is not None:
+        return index
+    with _index_lock:
+        index = _lookup(_cached, menu_data)
+        if index is None:
+            index = MenuIndex(menu_data)
+            _remember(menu_data, index)
+        return index
+
+
+def register_menu_index(menu_data: List[Menu], index: MenuIndex):
+    """미리 만든 인덱스를 캐시에 등록 (메뉴 저장소가 새 스냅샷으로 교체할 때)"""
+    with _index_lock:
+        _remember(menu_data, index)
+
+
+def invalidate_menu_index():
+    """메뉴 인덱스 캐시 무효화 (메뉴 목록을 제자리에서 수정한 뒤 호출)"""
+    global _cached
+    with _index_lock:
+        _cached = ()
@@ -1,102 +1,252 @@
-from typing import List, Dict, Tuple
+from typing import Callable, List, Dict, Optional, Tuple, Union
+from answer_table import get_answer_table
+from combo_engine import get_combo_engine
+from intent_cache import IntentCache, get_intent_cache, normalize_text
+from menu_index import MenuIndex, get_menu_index
+from prompt_builder import get_prompt_builder
+from intent_parser import answer_from_rules, parse_intent
+from llm_json import StreamingJSONParser, parse_llm_json
+from shared_cache import get_shared_cache
 import json
-import re
+import logging
+import metrics
+import time
 
-def recommend_menus(menu_data: List[Dict], user_input: str, llm_engine=None) -> Tuple[Dict, List[Dict]]:
-    
+logger = logging.getLogger(__name__)
+
+# 워커 간 공유 캐시에 둔 LLM 분석 결과 수명(초) - 메뉴 버전이 키에 들어가므로 메뉴 변경은 따로 무효화 불필요
+SHARED_INTENT_TTL = 6 * 3600
+
+# 추천에 쓰는 분석 필드 (모두 받으면 LLM 생성 조기 중단)
+ANALYSIS_FIELDS = ("understanding", "budget", "allergies", "recommended_menus")
+
+def recommend_menus(
+    menu_data: List[Dict],
+    user_input: str,
+    llm_engine=None,
+    cache: Optional[IntentCache] = None,
+    with_pitch: bool = False
+) -> Tuple[Dict, List[Dict]]:
+    """
+    사용자 입력을 분석해 메뉴 추천
+    1) 단순 조건(예산/알레르기/맵기 등)은 규칙 기반으로 즉시 응답
+    2) 미리 계산한 응답 표(precompute.py)에 있는 문장은 표에서 응답
+    3) 동일/유사 문장은 캐시에서 응답
+    4) 그 외 모호한 입력만 LLM 분석 (워커 간 공유 캐시로 같은 문장은 전체 워커에서 한 번만)
+
+    Args:
+        menu_data: 전체 메뉴 목록
+        user_input: 사용자 입력 텍스트
+        llm_engine: OllamaEngine 인스턴스 (없으면 기본 추천)
+        cache: IntentCache (없으면 전역 캐시 사용)
+        with_pitch: True면 LLM 분석 시 권유 문장도 함께 받아 intent["pitch"]에 저장
+
+    Returns:
+        (intent, recommendations) 튜플
+    """
+    fast_answer = answer_from_rules(menu_data, user_input)
+    if fast_answer is not None:
+        return _answered(fast_answer)
+
+    precomputed = get_answer_table().lookup(user_input, get_menu_index(menu_data))
+    if precomputed is not None:
+        return _answered(precomputed)
+
+    if llm_engine is None:
+        return _answered(_recommend_with_llm(menu_data, user_input, None)[:2])
+
+    cache = cache if cache is not None else get_intent_cache()
+    menu_version = get_menu_index(menu_data).version
+    cached = cache.get(user_input, menu_version)
+    if cached is not None:
+        cached[0]["source"] = "cache"
+        return _answered(cached)
+
+    started = time.perf_counter()
+    shared = get_shared_cache()
+    if shared is None:
+        intent, recommendations, from_llm = _recommend_with_llm(menu_data, user_input, llm_engine, with_pitch)
+    else:
+        index = get_menu_index(menu_data)
+        intent, recommendations, from_llm = shared.get_or_compute(
+            f"intent:{menu_version}:{int(with_pitch)}:{normalize_text(user_input)}",
+            lambda: _recommend_with_llm(menu_data, user_input, llm_engine, with_pitch),
+            ttl=SHARED_INTENT_TTL,
+            encode=_encode_shared,
+            decode=lambda raw: _decode_shared(raw, index),
+            cacheable=lambda result: result[2]
+        )
+    if from_llm:
+        cost_ms = (time.perf_counter() - started) * 1000
+        cache.put(user_input, menu_version, (intent, recommendations), cost_ms=cost_ms)
+    return _answered((intent, recommendations))
+
+
+def _encode_shared(result: Tuple[Dict, List[Dict], bool]) -> bytes:
+    """공유 캐시 저장 형식: intent + 추천 메뉴 ID (메뉴 객체는 각 워커의 인덱스에서 다시 찾음)"""
+    intent, recommendations, _ = result
+    payload = {"intent": intent, "menu_ids": [menu["menu_id"] for menu in recommendations]}
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _decode_shared(raw: bytes, index: MenuIndex) -> Tuple[Dict, List[Dict], bool]:
+    """다른 워커가 분석한 결과 복원 (응답 경로는 cache로 표시)"""
+    payload = json.loads(raw.decode("utf-8"))
+    intent = payload["intent"]
+    intent["source"] = "cache"
+    recommendations = [menu for menu in map(index.get, payload["menu_ids"]) if menu is not None]
+    return intent, recommendations, True
+
+
+def _answered(result: Tuple[Dict, List[Dict]]) -> Tuple[Dict, List[Dict]]:
+    """응답 경로(rules/precomputed/cache/llm/fallback/shed) 카운터 기록 후 그대로 반환"""
+    metrics.ANSWER_SOURCE.inc(source=result[0].get("source", "fallback"))
+    return result
+
+
+def _recommend_with_llm(
+    menu_data: List[Dict],
+    user_input: str,
+    llm_engine=None,
+    with_pitch: bool = False
+) -> Tuple[Dict, List[Dict], bool]:
+    """LLM 분석 후 (intent, recommendations, LLM 결과 여부) 반환"""
     intent = {
         "description": user_input,
         "allergies": [],
         "budget": None,
         "preferences": [],
-        "understanding": ""
+        "understanding": "",
+        "source": "fallback"
     }
     
-    # 메뉴 데이터 간소화 (토큰 절약 및 속도 향상)
-    menu_list_text = "\n".join([
-        f"- {m['name']} ({m['price']}원, {', '.join(m['tags'])})"
-        for m in menu_data
-    ])
-    
-    analysis_prompt = f"""
-역할: 햄버거 가게 AI 점원.
-목표: 사용자 입력("{user_input}")을 분석하여 가장 적절한 메뉴를 추천.
-
-[메뉴 목록]
-{menu_list_text}
-
-[응답 규칙]
-1. 반드시 아래 JSON 형식으로만 응답할 것.
-2. 설명은 한국어로 작성.
-3. 추천 메뉴명은 메뉴 목록에 있는 이름을 정확히 사용.
-
-{{
-  "recommended_menus": ["메뉴이름1", "메뉴이름2"],
-  "reason": "추천 이유",
-  "budget": 숫자 또는 null,
-  "allergies": ["감지된 알레르기 성분"],
-  "understanding": "사용자 의도 요약"
-}}
-"""
-    
     if llm_engine:
         try:
-            print("LLM 분석 시작...") # 디버깅용
-            response = llm_engine.generate_response(analysis_prompt)
-            print(f"LLM 응답: {response}") # 디버깅용
+            # 정적 프리픽스 + 관련 메뉴 상위 N개 + 사용자 입력 (메뉴 블록은 버전별 캐시)
+            prompt_builder = get_prompt_builder()
+            menu_index = get_menu_index(menu_data)
+            with metrics.span("prompt_build"):
+                analysis_prompt = prompt_builder.build(menu_index, user_input, with_pitch=with_pitch)
+                profile = prompt_builder.generation_profile(menu_index, with_pitch)
+            logger.debug("LLM 분석 시작 (프롬프트 약 %d토큰, 메뉴 %d개)", analysis_prompt.token_estimate, analysis_prompt.menu_count)
+            llm_stats = {}
+            # 사용하는 필드(통합 호출이면 권유 문장 포함)가 모두 끝나면 나머지(reason) 생성은 기다리지 않음
+            stream_parser = StreamingJSONParser(ANALYSIS_FIELDS + ("pitch",) if with_pitch else ANALYSIS_FIELDS)
+            response = llm_engine.generate_response(
+                analysis_prompt.text, stats=llm_stats, stop_when=stream_parser.feed, profile=profile
+            )
+            prompt_builder.record_prompt_eval(llm_stats)
+            logger.debug(
+                "LLM 응답 %d자 (eval_count=%s, 조기 중단=%s)",
+                len(response or ""), llm_stats.get("eval_count"), bool(llm_stats.get("early_stop"))
+            )
+
+            if llm_stats.get("shed"):
+                # LLM 대기열이 밀려 거절됨 → 기다리지 않고 규칙 기반 결과로 응답
+                shed_answer = answer_from_rules(menu_data, user_input, threshold=0.0)
+                if shed_answer is not None:
+                    shed_answer[0]["source"] = "shed"
+                    return shed_answer[0], shed_answer[1], False
             
             if response:
-                # Markdown 코드 블록 제거 (```json ... ```)
-                clean_response = re.sub(r'```json\s*|\s*```', '', response)
-                
-                # JSON 파싱
-                # 혹시 모를 텍스트 섞임 방지를 위해 중괄호 찾기
-                json_match = re.search(r'\{.*\}', clean_response, re.DOTALL)
-                
-                if json_match:
-                    analysis = json.loads(json_match.group())
-                    
+                # 코드 블록/잡담/작은따옴표/후행 쉼표 등은 보정해서 파싱 (조기 중단이면 닫는 괄호 보충)
+                early_stop = bool(llm_stats.get("early_stop"))
+                with metrics.span("json_parse"):
+                    analysis, outcome = parse_llm_json(response, truncated=early_stop)
+                metrics.LLM_PARSE.inc(outcome=outcome, early_stop=str(early_stop).lower())
+                if analysis is None:
+                    logger.debug("LLM 응답 파싱 실패: %.200s", response)
+
+                if analysis is not None:
                     # 데이터 매핑
                     intent["understanding"] = analysis.get("understanding", "")
                     intent["budget"] = analysis.get("budget")
-                    intent["allergies"] = analysis.get("allergies", [])
-                    intent["reason"] = analysis.get("reason", "")
+                    intent["allergies"] = analysis.get("allergies") or []
+                    intent["reason"] = analysis.get("reason") or ""
+                    if with_pitch and isinstance(analysis.get("pitch"), str):
+                        intent["pitch"] = analysis["pitch"].strip()
+                    intent["source"] = "llm"
                     
-                    # 추천 메뉴 객체 찾기
-                    rec_names = analysis.get("recommended_menus", [])
-                    recommendations = [
-                        m for m in menu_data 
-                        if m["name"] in rec_names
-                    ]
+                    # 추천 메뉴 객체 찾기 (이름 인덱스 조회, 비슷한 이름도 매칭, LLM 추천 순서 유지)
+                    rec_names = analysis.get("recommended_menus") or []
+                    if isinstance(rec_names, str):
+                        rec_names = [rec_names]
+                    recommendations = menu_index.find_by_names(rec_names, fuzzy=True)
                     
-                    # 추천이 없거나 부족하면 기본 메뉴 채우기
+                    # 추천이 없으면 입력 조건으로 점수를 매긴 상위 메뉴로 대체
                     if len(recommendations) == 0:
-                        return intent, menu_data[:4]
+                        intent["source"] = "fallback"
+                        return intent, _fallback_menus(menu_data, user_input, intent), False
                         
-                    return intent, recommendations
+                    return intent, recommendations, True
 
         except Exception as e:
             print(f"추천 로직 에러: {e}")
     
     # 실패 시 기본값
-    return intent, menu_data[:4]
+    return intent, _fallback_menus(menu_data, user_input, intent), False
 
-# suggest_combo 함수는 기존 그대로 유지
-def suggest_combo(recommended_menus: List[Dict], all_menus: List[Dict], budget: int = None) -> Dict:
-    # (기존 코드와 동일)
-    if not recommended_menus: return None
-    main = next((m for m in recommended_menus if m["category"] == "버거"), recommended_menus[0])
-    
-    available_sides = [m for m in all_menus if m["category"] == "사이드"]
-    if budget: available_sides = [s for s in available_sides if main["price"] + s["price"] <= budget]
-    side = available_sides[0] if available_sides else None
-    
-    available_drinks = [m for m in all_menus if m["category"] == "음료"]
-    if budget and side: available_drinks = [d for d in available_drinks if main["price"] + side["price"] + d["price"] <= budget]
-    drink = available_drinks[0] if available_drinks else None
-    
-    if side and drink:
-        total = main["price"] + side["price"] + drink["price"]
-        if budget and total > budget: return None
-        return {"main": main, "side": side, "drink": drink, "total_price": total}
-    return None
\ No newline at end of file
+
+def _fallback_menus(menu_data: List[Dict], user_input: str, intent: Dict, limit: int = 4) -> List[Dict]:
+    """
+    LLM 추천이 없을 때의 대체 추천
+    입력에서 읽은 조건(+ LLM이 읽은 예산/알레르기)으로 전체 메뉴를 점수화한 상위 메뉴,
+    조건을 만족하는 메뉴가 없으면 메뉴 앞쪽 기본 추천
+    """
+    query = parse_intent(user_input)
+    if not query["budget"] and isinstance(intent.get("budget"), (int, float)):
+        query["budget"] = intent["budget"]
+    for allergen in intent.get("allergies") or []:
+        if isinstance(allergen, str) and allergen not in query["allergies"]:
+            query["allergies"].append(allergen)
+    return get_menu_index(menu_data).scorer.top_k(query, limit) or menu_data[:limit]
+
+def suggest_combos(
+    recommended_menus: List[Dict],
+    all_menus: List[Dict],
+    budget: int = None,
+    allergies: Optional[List[str]] = None,
+    score: Union[str, Callable] = "budget_fit",
+    top_k: int = 3,
+    spicy: Optional[int] = None
+) -> List[Dict]:
+    """
+    추천 메뉴(버거)를 메인으로 예산 안의 최적 세트 조합 top-k 반환
+
+    Args:
+        recommended_menus: 추천 메뉴 목록 (버거가 메인 후보)
+        all_menus: 전체 메뉴 목록
+        budget: 총액 상한
+        allergies: 제외할 알레르기 코드
+        score: 점수 기준 ("budget_fit", "protein", "calories", "spicy" 또는 항목 점수 함수)
+        top_k: 반환할 조합 수
+        spicy: 선호 맵기 (score="spicy"일 때)
+
+    Returns:
+        점수 내림차순 조합 목록 (없으면 빈 리스트)
+    """
+    if not recommended_menus:
+        return []
+    mains = [m for m in recommended_menus if m["category"] == "버거"] or recommended_menus[:1]
+    with metrics.span("combo"):
+        return get_combo_engine().find_combos(
+            get_menu_index(all_menus),
+            mains,
+            budget=budget,
+            allergies=allergies or (),
+            score=score,
+            top_k=top_k,
+            spicy=spicy
+        )
+
+
+def suggest_combo(
+    recommended_menus: List[Dict],
+    all_menus: List[Dict],
+    budget: int = None,
+    allergies: Optional[List[str]] = None,
+    score: Union[str, Callable] = "budget_fit"
+) -> Optional[Dict]:
+    """최적 세트 조합 하나 반환 (예산 안에서 만들 수 없으면 None)"""
+    combos = suggest_combos(recommended_menus, all_menus, budget=budget, allergies=allergies, score=score, top_k=1)
+    return combos[0] if combos else None
\ No newline at end of file
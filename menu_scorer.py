@@ -0,0 +1,167 @@
+"""
+Menu Scorer - 전체 메뉴를 한 번의 배열 연산으로 점수화하는 추천 엔진
+- 하드 조건: 알레르기 비트마스크 제외, 가격 ≤ 예산, 맵기 범위, 카테고리, 단백질 하한/칼로리 상한
+- 소프트 점수: 태그 일치 가중치 → 메인(버거) 우선 → 정렬 기준(단백질/칼로리/가격/예산 근접)
+- top-k는 argpartition으로 후보를 고른 뒤 그 안에서만 정렬 (같은 점수는 메뉴 순서 유지)
+- 여러 질의를 (질의 수 × 메뉴 수) 행렬로 한 번에 점수화하는 배치 API
+
+질의(query)는 intent_parser.parse_intent()의 결과 딕셔너리를 그대로 쓸 수 있다:
+    budget, allergies, spicy_min, spicy_max, categories, tags, sort_by
+추가 키 (선택):
+    protein_min, calories_max: 영양 목표 (하드 조건)
+    tag_weights: {태그: 가중치} (tags는 가중치 1)
+    tags_only: 원하는 태그를 가진 메뉴가 있으면 그 메뉴만 남길지 (기본 True)
+"""
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from menu_columns import MenuColumns
+
+Menu = Dict[str, Any]
+Query = Dict[str, Any]
+
+# 점수 자릿수: 태그 일치 1개 > 메인 카테고리 + 정렬 기준 (정렬 기준 점수는 [0, 1) 범위)
+TAG_WEIGHT = 4.0
+MAIN_WEIGHT = 2.0
+
+# 정렬 기준 이름 → 점수 행 번호
+_OBJECTIVES = ("none", "protein", "calories", "price", "budget")
+
+
+class MenuScorer:
+    """
+    메뉴 열 배열 위의 점수 엔진 (메뉴 버전마다 한 번 생성, MenuIndex.scorer)
+
+    Args:
+        columns: 메뉴 열 배열
+        main_category: 우선 추천할 메인 카테고리
+    """
+
+    def __init__(self, columns: MenuColumns, main_category: str = "버거"):
+        self.columns = columns
+        self._main = np.zeros(len(columns))
+        if main_category in columns.category_names:
+            self._main[columns.category == columns.category_names.index(main_category)] = 1.0
+        self._tag_matrix = columns.tags.matrix()  # (메뉴 수, 태그 수)
+
+        def scaled(values: np.ndarray) -> np.ndarray:
+            return values / (values.max() + 1.0) if len(values) else values.astype(np.float64)
+
+        # 정렬 기준별 [0, 1) 점수 (높을수록 좋음)
+        self._objective_table = np.stack([
+            np.zeros(len(columns)),
+            scaled(columns.protein.astype(np.float64)),        # 단백질 많은 순
+            1.0 - scaled(columns.calories.astype(np.float64)),  # 칼로리 낮은 순
+            1.0 - scaled(columns.price.astype(np.float64)),     # 저렴한 순
+            scaled(columns.price.astype(np.float64)),           # 예산 안에서 예산에 가까운 순
+        ])
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def _tag_weights(self, queries: Sequence[Query]) -> np.ndarray:
+        weights = np.zeros((len(queries), self._tag_matrix.shape[1]), dtype=np.float32)
+        bits = self.columns.tags.bits
+        for row, query in enumerate(queries):
+            for tag in query.get("tags") or ():
+                if tag in bits:
+                    weights[row, bits[tag]] = 1.0
+            for tag, weight in (query.get("tag_weights") or {}).items():
+                if tag in bits:
+                    weights[row, bits[tag]] = weight
+        return weights
+
+    @staticmethod
+    def _objective(query: Query) -> int:
+        """정렬 기준 행 번호 (sort_by가 없으면 예산이 있을 때 예산 근접 순)"""
+        if query.get("sort_by") in _OBJECTIVES:
+            return _OBJECTIVES.index(query["sort_by"])
+        return _OBJECTIVES.index("budget" if query.get("budget") else "none")
+
+    def score_batch(self, queries: Sequence[Query]) -> np.ndarray:
+        """
+        질의 여러 개를 한 번에 점수화
+
+        Args:
+            queries: 질의 딕셔너리 목록
+
+        Returns:
+            (질의 수, 메뉴 수) 점수 행렬, 조건을 만족하지 않는 메뉴는 -inf
+        """
+        cols = self.columns
+        count = len(queries)
+
+        budgets = np.array([q.get("budget") or np.inf for q in queries], dtype=np.float64)[:, None]
+        feasible = cols.price[None, :] <= budgets
+        for key, column, lower in (
+            ("spicy_min", cols.spicy, True),
+            ("spicy_max", cols.spicy, False),
+            ("protein_min", cols.protein, True),
+            ("calories_max", cols.calories, False),
+        ):
+            # 아무 질의에도 없는 조건은 건너뜀
+            if all(q.get(key) is None for q in queries):
+                continue
+            default = -np.inf if lower else np.inf
+            limits = np.array([q.get(key) if q.get(key) is not None else default for q in queries], dtype=np.float64)[:, None]
+            feasible &= column[None, :] >= limits if lower else column[None, :] <= limits
+
+        # 알레르기: 질의별 비트마스크와 메뉴 비트마스크가 겹치면 제외
+        allergen_words = np.zeros((count, cols.allergens.masks.shape[1]), dtype=np.uint64)
+        for row, query in enumerate(queries):
+            words = cols.allergens.query(query.get("allergies") or ())
+            if words is not None:
+                allergen_words[row] = words
+        if allergen_words.any():
+            feasible &= ~(cols.allergens.masks[None, :, :] & allergen_words[:, None, :]).any(axis=2)
+
+        # 카테고리: 질의 × 카테고리 허용표를 메뉴 카테고리 코드로 펼침
+        if any(q.get("categories") for q in queries):
+            allowed = np.ones((count, len(cols.category_names)), dtype=bool)
+            for row, query in enumerate(queries):
+                if query.get("categories"):
+                    allowed[row] = [name in query["categories"] for name in cols.category_names]
+            feasible &= allowed[:, cols.category]
+
+        scores = MAIN_WEIGHT * self._main[None, :] + self._objective_table[[self._objective(q) for q in queries]]
+
+        # 태그 일치 점수: (질의 × 태그) @ (태그 × 메뉴)
+        if any(q.get("tags") or q.get("tag_weights") for q in queries):
+            tag_hits = self._tag_weights(queries) @ self._tag_matrix.T
+            scores += TAG_WEIGHT * tag_hits
+            wants_tags = np.array([bool(q.get("tags") or q.get("tag_weights")) and q.get("tags_only", True) for q in queries])
+            if wants_tags.any():
+                tagged = feasible & (tag_hits > 0)
+                only_tagged = wants_tags & tagged.any(axis=1)
+                feasible = np.where(only_tagged[:, None], tagged, feasible)
+
+        scores[~feasible] = -np.inf
+        return scores
+
+    def top_k_batch(self, queries: Sequence[Query], k: int) -> List[List[Menu]]:
+        """
+        질의별 점수 상위 k개 메뉴
+
+        Returns:
+            질의 순서대로 메뉴 목록 (점수 내림차순, 같은 점수는 메뉴 순서, 조건을 만족하는 메뉴만)
+        """
+        if not queries:
+            return []
+        scores = self.score_batch(queries)
+        k = min(k, len(self.columns))
+        if k <= 0:
+            return [[] for _ in queries]
+        # k번째 점수를 argpartition으로 구하고, 그 이상인 후보(동점 포함)만 정렬
+        kth = scores[np.arange(len(queries)), np.argpartition(-scores, k - 1, axis=1)[:, k - 1]]
+        results = []
+        for row in range(len(queries)):
+            row_scores = scores[row]
+            candidates = np.flatnonzero((row_scores >= kth[row]) & np.isfinite(row_scores))
+            ordered = candidates[np.lexsort((candidates, -row_scores[candidates]))][:k]
+            results.append([self.columns.menus[i] for i in ordered])
+        return results
+
+    def top_k(self, query: Query, k: int) -> List[Menu]:
+        """질의 하나의 점수 상위 k개 메뉴"""
+        return self.top_k_batch([query], k)[0]
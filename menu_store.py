@@ -0,0 +1,354 @@
+"""
+Menu Store - 파일(JSON/SQLite)에서 읽는 버전 관리 메뉴 저장소
+- 메뉴 파일의 변경(mtime/크기)을 백그라운드 스레드가 감시해 다시 읽고, 검증이 끝난 스냅샷으로 원자적으로 교체
+- 스냅샷: 메뉴 목록 + 단조 증가 버전 번호 + 내용 해시(fingerprint) + 미리 만든 MenuIndex/열 배열
+- 읽기 쪽은 store.snapshot을 한 번 가져와 쓰면 요청 도중 메뉴가 바뀌어도 일관된 목록을 본다
+
+메뉴 파일 형식:
+- JSON: 메뉴 목록, 또는 {"menus": [...]}
+- SQLite(.db/.sqlite/.sqlite3): menus 테이블 (allergy/tags 열은 JSON 배열 또는 쉼표 구분 문자열)
+
+KIOSK_MENU_PATH가 없거나 읽을 수 없으면 menu_data.MENU_DATA(내장 메뉴)를 쓴다.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from menu_index import Menu, MenuIndex, menu_fingerprint, register_menu_index
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+# 메뉴 필드: (이름, 변환 함수, 기본값) - 기본값이 None이면 필수
+_FIELDS: Tuple[Tuple[str, Callable[[Any], Any], Any], ...] = (
+    ("menu_id", str, None),
+    ("category", str, None),
+    ("name", str, None),
+    ("price", int, None),
+    ("description", str, ""),
+    ("spicy", int, 0),
+    ("calories", int, 0),
+    ("protein", int, 0),
+    ("preparation_time", str, ""),
+)
+_LIST_FIELDS = ("allergy", "tags")
+
+
+class MenuSnapshot:
+    """
+    한 시점의 메뉴 (읽기 전용)
+
+    Args:
+        menus: 전체 메뉴 목록
+        version: 저장소가 매기는 버전 번호 (교체될 때마다 1씩 증가)
+        source: 읽어 온 파일 경로 (내장 메뉴면 "builtin")
+    """
+
+    def __init__(self, menus: List[Menu], version: int, source: str):
+        self.menus = menus
+        self.version = version
+        self.source = source
+        self.loaded_at = time.time()
+        # 첫 요청이 인덱스/열 배열/점수 엔진 생성 비용을 내지 않도록 교체 전에 미리 생성
+        self.index = MenuIndex(menus)
+        self.columns = self.index.columns
+        self.scorer = self.index.scorer
+        self.fingerprint = self.index.version
+        register_menu_index(menus, self.index)
+
+    def __len__(self) -> int:
+        return len(self.menus)
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, str):
+        stripped = value.strip()
+        if stripped.startswith("["):
+            value = json.loads(stripped)
+        else:
+            return [v.strip() for v in stripped.split(",") if v.strip()]
+    return [str(v) for v in value]
+
+
+def normalize_menus(raw_menus: List[Dict[str, Any]]) -> List[Menu]:
+    """
+    파일에서 읽은 메뉴를 검증하고 필드 형식을 맞춤
+
+    Raises:
+        ValueError: 필수 필드 누락, 잘못된 값, 중복 ID/이름
+    """
+    if not isinstance(raw_menus, list) or not raw_menus:
+        raise ValueError("메뉴 목록이 비어 있음")
+    menus: List[Menu] = []
+    ids, names = set(), set()
+    for position, raw in enumerate(raw_menus):
+        if not isinstance(raw, dict):
+            raise ValueError(f"{position}번 메뉴가 객체가 아님")
+        menu: Menu = {}
+        for field, convert, default in _FIELDS:
+            value = raw.get(field)
+            if value is None or value == "":
+                if default is None:
+                    raise ValueError(f"{position}번 메뉴에 {field} 없음")
+                value = default
+            try:
+                menu[field] = convert(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{position}번 메뉴의 {field} 값이 잘못됨: {value!r}")
+        for field in _LIST_FIELDS:
+            menu[field] = _as_list(raw.get(field))
+        if menu["price"] < 0:
+            raise ValueError(f"{menu['menu_id']} 가격이 음수")
+        if menu["menu_id"] in ids or menu["name"] in names:
+            raise ValueError(f"중복 메뉴: {menu['menu_id']} / {menu['name']}")
+        ids.add(menu["menu_id"])
+        names.add(menu["name"])
+        menus.append(menu)
+    return menus
+
+
+def _is_sqlite(path: str) -> bool:
+    return path.lower().endswith(SQLITE_SUFFIXES)
+
+
+def read_menu_file(path: str) -> List[Menu]:
+    """메뉴 파일(JSON/SQLite)을 읽어 검증된 메뉴 목록 반환"""
+    if _is_sqlite(path):
+        # 읽기 전용으로 열어 관리 도구가 쓰는 중인 DB를 잠그지 않음
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=5)
+        try:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("SELECT * FROM menus ORDER BY rowid").fetchall()
+        finally:
+            conn.close()
+        return normalize_menus([dict(row) for row in rows])
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("menus")
+    return normalize_menus(data)
+
+
+def save_menu_file(path: str, menus: List[Menu]):
+    """
+    메뉴 목록을 파일로 저장 (저장소 감시 스레드가 읽는 도중 반쯤 쓴 파일을 보지 않도록 원자적 교체)
+
+    Args:
+        path: .json 또는 .db/.sqlite/.sqlite3 경로
+        menus: 메뉴 목록
+    """
+    menus = normalize_menus(menus)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        if _is_sqlite(path):
+            columns = [field for field, _, _ in _FIELDS] + list(_LIST_FIELDS)
+            conn = sqlite3.connect(tmp_path)
+            try:
+                conn.execute(
+                    "CREATE TABLE menus (menu_id TEXT PRIMARY KEY, category TEXT NOT NULL, name TEXT NOT NULL UNIQUE, "
+                    "price INTEGER NOT NULL, description TEXT, spicy INTEGER, calories INTEGER, protein INTEGER, "
+                    "preparation_time TEXT, allergy TEXT, tags TEXT)"
+                )
+                conn.executemany(
+                    f"INSERT INTO menus ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    [
+                        [m[c] for c in columns[:-2]] + [json.dumps(m[c], ensure_ascii=False) for c in _LIST_FIELDS]
+                        for m in menus
+                    ]
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        else:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"menus": menus}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    """변경 감지용 (mtime_ns, 크기, WAL 크기) - 파일이 없으면 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    wal_size = 0
+    if _is_sqlite(path):
+        try:
+            wal_size = os.stat(path + "-wal").st_size
+        except OSError:
+            pass
+    return stat.st_mtime_ns, stat.st_size, wal_size
+
+
+class MenuStore:
+    """
+    핫 리로드 메뉴 저장소
+
+    Args:
+        path: 메뉴 파일 경로 (None이면 기본 메뉴만 사용)
+        default_menus: 파일이 없거나 처음 읽기에 실패했을 때 쓸 메뉴
+        poll_interval: 파일 변경 확인 주기(초)
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        default_menus: Optional[List[Menu]] = None,
+        poll_interval: float = 2.0
+    ):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_error: Optional[str] = None
+        self._default_menus = default_menus or []
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._failed_signature: Optional[Tuple[int, int, int]] = None
+        self._listeners: List[Callable[[MenuSnapshot], None]] = []
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self._snapshot = MenuSnapshot(self._default_menus, 0, "builtin")
+        if path:
+            self.reload()
+
+    @property
+    def snapshot(self) -> MenuSnapshot:
+        """현재 메뉴 스냅샷 (교체는 참조 대입 한 번이라 잠금 없이 읽어도 일관됨)"""
+        return self._snapshot
+
+    @property
+    def menus(self) -> List[Menu]:
+        return self._snapshot.menus
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    @property
+    def fingerprint(self) -> str:
+        return self._snapshot.fingerprint
+
+    def subscribe(self, callback: Callable[[MenuSnapshot], None]):
+        """메뉴가 교체될 때마다 새 스냅샷으로 호출할 함수 등록"""
+        self._listeners.append(callback)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        파일이 바뀌었으면 다시 읽어 교체
+
+        Args:
+            force: 변경 여부와 관계없이 다시 읽기
+
+        Returns:
+            메뉴 내용이 바뀌어 교체했으면 True (읽기 실패 시 기존 메뉴 유지)
+        """
+        if not self.path:
+            return False
+        with self._lock:
+            signature = _file_signature(self.path)
+            if signature is None:
+                if self._signature is not None or self.last_error is None:
+                    self.last_error = f"메뉴 파일 없음: {self.path}"
+                    print(f"{self.last_error} (기존 메뉴 유지)")
+                self._signature = None
+                return False
+            if not force and signature in (self._signature, self._failed_signature):
+                return False
+            try:
+                menus = read_menu_file(self.path)
+            except (OSError, ValueError, sqlite3.Error) as e:
+                # 쓰는 도중 읽었다면 쓰기가 끝날 때 서명이 바뀌므로 그때 다시 시도
+                self._failed_signature = signature
+                self.failed_reloads += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"메뉴 파일 읽기 실패 (기존 메뉴 유지): {self.last_error}")
+                return False
+            self._signature = signature
+            self.last_error = None
+            if menu_fingerprint(menus) == self._snapshot.fingerprint and self._snapshot.source == self.path:
+                return False  # 저장만 다시 한 경우 (내용 동일)
+            snapshot = MenuSnapshot(menus, self._snapshot.version + 1, self.path)
+            self._snapshot = snapshot
+            self.reloads += 1
+        for callback in list(self._listeners):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"메뉴 변경 알림 실패: {e}")
+        return True
+
+    def start_watching(self) -> Optional[threading.Thread]:
+        """파일 감시 스레드 시작 (경로가 없으면 시작하지 않음, 두 번째 호출부터는 무시)"""
+        if not self.path:
+            return None
+        with self._lock:
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name="menu-watcher", daemon=True)
+                self._watcher.start()
+        return self._watcher
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"메뉴 감시 오류: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """현재 버전과 리로드 횟수"""
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "fingerprint": snapshot.fingerprint,
+            "source": snapshot.source,
+            "menus": len(snapshot),
+            "loaded_at": snapshot.loaded_at,
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "last_error": self.last_error
+        }
+
+
+# 싱글톤 인스턴스 관리
+_menu_store: Optional[MenuStore] = None
+_menu_store_lock = threading.Lock()
+
+def get_menu_store(**kwargs) -> MenuStore:
+    """
+    MenuStore 싱글톤 인스턴스 반환 (KIOSK_MENU_PATH가 있으면 파일 감시 시작)
+
+    Args:
+        **kwargs: 최초 생성 시 MenuStore 초기화 파라미터
+
+    Returns:
+        MenuStore 인스턴스
+    """
+    global _menu_store
+    if _menu_store is None:
+        with _menu_store_lock:
+            if _menu_store is None:
+                from menu_data import MENU_DATA
+                kwargs.setdefault("path", os.environ.get("KIOSK_MENU_PATH"))
+                kwargs.setdefault("default_menus", MENU_DATA)
+                kwargs.setdefault("poll_interval", float(os.environ.get("KIOSK_MENU_POLL_INTERVAL", "2")))
+                store = MenuStore(**kwargs)
+                store.start_watching()
+                _menu_store = store
+    return _menu_store
@@ -0,0 +1,309 @@
+"""
+Metrics - 단계별 지연 히스토그램/카운터와 Prometheus 텍스트 내보내기
+- span("stage"): with 블록 실행 시간을 kiosk_stage_duration_seconds{stage=...}에 기록
+- record_llm_stats(): Ollama 응답의 eval_count / prompt_eval_duration / eval_duration 기록
+- render_prometheus(): Prometheus text exposition 형식 (kiosk_api /metrics, KIOSK_METRICS_FILE)
+
+KIOSK_METRICS=0 이면 span()은 공용 no-op 객체를 돌려주고 기록 함수는 바로 반환한다.
+"""
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+_enabled = os.environ.get("KIOSK_METRICS", "1") != "0"
+
+
+def enabled() -> bool:
+    """지표 수집 여부"""
+    return _enabled
+
+
+def set_enabled(value: bool):
+    """지표 수집 켜기/끄기 (벤치마크에서 오버헤드 비교용)"""
+    global _enabled
+    _enabled = value
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    """단조 증가 카운터 (레이블별)"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not _enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+
+class Gauge:
+    """마지막 값을 기록하는 게이지 (레이블별)"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels):
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def value(self, **labels) -> Optional[float]:
+        return self._values.get(_label_key(labels))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """누적 버킷 히스토그램 (레이블별)"""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = SECONDS_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        # 레이블 → [버킷별 개수..., +Inf 개수], 합계
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        if not _enabled:
+            return
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(_label_key(labels), ()))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key in sorted(self._counts):
+                cumulative = 0
+                for bound, count in zip(self.buckets, self._counts[key]):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+                cumulative += self._counts[key][-1]
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {self._sums[key]:g}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """지표 모음 (이름 순서대로 내보냄)"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._register(Gauge(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = SECONDS_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "kiosk_stage_duration_seconds",
+    "Duration of pipeline stages (audio_preprocess, stt, early_intent, prompt_build, llm_request, llm_first_token, json_parse, combo, tts)"
+)
+STAGE_ERRORS = REGISTRY.counter("kiosk_stage_errors_total", "Exceptions raised inside a stage span")
+ANSWER_SOURCE = REGISTRY.counter("kiosk_answer_source_total", "Recommendations by answer path (rules, precomputed, cache, llm, fallback, shed)")
+LLM_PARSE = REGISTRY.counter("kiosk_llm_parse_total", "Intent JSON parse outcomes (ok, repaired, failed) by early stop")
+STARTUP_SECONDS = REGISTRY.gauge("kiosk_startup_seconds", "Seconds from process start until each startup phase finished")
+STT_AUDIO_SECONDS = REGISTRY.counter("kiosk_stt_audio_seconds_total", "Audio seconds before (input) and after (processed) STT preprocessing")
+SHARED_CACHE = REGISTRY.counter(
+    "kiosk_shared_cache_total",
+    "Cross-process cache lookups by result (hits, computed, waited, joined, timeouts, errors)"
+)
+EVENT_LOG = REGISTRY.counter("kiosk_event_log_events_total", "Order/interaction events by result (written, dropped)")
+EVENT_LOG_COMMIT_SECONDS = REGISTRY.histogram(
+    "kiosk_event_log_commit_seconds", "Event log group commit duration (serialize + write, fsync when due) by policy"
+)
+SPEECH_END_SECONDS = REGISTRY.histogram(
+    "kiosk_speech_end_to_recommendation_seconds",
+    "Streaming voice input: last speech frame to recommendations ready, by path (early, speculative, full)"
+)
+VOICE_FAILURES = REGISTRY.counter("kiosk_voice_failures_total", "STT/TTS requests that returned no result to the customer")
+LLM_PROMPT_TOKENS = REGISTRY.histogram("kiosk_llm_prompt_tokens", "Ollama prompt_eval_count per request", TOKEN_BUCKETS)
+LLM_EVAL_TOKENS = REGISTRY.histogram("kiosk_llm_eval_tokens", "Ollama eval_count per request", TOKEN_BUCKETS)
+LLM_PROMPT_EVAL_SECONDS = REGISTRY.histogram("kiosk_llm_prompt_eval_seconds", "Ollama prompt_eval_duration per request")
+LLM_EVAL_SECONDS = REGISTRY.histogram("kiosk_llm_eval_seconds", "Ollama eval_duration per request")
+LLM_DONE = REGISTRY.counter("kiosk_llm_done_total", "Completed Ollama generations by done_reason (stop, length)")
+
+
+class _Span:
+    __slots__ = ("stage", "labels", "started")
+
+    def __init__(self, stage: str, labels: Dict[str, Any]):
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        STAGE_SECONDS.observe(time.perf_counter() - self.started, stage=self.stage, **self.labels)
+        # GeneratorExit 등(스트림 중단)은 에러로 세지 않음
+        if exc_type is not None and issubclass(exc_type, Exception):
+            STAGE_ERRORS.inc(stage=self.stage, error=exc_type.__name__)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(stage: str, **labels):
+    """
+    단계 실행 시간을 기록하는 컨텍스트 매니저
+
+    Args:
+        stage: 단계 이름 (stt, prompt_build, llm_request, json_parse, combo, tts 등)
+        **labels: 추가 레이블 (예: mode="json")
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(stage, labels)
+
+
+def record_llm_stats(stats: Dict[str, Any], mode: str):
+    """
+    Ollama 마지막 청크의 생성 통계 기록
+
+    Args:
+        stats: done 청크 (prompt_eval_count, eval_count, prompt_eval_duration, eval_duration; 나노초)
+        mode: 생성 프로필 이름 (intent, intent_pitch, pitch, json, text)
+    """
+    if not _enabled:
+        return
+    if stats.get("prompt_eval_count") is not None:
+        LLM_PROMPT_TOKENS.observe(stats["prompt_eval_count"], mode=mode)
+    if stats.get("eval_count") is not None:
+        LLM_EVAL_TOKENS.observe(stats["eval_count"], mode=mode)
+    if stats.get("prompt_eval_duration") is not None:
+        LLM_PROMPT_EVAL_SECONDS.observe(stats["prompt_eval_duration"] / 1e9, mode=mode)
+    if stats.get("eval_duration") is not None:
+        LLM_EVAL_SECONDS.observe(stats["eval_duration"] / 1e9, mode=mode)
+    if stats.get("done_reason"):
+        LLM_DONE.inc(mode=mode, reason=stats["done_reason"])
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition 형식 문자열"""
+    return REGISTRY.render()
+
+
+def write_prometheus(path: str):
+    """지표를 파일로 저장 (node_exporter textfile collector용, 원자적 교체)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+_exporter: Optional[threading.Thread] = None
+
+def start_file_exporter(path: Optional[str] = None, interval: float = 15.0) -> Optional[threading.Thread]:
+    """
+    주기적으로 지표 파일을 쓰는 백그라운드 스레드 시작 (프로세스당 한 번)
+
+    Args:
+        path: 출력 파일 (None이면 KIOSK_METRICS_FILE 환경변수, 둘 다 없으면 시작하지 않음)
+        interval: 저장 주기(초)
+    """
+    global _exporter
+    path = path or os.environ.get("KIOSK_METRICS_FILE")
+    if not path or not _enabled or _exporter is not None:
+        return _exporter
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                write_prometheus(path)
+            except OSError as e:
+                print(f"지표 파일 저장 실패: {e}")
+
+    _exporter = threading.Thread(target=run, name="metrics-exporter", daemon=True)
+    _exporter.start()
+    return _exporter
@@ -0,0 +1,608 @@
+"""
+Kiosk Pipeline - STT → 분석 → (조합 | 권유 문장 → TTS) 단계 병렬 실행
+- 분석이 끝나면 조합 계산과 권유 문장 생성을 워커 스레드에서 동시에 시작 (카드 렌더링과 겹침)
+- 권유 문장은 스트리밍 중 첫 문장이 완성되는 즉시 TTS 합성 시작
+- KIOSK_MERGE_LLM_CALLS=1 이면 분석 호출에서 권유 문장까지 받아 두 번째 LLM 호출 생략
+- 단계별 시작/종료 시각을 PipelineTrace에 기록해 종단 지연과 겹침 효과를 확인
+- 스트리밍 음성 입력이면 EarlyAnalysis가 말하는 동안 부분 인식 결과로 분석을 먼저 시작
+- 추천/조합 제안/조합 수락/단계별 지연을 event_log에 남김 (백그라운드 기록이라 요청 경로 지연 없음)
+"""
+import os
+import queue
+import re
+import statistics
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+import metrics
+from answer_table import get_answer_table
+from event_log import log_event
+from intent_cache import normalize_text
+from intent_parser import answer_from_rules, parse_intent
+from llm_engine import GenerationProfile
+from llm_scheduler import PRIORITY_PITCH
+from menu_data import get_menu_data
+from menu_index import get_menu_index
+from menu_recommender import recommend_menus, suggest_combo
+from voice_utils import text_to_speech
+
+# 문장 끝 (마침표/느낌표/물음표 뒤 공백)
+_SENTENCE_END = re.compile(r"[.!?。]+[\"')\]]*\s+")
+
+# 스트림 종료 표시
+_END_OF_STREAM = object()
+
+DEFAULT_PITCH = "추천 드린 메뉴를 선택해 주세요!"
+
+# 권유 문장은 짧은 1문장: 줄바꿈에서 멈추고 토큰 수 상한
+PITCH_PROFILE = GenerationProfile("pitch", temperature=0.7, num_predict=64, stop=["\n"])
+
+# 다른 단계 안에 포함되는 시점/부분 구간 (직렬 합계에서 제외)
+_SUB_STAGES = {"pitch_first_token", "tts_first_sentence", "speech_end_to_recommendation"}
+
+# 부분 인식 결과로 미리 고르는 후보 메뉴 수
+EARLY_CANDIDATES = 8
+
+
+def build_pitch_prompt(user_input: str, recommendations: List[Dict]) -> str:
+    """권유 문장 생성 프롬프트"""
+    menu_names = ", ".join([m['name'] for m in recommendations])
+    return f"""상황: 키오스크가 손님에게 메뉴를 추천함.
+손님요청: "{user_input}"
+추천메뉴: {menu_names}
+
+지시: 추천 메뉴 중 하나를 골라 왜 좋은지 40자 이내의 1문장으로 자연스럽게 권유해주세요.
+(주의: JSON 형식 사용 금지, 일반 텍스트만 응답)"""
+
+
+def _combo_fields(combo: Dict) -> Dict[str, Any]:
+    """조합 이벤트 필드 (메뉴 ID와 총액)"""
+    return {
+        "menu_ids": [combo[part]["menu_id"] for part in ("main", "side", "drink") if combo.get(part)],
+        "total_price": combo.get("total_price")
+    }
+
+
+class PipelineTrace:
+    """요청 하나의 단계별 시작/종료 시각 (요청 시작 기준 ms)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.request_id = uuid.uuid4().hex[:16]  # 이벤트 로그에서 같은 요청의 이벤트를 묶는 키
+        self.stages: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, start: float, end: float):
+        """단계 구간 기록 (같은 단계가 여러 번이면 전체 구간으로 합침)"""
+        start_ms = (start - self.started) * 1000
+        end_ms = (end - self.started) * 1000
+        with self._lock:
+            if name in self.stages:
+                prev_start, prev_end = self.stages[name]
+                start_ms, end_ms = min(prev_start, start_ms), max(prev_end, end_ms)
+            self.stages[name] = (start_ms, end_ms)
+
+    def mark(self, name: str):
+        """시점 이벤트 기록 (예: 첫 토큰 도착)"""
+        now = time.perf_counter()
+        self.record(name, now, now)
+
+    @contextmanager
+    def stage(self, name: str):
+        """with 블록 실행 구간을 단계로 기록"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def end_to_end_ms(self) -> float:
+        """요청 시작부터 마지막 단계 종료까지"""
+        with self._lock:
+            return max((end for _, end in self.stages.values()), default=0.0)
+
+    def serial_ms(self) -> float:
+        """모든 단계를 직렬로 실행했다면 걸렸을 시간 (단계 구간 길이의 합)"""
+        with self._lock:
+            return sum(
+                end - start for name, (start, end) in self.stages.items() if name not in _SUB_STAGES
+            )
+
+    def duration_ms(self, name: str) -> Optional[float]:
+        """단계 구간 길이 (기록이 없으면 None)"""
+        with self._lock:
+            if name not in self.stages:
+                return None
+            start, end = self.stages[name]
+            return end - start
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """단계별 {start_ms, end_ms, duration_ms}"""
+        with self._lock:
+            return {
+                name: {"start_ms": start, "end_ms": end, "duration_ms": end - start}
+                for name, (start, end) in sorted(self.stages.items(), key=lambda x: x[1][0])
+            }
+
+
+class TraceHistory:
+    """최근 요청 기록으로 단계별 지연 지표 집계"""
+
+    def __init__(self, size: int = 100):
+        self._traces: "deque[PipelineTrace]" = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, trace: PipelineTrace):
+        with self._lock:
+            self._traces.append(trace)
+
+    def stats(self) -> Dict[str, Any]:
+        """최근 요청의 단계별 중앙값(ms)과 병렬 실행으로 줄어든 시간"""
+        with self._lock:
+            traces = list(self._traces)
+        if not traces:
+            return {"requests": 0, "stages": {}, "e2e_p50_ms": 0.0, "overlap_saved_p50_ms": 0.0}
+
+        durations: Dict[str, List[float]] = {}
+        for trace in traces:
+            for name, timing in trace.as_dict().items():
+                durations.setdefault(name, []).append(timing["duration_ms"])
+        return {
+            "requests": len(traces),
+            "stages": {name: statistics.median(values) for name, values in durations.items()},
+            "e2e_p50_ms": statistics.median(t.end_to_end_ms() for t in traces),
+            "overlap_saved_p50_ms": statistics.median(
+                max(0.0, t.serial_ms() - t.end_to_end_ms()) for t in traces
+            )
+        }
+
+
+class PitchStream:
+    """
+    권유 문장 토큰 스트림
+    생성은 워커 스레드에서 바로 시작되고(카드 렌더링과 겹침), 소비자는 큐에서 토큰을 꺼낸다.
+    문장이 완성될 때마다 TTS 합성을 워커 스레드에 제출한다.
+
+    Args:
+        executor: 문장 TTS 합성을 실행할 스레드 풀
+        tokens: 토큰 이터레이터
+        trace: 단계 기록
+        cancel_event: 설정되면 생성 중단
+        speak: 문장 단위 TTS 합성 여부
+        synthesize: 문장 → 오디오 바이트 함수 (기본: voice_utils.text_to_speech)
+        producer_executor: 토큰 생성을 실행할 스레드 풀 (None이면 executor)
+            생성은 LLM 대기 시간 내내 스레드를 잡고 있으므로 짧은 작업(조합/TTS)과 풀을 나눠 쓴다.
+    """
+
+    def __init__(
+        self,
+        executor: ThreadPoolExecutor,
+        tokens: Iterator[str],
+        trace: PipelineTrace,
+        cancel_event: threading.Event,
+        speak: bool = True,
+        synthesize: Optional[Callable[[str], Optional[bytes]]] = None,
+        producer_executor: Optional[ThreadPoolExecutor] = None
+    ):
+        self.trace = trace
+        self.cancel_event = cancel_event
+        self.text = ""
+        self._executor = executor
+        self._speak = speak
+        self._synthesize_fn = synthesize or text_to_speech
+        self._queue: "queue.Queue" = queue.Queue()
+        self._audio_futures: List[Future] = []
+        self._sentence_buffer = ""
+        self._finished = threading.Event()
+        self._producer = (producer_executor or executor).submit(self._produce, tokens)
+
+    def _produce(self, tokens: Iterator[str]):
+        """토큰 생성 → 큐 (문장 단위로 TTS 제출)"""
+        start = time.perf_counter()
+        first = True
+        try:
+            for token in tokens:
+                if self.cancel_event.is_set():
+                    break
+                if first:
+                    self.trace.mark("pitch_first_token")
+                    first = False
+                self._queue.put(token)
+                self._feed_sentences(token)
+        except Exception as e:
+            print(f"권유 문장 생성 에러: {e}")
+        finally:
+            close = getattr(tokens, "close", None)
+            if close is not None:
+                close()
+            if not self.cancel_event.is_set():
+                self._flush_sentence()
+            self.trace.record("pitch", start, time.perf_counter())
+            self._finished.set()
+            self._queue.put(_END_OF_STREAM)
+
+    def _feed_sentences(self, token: str):
+        self._sentence_buffer += token
+        while True:
+            match = _SENTENCE_END.search(self._sentence_buffer)
+            if match is None:
+                return
+            sentence = self._sentence_buffer[:match.end()].strip()
+            self._sentence_buffer = self._sentence_buffer[match.end():]
+            self._submit_tts(sentence)
+
+    def _flush_sentence(self):
+        sentence = self._sentence_buffer.strip()
+        self._sentence_buffer = ""
+        if sentence:
+            self._submit_tts(sentence)
+
+    def _submit_tts(self, sentence: str):
+        if self._speak:
+            first = not self._audio_futures
+            self._audio_futures.append(self._executor.submit(self._synthesize, sentence, first))
+
+    def _synthesize(self, sentence: str, first: bool) -> Optional[bytes]:
+        start = time.perf_counter()
+        audio = self._synthesize_fn(sentence)
+        end = time.perf_counter()
+        if first:
+            self.trace.record("tts_first_sentence", start, end)
+        self.trace.record("tts", start, end)
+        return audio
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            item = self._queue.get()
+            if item is _END_OF_STREAM:
+                return
+            self.text += item
+            yield item
+
+    def close(self):
+        """생성 중단 (새 입력/초기화/rerun 시, 이미 끝난 스트림은 그대로 둠)"""
+        if not self._finished.is_set():
+            self.cancel_event.set()
+
+    def audio_segments(self, timeout: float = 30.0) -> List[bytes]:
+        """문장별 합성 오디오 (생성 종료 후 호출, 실패한 문장은 제외)"""
+        self._producer.result(timeout=timeout)
+        segments = []
+        for future in self._audio_futures:
+            try:
+                audio = future.result(timeout=timeout)
+            except Exception as e:
+                print(f"TTS 에러: {e}")
+                continue
+            if audio:
+                segments.append(audio)
+        return segments
+
+
+class EarlyAnalysis:
+    """
+    스트리밍 음성 입력 중 부분 인식 결과로 먼저 하는 의도 분석 (발화 하나)
+    - update(): 확정 부분이 늘 때마다 예산/알레르기 추출, 후보 메뉴 사전 필터, 규칙 기반 응답 (수 ms)
+    - speculate(): 말이 멈췄을 때 그 가설로 전체 분석(LLM 포함)을 미리 시작 (결과는 분석 캐시에도 남음)
+    - finish(): 최종 인식 결과가 미리 분석한 문장과 같으면 그 결과를 그대로 쓰고, 다르면 그때 분석
+
+    Args:
+        pipeline: 분석/조합을 실행할 파이프라인
+        speculate: 멈춤 시점 전체 분석 여부 (None이면 KIOSK_STT_SPECULATE 환경변수, 기본 사용)
+    """
+
+    def __init__(self, pipeline: "KioskPipeline", speculate: Optional[bool] = None):
+        if speculate is None:
+            speculate = os.environ.get("KIOSK_STT_SPECULATE", "1") != "0"
+        self._pipeline = pipeline
+        self.speculate_enabled = speculate
+        # 분석과 조합이 같은 메뉴 스냅샷을 쓰도록 발화 시작 시 한 번만 가져옴
+        self.menu_data = pipeline.menu_data
+        self._early: Dict[str, Future] = {}        # 정규화 문장 → (조건, 후보, 규칙 응답)
+        self._speculative: Dict[str, Future] = {}  # 정규화 문장 → (intent, recommendations)
+        self._lock = threading.Lock()
+        self.latest: Optional[Dict[str, Any]] = None  # 가장 최근 사전 분석 요약 (화면/이벤트 표시용)
+        self.path: Optional[str] = None  # finish()가 쓴 결과 경로 (early / speculative / full)
+        self.speech_end_ms: Optional[float] = None
+
+    def update(self, text: str):
+        """확정된 부분 인식 결과로 조건 추출과 사전 필터 시작"""
+        key = normalize_text(text)
+        with self._lock:
+            if not key or key in self._early:
+                return
+            self._early[key] = self._pipeline._executor.submit(self._prefilter, text)
+
+    def _prefilter(self, text: str) -> Tuple[Dict, List[Dict], Optional[Tuple[Dict, List[Dict]]]]:
+        with metrics.span("early_intent"):
+            parsed = parse_intent(text)
+            candidates = get_menu_index(self.menu_data).scorer.top_k(dict(parsed, tags_only=False), EARLY_CANDIDATES)
+            answer = answer_from_rules(self.menu_data, text)
+        self.latest = {
+            "text": text,
+            "budget": parsed["budget"],
+            "allergies": parsed["allergies"],
+            "categories": parsed["categories"],
+            "candidates": [m["name"] for m in candidates],
+            "answered": answer is not None
+        }
+        return parsed, candidates, answer
+
+    def speculate(self, text: str):
+        """말이 멈췄을 때의 가설로 전체 분석 시작 (규칙으로 답할 수 있는 문장은 사전 필터 결과로 충분)"""
+        self.update(text)
+        key = normalize_text(text)
+        if not self.speculate_enabled or not key:
+            return
+        with self._lock:
+            if key in self._speculative:
+                return
+            # LLM 호출이라 오래 걸림 → 짧은 작업 워커(사전 필터/조합/TTS)를 막지 않도록 LLM용 풀에서 실행
+            self._speculative[key] = self._pipeline._pitch_executor.submit(self._full_analysis, key, text)
+
+    def _full_analysis(self, key: str, text: str) -> Optional[Tuple[Dict, List[Dict]]]:
+        early = self._early[key].result()
+        if early[2] is not None:
+            return None
+        return recommend_menus(self.menu_data, text, self._pipeline.engine, with_pitch=self._pipeline.merge_llm_calls)
+
+    def _reuse(self, key: str) -> Tuple[Optional[Tuple[Dict, List[Dict]]], str]:
+        """미리 분석한 결과 (없으면 None)와 경로 이름"""
+        with self._lock:
+            early = self._early.get(key)
+            speculative = self._speculative.get(key)
+        if early is not None:
+            answer = early.result()[2]
+            if answer is not None:
+                metrics.ANSWER_SOURCE.inc(source=answer[0].get("source", "rules"))
+                return answer, "early"
+        if speculative is not None:
+            result = speculative.result()
+            if result is not None:
+                return result, "speculative"
+        return None, "full"
+
+    def finish(self, final_text: str, trace: PipelineTrace, speech_end_at: Optional[float] = None) -> Tuple[Dict, List[Dict], Future]:
+        """
+        최종 인식 결과로 분석 완료 후 조합 계산을 워커 스레드에 제출
+
+        Args:
+            final_text: 최종 인식 결과
+            trace: 단계 기록
+            speech_end_at: 마지막 말소리 시각 (perf_counter, 있으면 발화 끝 → 추천 지연 기록)
+
+        Returns:
+            (intent, recommendations, 조합 Future) 튜플
+        """
+        with trace.stage("analysis"):
+            result, path = self._reuse(normalize_text(final_text))
+            if result is None:
+                result = recommend_menus(
+                    self.menu_data, final_text, self._pipeline.engine, with_pitch=self._pipeline.merge_llm_calls
+                )
+        intent, recommendations = result
+        self.path = path
+        if speech_end_at is not None:
+            ready = time.perf_counter()
+            self.speech_end_ms = (ready - speech_end_at) * 1000
+            trace.record("speech_end_to_recommendation", speech_end_at, ready)
+            metrics.SPEECH_END_SECONDS.observe(ready - speech_end_at, path=path)
+        self._pipeline._log_recommendation(trace, final_text, intent, recommendations, path=path)
+        combo_future = self._pipeline._executor.submit(
+            self._pipeline._combo, self.menu_data, intent, recommendations, trace
+        )
+        return intent, recommendations, combo_future
+
+
+class KioskPipeline:
+    """
+    주문 처리 단계를 스레드 풀로 겹쳐 실행하는 오케스트레이터
+
+    Args:
+        menu_data: 전체 메뉴 목록 (None이면 메뉴 저장소의 현재 메뉴 - 메뉴 파일 변경 반영)
+        engine: OllamaEngine 인스턴스 (없으면 규칙/기본 추천만)
+        merge_llm_calls: 분석 호출에서 권유 문장까지 받을지 (None이면 KIOSK_MERGE_LLM_CALLS 환경변수)
+        max_workers: 짧은 작업(조합/문장 TTS/조기 분석) 워커 스레드 수
+        max_pitch_streams: 권유 문장 생성/추측 분석 등 LLM 호출 스레드 수 (동시 세션 수만큼 - LLM 호출이 짧은 작업 워커를 차지하지 않도록)
+        history_size: 지표 집계에 쓸 최근 요청 수
+    """
+
+    def __init__(
+        self,
+        menu_data: Optional[List[Dict]] = None,
+        engine=None,
+        merge_llm_calls: Optional[bool] = None,
+        max_workers: int = 4,
+        max_pitch_streams: int = 16,
+        history_size: int = 100
+    ):
+        if merge_llm_calls is None:
+            merge_llm_calls = os.environ.get("KIOSK_MERGE_LLM_CALLS", "0") == "1"
+        self._menu_data = menu_data
+        self.engine = engine
+        self.merge_llm_calls = merge_llm_calls
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline")
+        self._pitch_executor = ThreadPoolExecutor(max_workers=max_pitch_streams, thread_name_prefix="pipeline-pitch")
+        self.history = TraceHistory(history_size)
+
+    @property
+    def menu_data(self) -> List[Dict]:
+        """이번 요청에 쓸 메뉴 목록"""
+        return self._menu_data if self._menu_data is not None else get_menu_data()
+
+    def analyze(self, user_input: str, trace: PipelineTrace) -> Tuple[Dict, List[Dict], Future]:
+        """
+        의도 분석 후 조합 계산을 워커 스레드에 제출
+
+        Returns:
+            (intent, recommendations, 조합 Future) 튜플
+        """
+        # 분석과 조합이 같은 메뉴 스냅샷을 쓰도록 요청 시작 시 한 번만 가져옴
+        menu_data = self.menu_data
+        with trace.stage("analysis"):
+            intent, recommendations = recommend_menus(
+                menu_data,
+                user_input,
+                self.engine,
+                with_pitch=self.merge_llm_calls
+            )
+        self._log_recommendation(trace, user_input, intent, recommendations)
+        combo_future = self._executor.submit(self._combo, menu_data, intent, recommendations, trace)
+        return intent, recommendations, combo_future
+
+    def start_early_analysis(self, speculate: Optional[bool] = None) -> EarlyAnalysis:
+        """스트리밍 음성 입력 하나의 선행 분석 시작 (StreamingTranscriber의 on_stable/on_pause에 연결)"""
+        return EarlyAnalysis(self, speculate)
+
+    def _log_recommendation(self, trace: PipelineTrace, user_input: str, intent: Dict, recommendations: List[Dict], **fields: Any):
+        """추천 결과 이벤트 기록"""
+        log_event(
+            "recommendation",
+            request_id=trace.request_id,
+            text=user_input,
+            answer_source=intent.get("source", "fallback"),
+            menu_ids=[menu["menu_id"] for menu in recommendations],
+            budget=intent.get("budget"),
+            allergies=list(intent.get("allergies") or []),
+            analysis_ms=trace.duration_ms("analysis"),
+            **fields
+        )
+
+    def _combo(self, menu_data: List[Dict], intent: Dict, recommendations: List[Dict], trace: PipelineTrace) -> Optional[Dict]:
+        with trace.stage("combo"):
+            combo = None
+            if intent.get("source") == "precomputed":
+                combo = get_answer_table().combo(intent["description"], get_menu_index(menu_data))
+            if combo is None:
+                combo = suggest_combo(
+                    recommendations,
+                    menu_data,
+                    budget=intent.get("budget"),
+                    allergies=intent.get("allergies")
+                )
+        if combo:
+            log_event("combo_offer", request_id=trace.request_id, **_combo_fields(combo))
+        return combo
+
+    def start_pitch(
+        self,
+        user_input: str,
+        intent: Dict,
+        recommendations: List[Dict],
+        trace: PipelineTrace,
+        cancel_event: Optional[threading.Event] = None,
+        speak: bool = True
+    ) -> PitchStream:
+        """
+        권유 문장 생성 시작 (분석에서 이미 받았으면 LLM 호출 없이 그대로 사용)
+
+        Args:
+            user_input: 사용자 입력
+            intent: 분석 결과 (통합 호출이면 "pitch" 포함)
+            recommendations: 추천 메뉴 목록
+            trace: 단계 기록
+            cancel_event: 설정되면 생성 중단
+            speak: 문장 단위 TTS 합성 여부
+
+        Returns:
+            PitchStream (반복하면 토큰, audio_segments()로 음성)
+        """
+        cancel_event = cancel_event or threading.Event()
+        if intent.get("pitch"):
+            tokens: Iterator[str] = iter([intent["pitch"]])
+        elif self.engine is not None and self.engine.is_available:
+            tokens = self.engine.stream_response(
+                build_pitch_prompt(user_input, recommendations),
+                json_mode=False,
+                cancel_event=cancel_event,
+                priority=PRIORITY_PITCH,
+                profile=PITCH_PROFILE
+            )
+        else:
+            tokens = iter([DEFAULT_PITCH])
+        return PitchStream(
+            self._executor, tokens, trace, cancel_event, speak=speak, producer_executor=self._pitch_executor
+        )
+
+    async def astream_pitch(
+        self,
+        user_input: str,
+        intent: Dict,
+        recommendations: List[Dict],
+        trace: PipelineTrace
+    ) -> AsyncIterator[str]:
+        """
+        권유 문장 토큰 비동기 생성 (음성 합성 없음, API 서버용)
+        - 이벤트 루프에서 바로 스트리밍하므로 동시 요청마다 스레드를 잡지 않음
+        - 호출 측이 반복을 멈추면(aclose) HTTP 스트림도 닫혀 생성이 중단됨
+        """
+        start = time.perf_counter()
+        try:
+            if intent.get("pitch"):
+                trace.mark("pitch_first_token")
+                yield intent["pitch"]
+            elif self.engine is not None and self.engine.is_available:
+                first = True
+                async for token in self.engine.astream_response(
+                    build_pitch_prompt(user_input, recommendations),
+                    json_mode=False,
+                    priority=PRIORITY_PITCH,
+                    profile=PITCH_PROFILE
+                ):
+                    if first:
+                        trace.mark("pitch_first_token")
+                        first = False
+                    yield token
+            else:
+                trace.mark("pitch_first_token")
+                yield DEFAULT_PITCH
+        finally:
+            trace.record("pitch", start, time.perf_counter())
+
+    def finish(self, trace: PipelineTrace):
+        """완료된 요청을 지표 집계와 이벤트 로그에 추가"""
+        self.history.add(trace)
+        log_event(
+            "latency",
+            request_id=trace.request_id,
+            end_to_end_ms=round(trace.end_to_end_ms(), 1),
+            serial_ms=round(trace.serial_ms(), 1),
+            stages={name: round(stage["duration_ms"], 1) for name, stage in trace.as_dict().items()}
+        )
+
+    def accept_combo(self, request_id: str, combo: Dict):
+        """손님이 제안된 조합으로 주문함 (조합 수락 이벤트)"""
+        log_event("combo_accepted", request_id=request_id, **_combo_fields(combo))
+
+    def stats(self) -> Dict[str, Any]:
+        """최근 요청의 단계별 중앙값(ms)과 병렬 실행으로 줄어든 시간"""
+        return self.history.stats()
+
+
+# 싱글톤 인스턴스 관리
+_pipeline: Optional[KioskPipeline] = None
+_pipeline_lock = threading.Lock()
+
+def get_pipeline(menu_data: Optional[List[Dict]] = None, engine=None, **kwargs) -> KioskPipeline:
+    """
+    KioskPipeline 싱글톤 인스턴스 반환
+
+    Args:
+        menu_data: 전체 메뉴 목록 (None이면 메뉴 저장소의 현재 메뉴)
+        engine: OllamaEngine 인스턴스
+        **kwargs: 최초 생성 시 KioskPipeline 초기화 파라미터
+
+    Returns:
+        KioskPipeline 인스턴스
+    """
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = KioskPipeline(menu_data, engine, **kwargs)
+    return _pipeline
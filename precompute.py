@@ -0,0 +1,371 @@
+"""
+Precompute - 과거 주문 문장 코퍼스로 응답 표(answer_table)를 미리 계산하는 배치 CLI
+- 입력: JSONL(한 줄에 한 문장, --field 필드) 또는 일반 텍스트 줄
+- 정규화(normalize_text) 기준으로 중복 제거 → 자주 나온 문장부터 프로세스 풀에서 recommend_menus + suggest_combo
+- 프로세스 간 세마포어로 동시 LLM 호출 수 제한 (--llm-concurrency, Ollama 병렬 처리 수에 맞춤)
+- 끝난 문장은 체크포인트(<출력>.checkpoint.jsonl)에 한 줄씩 기록 → --resume으로 중단된 곳부터 이어서
+- LLM이 분석한 문장만 표에 저장 (규칙 기반은 이미 즉시 응답, LLM 실패/대체 응답은 제외)
+- 처리량과, 표 + 규칙 기반으로 바로 답할 수 있는 트래픽 비율(coverage)을 보고
+
+실행 예:
+    python -m precompute build utterances.jsonl --workers 4 --llm-concurrency 2
+    python -m precompute build utterances.jsonl --resume
+    python -m precompute coverage --traffic live.jsonl
+    python -m precompute coverage --events results/events
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from answer_table import DEFAULT_PATH, AnswerTable, build_entry
+from intent_cache import normalize_text
+from intent_parser import answer_from_rules
+from menu_data import get_menu_data
+from menu_index import get_menu_index
+
+# 표에 저장하는 응답 경로 (cache: 워커 간 공유 캐시에 있던 LLM 분석 결과)
+STORED_SOURCES = ("llm", "cache")
+
+
+def load_utterances(path: str, field: str = "text") -> Iterator[str]:
+    """코퍼스 문장 (JSON 줄이면 field 값, JSON이 아니면 줄 전체)"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line
+                continue
+            text = row.get(field) if isinstance(row, dict) else None
+            if isinstance(text, str) and text.strip():
+                yield text.strip()
+
+
+def dedupe(texts: Iterable[str]) -> List[Tuple[str, str, int]]:
+    """정규화 기준 중복 제거 - (키, 처음 나온 원문, 횟수)를 횟수 내림차순으로"""
+    counts: Counter = Counter()
+    originals: Dict[str, str] = {}
+    for text in texts:
+        key = normalize_text(text)
+        if not key:
+            continue
+        counts[key] += 1
+        originals.setdefault(key, text)
+    return [(key, originals[key], count) for key, count in counts.most_common()]
+
+
+# ===== 워커 프로세스 =====
+class _BoundedEngine:
+    """LLM 호출을 프로세스 간 세마포어로 감싼 엔진 (나머지 속성은 그대로 위임)"""
+
+    def __init__(self, engine, slots):
+        self._engine = engine
+        self._slots = slots
+
+    def generate_response(self, *args, **kwargs):
+        with self._slots:
+            return self._engine.generate_response(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._engine, name)
+
+
+_worker_engine: Optional[_BoundedEngine] = None
+
+
+def _init_worker(slots, probe_timeout: float):
+    global _worker_engine
+    import answer_table
+    from llm_engine import get_engine
+    # 기존 표(보통 같은 출력 경로)를 조회하면 "precomputed"로 돌아와 다시 만들 때 빠지므로 워커에서는 빈 표
+    answer_table._table = AnswerTable()
+    engine = get_engine()
+    probed = getattr(engine, "probed", None)
+    if probed is not None:
+        probed.wait(probe_timeout)
+    _worker_engine = _BoundedEngine(engine, slots)
+
+
+def _compute(item: Tuple[str, str]) -> Dict[str, Any]:
+    """문장 하나 분석 + 조합 (체크포인트 한 줄)"""
+    from menu_recommender import recommend_menus, suggest_combo
+    key, text = item
+    menu_data = get_menu_data()
+    started = time.perf_counter()
+    try:
+        intent, recommendations = recommend_menus(menu_data, text, _worker_engine)
+        combo = suggest_combo(
+            recommendations, menu_data, budget=intent.get("budget"), allergies=intent.get("allergies")
+        )
+    except Exception as e:
+        return {"key": key, "source": "error", "error": f"{type(e).__name__}: {e}", "ms": 0.0}
+    source = intent.get("source", "fallback")
+    stored = source in STORED_SOURCES and bool(recommendations)
+    return {
+        "key": key,
+        "source": source,
+        "menu_version": get_menu_index(menu_data).version,
+        "entry": build_entry(intent, recommendations, combo, 0) if stored else None,
+        "ms": (time.perf_counter() - started) * 1000
+    }
+
+
+# ===== 체크포인트 =====
+def load_checkpoint(path: str, menu_version: str) -> Dict[str, Dict[str, Any]]:
+    """체크포인트의 완료 문장 (메뉴가 바뀌었으면 버리고 처음부터)"""
+    done: Dict[str, Dict[str, Any]] = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("menu_version") != menu_version:
+                print(f"체크포인트의 메뉴 버전이 현재와 달라 처음부터 계산: {path}")
+                return {}
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # 중단 시 잘린 마지막 줄
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue
+                if result.get("source") != "error":
+                    done[result["key"]] = result
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"체크포인트를 읽을 수 없어 처음부터 계산 ({path}): {e}")
+        return {}
+    return done
+
+
+def _open_checkpoint(path: str, menu_version: str, resume: bool):
+    """이어서 쓰기면 append, 아니면 헤더부터 새로 씀"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    if resume and os.path.exists(path):
+        return open(path, "a", encoding="utf-8")
+    f = open(path, "w", encoding="utf-8")
+    f.write(json.dumps({"menu_version": menu_version, "created": time.time()}) + "\n")
+    f.flush()
+    return f
+
+
+# ===== 배치 실행 =====
+def build(
+    corpus: str,
+    output: str = DEFAULT_PATH,
+    field: str = "text",
+    workers: int = 4,
+    llm_concurrency: int = 2,
+    resume: bool = False,
+    min_count: int = 1,
+    max_entries: Optional[int] = None,
+    probe_timeout: float = 10.0,
+    progress: bool = True
+) -> Dict[str, Any]:
+    """
+    코퍼스로 응답 표를 만들어 저장
+
+    Args:
+        corpus: 문장 코퍼스 경로
+        output: 응답 표 출력 경로
+        field: JSONL에서 문장이 든 필드
+        workers: 워커 프로세스 수
+        llm_concurrency: 모든 워커를 합친 동시 LLM 호출 수
+        resume: 체크포인트의 완료 문장은 건너뜀
+        min_count: 이 횟수 이상 나온 문장만 계산
+        max_entries: 표 최대 항목 수 (자주 나온 순)
+        probe_timeout: 워커마다 LLM 헬스 체크를 기다릴 시간(초)
+        progress: 진행 상황 출력
+
+    Returns:
+        실행 보고 (처리량, 응답 경로, 표 크기, 코퍼스 coverage)
+    """
+    started = time.perf_counter()
+    texts = list(load_utterances(corpus, field))
+    unique = dedupe(texts)
+    menu_data = get_menu_data()
+    menu_version = get_menu_index(menu_data).version
+
+    checkpoint_path = f"{output}.checkpoint.jsonl"
+    done = load_checkpoint(checkpoint_path, menu_version) if resume else {}
+    reused = len(done)
+    todo = [(key, text) for key, text, count in unique if count >= min_count and key not in done]
+
+    latencies: List[float] = []
+    computed_sources: Counter = Counter()
+    compute_started = time.perf_counter()
+    checkpoint = _open_checkpoint(checkpoint_path, menu_version, resume and bool(done))
+    try:
+        if todo:
+            context = multiprocessing.get_context("spawn")
+            slots = context.BoundedSemaphore(max(1, llm_concurrency))
+            processes = max(1, min(workers, len(todo)))
+            with context.Pool(processes, initializer=_init_worker, initargs=(slots, probe_timeout)) as pool:
+                step = max(1, len(todo) // 20)
+                for i, result in enumerate(pool.imap_unordered(_compute, todo), 1):
+                    checkpoint.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    checkpoint.flush()
+                    computed_sources[result["source"]] += 1
+                    if result["source"] != "error":
+                        done[result["key"]] = result
+                        latencies.append(result["ms"])
+                    if progress and (i % step == 0 or i == len(todo)):
+                        rate = i / (time.perf_counter() - compute_started)
+                        print(f"  {i}/{len(todo)} 문장 ({rate:.1f}/s)")
+        os.fsync(checkpoint.fileno())
+    finally:
+        checkpoint.close()
+    compute_seconds = time.perf_counter() - compute_started
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    stale = 0
+    for key, _, count in unique:
+        result = done.get(key)
+        if not result or not result.get("entry"):
+            continue
+        if result.get("menu_version") != menu_version:
+            stale += 1  # 실행 중 메뉴가 바뀜
+            continue
+        entries[key] = dict(result["entry"], count=count)
+        if max_entries is not None and len(entries) >= max_entries:
+            break
+
+    table = AnswerTable(entries, menu_version, meta={
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "corpus": os.path.basename(corpus),
+        "utterances": len(texts),
+        "unique": len(unique)
+    })
+    table.save(output)
+    if computed_sources.get("error", 0) == 0:
+        os.remove(checkpoint_path)
+
+    rules_covered = sum(
+        count for key, _, count in unique if key not in entries and done.get(key, {}).get("source") == "rules"
+    )
+    table_covered = sum(entry["count"] for entry in entries.values())
+    computed = sum(computed_sources.values())
+    return {
+        "utterances": len(texts),
+        "unique": len(unique),
+        "computed": computed,
+        "reused": reused,
+        "errors": computed_sources.get("error", 0),
+        "stale": stale,
+        "sources": dict(computed_sources),
+        "compute_seconds": compute_seconds,
+        "elapsed_seconds": time.perf_counter() - started,
+        "unique_per_second": computed / compute_seconds if computed and compute_seconds else 0.0,
+        "p50_ms": statistics.median(latencies) if latencies else 0.0,
+        "entries": len(entries),
+        "table_bytes": os.path.getsize(output),
+        "coverage": {
+            "table": table_covered / len(texts) if texts else 0.0,
+            "rules": rules_covered / len(texts) if texts else 0.0
+        }
+    }
+
+
+def coverage(table: AnswerTable, texts: Iterable[str]) -> Dict[str, Any]:
+    """
+    실제 트래픽 중 LLM 없이 바로 답하는 비율 (표에는 LLM 문장만 있으므로 규칙 기반과 겹치지 않음)
+
+    Args:
+        table: 응답 표
+        texts: 트래픽 문장
+
+    Returns:
+        {"utterances", "precomputed", "rules", "llm", "instant_rate", "stale"}
+    """
+    menu_data = get_menu_data()
+    index = get_menu_index(menu_data)
+    stale = bool(len(table)) and table.menu_version != index.version
+    counts: Counter = Counter()
+    for text in texts:
+        if not stale and text in table:
+            counts["precomputed"] += 1
+        elif answer_from_rules(menu_data, text) is not None:
+            counts["rules"] += 1
+        else:
+            counts["llm"] += 1
+    total = sum(counts.values())
+    return {
+        "utterances": total,
+        "precomputed": counts["precomputed"],
+        "rules": counts["rules"],
+        "llm": counts["llm"],
+        "instant_rate": (counts["precomputed"] + counts["rules"]) / total if total else 0.0,
+        "stale": stale
+    }
+
+
+def _print_coverage(report: Dict[str, Any]):
+    total = report["utterances"] or 1
+    print(f"트래픽 {report['utterances']}문장")
+    print(f"  응답 표      {report['precomputed']:6d} ({report['precomputed'] / total:6.1%})")
+    print(f"  규칙 기반    {report['rules']:6d} ({report['rules'] / total:6.1%})")
+    print(f"  LLM 필요     {report['llm']:6d} ({report['llm'] / total:6.1%})")
+    print(f"  즉시 응답 비율 {report['instant_rate']:.1%}")
+    if report["stale"]:
+        print("  ⚠️ 응답 표의 메뉴 버전이 현재 메뉴와 달라 사용되지 않음 - 다시 생성 필요")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="주문 문장 코퍼스로 응답 표 미리 계산")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="코퍼스로 응답 표 생성")
+    build_parser.add_argument("corpus", help="문장 코퍼스 (JSONL 또는 텍스트 줄)")
+    build_parser.add_argument("-o", "--output", default=os.environ.get("KIOSK_ANSWER_TABLE", DEFAULT_PATH))
+    build_parser.add_argument("--field", default="text", help="JSONL에서 문장이 든 필드")
+    build_parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="워커 프로세스 수")
+    build_parser.add_argument("--llm-concurrency", type=int, default=2, help="동시 LLM 호출 수 (전체 워커 합계)")
+    build_parser.add_argument("--resume", action="store_true", help="체크포인트에서 이어서")
+    build_parser.add_argument("--min-count", type=int, default=1, help="이 횟수 이상 나온 문장만")
+    build_parser.add_argument("--max-entries", type=int, help="표 최대 항목 수 (자주 나온 순)")
+    coverage_parser = sub.add_parser("coverage", help="실제 트래픽 중 즉시 응답 비율")
+    coverage_parser.add_argument("--table", default=os.environ.get("KIOSK_ANSWER_TABLE", DEFAULT_PATH))
+    source = coverage_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--traffic", help="트래픽 문장 파일 (JSONL 또는 텍스트 줄)")
+    source.add_argument("--events", help="이벤트 로그 디렉터리 (recommendation 이벤트의 text)")
+    coverage_parser.add_argument("--field", default="text", help="JSONL에서 문장이 든 필드")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        report = build(
+            args.corpus, args.output, args.field, args.workers, args.llm_concurrency,
+            args.resume, args.min_count, args.max_entries
+        )
+        sources = ", ".join(f"{name} {count}" for name, count in sorted(report["sources"].items()))
+        print(f"문장 {report['utterances']}개 → 중복 제거 {report['unique']}개")
+        print(
+            f"  계산 {report['computed']}개 (체크포인트 재사용 {report['reused']}개, 오류 {report['errors']}개): {sources}"
+        )
+        print(
+            f"  처리량 {report['unique_per_second']:.1f} 문장/s, 문장당 p50 {report['p50_ms']:.0f} ms, "
+            f"총 {report['elapsed_seconds']:.1f} s"
+        )
+        print(f"  응답 표 {report['entries']}항목, {report['table_bytes'] / 1024:.1f} KB → {args.output}")
+        print(
+            f"  코퍼스 coverage: 응답 표 {report['coverage']['table']:.1%} + 규칙 기반 {report['coverage']['rules']:.1%}"
+        )
+    else:
+        if args.events:
+            from event_log import read_events
+            texts: Iterable[str] = (
+                event["text"] for event in read_events(args.events, types=("recommendation",)) if event.get("text")
+            )
+        else:
+            texts = load_utterances(args.traffic, args.field)
+        _print_coverage(coverage(AnswerTable.load(args.table), texts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Prompt Builder - 의도 분석 프롬프트 생성
+- 정적 프리픽스(역할/규칙/응답 형식)는 호출마다 바이트 단위로 동일 → Ollama KV 프롬프트 캐시 재사용
+- 메뉴 블록은 메뉴 버전별로 줄 단위 캐시, 요청 조건(알레르기/예산/태그)으로 상위 N개만 삽입
+- 사용자 입력은 맨 끝에 배치해 공통 프리픽스를 최대한 길게 유지
+- 생성 프로필: 메뉴 이름 enum으로 제한한 JSON 스키마 + num_predict/stop (메뉴 버전별 캐시)
+"""
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from intent_parser import parse_intent
+from llm_engine import GenerationProfile
+from menu_index import MenuIndex
+
+# 모든 분석 프롬프트가 공유하는 정적 프리픽스 (수정 시 KV 캐시가 한 번 무효화됨)
+# 필드 순서: 추천에 쓰는 필드를 앞에 두고 reason을 마지막에 둠 (앞 필드가 모두 끝나면 생성 조기 중단)
+STATIC_PREFIX = """역할: 햄버거 가게 AI 점원.
+목표: 사용자 입력을 분석하여 [메뉴 목록]에서 가장 적절한 메뉴를 추천.
+
+[응답 규칙]
+1. 반드시 아래 JSON 형식으로만 응답할 것.
+2. 설명은 한국어로 작성.
+3. 추천 메뉴명은 메뉴 목록에 있는 이름을 정확히 사용.
+
+{
+  "understanding": "사용자 의도 요약",
+  "budget": 숫자 또는 null,
+  "allergies": ["감지된 알레르기 성분"],
+  "recommended_menus": ["메뉴이름1", "메뉴이름2"],
+  "reason": "추천 이유"
+}
+
+[메뉴 목록]
+"""
+
+# 분석 + 권유 문장을 한 번의 호출로 받는 통합 프리픽스 (별도 권유 문장 호출 생략)
+MERGED_STATIC_PREFIX = """역할: 햄버거 가게 AI 점원.
+목표: 사용자 입력을 분석하여 [메뉴 목록]에서 가장 적절한 메뉴를 추천하고, 손님에게 건넬 권유 문장을 작성.
+
+[응답 규칙]
+1. 반드시 아래 JSON 형식으로만 응답할 것.
+2. 설명은 한국어로 작성.
+3. 추천 메뉴명은 메뉴 목록에 있는 이름을 정확히 사용.
+4. pitch는 추천 메뉴 중 하나를 골라 왜 좋은지 자연스럽게 권유하는 1문장.
+
+{
+  "understanding": "사용자 의도 요약",
+  "budget": 숫자 또는 null,
+  "allergies": ["감지된 알레르기 성분"],
+  "recommended_menus": ["메뉴이름1", "메뉴이름2"],
+  "pitch": "손님에게 건넬 권유 1문장",
+  "reason": "추천 이유"
+}
+
+[메뉴 목록]
+"""
+
+# 분석 호출 생성 상한 (조기 중단으로 reason 전에 끊기므로 폭주 방지용 안전망)
+INTENT_NUM_PREDICT = 160
+INTENT_PITCH_NUM_PREDICT = 256
+# JSON 객체 뒤 공백/줄바꿈 반복 방지
+INTENT_STOP = ["\n\n\n"]
+
+_HANGUL_PATTERN = re.compile(r"[가-힣ㄱ-ㆎ]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 토큰 수 추정
+    한글 음절은 약 1토큰, 그 외 문자는 약 4글자당 1토큰으로 계산
+    """
+    hangul = len(_HANGUL_PATTERN.findall(text))
+    return hangul + (len(text) - hangul + 3) // 4
+
+
+def intent_schema(menu_names: List[str], with_pitch: bool = False) -> Dict[str, Any]:
+    """
+    의도 분석 응답 JSON 스키마 (Ollama structured outputs)
+    추천 메뉴는 실제 메뉴 이름 enum으로 제한, 속성 순서는 프롬프트의 응답 형식과 같음
+    """
+    properties: Dict[str, Any] = {
+        "understanding": {"type": "string", "maxLength": 40},
+        "budget": {"type": ["integer", "null"]},
+        "allergies": {"type": "array", "items": {"type": "string"}, "maxItems": 5},
+        "recommended_menus": {
+            "type": "array",
+            "items": {"type": "string", "enum": menu_names},
+            "minItems": 1,
+            "maxItems": 4
+        },
+    }
+    if with_pitch:
+        properties["pitch"] = {"type": "string", "maxLength": 80}
+    properties["reason"] = {"type": "string", "maxLength": 80}
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+
+def _menu_line(menu: Dict[str, Any]) -> str:
+    """메뉴 한 줄 요약 (이름, 가격, 태그)"""
+    return f"- {menu['name']} ({menu['price']}원, {', '.join(menu['tags'])})"
+
+
+class AnalysisPrompt:
+    """생성된 분석 프롬프트와 크기 정보"""
+    __slots__ = ("text", "prefix_chars", "menu_count", "token_estimate")
+
+    def __init__(self, text: str, prefix_chars: int, menu_count: int):
+        self.text = text
+        self.prefix_chars = prefix_chars
+        self.menu_count = menu_count
+        self.token_estimate = estimate_tokens(text)
+
+
+class PromptBuilder:
+    """
+    메뉴 버전별로 캐시된 메뉴 블록을 사용하는 프롬프트 생성기
+
+    Args:
+        max_menu_items: 프롬프트에 넣을 최대 메뉴 수
+    """
+
+    def __init__(self, max_menu_items: int = 20, constrained: bool = True):
+        self.max_menu_items = max_menu_items
+        self.constrained = constrained
+        self._version: Optional[str] = None
+        self._lines: Dict[str, str] = {}
+        self._full_block = ""
+        self._profiles: Dict[bool, GenerationProfile] = {}
+        self._lock = threading.Lock()
+
+        # 지표
+        self.prompt_count = 0
+        self.total_token_estimate = 0
+        self.total_menu_items = 0
+        self.last_prompt_eval_count: Optional[int] = None
+
+    def _sync(self, index: MenuIndex) -> Tuple[Dict[str, str], str]:
+        """메뉴 버전이 바뀌었을 때만 메뉴 줄/전체 블록 재생성"""
+        with self._lock:
+            if index.version != self._version:
+                self._lines = {m["menu_id"]: _menu_line(m) for m in index.menus}
+                self._full_block = "\n".join(self._lines[m["menu_id"]] for m in index.menus)
+                self._profiles = {}
+                self._version = index.version
+            return self._lines, self._full_block
+
+    def select_menus(self, index: MenuIndex, user_input: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        요청 조건으로 관련 메뉴 상위 N개 선택 (전체 메뉴 점수화 → top-k)
+
+        Returns:
+            선택된 메뉴 목록, 조건이 없고 전체 메뉴가 N개 이하면 None (캐시된 전체 블록 사용)
+        """
+        parsed = parse_intent(user_input)
+        if not (parsed["budget"] or parsed["allergies"] or parsed["tags"]) and len(index.menus) <= self.max_menu_items:
+            return None
+        # 알레르기/예산은 걸러내고 원하는 태그를 가진 메뉴를 앞으로 (태그 없는 메뉴도 LLM이 고를 수 있게 남김)
+        # "6천원 정도"처럼 근사 예산도 있으므로 10% 여유를 두고 LLM이 고르게 함
+        candidates = index.scorer.top_k({
+            "budget": parsed["budget"] * 1.1 if parsed["budget"] else None,
+            "allergies": parsed["allergies"],
+            "tags": parsed["tags"],
+            "sort_by": parsed["sort_by"],
+            "tags_only": False
+        }, self.max_menu_items)
+        return candidates or index.menus[:self.max_menu_items]
+
+    def build(self, index: MenuIndex, user_input: str, with_pitch: bool = False) -> AnalysisPrompt:
+        """
+        의도 분석 프롬프트 생성
+
+        Args:
+            index: 메뉴 인덱스
+            user_input: 사용자 입력 텍스트
+            with_pitch: True면 권유 문장(pitch)까지 한 번에 요청하는 통합 프리픽스 사용
+
+        Returns:
+            AnalysisPrompt (text, prefix_chars, menu_count, token_estimate)
+        """
+        lines, full_block = self._sync(index)
+        selected = self.select_menus(index, user_input)
+        if selected is None:
+            menu_block = full_block
+            menu_count = len(index.menus)
+        else:
+            menu_block = "\n".join(lines[m["menu_id"]] for m in selected)
+            menu_count = len(selected)
+
+        prefix = MERGED_STATIC_PREFIX if with_pitch else STATIC_PREFIX
+        text = f'{prefix}{menu_block}\n\n[사용자 입력]\n"{user_input}"\n'
+        prompt = AnalysisPrompt(text, len(prefix), menu_count)
+
+        with self._lock:
+            self.prompt_count += 1
+            self.total_token_estimate += prompt.token_estimate
+            self.total_menu_items += menu_count
+        return prompt
+
+    def generation_profile(self, index: MenuIndex, with_pitch: bool = False) -> Optional[GenerationProfile]:
+        """
+        의도 분석 호출 생성 프로필 (메뉴 버전별 캐시)
+
+        Returns:
+            GenerationProfile, constrained=False면 None (엔진 기본 format=json)
+        """
+        if not self.constrained:
+            return None
+        self._sync(index)
+        with self._lock:
+            profile = self._profiles.get(with_pitch)
+            if profile is None:
+                profile = GenerationProfile(
+                    "intent_pitch" if with_pitch else "intent",
+                    temperature=0.3,
+                    num_predict=INTENT_PITCH_NUM_PREDICT if with_pitch else INTENT_NUM_PREDICT,
+                    stop=INTENT_STOP,
+                    format=intent_schema([m["name"] for m in index.menus], with_pitch)
+                )
+                self._profiles[with_pitch] = profile
+            return profile
+
+    def record_prompt_eval(self, stats: Dict[str, Any]):
+        """Ollama 응답의 실제 프롬프트 토큰 수 기록"""
+        if stats.get("prompt_eval_count") is not None:
+            self.last_prompt_eval_count = stats["prompt_eval_count"]
+
+    def stats(self) -> Dict[str, Any]:
+        """프롬프트 크기 지표"""
+        with self._lock:
+            count = self.prompt_count
+            return {
+                "prompts": count,
+                "avg_token_estimate": self.total_token_estimate / count if count else 0.0,
+                "avg_menu_items": self.total_menu_items / count if count else 0.0,
+                "last_prompt_eval_count": self.last_prompt_eval_count
+            }
+
+
+# 싱글톤 인스턴스 관리
+_builder: Optional[PromptBuilder] = None
+
+def get_prompt_builder(**kwargs) -> PromptBuilder:
+    """
+    PromptBuilder 싱글톤 인스턴스 반환
+
+    Args:
+        **kwargs: 최초 생성 시 PromptBuilder 초기화 파라미터
+
+    Returns:
+        PromptBuilder 인스턴스
+    """
+    global _builder
+    if _builder is None:
+        _builder = PromptBuilder(**kwargs)
+    return _builder
@@ -0,0 +1,395 @@
+"""
+Shared Cache - 여러 워커 프로세스가 함께 쓰는 결과 캐시
+- st.cache_data / IntentCache / AudioCache는 프로세스마다 따로라서, 프록시 뒤에 워커를 여러 개 띄우면
+  같은 문장의 LLM 분석과 TTS 합성을 워커 수만큼 반복한다
+- 저장소는 Redis 호환 부분 인터페이스(get/set nx ex/delete/exists/expire/ttl/incr)만 사용:
+  redis-py 클라이언트 또는 로컬 대역인 SQLiteCache(WAL 모드 파일 하나)를 그대로 끼울 수 있음
+- get_or_compute: 조회 → 없으면 키별 잠금(SET NX EX)을 잡은 한 워커만 계산하고 나머지는 결과를 기다림
+  (프로세스 안에서는 같은 키의 동시 호출을 Future 하나로 합침) → N개 워커가 같은 질문을 해도 LLM 호출 1회
+
+KIOSK_SHARED_CACHE 환경변수:
+- redis://host:6379/0 (redis-py 필요)
+- sqlite:///경로 또는 파일 경로 (기본 .kiosk_cache/shared.db)
+- off: 사용 안 함 (get_shared_cache()가 None 반환)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Union
+
+import metrics
+
+DEFAULT_URL = "sqlite:///.kiosk_cache/shared.db"
+
+Value = Union[bytes, str, int, float]
+
+
+def _to_bytes(value: Value) -> bytes:
+    """redis-py와 같은 값 변환 (문자열/숫자는 UTF-8 바이트로 저장)"""
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+class SQLiteCache:
+    """
+    Redis 호환 부분 인터페이스의 로컬 대역 (SQLite WAL 파일 하나를 여러 프로세스가 공유)
+
+    값은 bytes로 돌려주고 만료는 벽시계 시각(time.time)으로 저장해 프로세스 간에 같은 기준을 쓴다.
+    연결은 스레드마다 따로 열고, 잠금 경합은 busy_timeout 동안 SQLite가 기다린다.
+
+    Args:
+        path: 데이터베이스 파일 경로 (상위 디렉터리는 자동 생성)
+        busy_timeout: 다른 프로세스의 쓰기 잠금을 기다릴 최대 시간(초)
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL"
+            ") WITHOUT ROWID"
+        )
+        # 워커가 뜰 때마다 만료된 행을 정리 (조회는 만료 행을 무시하므로 용량 관리용)
+        self.purge_expired()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: 문장마다 자동 커밋, 여러 문장이 필요한 곳만 BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _expires_at(ex: Optional[float], px: Optional[int]) -> Optional[float]:
+        if px is not None:
+            return time.time() + px / 1000
+        if ex is not None:
+            return time.time() + ex
+        return None
+
+    def ping(self) -> bool:
+        self._conn().execute("SELECT 1")
+        return True
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(
+        self,
+        key: str,
+        value: Value,
+        ex: Optional[float] = None,
+        px: Optional[int] = None,
+        nx: bool = False
+    ) -> Optional[bool]:
+        """
+        값 저장 (redis SET key value [EX|PX] [NX])
+
+        Returns:
+            저장했으면 True, nx인데 이미 살아 있는 키가 있으면 None (redis-py와 같음)
+        """
+        now = time.time()
+        params = (key, _to_bytes(value), self._expires_at(ex, px))
+        if nx:
+            # 만료된 키는 없는 것으로 보고 덮어씀 - 한 문장이라 프로세스 간에도 원자적
+            cursor = self._conn().execute(
+                "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                "WHERE kv.expires_at IS NOT NULL AND kv.expires_at <= ?",
+                params + (now,)
+            )
+            return True if cursor.rowcount == 1 else None
+        self._conn().execute("INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)", params)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        cursor = self._conn().execute(
+            f"DELETE FROM kv WHERE key IN ({','.join('?' * len(keys))}) AND (expires_at IS NULL OR expires_at > ?)",
+            keys + (time.time(),)
+        )
+        return cursor.rowcount
+
+    def exists(self, *keys: str) -> int:
+        now = time.time()
+        return sum(
+            1 for key in keys
+            if self._conn().execute(
+                "SELECT 1 FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, now)
+            ).fetchone()
+        )
+
+    def expire(self, key: str, seconds: float) -> bool:
+        now = time.time()
+        cursor = self._conn().execute(
+            "UPDATE kv SET expires_at = ? WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (now + seconds, key, now)
+        )
+        return cursor.rowcount == 1
+
+    def ttl(self, key: str) -> int:
+        """남은 수명(초) - 키가 없으면 -2, 만료 없음이면 -1 (redis TTL과 같음)"""
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT expires_at FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, now)
+        ).fetchone()
+        if row is None:
+            return -2
+        return -1 if row[0] is None else int(round(row[0] - now))
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value, expires_at FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time())
+            ).fetchone()
+            value = (int(bytes(row[0])) if row else 0) + amount
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, _to_bytes(value), row[1] if row else None)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def flushdb(self) -> bool:
+        self._conn().execute("DELETE FROM kv")
+        return True
+
+    def purge_expired(self) -> int:
+        """만료된 행 삭제 후 삭제한 행 수 반환"""
+        return self._conn().execute(
+            "DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+        ).rowcount
+
+
+def _json_encode(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+def _json_decode(raw: bytes) -> Any:
+    return json.loads(raw.decode("utf-8"))
+
+
+class SharedCache:
+    """
+    공유 저장소 위의 get-or-compute (키별 단일 계산)
+
+    Args:
+        client: Redis 호환 클라이언트 (redis.Redis 또는 SQLiteCache)
+        namespace: 키 앞에 붙일 이름공간
+        lock_ttl: 계산 잠금 수명(초) - 계산하던 워커가 죽어도 이 시간 뒤 다른 워커가 이어받음
+        wait_timeout: 다른 워커의 결과를 기다릴 최대 시간(초), 넘으면 직접 계산
+        poll_interval: 결과 대기 첫 폴링 간격(초), 대기할수록 최대 8배까지 늘림
+    """
+
+    def __init__(
+        self,
+        client,
+        namespace: str = "kiosk",
+        lock_ttl: float = 30.0,
+        wait_timeout: float = 30.0,
+        poll_interval: float = 0.02
+    ):
+        self.client = client
+        self.namespace = namespace
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "computed": 0, "waited": 0, "joined": 0, "timeouts": 0, "errors": 0}
+        self._last_error = ""
+
+    def _count(self, result: str):
+        with self._lock:
+            self._stats[result] += 1
+        metrics.SHARED_CACHE.inc(result=result)
+
+    def _call(self, method: str, *args, **kwargs):
+        """저장소 호출 - 실패하면 None (공유 캐시 장애가 추천 응답을 막지 않도록)"""
+        try:
+            return getattr(self.client, method)(*args, **kwargs)
+        except Exception as e:
+            self._count("errors")
+            message = f"{type(e).__name__}: {e}"
+            if message != self._last_error:
+                self._last_error = message
+                print(f"공유 캐시 에러 ({method}): {message}")
+            return None
+
+    def get(self, key: str, decode: Callable[[bytes], Any] = _json_decode) -> Optional[Any]:
+        """계산 없이 조회만 (없으면 None)"""
+        raw = self._call("get", f"{self.namespace}:{key}")
+        return decode(raw) if raw is not None else None
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Optional[float] = None,
+        encode: Callable[[Any], bytes] = _json_encode,
+        decode: Callable[[bytes], Any] = _json_decode,
+        cacheable: Callable[[Any], bool] = lambda value: True
+    ) -> Any:
+        """
+        공유 캐시에서 조회하고, 없으면 모든 워커를 통틀어 한 번만 계산해 저장
+
+        Args:
+            key: 캐시 키 (이름공간은 자동으로 붙음)
+            compute: 값 계산 함수 (잠금을 잡은 호출자만 실행)
+            ttl: 값 수명(초), None이면 만료 없음
+            encode / decode: 값 ↔ bytes 변환 (기본 JSON)
+            cacheable: False를 돌려주는 값(폴백 응답 등)은 저장하지 않음 - 기다리던 워커는 각자 다시 시도
+
+        Returns:
+            compute 결과, 또는 공유 캐시에서 decode한 값
+        """
+        full_key = f"{self.namespace}:{key}"
+        raw = self._call("get", full_key)
+        if raw is not None:
+            self._count("hits")
+            return decode(raw)
+
+        # 프로세스 안: 같은 키의 동시 호출은 먼저 온 스레드의 결과를 나눠 받음
+        with self._lock:
+            future = self._inflight.get(full_key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[full_key] = future
+        if not leader:
+            self._count("joined")
+            value, encoded = future.result()
+            # 호출자마다 따로 고칠 수 있게 저장된 형태에서 새로 만들어 줌
+            return decode(encoded) if encoded is not None else value
+
+        try:
+            value, encoded = self._compute_shared(full_key, compute, ttl, encode, decode, cacheable)
+            future.set_result((value, encoded))
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(full_key, None)
+
+    def _compute_shared(self, full_key, compute, ttl, encode, decode, cacheable):
+        """프로세스 간: 잠금(SET NX EX)을 잡은 워커만 계산하고 나머지는 값이 저장되길 기다림"""
+        lock_key = f"{full_key}:lock"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_timeout
+        interval = self.poll_interval
+        waited = False
+        while True:
+            acquired = self._call("set", lock_key, token, ex=max(1, int(self.lock_ttl)), nx=True)
+            if acquired:
+                try:
+                    # 잠금을 잡기 직전에 다른 워커가 저장을 마쳤을 수 있음
+                    raw = self._call("get", full_key)
+                    if raw is not None:
+                        self._count("waited" if waited else "hits")
+                        return decode(raw), raw
+                    value = compute()
+                    self._count("computed")
+                    encoded = None
+                    if cacheable(value):
+                        encoded = encode(value)
+                        if ttl is not None:
+                            self._call("set", full_key, encoded, ex=max(1, int(ttl)))
+                        else:
+                            self._call("set", full_key, encoded)
+                    return value, encoded
+                finally:
+                    # 잠금 수명이 지나 다른 워커가 잡은 잠금은 건드리지 않음
+                    if self._call("get", lock_key) == token.encode():
+                        self._call("delete", lock_key)
+            if acquired is None and self._call("exists", lock_key) is None:
+                # 저장소 장애 (exists도 실패) → 공유 없이 직접 계산
+                return compute(), None
+
+            waited = True
+            time.sleep(interval)
+            interval = min(interval * 2, self.poll_interval * 8)
+            raw = self._call("get", full_key)
+            if raw is not None:
+                self._count("waited")
+                return decode(raw), raw
+            if time.monotonic() >= deadline:
+                self._count("timeouts")
+                return compute(), None
+
+    def stats(self) -> Dict[str, Any]:
+        """공유 캐시 통계 (이 프로세스 기준)"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["backend"] = type(self.client).__name__
+        stats["namespace"] = self.namespace
+        return stats
+
+
+def open_client(url: str):
+    """
+    KIOSK_SHARED_CACHE 형식의 주소로 Redis 호환 클라이언트 생성
+
+    Args:
+        url: redis://..., rediss://..., unix://... (redis-py 필요) 또는 sqlite:///경로 / 파일 경로
+    """
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        import redis
+        return redis.Redis.from_url(url)
+    if url.startswith("sqlite:///"):
+        url = url[len("sqlite:///"):]
+    return SQLiteCache(url)
+
+
+# 싱글톤 인스턴스 관리
+_shared: Optional[SharedCache] = None
+_shared_ready = False
+_shared_lock = threading.Lock()
+
+def get_shared_cache(**kwargs) -> Optional[SharedCache]:
+    """
+    SharedCache 싱글톤 인스턴스 반환
+
+    Args:
+        **kwargs: 최초 생성 시 SharedCache 초기화 파라미터 (url로 저장소 주소 지정 가능)
+
+    Returns:
+        SharedCache 인스턴스, 사용 안 함(off)이거나 저장소를 열 수 없으면 None
+    """
+    global _shared, _shared_ready
+    if not _shared_ready:
+        with _shared_lock:
+            if not _shared_ready:
+                url = kwargs.pop("url", None) or os.environ.get("KIOSK_SHARED_CACHE", DEFAULT_URL)
+                if url.strip().lower() not in ("", "off", "0", "none"):
+                    try:
+                        _shared = SharedCache(open_client(url), **kwargs)
+                    except Exception as e:
+                        print(f"공유 캐시를 열 수 없음 ({url}): {e}")
+                _shared_ready = True
+    return _shared
@@ -0,0 +1,201 @@
+"""
+Kiosk Startup - 부팅 직후 백그라운드 준비 작업과 준비 시간(time-to-ready) 측정
+0) answer_table : 미리 계산한 응답 표 읽기 (LLM 준비 전에도 자주 들어오는 문장은 즉시 응답)
+1) llm_probe    : 엔진 풀의 첫 헬스 체크 대기 (화면은 막지 않음)
+2) model_load   : 엔드포인트마다 빈 프롬프트로 모델 로드, keep_alive로 고정
+3) prompt_warm  : 분석 프롬프트 정적 프리픽스를 한 번 처리시켜 KV 캐시 적재 (첫 토큰에서 중단)
+   → 여기까지 끝나면 ready (첫 손님이 모델 로드 시간을 기다리지 않음)
+4) stt_load / tts_prerender : 음성 엔진은 LLM 준비 뒤에 로드 (LLM 로드와 CPU/디스크 경쟁 방지)
+
+준비 시간은 프로세스 시작 시각 기준 (/proc이 없으면 이 모듈 import 시각).
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import metrics
+from answer_table import get_answer_table
+from llm_scheduler import PRIORITY_PITCH
+from menu_index import get_menu_index
+from prompt_builder import get_prompt_builder
+from stt_backends import get_stt_service
+from tts_service import get_tts_service
+
+# 프리픽스 캐시 적재용 문장 (규칙 기반으로 처리되지 않는 모호한 요청)
+WARM_UP_INPUT = "오늘 뭐 먹을지 추천해줘"
+
+
+def _process_started() -> float:
+    """프로세스 시작 시각 (time.time 기준, /proc이 없으면 현재 시각)"""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        # /proc/self/stat 22번째 필드: 부팅 후 프로세스 시작까지의 클록 틱
+        return time.time() - uptime + int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.time()
+
+
+PROCESS_STARTED = _process_started()
+
+
+class KioskStartup:
+    """
+    준비 작업 실행기 (프로세스당 한 번 start)
+
+    Args:
+        probe_timeout: 첫 헬스 체크 대기 시간(초)
+        voice: 음성 엔진(STT 모델, 고정 안내 음성)도 준비할지
+    """
+
+    def __init__(self, probe_timeout: float = 10.0, voice: bool = True):
+        self.probe_timeout = probe_timeout
+        self.voice = voice
+        self.started = PROCESS_STARTED
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.ready = threading.Event()
+        self.voice_ready = threading.Event()
+        self.ready_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self, engine=None, menu_data: Optional[List[Dict]] = None) -> "KioskStartup":
+        """백그라운드 스레드에서 준비 작업 시작 (두 번째 호출부터는 무시)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, args=(engine, menu_data), name="kiosk-startup", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def _phase(self, name: str, fn: Callable[[], Any]) -> Any:
+        """단계 실행 + 소요 시간/완료 시각 기록 (실패해도 다음 단계 진행)"""
+        started = time.perf_counter()
+        ok, detail = True, None
+        try:
+            detail = fn()
+        except Exception as e:
+            ok, detail = False, f"{type(e).__name__}: {e}"
+            print(f"시작 준비 실패 ({name}): {detail}")
+        finished = time.time() - self.started
+        self.phases[name] = {
+            "ok": ok,
+            "duration_ms": (time.perf_counter() - started) * 1000,
+            "finished_s": finished,
+            "detail": detail
+        }
+        metrics.STARTUP_SECONDS.set(finished, phase=name)
+        return detail
+
+    def _run(self, engine, menu_data: Optional[List[Dict]]):
+        self._phase("answer_table", self._load_answer_table)
+        if engine is not None:
+            self._phase("llm_probe", lambda: self._probe(engine))
+            if engine.is_available:
+                self._phase("model_load", lambda: self._load_models(engine))
+                if menu_data:
+                    self._phase("prompt_warm", lambda: self._warm_prompt(engine, menu_data))
+        self.ready_at = time.time()
+        metrics.STARTUP_SECONDS.set(self.ready_at - self.started, phase="ready")
+        self.ready.set()
+
+        if self.voice:
+            self._phase("stt_load", self._load_stt)
+            self._phase("tts_prerender", self._prerender_tts)
+            metrics.STARTUP_SECONDS.set(time.time() - self.started, phase="voice_ready")
+        self.voice_ready.set()
+
+    @staticmethod
+    def _load_answer_table() -> Dict[str, Any]:
+        table = get_answer_table()
+        return {"entries": len(table), "path": table.path}
+
+    def _probe(self, engine) -> Dict[str, Any]:
+        probed = getattr(engine, "probed", None)
+        if probed is not None and not probed.wait(self.probe_timeout):
+            raise TimeoutError("헬스 체크 시간 초과")
+        return {"available": engine.is_available}
+
+    @staticmethod
+    def _load_models(engine) -> List[Dict[str, Any]]:
+        results = []
+        for endpoint in getattr(engine, "endpoints", []):
+            if not endpoint.routable:
+                continue
+            response = endpoint.engine.warm_up()
+            results.append({
+                "base_url": endpoint.engine.base_url,
+                "load_ms": response.get("load_duration", 0) / 1e6
+            })
+        return results
+
+    @staticmethod
+    def _warm_prompt(engine, menu_data: List[Dict]) -> Dict[str, Any]:
+        builder = get_prompt_builder()
+        index = get_menu_index(menu_data)
+        prompt = builder.build(index, WARM_UP_INPUT)
+        profile = builder.generation_profile(index)
+        warmed = 0
+        for endpoint in getattr(engine, "endpoints", []):
+            if not endpoint.routable:
+                continue
+            # 프롬프트 처리(prefill)만 필요하므로 첫 토큰에서 끊음
+            endpoint.engine.generate_response(
+                prompt.text, priority=PRIORITY_PITCH, stop_when=lambda token: True, profile=profile
+            )
+            warmed += 1
+        return {"endpoints": warmed, "token_estimate": prompt.token_estimate}
+
+    @staticmethod
+    def _load_stt() -> Optional[str]:
+        service = get_stt_service()
+        if not service.backends:
+            return None
+        service.backends[0].ensure_loaded()
+        return service.backends[0].name
+
+    @staticmethod
+    def _prerender_tts() -> Dict[str, Any]:
+        service = get_tts_service()
+        service.prerender().join(timeout=30)
+        return {"disk_bytes": service.cache.stats()["disk_bytes"]}
+
+    @property
+    def time_to_ready_ms(self) -> Optional[float]:
+        """프로세스 시작부터 ready까지 (아직 준비 중이면 None)"""
+        return (self.ready_at - self.started) * 1000 if self.ready_at is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        """준비 상태와 단계별 소요 시간"""
+        return {
+            "ready": self.ready.is_set(),
+            "voice_ready": self.voice_ready.is_set(),
+            "time_to_ready_ms": self.time_to_ready_ms,
+            "phases": dict(self.phases)
+        }
+
+
+# 싱글톤 인스턴스 관리
+_startup: Optional[KioskStartup] = None
+_startup_lock = threading.Lock()
+
+def get_startup(**kwargs) -> KioskStartup:
+    """
+    KioskStartup 싱글톤 인스턴스 반환
+
+    Args:
+        **kwargs: 최초 생성 시 KioskStartup 초기화 파라미터
+
+    Returns:
+        KioskStartup 인스턴스
+    """
+    global _startup
+    if _startup is None:
+        with _startup_lock:
+            if _startup is None:
+                _startup = KioskStartup(**kwargs)
+    return _startup
@@ -0,0 +1,536 @@
+"""
+STT Backends - 교체 가능한 음성 인식 엔진
+- google: Google Web Speech API (네트워크 필요)
+- whisper: faster-whisper 로컬 CPU 모델 (오프라인)
+- vosk: Vosk 로컬 모델 (오프라인, 저사양)
+
+KIOSK_STT_BACKENDS 환경변수로 사용 순서를 지정 (예: "whisper,google").
+앞 엔진을 쓸 수 없으면(네트워크 단절, 모델 없음) 다음 엔진으로 넘어간다.
+
+open_stream()은 발화 하나를 청크 단위로 받는 스트리밍 인식 세션을 연다:
+Vosk는 엔진의 부분 인식 결과를, 나머지 엔진은 쌓인 오디오를 일정 간격으로 다시 인식한 결과를 가설로 낸다.
+
+인식 전에 audio_preprocess로 형식 감지/디코딩, 엔진 샘플레이트로 리샘플링, 앞뒤 무음 제거, 음량 정규화를 한다
+(KIOSK_STT_PREPROCESS=0이면 받은 바이트를 그대로 PCM으로 전달).
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+import metrics
+from audio_preprocess import AudioDecodeError, AudioPreprocessor, PreparedAudio, float_to_pcm16
+
+DEFAULT_BACKENDS = "google"
+
+
+class STTUnavailableError(Exception):
+    """엔진을 사용할 수 없음 (네트워크/모델 문제) - 다음 엔진으로 넘어감"""
+
+
+class STTBackend:
+    """
+    음성 인식 엔진 인터페이스
+
+    모델/클라이언트는 최초 사용 시 한 번만 로드하고 이후 재사용한다.
+    """
+    name = "base"
+    sample_rate = 16000  # 엔진이 선호하는 입력 샘플레이트
+    stream_step_seconds: Optional[float] = 1.0  # 스트리밍 시 다시 인식할 간격 (None이면 멈춤/종료 때만)
+
+    def __init__(self):
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        # 지표
+        self.calls = 0
+        self.failures = 0
+        self.total_seconds = 0.0
+        self.total_audio_seconds = 0.0
+
+    def _load(self):
+        """모델/클라이언트 로드 (하위 클래스에서 구현)"""
+
+    def ensure_loaded(self):
+        """최초 1회만 로드"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    def _transcribe(self, pcm: bytes, sample_rate: int, sample_width: int) -> Optional[str]:
+        raise NotImplementedError
+
+    def _transcribe_samples(self, audio: PreparedAudio) -> Optional[str]:
+        """전처리된 오디오 인식 (기본: 16bit PCM으로 변환해 _transcribe 호출)"""
+        return self._transcribe(audio.pcm16(), audio.sample_rate, 2)
+
+    def transcribe(self, pcm: bytes, sample_rate: int = 16000, sample_width: int = 2) -> Optional[str]:
+        """
+        PCM 오디오를 텍스트로 변환
+
+        Args:
+            pcm: 모노 PCM 바이트
+            sample_rate: 샘플레이트
+            sample_width: 샘플당 바이트 수
+
+        Returns:
+            인식된 텍스트 또는 None (인식 실패)
+
+        Raises:
+            STTUnavailableError: 엔진 사용 불가
+        """
+        return self._timed(
+            lambda: self._transcribe(pcm, sample_rate, sample_width),
+            len(pcm) / float(sample_rate * sample_width)
+        )
+
+    def transcribe_prepared(self, audio: PreparedAudio) -> Optional[str]:
+        """
+        전처리된 오디오를 텍스트로 변환 (float32 입력 엔진은 PCM 변환 없이 전달)
+
+        Raises:
+            STTUnavailableError: 엔진 사용 불가
+        """
+        return self._timed(lambda: self._transcribe_samples(audio), audio.seconds)
+
+    def open_stream(self) -> "STTStream":
+        """
+        스트리밍 인식 세션 (기본: 쌓인 오디오를 stream_step_seconds마다 다시 인식)
+
+        Raises:
+            STTUnavailableError: 엔진 사용 불가
+        """
+        self.ensure_loaded()
+        return RedecodeSTTStream(self, self.stream_step_seconds)
+
+    def _timed(self, run: Callable[[], Optional[str]], audio_seconds: float) -> Optional[str]:
+        try:
+            self.ensure_loaded()
+            started = time.perf_counter()
+            text = run()
+        except STTUnavailableError:
+            self.failures += 1
+            raise
+        # 모델 로드 시간은 제외하고 순수 인식 시간만 집계
+        self.calls += 1
+        self.total_seconds += time.perf_counter() - started
+        self.total_audio_seconds += audio_seconds
+        return text.strip() if text and text.strip() else None
+
+    def stats(self) -> Dict[str, Any]:
+        """지연 시간 / 실시간 계수(RTF = 처리 시간 / 오디오 길이)"""
+        return {
+            "backend": self.name,
+            "calls": self.calls,
+            "failures": self.failures,
+            "avg_latency_ms": self.total_seconds / self.calls * 1000 if self.calls else 0.0,
+            "real_time_factor": self.total_seconds / self.total_audio_seconds if self.total_audio_seconds else 0.0
+        }
+
+
+def pcm16_to_float32(pcm: bytes, sample_rate: int, target_rate: int = 16000):
+    """16bit PCM 바이트를 [-1, 1] float32 배열로 변환 (필요 시 선형 보간 리샘플링)"""
+    audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    if sample_rate != target_rate and len(audio):
+        duration = len(audio) / sample_rate
+        target_len = int(duration * target_rate)
+        audio = np.interp(
+            np.linspace(0, len(audio) - 1, target_len, dtype=np.float32),
+            np.arange(len(audio), dtype=np.float32),
+            audio
+        ).astype(np.float32)
+    return audio
+
+
+class GoogleSTTBackend(STTBackend):
+    """Google Web Speech API (Recognizer 인스턴스 재사용)"""
+    name = "google"
+    stream_step_seconds = None  # 네트워크 호출이라 주기적 재인식 없이 멈춤/종료 때만 인식
+
+    def __init__(self, language: str = "ko-KR"):
+        super().__init__()
+        self.language = language
+        self._sr = None
+        self._recognizer = None
+
+    def _load(self):
+        try:
+            import speech_recognition as sr
+        except ImportError as e:
+            raise STTUnavailableError("SpeechRecognition이 설치되지 않음") from e
+
+        self._sr = sr
+        self._recognizer = sr.Recognizer()
+
+    def _transcribe(self, pcm: bytes, sample_rate: int, sample_width: int) -> Optional[str]:
+        sr = self._sr
+        audio_data = sr.AudioData(pcm, sample_rate=sample_rate, sample_width=sample_width)
+        try:
+            return self._recognizer.recognize_google(audio_data, language=self.language)
+        except sr.UnknownValueError:
+            return None
+        except sr.RequestError as e:
+            raise STTUnavailableError(f"Google STT API 에러: {e}") from e
+
+
+class WhisperSTTBackend(STTBackend):
+    """faster-whisper 로컬 모델 (CPU int8)"""
+    name = "whisper"
+
+    def __init__(self, model_size: str = "small", language: str = "ko", compute_type: str = "int8", cpu_threads: int = 0):
+        super().__init__()
+        self.model_size = model_size
+        self.language = language
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self._model = None
+
+    def _load(self):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise STTUnavailableError("faster-whisper가 설치되지 않음") from e
+        self._model = WhisperModel(
+            self.model_size,
+            device="cpu",
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads
+        )
+
+    def _transcribe(self, pcm: bytes, sample_rate: int, sample_width: int) -> Optional[str]:
+        audio = pcm16_to_float32(pcm, sample_rate, self.sample_rate)
+        segments, _ = self._model.transcribe(audio, language=self.language, beam_size=1, vad_filter=False)
+        return "".join(segment.text for segment in segments)
+
+    def _transcribe_samples(self, audio: PreparedAudio) -> Optional[str]:
+        # 전처리 결과가 이미 16kHz float32이므로 그대로 전달
+        segments, _ = self._model.transcribe(audio.samples, language=self.language, beam_size=1, vad_filter=False)
+        return "".join(segment.text for segment in segments)
+
+
+class VoskSTTBackend(STTBackend):
+    """Vosk 로컬 모델 (KIOSK_VOSK_MODEL 경로의 한국어 모델)"""
+    name = "vosk"
+
+    def __init__(self, model_path: Optional[str] = None):
+        super().__init__()
+        self.model_path = model_path or os.environ.get("KIOSK_VOSK_MODEL", "models/vosk-model-small-ko-0.22")
+        self._vosk = None
+        self._model = None
+
+    def _load(self):
+        try:
+            import vosk
+        except ImportError as e:
+            raise STTUnavailableError("vosk가 설치되지 않음") from e
+        if not os.path.isdir(self.model_path):
+            raise STTUnavailableError(f"Vosk 모델 없음: {self.model_path}")
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self._model = vosk.Model(self.model_path)
+
+    def _transcribe(self, pcm: bytes, sample_rate: int, sample_width: int) -> Optional[str]:
+        recognizer = self._vosk.KaldiRecognizer(self._model, sample_rate)
+        recognizer.AcceptWaveform(pcm)
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+    def open_stream(self) -> "STTStream":
+        self.ensure_loaded()
+        return VoskSTTStream(self, self._vosk.KaldiRecognizer(self._model, self.sample_rate))
+
+
+class STTStream:
+    """
+    발화 하나의 스트리밍 인식 세션 (엔진 샘플레이트의 float32 샘플을 청크로 받음)
+
+    hypothesis는 지금까지의 부분 인식 결과이며 뒤 청크에 따라 바뀔 수 있다.
+    세션 하나가 끝나면(finish) 엔진 지표에 인식 1회로 집계한다.
+
+    Args:
+        backend: 인식 엔진
+    """
+
+    def __init__(self, backend: STTBackend):
+        self.backend = backend
+        self.hypothesis = ""
+        self.audio_seconds = 0.0
+        self.decode_seconds = 0.0  # 인식에 쓴 계산 시간 (재인식 포함)
+        self.decodes = 0
+
+    def _accept(self, samples: np.ndarray, decode: bool) -> Optional[str]:
+        raise NotImplementedError
+
+    def _finish(self) -> Optional[str]:
+        raise NotImplementedError
+
+    def _measure(self, run: Callable[[], Optional[str]]) -> Optional[str]:
+        started = time.perf_counter()
+        try:
+            return run()
+        except STTUnavailableError:
+            self.backend.failures += 1
+            raise
+        finally:
+            self.decode_seconds += time.perf_counter() - started
+
+    def accept(self, samples: np.ndarray, decode: bool = False) -> Optional[str]:
+        """
+        샘플 추가 후 가설 갱신
+
+        Args:
+            samples: 엔진 샘플레이트의 모노 float32 샘플
+            decode: 간격과 관계없이 지금 다시 인식 (말이 멈췄을 때)
+
+        Returns:
+            바뀐 가설 또는 None (그대로이거나 아직 인식하지 않음)
+
+        Raises:
+            STTUnavailableError: 엔진 사용 불가
+        """
+        self.audio_seconds += len(samples) / self.backend.sample_rate
+        text = self._measure(lambda: self._accept(samples, decode))
+        if text is None:
+            return None  # 이번에는 인식하지 않음
+        text = text.strip()
+        if text == self.hypothesis:
+            return None
+        self.hypothesis = text
+        return text
+
+    def finish(self) -> Optional[str]:
+        """
+        최종 인식 결과 (엔진 지표에 인식 1회로 기록)
+
+        Raises:
+            STTUnavailableError: 엔진 사용 불가
+        """
+        text = (self._measure(self._finish) or "").strip()
+        backend = self.backend
+        backend.calls += 1
+        backend.total_seconds += self.decode_seconds
+        backend.total_audio_seconds += self.audio_seconds
+        self.hypothesis = text
+        return text or None
+
+
+class RedecodeSTTStream(STTStream):
+    """
+    스트리밍 API가 없는 엔진용: 쌓인 오디오 전체를 step_seconds마다 다시 인식
+    마지막 인식 뒤 새 오디오가 없으면 finish()는 다시 인식하지 않고 마지막 가설을 쓴다.
+
+    Args:
+        backend: 인식 엔진
+        step_seconds: 재인식 간격 (None이면 decode=True일 때만)
+    """
+
+    def __init__(self, backend: STTBackend, step_seconds: Optional[float] = 1.0):
+        super().__init__(backend)
+        self.step_samples = int(step_seconds * backend.sample_rate) if step_seconds else None
+        self._chunks: List[np.ndarray] = []
+        self._total = 0
+        self._decoded_upto = 0
+
+    def _decode(self) -> Optional[str]:
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        samples = self._chunks[0] if self._chunks else np.zeros(0, dtype=np.float32)
+        self._decoded_upto = self._total
+        self.decodes += 1
+        seconds = len(samples) / self.backend.sample_rate
+        audio = PreparedAudio(samples, self.backend.sample_rate, "pcm", seconds, len(samples) * 2)
+        return self.backend._transcribe_samples(audio) if len(samples) else ""
+
+    def _accept(self, samples: np.ndarray, decode: bool) -> Optional[str]:
+        if len(samples):
+            self._chunks.append(samples)
+            self._total += len(samples)
+        pending = self._total - self._decoded_upto
+        if pending and (decode or (self.step_samples and pending >= self.step_samples)):
+            return self._decode()
+        return None
+
+    def _finish(self) -> Optional[str]:
+        if self._total == self._decoded_upto and self.decodes:
+            return self.hypothesis
+        return self._decode()
+
+
+class VoskSTTStream(STTStream):
+    """Vosk 스트리밍: 청크마다 부분 결과, 엔진이 끊은 구간은 확정 결과로 이어 붙임"""
+
+    def __init__(self, backend: VoskSTTBackend, recognizer):
+        super().__init__(backend)
+        self._recognizer = recognizer
+        self._final_parts: List[str] = []
+
+    def _joined(self, tail: str) -> str:
+        return " ".join(part for part in self._final_parts + [tail] if part)
+
+    def _accept(self, samples: np.ndarray, decode: bool) -> Optional[str]:
+        pcm = float_to_pcm16(samples)
+        self.decodes += 1
+        if self._recognizer.AcceptWaveform(pcm):
+            self._final_parts.append(json.loads(self._recognizer.Result()).get("text", ""))
+            return self._joined("")
+        return self._joined(json.loads(self._recognizer.PartialResult()).get("partial", ""))
+
+    def _finish(self) -> Optional[str]:
+        return self._joined(json.loads(self._recognizer.FinalResult()).get("text", ""))
+
+
+BACKEND_TYPES = {
+    "google": GoogleSTTBackend,
+    "whisper": WhisperSTTBackend,
+    "vosk": VoskSTTBackend,
+}
+
+
+class STTService:
+    """
+    설정된 순서대로 엔진을 시도하는 음성 인식 서비스
+    인식은 워커 스레드에서 실행해 Streamlit 스크립트 스레드가 엔진에 묶이지 않게 한다.
+
+    Args:
+        backend_names: 시도할 엔진 이름 목록 (None이면 KIOSK_STT_BACKENDS 환경변수)
+        max_workers: 인식 워커 스레드 수
+        timeout: 한 번의 인식 대기 시간(초)
+        preprocess: 인식 전 오디오 전처리 여부 (None이면 KIOSK_STT_PREPROCESS 환경변수, 기본 사용)
+    """
+
+    def __init__(
+        self,
+        backend_names: Optional[List[str]] = None,
+        max_workers: int = 2,
+        timeout: float = 30.0,
+        preprocess: Optional[bool] = None
+    ):
+        if backend_names is None:
+            backend_names = os.environ.get("KIOSK_STT_BACKENDS", DEFAULT_BACKENDS).split(",")
+        if preprocess is None:
+            preprocess = os.environ.get("KIOSK_STT_PREPROCESS", "1") != "0"
+        self.backends: List[STTBackend] = [
+            BACKEND_TYPES[name.strip()]() for name in backend_names if name.strip() in BACKEND_TYPES
+        ]
+        self.timeout = timeout
+        self.preprocessor: Optional[AudioPreprocessor] = AudioPreprocessor() if preprocess else None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stt")
+
+    def _prepare(
+        self, audio: bytes, sample_rate: int, sample_width: int, target_rate: int, raw_pcm: bool = False
+    ) -> Optional[PreparedAudio]:
+        """전처리 (해석할 수 없는 형식이면 None → 원본 바이트를 그대로 전달)"""
+        try:
+            return self.preprocessor.process(audio, sample_rate, sample_width, target_rate, raw_pcm)
+        except AudioDecodeError as e:
+            print(f"오디오 전처리 생략: {e}")
+            return None
+
+    def _run(self, pcm: bytes, sample_rate: int, sample_width: int, raw_pcm: bool = False) -> Optional[str]:
+        last_error: Optional[Exception] = None
+        prepared: Dict[int, Optional[PreparedAudio]] = {}  # 엔진 샘플레이트별 전처리 결과 (대체 엔진도 재사용)
+        for backend in self.backends:
+            try:
+                audio = None
+                if self.preprocessor is not None:
+                    if backend.sample_rate not in prepared:
+                        prepared[backend.sample_rate] = self._prepare(
+                            pcm, sample_rate, sample_width, backend.sample_rate, raw_pcm
+                        )
+                    audio = prepared[backend.sample_rate]
+                    if audio is not None and audio.is_silent:
+                        return None  # 말소리 없음 → 인식 호출 생략
+                with metrics.span("stt", backend=backend.name):
+                    if audio is not None:
+                        return backend.transcribe_prepared(audio)
+                    return backend.transcribe(pcm, sample_rate, sample_width)
+            except STTUnavailableError as e:
+                print(f"STT 엔진 사용 불가 ({backend.name}): {e}")
+                last_error = e
+        raise STTUnavailableError(str(last_error) if last_error else "사용 가능한 STT 엔진 없음")
+
+    def submit(self, pcm: bytes, sample_rate: int = 16000, sample_width: int = 2, raw_pcm: bool = False):
+        """워커 스레드에 인식 작업 제출 (Future 반환)"""
+        return self._executor.submit(self._run, pcm, sample_rate, sample_width, raw_pcm)
+
+    def transcribe(
+        self, pcm: bytes, sample_rate: int = 16000, sample_width: int = 2, raw_pcm: bool = False
+    ) -> Optional[str]:
+        """
+        인식 결과를 기다려 반환
+
+        Args:
+            pcm: 오디오 바이트 (컨테이너 또는 헤더 없는 모노 PCM)
+            sample_rate / sample_width: 헤더 없는 PCM일 때의 형식
+            raw_pcm: 헤더 없는 PCM임이 확실할 때 (형식 감지에서 MP3로 오인하지 않도록)
+
+        Raises:
+            STTUnavailableError: 모든 엔진 사용 불가 또는 시간 초과
+        """
+        try:
+            return self.submit(pcm, sample_rate, sample_width, raw_pcm).result(timeout=self.timeout)
+        except FutureTimeoutError as e:
+            raise STTUnavailableError("STT 시간 초과") from e
+
+    def open_stream(self) -> STTStream:
+        """
+        설정 순서대로 사용 가능한 첫 엔진의 스트리밍 세션
+
+        Raises:
+            STTUnavailableError: 모든 엔진 사용 불가
+        """
+        last_error: Optional[Exception] = None
+        for backend in self.backends:
+            try:
+                return backend.open_stream()
+            except STTUnavailableError as e:
+                print(f"STT 엔진 사용 불가 ({backend.name}): {e}")
+                last_error = e
+        raise STTUnavailableError(str(last_error) if last_error else "사용 가능한 STT 엔진 없음")
+
+    def warm_up(self):
+        """첫 번째 엔진 모델을 백그라운드에서 미리 로드"""
+        if self.backends:
+            self._executor.submit(self._safe_load, self.backends[0])
+
+    @staticmethod
+    def _safe_load(backend: STTBackend):
+        try:
+            backend.ensure_loaded()
+        except STTUnavailableError as e:
+            print(f"STT 엔진 로드 실패 ({backend.name}): {e}")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """엔진별 지연/RTF 지표"""
+        return [backend.stats() for backend in self.backends]
+
+    def preprocess_stats(self) -> Dict[str, Any]:
+        """전처리로 줄어든 오디오 길이/크기 (전처리를 끄면 빈 딕셔너리)"""
+        return self.preprocessor.stats() if self.preprocessor is not None else {}
+
+
+# 싱글톤 인스턴스 관리
+_service: Optional[STTService] = None
+_service_lock = threading.Lock()
+
+def get_stt_service(**kwargs) -> STTService:
+    """
+    STTService 싱글톤 인스턴스 반환
+
+    Args:
+        **kwargs: 최초 생성 시 STTService 초기화 파라미터
+
+    Returns:
+        STTService 인스턴스
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = STTService(**kwargs)
+    return _service
@@ -0,0 +1,313 @@
+"""
+STT Streaming - 말하는 동안 청크 단위로 받는 실시간 음성 인식
+- 청크(헤더 없는 모노 PCM)를 받는 즉시 float32로 바꿔 엔진 샘플레이트로 리샘플링
+- 인식은 세션 전용 워커 스레드에서 실행 (인식이 밀려도 VAD/종료 감지는 실시간, 밀린 오디오는 한 번에 인식)
+- 프레임 에너지 VAD: 발화 전 무음과 발화 중 긴 멈춤은 엔진에 보내지 않음 (말소리 앞뒤 PAD_MS만 유지)
+- 말이 PAUSE_MS 멈추면 바로 다시 인식해 가설 전체를 확정 (대개 이 결과가 그대로 최종 결과)
+- ENDPOINT_MS 멈추면 발화 종료
+- LocalAgreement: 연속된 가설이 공통으로 가진 앞부분(어절 단위)을 확정 부분으로 보고 의도 분석에 먼저 전달
+
+마지막 말소리가 도착한 시각은 speech_end_at에 남아 발화 끝 → 추천 지연 측정에 쓴다.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from audio_preprocess import FRAME_MS, MIN_SPEECH_FRAMES, PAD_MS, SILENCE_DBFS, float_to_pcm16, frame_dbfs, pcm_to_float, resample
+from stt_backends import STTService, STTUnavailableError, get_stt_service
+
+PAUSE_MS = 300      # 이만큼 멈추면 가설을 다시 인식해 확정 (분석 선행 시작)
+ENDPOINT_MS = 700   # 이만큼 멈추면 발화 종료
+LEVEL_HISTORY = 500  # 임계값 계산에 쓰는 최근 프레임 수 (10초)
+
+
+class LocalAgreement:
+    """
+    연속된 가설 n개가 공통으로 가진 앞부분(어절 단위)을 확정
+    확정 부분은 줄어들지 않는다 (이미 의도 분석에 넘긴 내용을 뒤집지 않음).
+
+    Args:
+        n: 일치해야 하는 연속 가설 수
+    """
+
+    def __init__(self, n: int = 2):
+        self._history: "deque[List[str]]" = deque(maxlen=n)
+        self.words: List[str] = []
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.words)
+
+    def update(self, hypothesis: str) -> Optional[str]:
+        """새 가설 추가 (확정 부분이 늘었으면 확정 문장, 아니면 None)"""
+        self._history.append(hypothesis.split())
+        if len(self._history) < self._history.maxlen:
+            return None
+        common: List[str] = []
+        for words in zip(*self._history):
+            if any(word != words[0] for word in words):
+                break
+            common.append(words[0])
+        return self._extend(common)
+
+    def commit(self, hypothesis: str) -> Optional[str]:
+        """말이 멈췄을 때의 가설은 전체를 확정 (확정 부분이 바뀌었으면 확정 문장)"""
+        self._history.append(hypothesis.split())
+        return self._extend(hypothesis.split())
+
+    def _extend(self, words: List[str]) -> Optional[str]:
+        if len(words) <= len(self.words) or words[:len(self.words)] != self.words:
+            return None
+        self.words = words
+        return self.text
+
+
+class StreamingTranscriber:
+    """
+    발화 하나를 청크 단위로 인식하는 세션
+
+    Args:
+        service: 음성 인식 서비스 (None이면 전역 서비스, 설정 순서의 첫 사용 가능 엔진으로 스트리밍)
+        sample_rate / sample_width: 입력 PCM 형식 (모노)
+        on_stable: 확정 부분이 늘 때마다 확정 문장으로 호출
+        on_pause: 말이 멈춰 다시 인식한 가설로 호출 (최종 결과일 가능성이 높음)
+        pause_ms / endpoint_ms: 가설 확정 / 발화 종료로 볼 멈춤 길이
+
+    Raises:
+        STTUnavailableError: 스트리밍할 수 있는 엔진 없음
+    """
+
+    def __init__(
+        self,
+        service: Optional[STTService] = None,
+        sample_rate: int = 16000,
+        sample_width: int = 2,
+        on_stable: Optional[Callable[[str], None]] = None,
+        on_pause: Optional[Callable[[str], None]] = None,
+        pause_ms: int = PAUSE_MS,
+        endpoint_ms: int = ENDPOINT_MS
+    ):
+        if sample_width not in (1, 2, 3, 4):
+            raise ValueError(f"지원하지 않는 PCM 샘플 크기: {sample_width}")
+        self.service = service or get_stt_service()
+        self.stream = self.service.open_stream()
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.target_rate = self.stream.backend.sample_rate
+        self.on_stable = on_stable
+        self.on_pause = on_pause
+        self.agreement = LocalAgreement()
+
+        self._frame = max(1, self.target_rate * FRAME_MS // 1000)
+        self._pad_frames = PAD_MS // FRAME_MS
+        self._pause_frames = max(1, pause_ms // FRAME_MS)
+        self._endpoint_frames = max(self._pause_frames, endpoint_ms // FRAME_MS)
+        self._byte_carry = b""                                   # 샘플 경계에 걸린 바이트
+        self._rate_carry = np.zeros(0, dtype=np.float32)         # 정수배 리샘플링에서 남은 샘플
+        self._frame_carry = np.zeros(0, dtype=np.float32)        # 프레임이 안 되는 나머지
+        self._levels: "deque[float]" = deque(maxlen=LEVEL_HISTORY)
+        self._preroll: "deque[np.ndarray]" = deque(maxlen=self._pad_frames + MIN_SPEECH_FRAMES)
+        self._speech: List[np.ndarray] = []                      # 엔진에 보낸 오디오 (엔진 실패 시 일반 인식용)
+        self._voiced_run = 0
+        self._silence = 0
+        self._failed: Optional[Exception] = None
+        # 인식 워커로 넘길 오디오와 워커가 만든 이벤트
+        self._lock = threading.Lock()
+        self._inbox: List[np.ndarray] = []
+        self._inbox_pause = False
+        self._decoding = False
+        self._events: List[Dict[str, Any]] = []
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stt-stream")
+
+        self.speaking = False
+        self.ended = False
+        self.final_text: Optional[str] = None
+        self.speech_started_at: Optional[float] = None
+        self.speech_end_at: Optional[float] = None  # 마지막 말소리 프레임 도착 시각 (perf_counter)
+        self.partials = 0
+
+    def _threshold(self) -> float:
+        """audio_preprocess.speech_bounds와 같은 적응형 임계값 (최근 프레임 기준)"""
+        levels = np.fromiter(self._levels, dtype=np.float64, count=len(self._levels))
+        return max(SILENCE_DBFS, min(float(np.percentile(levels, 10)) + 6.0, float(levels.max()) - 20.0))
+
+    def _to_samples(self, chunk: bytes) -> np.ndarray:
+        data = self._byte_carry + chunk if self._byte_carry else chunk
+        usable = len(data) // self.sample_width * self.sample_width
+        self._byte_carry = bytes(data[usable:])
+        samples = pcm_to_float(memoryview(data)[:usable], self.sample_width, 1)
+        if self.sample_rate == self.target_rate:
+            return samples
+        if self.sample_rate % self.target_rate == 0:
+            # 정수배 다운샘플링은 구간 경계를 청크 사이에서 이어 붙임
+            if len(self._rate_carry):
+                samples = np.concatenate([self._rate_carry, samples])
+            factor = self.sample_rate // self.target_rate
+            usable = len(samples) // factor * factor
+            self._rate_carry = samples[usable:]
+            samples = samples[:usable]
+        return resample(samples, self.sample_rate, self.target_rate)
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        """
+        PCM 청크 처리 (인식은 워커에서 진행, 그사이 나온 인식 이벤트를 함께 반환)
+
+        Returns:
+            이벤트 목록: {"event": "partial", "text", "stable"} / {"event": "pause", "text"} / {"event": "endpoint"}
+        """
+        if self.ended or not chunk:
+            return self.pop_events()
+        arrived = time.perf_counter()
+        samples = self._to_samples(chunk)
+        if len(self._frame_carry):
+            samples = np.concatenate([self._frame_carry, samples])
+        count = len(samples) // self._frame
+        self._frame_carry = samples[count * self._frame:]
+        if not count:
+            return self.pop_events()
+        frames = samples[:count * self._frame].reshape(count, self._frame)
+        levels = frame_dbfs(frames.reshape(-1), self._frame)
+        self._levels.extend(levels.tolist())
+        threshold = self._threshold()
+
+        outgoing: List[np.ndarray] = []
+        pause = False
+        for i, (frame, level) in enumerate(zip(frames, levels)):
+            voiced = level >= threshold
+            if not self.speaking:
+                self._preroll.append(frame)
+                self._voiced_run = self._voiced_run + 1 if voiced else 0
+                if self._voiced_run >= MIN_SPEECH_FRAMES:
+                    self.speaking = True
+                    self.speech_started_at = arrived
+                    outgoing.extend(self._preroll)
+                    self._preroll.clear()
+                continue
+            if voiced:
+                if self._silence > self._pad_frames:
+                    outgoing.extend(self._preroll)  # 긴 멈춤 뒤 다시 말함: 직전 여유 구간만 붙임
+                self._preroll.clear()
+                self._silence = 0
+                outgoing.append(frame)
+                # 청크 안 뒤쪽 프레임만큼 앞선 시각 (실시간 입력 기준)
+                self.speech_end_at = arrived - (count - 1 - i) * FRAME_MS / 1000.0
+                continue
+            self._silence += 1
+            if self._silence <= self._pad_frames:
+                outgoing.append(frame)
+            else:
+                self._preroll.append(frame)
+            if self._silence == self._pause_frames:
+                pause = True
+            if self._silence >= self._endpoint_frames:
+                self.ended = True
+                break
+
+        if self.speaking and self.speech_end_at is None:
+            self.speech_end_at = arrived
+        if outgoing or pause:
+            self._submit(np.concatenate(outgoing) if outgoing else frames[:0].reshape(-1), pause)
+        events = self.pop_events()
+        if self.ended:
+            events.append({"event": "endpoint"})
+        return events
+
+    def pop_events(self) -> List[Dict[str, Any]]:
+        """워커가 만든 인식 이벤트 (가져가면 비움)"""
+        with self._lock:
+            events, self._events = self._events, []
+        return events
+
+    def _submit(self, samples: np.ndarray, pause: bool):
+        """인식 워커에 오디오 전달 (워커가 인식 중이면 쌓아 두었다가 다음 인식에 한꺼번에)"""
+        if len(samples):
+            self._speech.append(samples)
+        with self._lock:
+            self._inbox.append(samples)
+            self._inbox_pause = self._inbox_pause or pause
+            if self._decoding:
+                return
+            self._decoding = True
+        self._worker.submit(self._drain)
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._inbox:
+                    self._decoding = False
+                    return
+                samples = np.concatenate(self._inbox) if len(self._inbox) > 1 else self._inbox[0]
+                pause = self._inbox_pause
+                self._inbox, self._inbox_pause = [], False
+            events = self._recognize(samples, pause)
+            with self._lock:
+                self._events.extend(events)
+
+    def _recognize(self, samples: np.ndarray, pause: bool) -> List[Dict[str, Any]]:
+        if self._failed is not None:
+            return []
+        try:
+            text = self.stream.accept(samples, decode=pause)
+        except STTUnavailableError as e:
+            # 이후는 모아 둔 오디오를 finish()에서 일반 인식(대체 엔진 포함)으로 처리
+            print(f"스트리밍 인식 중단 ({self.stream.backend.name}): {e}")
+            self._failed = e
+            return []
+
+        events: List[Dict[str, Any]] = []
+        hypothesis = self.stream.hypothesis
+        stable = self.agreement.commit(hypothesis) if pause else (self.agreement.update(text) if text is not None else None)
+        if text is not None:
+            self.partials += 1
+            events.append({"event": "partial", "text": text, "stable": self.agreement.text})
+        if stable and self.on_stable is not None:
+            self.on_stable(stable)
+        if pause and hypothesis:
+            events.append({"event": "pause", "text": hypothesis})
+            if self.on_pause is not None:
+                self.on_pause(hypothesis)
+        return events
+
+    def finish(self) -> Optional[str]:
+        """
+        최종 인식 결과 (발화 종료 또는 입력 끝에서 호출, 말소리가 없었으면 None)
+
+        Raises:
+            STTUnavailableError: 모든 엔진 사용 불가
+        """
+        if self.final_text is not None or (self.ended and not self.speaking):
+            return self.final_text
+        self.ended = True
+        self._worker.shutdown(wait=True)  # 밀린 인식을 마친 뒤 최종 결과
+        if not self.speaking:
+            return None
+        if self._failed is None:
+            try:
+                self.final_text = self.stream.finish()
+                return self.final_text
+            except STTUnavailableError as e:
+                print(f"스트리밍 인식 중단 ({self.stream.backend.name}): {e}")
+                self._failed = e
+        pcm = float_to_pcm16(np.concatenate(self._speech)) if self._speech else b""
+        self.final_text = self.service.transcribe(pcm, self.target_rate, 2, raw_pcm=True) if pcm else None
+        return self.final_text
+
+    def close(self):
+        """끝까지 받지 못한 세션 정리 (클라이언트 연결 끊김 등, 밀린 인식은 기다리지 않음)"""
+        self.ended = True
+        self._worker.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """세션 지표 (부분 결과 수, 재인식 수, 인식 계산 시간)"""
+        return {
+            "backend": self.stream.backend.name,
+            "partials": self.partials,
+            "decodes": self.stream.decodes,
+            "audio_seconds": self.stream.audio_seconds,
+            "decode_ms": self.stream.decode_seconds * 1000,
+            "streaming_failed": self._failed is not None
+        }
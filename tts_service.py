@@ -0,0 +1,363 @@
+"""
+TTS Service - 음성 합성 엔진 + 오디오 캐시
+- gtts: Google Text-to-Speech (네트워크 필요, MP3)
+- pyttsx3: OS 내장 음성 엔진 (오프라인, WAV)
+
+(text, lang, slow, voice) 내용 주소 캐시: 메모리 LRU → 디스크 → 워커 간 공유 캐시 → 합성 순으로 조회.
+KIOSK_TTS_BACKENDS 환경변수로 엔진 순서 지정 (예: "gtts,pyttsx3").
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import metrics
+from shared_cache import get_shared_cache
+
+DEFAULT_BACKENDS = "gtts"
+
+# 워커 간 공유 캐시에 둔 합성 오디오 수명(초)
+SHARED_AUDIO_TTL = 24 * 3600
+
+# 시작 시 미리 합성해 두는 고정 문구
+PRERENDER_PHRASES = [
+    "안녕하세요, AI 버거 하우스입니다. 무엇을 도와드릴까요?",
+    "추천 드린 메뉴를 선택해 주세요!",
+    "죄송합니다. 오류가 발생했습니다.",
+    "주문이 완료되었습니다. 감사합니다!",
+]
+
+
+class TTSUnavailableError(Exception):
+    """엔진을 사용할 수 없음 (네트워크/라이브러리 문제) - 다음 엔진으로 넘어감"""
+
+
+class TTSBackend:
+    """음성 합성 엔진 인터페이스"""
+    name = "base"
+    audio_format = "mp3"
+
+    def synthesize(self, text: str, lang: str, slow: bool) -> bytes:
+        """
+        텍스트를 오디오 바이트로 합성
+
+        Raises:
+            TTSUnavailableError: 엔진 사용 불가
+        """
+        raise NotImplementedError
+
+
+class GTTSBackend(TTSBackend):
+    """Google Text-to-Speech (MP3)"""
+    name = "gtts"
+    audio_format = "mp3"
+
+    def synthesize(self, text: str, lang: str, slow: bool) -> bytes:
+        try:
+            from gtts import gTTS
+        except ImportError as e:
+            raise TTSUnavailableError("gTTS가 설치되지 않음") from e
+        try:
+            audio_buffer = io.BytesIO()
+            gTTS(text=text, lang=lang, slow=slow).write_to_fp(audio_buffer)
+            return audio_buffer.getvalue()
+        except Exception as e:
+            raise TTSUnavailableError(f"gTTS 에러: {e}") from e
+
+
+class Pyttsx3Backend(TTSBackend):
+    """OS 내장 음성 엔진 (오프라인, WAV) - 엔진이 스레드 안전하지 않아 직렬화"""
+    name = "pyttsx3"
+    audio_format = "wav"
+
+    def __init__(self, rate: int = 170):
+        self.rate = rate
+        self._engine = None
+        self._lock = threading.Lock()
+
+    def synthesize(self, text: str, lang: str, slow: bool) -> bytes:
+        with self._lock:
+            if self._engine is None:
+                try:
+                    import pyttsx3
+                    self._engine = pyttsx3.init()
+                except Exception as e:
+                    raise TTSUnavailableError(f"pyttsx3 초기화 실패: {e}") from e
+            self._engine.setProperty("rate", int(self.rate * (0.7 if slow else 1.0)))
+
+            fd, path = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            try:
+                self._engine.save_to_file(text, path)
+                self._engine.runAndWait()
+                with open(path, "rb") as f:
+                    audio = f.read()
+            finally:
+                os.remove(path)
+        if not audio:
+            raise TTSUnavailableError("pyttsx3 합성 결과 없음")
+        return audio
+
+
+BACKEND_TYPES = {
+    "gtts": GTTSBackend,
+    "pyttsx3": Pyttsx3Backend,
+}
+
+
+def cache_key(text: str, lang: str, slow: bool, voice: str) -> str:
+    """(text, lang, slow, voice) 내용 주소 키"""
+    payload = json.dumps([text, lang, slow, voice], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _encode_audio(result: Tuple[bytes, str, str]) -> bytes:
+    """공유 캐시 저장 형식: 엔진 이름, 포맷 (각각 줄바꿈으로 끝남) + 오디오 바이트"""
+    audio, audio_format, voice = result
+    return f"{voice}\n{audio_format}\n".encode("utf-8") + audio
+
+
+def _decode_audio(raw: bytes) -> Tuple[bytes, str, str]:
+    voice, audio_format, audio = raw.split(b"\n", 2)
+    return audio, audio_format.decode("utf-8"), voice.decode("utf-8")
+
+
+class AudioCache:
+    """
+    2단계 오디오 캐시 (메모리 LRU + 디스크), 두 단계 모두 용량 기준으로 제거
+
+    Args:
+        cache_dir: 디스크 캐시 디렉터리 (None이면 메모리만 사용)
+        max_memory_bytes: 메모리 캐시 최대 용량
+        max_disk_bytes: 디스크 캐시 최대 용량
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = ".tts_cache",
+        max_memory_bytes: int = 32 * 1024 * 1024,
+        max_disk_bytes: int = 256 * 1024 * 1024
+    ):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()  # key -> (파일명, 크기)
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+        # 지표
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._scan_disk()
+
+    def _scan_disk(self):
+        """기존 디스크 캐시를 오래된 순서로 등록"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            key, _, ext = entry.name.partition(".")
+            if entry.is_file() and ext in ("mp3", "wav"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, key, entry.name, stat.st_size))
+        for _, key, filename, size in sorted(entries):
+            self._disk[key] = (filename, size)
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def _evict_memory(self):
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, (audio, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= len(audio)
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            _, (filename, size) = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(os.path.join(self.cache_dir, filename))
+            except OSError:
+                pass
+
+    def _put_memory(self, key: str, audio: bytes, audio_format: str):
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key)[0])
+        self._memory[key] = (audio, audio_format)
+        self._memory_bytes += len(audio)
+        self._evict_memory()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """(오디오 바이트, 포맷) 또는 None"""
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return hit
+            disk_entry = self._disk.get(key)
+
+        if disk_entry is not None:
+            filename, _ = disk_entry
+            try:
+                with open(os.path.join(self.cache_dir, filename), "rb") as f:
+                    audio = f.read()
+            except OSError:
+                audio = None
+            if audio:
+                audio_format = filename.partition(".")[2]
+                with self._lock:
+                    if key in self._disk:
+                        self._disk.move_to_end(key)
+                    self._put_memory(key, audio, audio_format)
+                    self.disk_hits += 1
+                return audio, audio_format
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, audio: bytes, audio_format: str):
+        """메모리와 디스크에 저장 (디스크는 임시 파일 후 원자적 교체)"""
+        with self._lock:
+            self._put_memory(key, audio, audio_format)
+        if not self.cache_dir:
+            return
+
+        filename = f"{key}.{audio_format}"
+        path = os.path.join(self.cache_dir, filename)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"TTS 캐시 저장 실패: {e}")
+            return
+        with self._lock:
+            if key in self._disk:
+                self._disk_bytes -= self._disk.pop(key)[1]
+            self._disk[key] = (filename, len(audio))
+            self._disk_bytes += len(audio)
+            self._evict_disk()
+
+    def stats(self) -> Dict[str, Any]:
+        """적중률 및 용량 지표"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes
+            }
+
+
+class TTSService:
+    """
+    캐시 → 설정된 순서의 엔진으로 음성을 합성하는 서비스
+
+    Args:
+        backend_names: 시도할 엔진 이름 목록 (None이면 KIOSK_TTS_BACKENDS 환경변수)
+        cache: 오디오 캐시 (None이면 KIOSK_TTS_CACHE_DIR 디렉터리로 생성)
+    """
+
+    def __init__(self, backend_names: Optional[List[str]] = None, cache: Optional[AudioCache] = None):
+        if backend_names is None:
+            backend_names = os.environ.get("KIOSK_TTS_BACKENDS", DEFAULT_BACKENDS).split(",")
+        self.backends: List[TTSBackend] = [
+            BACKEND_TYPES[name.strip()]() for name in backend_names if name.strip() in BACKEND_TYPES
+        ]
+        self.cache = cache if cache is not None else AudioCache(os.environ.get("KIOSK_TTS_CACHE_DIR", ".tts_cache"))
+
+    def synthesize(self, text: str, lang: str = "ko", slow: bool = False) -> Optional[Tuple[bytes, str]]:
+        """
+        음성 합성 (캐시 우선)
+
+        Args:
+            text: 변환할 텍스트
+            lang: 언어 코드
+            slow: 느린 발음 여부
+
+        Returns:
+            (오디오 바이트, 포맷 "mp3"/"wav") 또는 None
+        """
+        text = text.strip()
+        # 엔진마다 음색이 다르므로 엔진 이름을 voice로 사용 (앞 엔진의 캐시부터 조회)
+        for backend in self.backends:
+            cached = self.cache.get(cache_key(text, lang, slow, backend.name))
+            if cached is not None:
+                return cached
+
+        shared = get_shared_cache()
+        if shared is None:
+            result = self._synthesize_with_backends(text, lang, slow)
+        else:
+            # 다른 워커가 같은 문장을 합성 중이면 그 결과를 기다림 (키는 엔진 순서 전체로 구분)
+            voices = ",".join(backend.name for backend in self.backends)
+            result = shared.get_or_compute(
+                "tts:" + cache_key(text, lang, slow, voices),
+                lambda: self._synthesize_with_backends(text, lang, slow),
+                ttl=SHARED_AUDIO_TTL,
+                encode=_encode_audio,
+                decode=_decode_audio,
+                cacheable=lambda value: value is not None
+            )
+        if result is None:
+            return None
+        audio, audio_format, voice = result
+        self.cache.put(cache_key(text, lang, slow, voice), audio, audio_format)
+        return audio, audio_format
+
+    def _synthesize_with_backends(self, text: str, lang: str, slow: bool) -> Optional[Tuple[bytes, str, str]]:
+        """설정된 순서로 엔진을 시도해 (오디오 바이트, 포맷, 엔진 이름) 반환"""
+        for backend in self.backends:
+            try:
+                with metrics.span("tts", backend=backend.name):
+                    audio = backend.synthesize(text, lang, slow)
+            except TTSUnavailableError as e:
+                print(f"TTS 엔진 사용 불가 ({backend.name}): {e}")
+                continue
+            return audio, backend.audio_format, backend.name
+        return None
+
+    def prerender(self, phrases: Iterable[str] = PRERENDER_PHRASES, lang: str = "ko") -> threading.Thread:
+        """고정 문구를 백그라운드 스레드에서 미리 합성해 캐시에 적재"""
+        def run():
+            for phrase in phrases:
+                self.synthesize(phrase, lang=lang)
+
+        thread = threading.Thread(target=run, name="tts-prerender", daemon=True)
+        thread.start()
+        return thread
+
+
+# 싱글톤 인스턴스 관리
+_service: Optional[TTSService] = None
+_service_lock = threading.Lock()
+
+def get_tts_service(**kwargs) -> TTSService:
+    """
+    TTSService 싱글톤 인스턴스 반환
+
+    Args:
+        **kwargs: 최초 생성 시 TTSService 초기화 파라미터
+
+    Returns:
+        TTSService 인스턴스
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = TTSService(**kwargs)
+    return _service
@@ -1,13 +1,13 @@
 """
 음성 처리 유틸리티 - 노인 친화적
-STT: Google Speech Recognition
-TTS: Google Text-to-Speech (gTTS)
+STT: 교체 가능한 엔진 (stt_backends - Google / faster-whisper / Vosk)
+TTS: 교체 가능한 엔진 (tts_service - gTTS / pyttsx3) + 오디오 캐시
 """
-import speech_recognition as sr
-from gtts import gTTS
-import io
 from typing import Optional
 from enum import Enum
+import metrics
+from stt_backends import STTUnavailableError, get_stt_service
+from tts_service import get_tts_service
 
 
 class TranscriptionResult(Enum):
@@ -21,7 +21,8 @@ class TranscriptionResult(Enum):
 def transcribe_audio(audio_bytes: dict) -> Optional[str]:
     """
     음성 바이트를 텍스트로 변환
-    Google Speech-to-Text API 사용
+    KIOSK_STT_BACKENDS 설정 순서대로 엔진을 시도 (워커 스레드에서 실행)
+    WAV/WebM/Ogg/MP3 컨테이너는 형식을 감지해 디코딩하고, 헤더가 없으면 PCM으로 간주
 
     Args:
         audio_bytes: mic_recorder에서 반환된 딕셔너리 {'bytes': bytes, ...}
@@ -29,55 +30,42 @@ def transcribe_audio(audio_bytes: dict) -> Optional[str]:
     Returns:
         인식된 텍스트 문자열
         None: 입력 없음 또는 인식 실패
-        "API_ERROR": API 연결 실패
+        "API_ERROR": 사용 가능한 엔진 없음
     """
     # 입력 검증
     if not audio_bytes:
         return None
 
     # mic_recorder 반환 형식 처리
+    sample_rate, sample_width = 16000, 2
     if isinstance(audio_bytes, dict):
         audio_data_bytes = audio_bytes.get('bytes')
         if not audio_data_bytes:
             return None
+        sample_rate = audio_bytes.get('sample_rate') or sample_rate
+        sample_width = audio_bytes.get('sample_width') or sample_width
     else:
         audio_data_bytes = audio_bytes
 
     try:
-        recognizer = sr.Recognizer()
+        return get_stt_service().transcribe(audio_data_bytes, sample_rate, sample_width)
 
-        # WAV 바이트를 AudioData로 변환
-        audio_data = sr.AudioData(
-            audio_data_bytes, 
-            sample_rate=16000, 
-            sample_width=2
-        )
-
-        # Google Speech-to-Text API 호출
-        text = recognizer.recognize_google(audio_data, language="ko-KR")
-
-        # 빈 문자열 체크
-        if text and text.strip():
-            return text.strip()
-        return None
-
-    except sr.UnknownValueError:
-        # 음성이 인식되지 않음
-        return None
-    except sr.RequestError as e:
-        # API 연결 실패
-        print(f"Google STT API 에러: {e}")
+    except STTUnavailableError as e:
+        # 모든 엔진 사용 불가 (네트워크 단절 + 로컬 모델 없음 등)
+        print(f"STT 에러: {e}")
+        metrics.VOICE_FAILURES.inc(kind="stt", error=type(e).__name__)
         return "API_ERROR"
     except Exception as e:
         # 기타 에러
         print(f"음성 변환 에러: {e}")
+        metrics.VOICE_FAILURES.inc(kind="stt", error=type(e).__name__)
         return "API_ERROR"
 
 
 def text_to_speech(text: str, lang: str = 'ko', slow: bool = False) -> Optional[bytes]:
     """
     텍스트를 음성으로 변환
-    gTTS (Google Text-to-Speech) 사용
+    (text, lang, slow, 엔진) 캐시를 먼저 확인하고, 없으면 KIOSK_TTS_BACKENDS 순서대로 합성
 
     Args:
         text: 변환할 텍스트
@@ -85,28 +73,30 @@ def text_to_speech(text: str, lang: str = 'ko', slow: bool = False) -> Optional[
         slow: 느린 발음 여부
 
     Returns:
-        MP3 오디오 바이트 또는 None
+        오디오 바이트 (gTTS는 MP3, pyttsx3는 WAV) 또는 None
     """
     # 입력 검증
     if not text or not text.strip():
         return None
 
     try:
-        # gTTS로 음성 생성
-        tts = gTTS(text=text.strip(), lang=lang, slow=slow)
-
-        # 바이트 버퍼에 저장
-        audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
-        audio_buffer.seek(0)
-
-        return audio_buffer.read()
+        result = get_tts_service().synthesize(text, lang=lang, slow=slow)
+        if result is None:
+            metrics.VOICE_FAILURES.inc(kind="tts", error="unavailable")
+            return None
+        return result[0]
 
     except Exception as e:
         print(f"TTS 에러: {e}")
+        metrics.VOICE_FAILURES.inc(kind="tts", error=type(e).__name__)
         return None
 
 
+def audio_mime_type(audio: bytes) -> str:
+    """오디오 바이트의 MIME 타입 (st.audio format 인자용)"""
+    return "audio/wav" if audio[:4] == b"RIFF" else "audio/mp3"
+
+
 def is_api_error(result: Optional[str]) -> bool:
     """API 에러 여부 확인 헬퍼 함수"""
     return result == "API_ERROR"